@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 import json
+import logging
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Literal
 
+from app.core.audit import write_audit_event
 from app.core.redis import get_redis, get_test_redis
 from app.core.time import utcnow
 from app.core.settings import Settings
+from app.upstream.singleflight import JSON_CODEC, get_singleflight, singleflight_enabled, singleflight_options
 from app.upstream.sis_actions_client import SisActionsClient
 
 CapabilityKey = Literal[
@@ -19,8 +24,13 @@ CapabilityKey = Literal[
     "looks_publish",
 ]
 
+logger = logging.getLogger(__name__)
+
 CACHE_TTL_SECONDS = 6 * 60 * 60
+# Reports older than this are re-probed in the background so readers keep hitting Redis.
+REFRESH_AHEAD_AFTER_SECONDS = 5 * 60 * 60
 _CACHE_PREFIX = "ownerbot:sis:capabilities"
+_REFRESHING: dict[str, asyncio.Task] = {}
 
 
 @dataclass(frozen=True)
@@ -128,16 +138,69 @@ async def _probe_one(client: SisActionsClient, probe: CapabilityProbe, correlati
 
 
 async def probe_sis_capabilities(*, settings: Settings, correlation_id: str) -> dict[str, Any]:
+    if not singleflight_enabled(settings):
+        return await _probe_all(settings=settings, correlation_id=correlation_id)
+    # A cache miss seen by several callers at once turns into a single probe run.
+    base_url = settings.sis_base_url.rstrip("/")
+    report, shared = await get_singleflight().do(
+        f"capabilities {base_url}",
+        lambda: _probe_all(settings=settings, correlation_id=correlation_id),
+        codec=JSON_CODEC,
+        **singleflight_options(settings),
+    )
+    return copy.deepcopy(report) if shared else report
+
+
+async def _probe_all(*, settings: Settings, correlation_id: str) -> dict[str, Any]:
     client = SisActionsClient(settings)
-    capabilities: dict[str, Any] = {}
-    for probe in CAPABILITY_PROBES:
-        capabilities[probe.key] = await _probe_one(client, probe, correlation_id)
+    limit = asyncio.Semaphore(max(1, settings.sis_capability_probe_concurrency))
+
+    async def _bounded(probe: CapabilityProbe) -> dict[str, Any]:
+        async with limit:
+            return await _probe_one(client, probe, correlation_id)
+
+    results = await asyncio.gather(*(_bounded(probe) for probe in CAPABILITY_PROBES))
     return {
         "checked_at": utcnow().isoformat(),
-        "capabilities": capabilities,
+        "capabilities": {probe.key: result for probe, result in zip(CAPABILITY_PROBES, results)},
     }
 
 
+async def _capabilities_redis():
+    try:
+        return await get_redis()
+    except RuntimeError:
+        return await get_test_redis()
+
+
+async def _probe_and_store(redis, key: str, *, settings: Settings, correlation_id: str) -> dict[str, Any]:
+    probed = await probe_sis_capabilities(settings=settings, correlation_id=correlation_id)
+    await redis.set(key, json.dumps(probed), ex=CACHE_TTL_SECONDS)
+    return probed
+
+
+def _refresh_due(report: dict[str, Any]) -> bool:
+    checked_at = checked_at_dt(report)
+    if checked_at is None:
+        return True
+    return (utcnow() - checked_at).total_seconds() >= REFRESH_AHEAD_AFTER_SECONDS
+
+
+def _schedule_refresh(redis, key: str, *, settings: Settings, correlation_id: str) -> None:
+    if key in _REFRESHING:
+        return
+
+    async def _refresh() -> None:
+        try:
+            await _probe_and_store(redis, key, settings=settings, correlation_id=f"{correlation_id}-refresh")
+        except Exception:
+            logger.warning("sis_capabilities_refresh_failed", extra={"key": key})
+        finally:
+            _REFRESHING.pop(key, None)
+
+    _REFRESHING[key] = asyncio.create_task(_refresh(), name=f"sis-capabilities-refresh:{key}")
+
+
 async def get_sis_capabilities(
     *,
     settings: Settings,
@@ -145,21 +208,63 @@ async def get_sis_capabilities(
     payload_scope: dict[str, Any] | None = None,
     force_refresh: bool = False,
 ) -> dict[str, Any]:
-    scope = _scope_from_payload(payload_scope)
-    key = _cache_key(scope)
-    try:
-        redis = await get_redis()
-    except RuntimeError:
-        redis = await get_test_redis()
+    key = _cache_key(_scope_from_payload(payload_scope))
+    redis = await _capabilities_redis()
 
     if not force_refresh:
         cached = _parse_cached(await redis.get(key))
         if cached is not None:
+            if _refresh_due(cached):
+                _schedule_refresh(redis, key, settings=settings, correlation_id=correlation_id)
             return cached
 
-    probed = await probe_sis_capabilities(settings=settings, correlation_id=correlation_id)
-    await redis.set(key, json.dumps(probed), ex=CACHE_TTL_SECONDS)
-    return probed
+    return await _probe_and_store(redis, key, settings=settings, correlation_id=correlation_id)
+
+
+async def refresh_capabilities_if_due(*, settings: Settings, correlation_id: str) -> bool:
+    """Background refresh-ahead for the default scope; returns True when a probe ran."""
+    key = _cache_key(_scope_from_payload(None))
+    redis = await _capabilities_redis()
+    cached = _parse_cached(await redis.get(key))
+    if cached is not None and not _refresh_due(cached):
+        return False
+    await _probe_and_store(redis, key, settings=settings, correlation_id=correlation_id)
+    return True
+
+
+async def mark_capability_unsupported(
+    *,
+    key: CapabilityKey,
+    endpoint: str,
+    status_code: int,
+    payload_scope: dict[str, Any] | None = None,
+    correlation_id: str | None = None,
+) -> None:
+    """Push invalidation: SIS answered "not implemented" on a live call, so patch the cached report now
+    instead of letting callers hit the endpoint until the next probe."""
+    cache_key = _cache_key(_scope_from_payload(payload_scope))
+    try:
+        redis = await _capabilities_redis()
+        # Without a cached report there is no probe time to keep: no checked_at, so the next read probes.
+        report = _parse_cached(await redis.get(cache_key)) or {"capabilities": {}}
+        capabilities = report.setdefault("capabilities", {})
+        previous = capabilities.get(key) if isinstance(capabilities, dict) else None
+        capabilities[key] = {
+            "supported": False,
+            "status": "unsupported",
+            "status_code": status_code,
+            "endpoint": endpoint,
+            "method": previous.get("method") if isinstance(previous, dict) else "POST",
+        }
+        await redis.set(cache_key, json.dumps(report), ex=CACHE_TTL_SECONDS)
+    except Exception:
+        logger.warning("sis_capabilities_push_invalidation_failed", extra={"capability": key})
+        return
+    await write_audit_event(
+        "sis_capability_marked_unsupported",
+        {"capability": key, "endpoint": endpoint, "status_code": status_code},
+        correlation_id=correlation_id,
+    )
 
 
 def capability_support_status(capabilities_report: dict[str, Any], key: CapabilityKey) -> bool | None:
@@ -131,7 +131,7 @@ def render_decision_memo_pdf(topic: str, brief: DataBriefResult | None, advice_c
         proposed_actions.append(f"{label}: {why}" if why else label)
 
     buf = BytesIO()
-    pdf = canvas.Canvas(buf, pagesize=A4, pageCompression=0)
+    pdf = canvas.Canvas(buf, pagesize=A4, pageCompression=0, invariant=1)
     y = A4[1] - 18 * mm
 
     y = _line(pdf, "OwnerBot Decision Memo", y, bold=True, size=14)
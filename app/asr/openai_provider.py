@@ -7,6 +7,7 @@ import httpx
 from app.asr.base import ASRProvider, TranscriptionResult
 from app.asr.convert import SUPPORTED_FORMATS, convert_telegram_voice
 from app.asr.errors import ASRError, AudioConvertError
+from app.core.http import OPENAI_CLIENT, get_http_client
 from app.core.settings import Settings
 
 
@@ -32,8 +33,7 @@ class OpenAIASRProvider(ASRProvider):
         max_retries = max(0, self._settings.asr_max_retries)
         for attempt in range(max_retries + 1):
             try:
-                async with httpx.AsyncClient(timeout=timeout) as client:
-                    response = await client.post(url, headers=headers, data=data, files=files)
+                response = await get_http_client(OPENAI_CLIENT).post(url, headers=headers, data=data, files=files, timeout=timeout)
             except httpx.RequestError as exc:
                 raise ASRError(code="UPSTREAM_UNAVAILABLE", message="ASR upstream unavailable.") from exc
 
@@ -8,17 +8,30 @@ from aiogram import Bot, Dispatcher
 from app.bot.middlewares.correlation import CorrelationMiddleware
 from app.bot.middlewares.owner_gate import OwnerGateMiddleware
 from app.bot.routers import actions, diagnostics, fx_settings, home_ui, owner_console, pagination, start, templates, upstream_control
+from app.core.audit import backfill_audit_hot_columns, start_audit_writer, stop_audit_writer
+from app.core.http import close_http_clients, start_http_clients
 from app.core.logging import configure_logging
+from app.core.outbound import OutboundRequestMiddleware
+from app.core.render_pool import close_render_pool, start_render_pool
 from app.core.preflight import format_preflight_report, preflight_validate_settings
 from app.core.redis import get_redis
 from app.core.settings import get_settings
-from app.core.tasks import NotifyWorker
+from app.core.tasks import AnalyticsCacheWorker, AuditRetentionWorker, ForecastPrecomputeWorker, NotifyOutboxWorker, NotifyWorker, RetroRollupWorker, SisEventConsumer, UpstreamHealthMonitor
+from app.core.tasks.sis_events import register_sis_event_consumer
 from app.storage.bootstrap import run_migrations, seed_demo_data
 from app.upstream.selector import resolve_effective_mode
 
 logger = logging.getLogger(__name__)
 
 _NOTIFY_TASK: asyncio.Task | None = None
+_NOTIFY_OUTBOX_TASK: asyncio.Task | None = None
+_SIS_EVENTS_TASK: asyncio.Task | None = None
+_AUDIT_BACKFILL_TASK: asyncio.Task | None = None
+_AUDIT_RETENTION_TASK: asyncio.Task | None = None
+_RETRO_ROLLUP_TASK: asyncio.Task | None = None
+_ANALYTICS_CACHE_TASK: asyncio.Task | None = None
+_FORECAST_PRECOMPUTE_TASK: asyncio.Task | None = None
+_UPSTREAM_HEALTH_TASK: asyncio.Task | None = None
 
 
 def build_dispatcher() -> Dispatcher:
@@ -40,27 +53,63 @@ def build_dispatcher() -> Dispatcher:
 
 
 async def on_startup(bot: Bot) -> None:
-    global _NOTIFY_TASK
+    global _NOTIFY_TASK, _NOTIFY_OUTBOX_TASK, _SIS_EVENTS_TASK, _AUDIT_BACKFILL_TASK, _AUDIT_RETENTION_TASK, _RETRO_ROLLUP_TASK, _ANALYTICS_CACHE_TASK, _FORECAST_PRECOMPUTE_TASK, _UPSTREAM_HEALTH_TASK
     loop = asyncio.get_running_loop()
     await loop.run_in_executor(None, run_migrations)
-    await seed_demo_data()
     settings = get_settings()
+    start_http_clients()
+    await start_render_pool()
+    if settings.audit_writer_enabled:
+        start_audit_writer()
+    _AUDIT_BACKFILL_TASK = asyncio.create_task(backfill_audit_hot_columns(), name="audit-backfill")
+    await seed_demo_data()
     if settings.notify_worker_enabled:
         worker = NotifyWorker(bot)
         _NOTIFY_TASK = asyncio.create_task(worker.run_forever(), name="notify-worker")
+        if settings.notify_outbox_enabled:
+            _NOTIFY_OUTBOX_TASK = asyncio.create_task(NotifyOutboxWorker(bot).run_forever(), name="notify-outbox")
+        if settings.notify_events_enabled:
+            consumer = SisEventConsumer(worker)
+            register_sis_event_consumer(consumer)
+            _SIS_EVENTS_TASK = asyncio.create_task(consumer.run_forever(), name="sis-events")
+    if settings.analytics_cache_enabled:
+        _ANALYTICS_CACHE_TASK = asyncio.create_task(AnalyticsCacheWorker().run_forever(), name="analytics-cache")
+    if settings.forecast_precompute_enabled:
+        _FORECAST_PRECOMPUTE_TASK = asyncio.create_task(ForecastPrecomputeWorker().run_forever(), name="forecast-precompute")
+    if settings.audit_retention_enabled:
+        _AUDIT_RETENTION_TASK = asyncio.create_task(AuditRetentionWorker().run_forever(), name="audit-retention")
+    if settings.retro_rollup_enabled:
+        _RETRO_ROLLUP_TASK = asyncio.create_task(RetroRollupWorker().run_forever(), name="retro-rollups")
+    if settings.upstream_health_monitor_enabled:
+        _UPSTREAM_HEALTH_TASK = asyncio.create_task(UpstreamHealthMonitor().run_forever(), name="upstream-health")
     logger.info("startup_complete")
 
 
 async def on_shutdown() -> None:
-    global _NOTIFY_TASK
-    if _NOTIFY_TASK is None:
-        return
-    _NOTIFY_TASK.cancel()
-    try:
-        await _NOTIFY_TASK
-    except asyncio.CancelledError:
-        pass
+    global _NOTIFY_TASK, _NOTIFY_OUTBOX_TASK, _SIS_EVENTS_TASK, _AUDIT_BACKFILL_TASK, _AUDIT_RETENTION_TASK, _RETRO_ROLLUP_TASK, _ANALYTICS_CACHE_TASK, _FORECAST_PRECOMPUTE_TASK, _UPSTREAM_HEALTH_TASK
+    for task in (_NOTIFY_TASK, _NOTIFY_OUTBOX_TASK, _SIS_EVENTS_TASK, _AUDIT_BACKFILL_TASK, _AUDIT_RETENTION_TASK, _RETRO_ROLLUP_TASK, _ANALYTICS_CACHE_TASK, _FORECAST_PRECOMPUTE_TASK, _UPSTREAM_HEALTH_TASK):
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.warning("background_task_failed", extra={"task": task.get_name()})
     _NOTIFY_TASK = None
+    _NOTIFY_OUTBOX_TASK = None
+    _SIS_EVENTS_TASK = None
+    register_sis_event_consumer(None)
+    _AUDIT_BACKFILL_TASK = None
+    _AUDIT_RETENTION_TASK = None
+    _RETRO_ROLLUP_TASK = None
+    _ANALYTICS_CACHE_TASK = None
+    _FORECAST_PRECOMPUTE_TASK = None
+    _UPSTREAM_HEALTH_TASK = None
+    await stop_audit_writer()
+    close_render_pool()
+    await close_http_clients()
 
 
 async def _resolve_mode_for_preflight(settings) -> tuple[str, str | None, bool]:
@@ -119,6 +168,8 @@ def main() -> None:
     )
 
     bot = Bot(token=settings.bot_token)
+    # Every Telegram send goes through one rate-limited, prioritized dispatcher.
+    bot.session.middleware(OutboundRequestMiddleware())
     dispatcher = build_dispatcher()
     asyncio.run(start_polling(dispatcher, bot))
 
@@ -56,7 +56,7 @@ async def _get_current_settings(correlation_id: str) -> dict[str, Any]:
             "min_rate_delta_percent": "0.5",
         }
     
-    # Call status endpoint to get current settings
+    # Call status endpoint to get current settings; uncached, since the screen shows them right after edits
     from app.tools.providers.sis_actions_gateway import run_sis_request
     resp = await run_sis_request(
         method="GET",
@@ -64,6 +64,7 @@ async def _get_current_settings(correlation_id: str) -> dict[str, Any]:
         payload=None,
         correlation_id=correlation_id,
         settings=settings,
+        use_cache=False,
     )
     if resp.status == "ok":
         return resp.data
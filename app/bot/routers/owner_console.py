@@ -42,6 +42,7 @@ from app.bot.ui.templates_keyboards import (
     build_templates_prices_keyboard,
     build_templates_products_keyboard,
 )
+from app.core.artifact_cache import render_cached
 from app.core.contracts import CANCEL_CB_PREFIX, CONFIRM_CB_PREFIX
 from app.core.logging import get_correlation_id
 from app.core.redis import get_redis
@@ -932,6 +933,7 @@ async def handle_tool_call(message: Message, text: str, *, input_kind: str = "te
             redis=redis,
             correlation_id=correlation_id,
             ping_callable=lambda: SisClient(settings).ping(correlation_id=correlation_id),
+            settings=settings,
         )
         if selected_mode == "SIS_HTTP":
             response = await run_sis_tool(
@@ -1266,7 +1268,7 @@ async def generate_advice_memo(callback_query: CallbackQuery) -> None:
 
     try:
         topic_value = str(advice_cache.get("topic") or topic_raw or AdviceTopic.NONE.value)
-        pdf_bytes = render_decision_memo_pdf(topic=topic_value, brief=brief, advice_cache=advice_cache)
+        pdf_bytes = await render_cached(render_decision_memo_pdf, topic=topic_value, brief=brief, advice_cache=advice_cache)
         await callback_query.message.answer_document(
             BufferedInputFile(pdf_bytes, filename=f"decision_memo_{topic_value}.pdf"),
             caption="📄 Decision Memo (PDF)",
@@ -35,7 +35,6 @@ from app.core.tasks.notify_worker import NotifyWorker
 from app.templates.catalog import get_template_catalog
 from app.templates.catalog.parsers import parse_input_value
 from app.tools.contracts import ToolActor, ToolTenant
-from app.tools.providers.sis_gateway import upstream_unavailable
 from app.tools.registry_setup import build_registry
 from app.upstream.selector import choose_data_mode, resolve_effective_mode
 
@@ -319,14 +318,11 @@ async def _run_template_action(message: Message, owner_user_id: int, spec, paylo
     actor = ToolActor(owner_user_id=owner_user_id)
     tenant = ToolTenant(project="OwnerBot", shop_id="shop_001", currency="EUR", timezone="Europe/Berlin", locale="ru-RU")
 
-    async def _ping_failover():
-        return upstream_unavailable(correlation_id)
-
     await choose_data_mode(
         effective_mode=effective_mode,
         redis=redis,
         correlation_id=correlation_id,
-        ping_callable=_ping_failover,
+        settings=settings,
     )
 
     if presentation.get("kind") == "weekly_pdf":
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from aiogram.types import BufferedInputFile, Message
+from aiogram.types import Message
 
 from app.bot.services.tool_runner import run_tool
+from app.core.artifact_cache import render_cached, send_artifact
 from app.reports.charts import render_revenue_trend_png
 from app.reports.pdf_weekly import build_weekly_report_pdf
 from app.tools.contracts import ToolActor, ToolTenant
@@ -24,14 +25,19 @@ def build_trend_caption(response_data: dict, currency: str) -> str:
 
 
 async def send_revenue_trend_png(*, message: Message, trend_response: dict, days: int, title: str, currency: str, timezone: str, source_tag: str | None = None) -> None:
-    png_bytes = render_revenue_trend_png(
+    png_bytes = await render_cached(
+        render_revenue_trend_png,
         series=trend_response.get("series", []),
         currency=currency,
         title=title,
         tz=timezone,
     )
-    await message.answer_photo(
-        BufferedInputFile(png_bytes, filename=f"revenue_trend_{days}d.png"),
+    await send_artifact(
+        message.bot,
+        message.chat.id,
+        "photo",
+        png_bytes,
+        filename=f"revenue_trend_{days}d.png",
         caption=f"Источник: {source_tag or 'DEMO'}\n" + build_trend_caption(trend_response, currency),
     )
 
@@ -78,9 +84,10 @@ async def send_weekly_pdf(*, message: Message, actor: ToolActor, tenant: ToolTen
         await message.answer("Не удалось собрать weekly PDF: один из tools вернул ошибку.")
         return
 
-    pdf_bytes = build_weekly_report_pdf(
+    # Only report data goes into the bundle: a per-request id would give every tap its own cache key and upload.
+    pdf_bytes = await render_cached(
+        build_weekly_report_pdf,
         {
-            "correlation_id": correlation_id,
             "currency": tenant.currency,
             "kpi": kpi_response.data,
             "trend": trend_response.data,
@@ -88,7 +95,11 @@ async def send_weekly_pdf(*, message: Message, actor: ToolActor, tenant: ToolTen
             "unanswered_chats": chats_response.data,
         }
     )
-    await message.answer_document(
-        BufferedInputFile(pdf_bytes, filename="weekly_report.pdf"),
+    await send_artifact(
+        message.bot,
+        message.chat.id,
+        "document",
+        pdf_bytes,
+        filename="weekly_report.pdf",
         caption="Недельный отчёт (PDF)",
     )
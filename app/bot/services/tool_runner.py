@@ -9,10 +9,13 @@ from app.actions.capabilities import get_sis_capabilities, required_capabilities
 from app.core.db import session_scope
 from app.core.audit import write_audit_event
 from app.core.settings import get_settings
+from app.notify.schedule import rearm_owner
 from app.tools.contracts import ToolActor, ToolResponse, ToolTenant
 from app.tools.registry_setup import build_registry
 from app.tools.verifier import verify_response
 
+NOTIFY_SETTINGS_TOOL_PREFIXES = ("ntf_", "onboard_")
+
 
 def _safe_validation_details(exc: ValidationError) -> dict:
     safe_errors = []
@@ -139,4 +142,8 @@ async def run_tool(
     async with session_factory() as session:
         response = await tool.handler(payload, correlation_id, session, **kwargs)
 
+    if response.status == "ok" and tool_name.startswith(NOTIFY_SETTINGS_TOOL_PREFIXES):
+        # Subscriptions, times and rules changed: let the notify worker recompute this owner's due time now.
+        await rearm_owner(actor.owner_user_id)
+
     return await _finish(verify_response(response))
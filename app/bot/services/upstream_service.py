@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from app.core.redis import get_redis
 from app.core.settings import get_settings
 from app.upstream.mode_store import set_runtime_mode
+from app.upstream.health import read_upstream_health
 from app.upstream.selector import resolve_effective_mode
 
 
@@ -26,7 +27,14 @@ async def get_upstream_snapshot() -> UpstreamSnapshot:
         redis = await get_redis()
         effective_mode, runtime_mode = await resolve_effective_mode(settings=settings, redis=redis)
         if effective_mode == "AUTO" or runtime_mode == "AUTO":
-            cached_ping = "ok" if await redis.get(":auto_ping_ok") == "1" else "unknown"
+            health = await read_upstream_health(redis)
+            if health is None:
+                cached_ping = "unknown"
+            elif health.available:
+                latency = f", {int(health.latency_ms)}ms" if health.latency_ms is not None else ""
+                cached_ping = f"ok ({health.availability:.0%}{latency})"
+            else:
+                cached_ping = f"down ({health.availability:.0%}, {health.last_error_code or 'UNKNOWN'})"
     except Exception:
         pass
 
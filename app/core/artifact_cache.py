@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from aiogram.types import BufferedInputFile
+from pydantic import BaseModel
+
+from app.core.redis import get_redis
+from app.core.render_pool import run_render
+from app.core.settings import get_settings
+
+
+# Bump when a renderer's layout changes so cached bytes from the old template are not served.
+RENDER_TEMPLATE_VERSION = "1"
+FILE_ID_KEY_PREFIX = "ownerbot:tg_file_id:"
+
+
+def _canonical(value: Any) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _canonical(dataclasses.asdict(value))
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def artifact_key(fn: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any], *, version: str = RENDER_TEMPLATE_VERSION) -> str:
+    """sha256 over the renderer, its inputs (bundle, format, timezone, titles) and the template version."""
+    material = json.dumps(
+        {
+            "fn": f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}",
+            "version": version,
+            "args": _canonical(list(args)),
+            "kwargs": _canonical(kwargs),
+        },
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class ArtifactCache:
+    """In-process LRU of rendered bytes bounded by entry count, total size and TTL; identical renders run once."""
+
+    def __init__(self, *, ttl_sec: float = 900.0, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self._ttl_sec = ttl_sec
+        self._max_entries = max(1, max_entries)
+        self._max_bytes = max(1, max_bytes)
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, content = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        if len(content) > self._max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self._ttl_sec, content)
+        self._bytes += len(content)
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        _expires_at, content = self._entries.pop(key)
+        self._bytes -= len(content)
+
+    async def render(self, fn: Callable[..., bytes], /, *args: Any, version: str = RENDER_TEMPLATE_VERSION, **kwargs: Any) -> bytes:
+        key = artifact_key(fn, args, kwargs, version=version)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.get_loop() is asyncio.get_running_loop():
+            self.hits += 1
+            return await asyncio.shield(inflight)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            content = await run_render(fn, *args, **kwargs)
+        except BaseException as exc:
+            # Failures are not cached; waiters see the same error and the next caller renders again.
+            if isinstance(exc, Exception):
+                future.set_exception(exc)
+                future.exception()
+            else:
+                future.cancel()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(content)
+        self.put(key, content)
+        return content
+
+    def stats(self) -> dict[str, Any]:
+        return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+class TelegramFileIdCache:
+    """Remembers the file_id Telegram assigned to uploaded bytes, so repeat sends reference it instead of uploading.
+
+    Local LRU first, Redis (best-effort) to share ids between replicas. file_ids are per bot token.
+    """
+
+    def __init__(self, *, ttl_sec: int = 30 * 24 * 3600, max_entries: int = 1024) -> None:
+        self._ttl_sec = ttl_sec
+        self._max_entries = max(1, max_entries)
+        self._local: OrderedDict[str, str] = OrderedDict()
+        self.reused = 0
+        self.uploaded = 0
+
+    async def get(self, digest: str) -> str | None:
+        file_id = self._local.get(digest)
+        if file_id is not None:
+            self._local.move_to_end(digest)
+            return file_id
+        try:
+            value = await (await get_redis()).get(f"{FILE_ID_KEY_PREFIX}{digest}")
+        except Exception:
+            return None
+        if value is None:
+            return None
+        file_id = value.decode() if isinstance(value, bytes) else str(value)
+        self._remember_local(digest, file_id)
+        return file_id
+
+    async def put(self, digest: str, file_id: str) -> None:
+        self._remember_local(digest, file_id)
+        try:
+            await (await get_redis()).set(f"{FILE_ID_KEY_PREFIX}{digest}", file_id, ex=self._ttl_sec)
+        except Exception:
+            pass
+
+    async def forget(self, digest: str) -> None:
+        self._local.pop(digest, None)
+        try:
+            await (await get_redis()).delete(f"{FILE_ID_KEY_PREFIX}{digest}")
+        except Exception:
+            pass
+
+    def _remember_local(self, digest: str, file_id: str) -> None:
+        self._local[digest] = file_id
+        self._local.move_to_end(digest)
+        while len(self._local) > self._max_entries:
+            self._local.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        return {"entries": len(self._local), "reused": self.reused, "uploaded": self.uploaded}
+
+
+def _uploaded_file_id(sent: Any, kind: str) -> str | None:
+    if kind == "photo":
+        photos = getattr(sent, "photo", None)
+        file_id = getattr(photos[-1], "file_id", None) if isinstance(photos, list) and photos else None
+    else:
+        file_id = getattr(getattr(sent, "document", None), "file_id", None)
+    return file_id if isinstance(file_id, str) and file_id else None
+
+
+async def send_artifact(bot, chat_id: int, kind: str, content: bytes, *, filename: str, caption: str | None = None):
+    """``send_photo``/``send_document`` that uploads given bytes once and then sends by file_id."""
+    cache = get_file_id_cache()
+    digest = f"{kind}:{content_digest(content)}"
+    method = bot.send_photo if kind == "photo" else bot.send_document
+    field = "photo" if kind == "photo" else "document"
+    file_id = await cache.get(digest)
+    if file_id is not None:
+        try:
+            sent = await method(chat_id=chat_id, caption=caption, **{field: file_id})
+            cache.reused += 1
+            return sent
+        except Exception as exc:
+            # Unknown or expired id: upload again. Rate limits and network errors go to the caller.
+            if "file" not in str(exc).lower():
+                raise
+            await cache.forget(digest)
+    sent = await method(chat_id=chat_id, caption=caption, **{field: BufferedInputFile(content, filename=filename)})
+    cache.uploaded += 1
+    uploaded_id = _uploaded_file_id(sent, kind)
+    if uploaded_id is not None:
+        await cache.put(digest, uploaded_id)
+    return sent
+
+
+_ARTIFACT_CACHE: ArtifactCache | None = None
+_FILE_ID_CACHE: TelegramFileIdCache | None = None
+
+
+def get_artifact_cache() -> ArtifactCache:
+    global _ARTIFACT_CACHE
+    if _ARTIFACT_CACHE is None:
+        settings = get_settings()
+        _ARTIFACT_CACHE = ArtifactCache(
+            ttl_sec=float(settings.artifact_cache_ttl_sec),
+            max_entries=settings.artifact_cache_max_entries,
+            max_bytes=settings.artifact_cache_max_mb * 1024 * 1024,
+        )
+    return _ARTIFACT_CACHE
+
+
+def get_file_id_cache() -> TelegramFileIdCache:
+    global _FILE_ID_CACHE
+    if _FILE_ID_CACHE is None:
+        _FILE_ID_CACHE = TelegramFileIdCache(ttl_sec=get_settings().telegram_file_id_ttl_sec)
+    return _FILE_ID_CACHE
+
+
+async def render_cached(fn: Callable[..., bytes], /, *args: Any, **kwargs: Any) -> bytes:
+    """``run_render`` with a content-addressed cache: one render per distinct input bundle and template."""
+    return await get_artifact_cache().render(fn, *args, **kwargs)
+
+
+def artifact_cache_stats() -> dict[str, Any]:
+    stats: dict[str, Any] = {}
+    if _ARTIFACT_CACHE is not None:
+        stats["renders"] = _ARTIFACT_CACHE.stats()
+    if _FILE_ID_CACHE is not None:
+        stats["file_ids"] = _FILE_ID_CACHE.stats()
+    return stats
@@ -1,30 +1,354 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
 
 from app.core.db import session_scope
 from app.core.logging import get_correlation_id
+from app.core.time import utcnow
 
 logger = logging.getLogger(__name__)
 
+# High-volume, low-value events that may be sampled when the queue is overloaded.
+SAMPLED_EVENT_TYPES = frozenset(
+    {
+        "tool_call_started",
+        "upstream_call_started",
+        "upstream_call_finished",
+        "sis_ping_started",
+        "sis_ping_finished",
+    }
+)
+OVERLOAD_WATERMARK = 0.8
+ERROR_EVENT_MARKERS = ("failed", "error", "unavailable")
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+SEVERITY_INFO = "info"
+
+
+def _short_str(value: object, limit: int) -> str | None:
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    text = str(value).strip()
+    return text[:limit] or None
+
+
+def derive_hot_columns(event_type: str, payload: dict) -> dict[str, Any]:
+    """Typed, indexable columns extracted from the payload so readers do not scan payload_json."""
+    payload = payload if isinstance(payload, dict) else {}
+    error_code = _short_str(payload.get("error_code") or payload.get("error_class"), 64)
+    status = _short_str(payload.get("status"), 32)
+    latency_ms = payload.get("latency_ms")
+    if isinstance(latency_ms, bool) or not isinstance(latency_ms, (int, float)):
+        latency_ms = None
+
+    lowered = event_type.lower()
+    if any(marker in lowered for marker in ERROR_EVENT_MARKERS):
+        severity = SEVERITY_ERROR
+    elif error_code or status == "error":
+        severity = SEVERITY_WARNING
+    else:
+        severity = SEVERITY_INFO
+
+    return {
+        "severity": severity,
+        "tool": _short_str(payload.get("tool"), 128),
+        "status": status,
+        "latency_ms": int(latency_ms) if latency_ms is not None else None,
+        "error_code": error_code,
+    }
+
+
+@dataclass
+class AuditRecord:
+    occurred_at: datetime
+    correlation_id: str
+    event_type: str
+    payload_json: str
+    severity: str = SEVERITY_INFO
+    tool: str | None = None
+    status: str | None = None
+    latency_ms: int | None = None
+    error_code: str | None = None
+
+    def to_row(self) -> dict[str, Any]:
+        return {
+            "occurred_at": self.occurred_at,
+            "correlation_id": self.correlation_id,
+            "event_type": self.event_type,
+            "payload_json": self.payload_json,
+            "severity": self.severity,
+            "tool": self.tool,
+            "status": self.status,
+            "latency_ms": self.latency_ms,
+            "error_code": self.error_code,
+        }
+
+
+class AuditWriter:
+    """Bounded in-process queue flushed to ownerbot_audit_events with multi-row INSERTs."""
+
+    def __init__(
+        self,
+        *,
+        max_queue_size: int = 5000,
+        batch_size: int = 200,
+        flush_interval_sec: float = 1.0,
+        backpressure_timeout_sec: float = 0.05,
+        overload_sample_every: int = 10,
+        session_factory=None,
+    ) -> None:
+        self._queue: asyncio.Queue[AuditRecord] = asyncio.Queue(maxsize=max(1, max_queue_size))
+        self._batch_size = max(1, batch_size)
+        self._flush_interval_sec = max(0.01, flush_interval_sec)
+        self._backpressure_timeout_sec = max(0.0, backpressure_timeout_sec)
+        self._overload_sample_every = max(1, overload_sample_every)
+        self._session_factory = session_factory or session_scope
+        self._task: asyncio.Task | None = None
+        self._pending: list[AuditRecord] = []
+        self._sample_seq = 0
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.drain()
+
+    async def submit(self, record: AuditRecord) -> bool:
+        if self._is_overloaded() and record.event_type in SAMPLED_EVENT_TYPES:
+            self._sample_seq += 1
+            if self._sample_seq % self._overload_sample_every:
+                self.sampled_out += 1
+                return False
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(record), timeout=self._backpressure_timeout_sec)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                logger.warning("audit_queue_full_dropped", extra={"event_type": record.event_type, "correlation_id": record.correlation_id})
+                return False
+        self.enqueued += 1
+        return True
+
+    async def drain(self) -> None:
+        pending, self._pending = self._pending, []
+        await self._flush(pending)
+        while not self._queue.empty():
+            await self._flush(self._take_batch())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue_size": self._queue.qsize(),
+            "queue_max": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "rejected": self.rejected,
+        }
+
+    def _is_overloaded(self) -> bool:
+        return self._queue.qsize() >= self._queue.maxsize * OVERLOAD_WATERMARK
+
+    def _take_batch(self, batch: list[AuditRecord] | None = None) -> list[AuditRecord]:
+        batch = batch if batch is not None else []
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Records stay in self._pending until flushed so stop() can write a batch interrupted by cancellation.
+            self._pending = [await self._queue.get()]
+            deadline = loop.time() + self._flush_interval_sec
+            self._take_batch(self._pending)
+            while len(self._pending) < self._batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+                self._take_batch(self._pending)
+            await self._flush(self._pending)
+            self._pending = []
+
+    async def _insert(self, records: list[AuditRecord]) -> None:
+        from sqlalchemy import insert
+
+        from app.storage.models import OwnerbotAuditEvent
+
+        async with self._session_factory() as session:
+            await session.execute(insert(OwnerbotAuditEvent), [record.to_row() for record in records])
+            await session.commit()
+
+    async def _flush(self, batch: list[AuditRecord]) -> None:
+        if not batch:
+            return
+        # The batch is tried twice (a transient DB error usually clears on a fresh connection), then row by row.
+        for attempt in (1, 2):
+            try:
+                await self._insert(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.flush_failures += 1
+                logger.warning("audit_batch_write_failed", extra={"batch_size": len(batch), "attempt": attempt})
+                continue
+            self.flushes += 1
+            self.written += len(batch)
+            batch.clear()
+            return
+        # Written rows leave the list as they go, so stop() re-flushes only what is left after a cancellation.
+        while batch:
+            record = batch[0]
+            try:
+                await self._insert([record])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.rejected += 1
+                logger.warning("audit_write_failed", extra={"event_type": record.event_type, "correlation_id": record.correlation_id})
+            else:
+                self.written += 1
+            del batch[0]
+
+
+_WRITER: AuditWriter | None = None
+
+
+def get_audit_writer() -> AuditWriter | None:
+    return _WRITER
+
+
+def start_audit_writer() -> AuditWriter:
+    global _WRITER
+    from app.core.settings import get_settings
+
+    if _WRITER is None:
+        settings = get_settings()
+        _WRITER = AuditWriter(
+            max_queue_size=settings.audit_queue_max_size,
+            batch_size=settings.audit_batch_size,
+            flush_interval_sec=settings.audit_flush_interval_sec,
+            backpressure_timeout_sec=settings.audit_backpressure_timeout_sec,
+            overload_sample_every=settings.audit_overload_sample_every,
+        )
+    _WRITER.start()
+    return _WRITER
+
+
+async def stop_audit_writer() -> None:
+    global _WRITER
+    writer, _WRITER = _WRITER, None
+    if writer is not None:
+        await writer.stop()
+
+
+async def _write_direct(record: AuditRecord) -> None:
+    from app.storage.models import OwnerbotAuditEvent
+
+    try:
+        async with session_scope() as session:
+            session.add(OwnerbotAuditEvent(**record.to_row()))
+            await session.commit()
+    except Exception:
+        logger.warning("audit_write_failed", extra={"event_type": record.event_type, "correlation_id": record.correlation_id})
+
+
+async def backfill_audit_hot_columns(*, batch_size: int = 1000, session_factory=None) -> int:
+    """Populate typed columns for rows written before they existed; safe to rerun, returns rows updated."""
+    from sqlalchemy import bindparam, select, update
+
+    from app.storage.models import OwnerbotAuditEvent
+
+    table = OwnerbotAuditEvent.__table__
+    factory = session_factory or session_scope
+    updated = 0
+    while True:
+        async with factory() as session:
+            rows = (
+                await session.execute(
+                    select(OwnerbotAuditEvent.id, OwnerbotAuditEvent.event_type, OwnerbotAuditEvent.payload_json)
+                    .where(OwnerbotAuditEvent.severity.is_(None))
+                    .order_by(OwnerbotAuditEvent.id)
+                    .limit(max(1, batch_size))
+                )
+            ).all()
+            if not rows:
+                break
+            params = []
+            for event_id, event_type, payload_json in rows:
+                try:
+                    payload = json.loads(payload_json)
+                except (TypeError, ValueError):
+                    payload = {}
+                params.append({"event_id": event_id, **derive_hot_columns(event_type, payload)})
+            # Matched by id alone: the primary key is (id, occurred_at) and id leads every partition's key index.
+            await session.execute(update(table).where(table.c.id == bindparam("event_id")), params)
+            await session.commit()
+        updated += len(rows)
+        if len(rows) < batch_size:
+            break
+    if updated:
+        logger.info("audit_hot_columns_backfilled", extra={"rows": updated})
+    return updated
+
 
 async def write_audit_event(
     event_type: str,
     payload: dict,
     correlation_id: str | None = None,
 ) -> None:
-    from app.storage.models import OwnerbotAuditEvent
-
     resolved_correlation_id = correlation_id or get_correlation_id()
     try:
-        async with session_scope() as session:
-            event = OwnerbotAuditEvent(
-                correlation_id=resolved_correlation_id,
-                event_type=event_type,
-                payload_json=json.dumps(payload, ensure_ascii=False),
-            )
-            session.add(event)
-            await session.commit()
-    except Exception:
+        payload_json = json.dumps(payload, ensure_ascii=False)
+    except (TypeError, ValueError):
         logger.warning("audit_write_failed", extra={"event_type": event_type, "correlation_id": resolved_correlation_id})
+        return
+    record = AuditRecord(
+        occurred_at=utcnow(),
+        correlation_id=resolved_correlation_id,
+        event_type=event_type,
+        payload_json=payload_json,
+        **derive_hot_columns(event_type, payload),
+    )
+    writer = _WRITER
+    if writer is not None and writer.running:
+        await writer.submit(record)
+        return
+    await _write_direct(record)
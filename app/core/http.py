@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+from collections import Counter
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SIS_CLIENT = "sis"
+OPENAI_CLIENT = "openai"
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class HttpClientRegistry:
+    """Process-wide keep-alive pools, one httpx.AsyncClient per upstream; per-call headers and timeouts stay with the caller."""
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_sec: float = 30.0,
+        http2: bool = False,
+    ) -> None:
+        self._limits = httpx.Limits(
+            max_connections=max(1, max_connections),
+            max_keepalive_connections=max(0, max_keepalive_connections),
+            keepalive_expiry=max(0.0, keepalive_expiry_sec),
+        )
+        self._http2 = http2 and _http2_available()
+        if http2 and not self._http2:
+            logger.warning("http2_unavailable_fallback_http11", extra={"hint": "pip install h2"})
+        self._clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._requests: Counter[str] = Counter()
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(name)
+        # A client's pooled connections belong to the loop that opened them, so a new loop gets a new client.
+        if entry is not None and entry[0] is loop and not entry[1].is_closed:
+            return entry[1]
+        client = httpx.AsyncClient(
+            limits=self._limits,
+            http2=self._http2,
+            event_hooks={"request": [self._count_request(name)]},
+        )
+        self._clients[name] = (loop, client)
+        return client
+
+    def _count_request(self, name: str):
+        async def hook(_request: httpx.Request) -> None:
+            self._requests[name] += 1
+
+        return hook
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for _loop, client in clients.values():
+            try:
+                await client.aclose()
+            except Exception:
+                logger.warning("http_client_close_failed")
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        result: dict[str, dict[str, Any]] = {}
+        for name, (_loop, client) in self._clients.items():
+            connections = list(getattr(getattr(client._transport, "_pool", None), "connections", []) or [])
+            result[name] = {
+                "requests": self._requests[name],
+                "connections": len(connections),
+                "idle": sum(1 for conn in connections if conn.is_idle()),
+                "http2": self._http2,
+                "closed": client.is_closed,
+            }
+        return result
+
+
+_REGISTRY: HttpClientRegistry | None = None
+
+
+def _get_registry() -> HttpClientRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        from app.core.settings import get_settings
+
+        settings = get_settings()
+        _REGISTRY = HttpClientRegistry(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry_sec=settings.http_keepalive_expiry_sec,
+            http2=settings.http2_enabled,
+        )
+    return _REGISTRY
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    return _get_registry().get(name)
+
+
+def start_http_clients() -> HttpClientRegistry:
+    return _get_registry()
+
+
+async def close_http_clients() -> None:
+    global _REGISTRY
+    registry, _REGISTRY = _REGISTRY, None
+    if registry is not None:
+        await registry.aclose()
+
+
+def http_pool_stats() -> dict[str, dict[str, Any]]:
+    return _REGISTRY.stats() if _REGISTRY is not None else {}
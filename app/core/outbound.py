@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from app.core.settings import get_settings
+
+T = TypeVar("T")
+ChatId = int | str
+
+
+class SendPriority(IntEnum):
+    INTERACTIVE = 0
+    DIGEST = 1
+    BROADCAST = 2
+
+
+_priority_var: ContextVar[SendPriority] = ContextVar("outbound_priority", default=SendPriority.INTERACTIVE)
+# Set while a call runs under a granted permit, so the request middleware does not queue it a second time.
+_permit_var: ContextVar[bool] = ContextVar("outbound_permit", default=False)
+
+
+@contextmanager
+def send_priority(priority: SendPriority) -> Iterator[None]:
+    token = _priority_var.set(priority)
+    try:
+        yield
+    finally:
+        _priority_var.reset(token)
+
+
+def current_send_priority() -> SendPriority:
+    return _priority_var.get()
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """Seconds Telegram asked us to wait (TelegramRetryAfter or a "retry after N" message), else None."""
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    message = getattr(exc, "message", None)
+    if isinstance(message, str):
+        parts = message.split("retry after ")
+        if len(parts) > 1:
+            token = parts[-1].split()[0]
+            if token.isdigit():
+                return float(token)
+    return None
+
+
+@dataclass
+class TokenBucket:
+    rate: float
+    capacity: float
+    tokens: float = -1.0
+    updated: float = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.tokens < 0:
+            self.tokens, self.updated = self.capacity, now
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float, need: float = 1.0) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1.0
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    chat_id: ChatId = field(compare=False)
+    charge_chat: bool = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class _ClassStats:
+    queued: int = 0
+    sent: int = 0
+    failed: int = 0
+    retry_after: int = 0
+    wait_ms_avg: float = 0.0
+    wait_ms_max: float = 0.0
+
+    def record_wait(self, wait_ms: float) -> None:
+        self.wait_ms_avg = wait_ms if self.sent == 0 else 0.2 * wait_ms + 0.8 * self.wait_ms_avg
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+
+class OutboundDispatcher:
+    """Single gate for Telegram sends: global and per-chat token buckets, strict priority classes.
+
+    Lower classes may only spend the global bucket down to ``interactive_reserve`` tokens, so a
+    digest wave or a broadcast always leaves room for the next interactive reply.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = 25.0,
+        global_burst: float = 30.0,
+        chat_rate: float = 1.0,
+        group_per_minute: float = 20.0,
+        interactive_reserve: float = 5.0,
+        max_retries: int = 3,
+        evict_interval_sec: float = 60.0,
+    ) -> None:
+        self._global = TokenBucket(rate=global_rate, capacity=global_burst)
+        self._chat_rate = chat_rate
+        self._group_rate = group_per_minute / 60.0
+        self._reserve = min(interactive_reserve, max(0.0, global_burst - 1))
+        self._max_retries = max(1, max_retries)
+        self._chats: dict[ChatId, TokenBucket] = {}
+        self._paused_until: dict[ChatId, float] = {}
+        self._evict_interval = max(0.0, evict_interval_sec)
+        self._evicted_at = time.monotonic()
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._changed: asyncio.Event | None = None
+        self._pump: asyncio.Task | None = None
+        self._stats = {priority: _ClassStats() for priority in SendPriority}
+
+    def _chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Negative ids are groups and channels: Telegram allows ~20 messages per minute there.
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self._group_rate if is_group else self._chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate=rate, capacity=1.0)
+        return bucket
+
+    def _chat_wait(self, waiter: _Waiter, now: float) -> float:
+        paused = max(0.0, self._paused_until.get(waiter.chat_id, 0.0) - now)
+        if not waiter.charge_chat:
+            return paused
+        return max(paused, self._chat_bucket(waiter.chat_id).wait_time(now))
+
+    def pause_chat(self, chat_id: ChatId, seconds: float) -> None:
+        until = time.monotonic() + max(0.0, seconds)
+        self._paused_until[chat_id] = max(until, self._paused_until.get(chat_id, 0.0))
+
+    def _evict_idle(self, now: float) -> None:
+        """Forget chats nobody is waiting on whose bucket has refilled and whose pause has ended.
+
+        A new bucket starts full, so dropping a full one changes nothing but the memory held per chat.
+        """
+        if now - self._evicted_at < self._evict_interval:
+            return
+        self._evicted_at = now
+        waiting = {waiter.chat_id for waiter in self._waiters}
+        self._paused_until = {chat_id: until for chat_id, until in self._paused_until.items() if until > now}
+        self._chats = {
+            chat_id: bucket
+            for chat_id, bucket in self._chats.items()
+            if chat_id in waiting or bucket.wait_time(now, bucket.capacity) > 0
+        }
+
+    def _ensure_pump(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._pump is not None and not self._pump.done() and self._pump.get_loop() is loop:
+            self._changed.set()
+            return
+        # Waiters left over from another event loop (tests, restarts) can never be woken here.
+        self._waiters = [waiter for waiter in self._waiters if waiter.future.get_loop() is loop]
+        self._changed = asyncio.Event()
+        self._pump = loop.create_task(self._run_pump(), name="outbound-dispatcher")
+
+    async def _run_pump(self) -> None:
+        while self._waiters:
+            now = time.monotonic()
+            self._waiters = [waiter for waiter in self._waiters if not waiter.future.done()]
+            chosen: _Waiter | None = None
+            next_wait = float("inf")
+            for waiter in self._waiters:
+                need = 1.0 if waiter.priority == SendPriority.INTERACTIVE else 1.0 + self._reserve
+                wait = max(self._global.wait_time(now, need), self._chat_wait(waiter, now))
+                if wait <= 0:
+                    chosen = waiter
+                    break
+                next_wait = min(next_wait, wait)
+            if chosen is not None:
+                self._waiters.remove(chosen)
+                self._global.take(now)
+                if chosen.charge_chat:
+                    self._chat_bucket(chosen.chat_id).take(now)
+                stats = self._stats[SendPriority(chosen.priority)]
+                stats.record_wait((now - chosen.enqueued_at) * 1000)
+                chosen.future.set_result(None)
+                continue
+            if not self._waiters:
+                break
+            self._evict_idle(now)
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=next_wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def acquire(self, chat_id: ChatId, priority: SendPriority, *, charge_chat: bool = True) -> None:
+        waiter = _Waiter(
+            priority=int(priority),
+            seq=next(self._seq),
+            chat_id=chat_id,
+            charge_chat=charge_chat,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._evict_idle(waiter.enqueued_at)
+        bisect.insort(self._waiters, waiter)
+        stats = self._stats[priority]
+        stats.queued += 1
+        try:
+            self._ensure_pump()
+            await waiter.future
+        finally:
+            stats.queued -= 1
+            if not waiter.future.done():
+                waiter.future.cancel()
+
+    async def send(
+        self,
+        chat_id: ChatId,
+        call: Callable[[], Awaitable[T]],
+        *,
+        priority: SendPriority | None = None,
+        max_retries: int | None = None,
+    ) -> T:
+        """Runs ``call`` once a permit is granted; retries after TelegramRetryAfter, then re-raises."""
+        priority = current_send_priority() if priority is None else priority
+        attempts = max_retries or self._max_retries
+        stats = self._stats[priority]
+        charge_chat = True
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.acquire(chat_id, priority, charge_chat=charge_chat)
+            token = _permit_var.set(True)
+            try:
+                result = await call()
+            except Exception as exc:
+                retry_after = retry_after_seconds(exc)
+                if retry_after is None or attempt >= attempts:
+                    stats.failed += 1
+                    raise
+                stats.retry_after += 1
+                self.pause_chat(chat_id, retry_after)
+                # The pause already spaces the retry; do not charge the chat bucket twice.
+                charge_chat = False
+                continue
+            finally:
+                _permit_var.reset(token)
+            stats.sent += 1
+            return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_depth": sum(stats.queued for stats in self._stats.values()),
+            "classes": {
+                priority.name.lower(): {
+                    "queued": stats.queued,
+                    "sent": stats.sent,
+                    "failed": stats.failed,
+                    "retry_after": stats.retry_after,
+                    "wait_ms_avg": round(stats.wait_ms_avg, 1),
+                    "wait_ms_max": round(stats.wait_ms_max, 1),
+                }
+                for priority, stats in self._stats.items()
+            },
+            "paused_chats": sum(1 for until in self._paused_until.values() if until > time.monotonic()),
+            "tracked_chats": len(self._chats),
+        }
+
+
+_DISPATCHER: OutboundDispatcher | None = None
+
+
+def get_outbound_dispatcher() -> OutboundDispatcher:
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        settings = get_settings()
+        _DISPATCHER = OutboundDispatcher(
+            global_rate=settings.outbound_global_rate_per_sec,
+            global_burst=settings.outbound_global_burst,
+            chat_rate=settings.outbound_chat_rate_per_sec,
+            group_per_minute=settings.outbound_group_per_minute,
+            interactive_reserve=settings.outbound_interactive_reserve,
+        )
+    return _DISPATCHER
+
+
+def outbound_stats() -> dict[str, Any]:
+    return _DISPATCHER.stats() if _DISPATCHER is not None else {}
+
+
+_SEND_METHOD_PREFIXES = ("Send", "Copy", "Forward")
+_UNTHROTTLED_METHODS = {"SendChatAction"}
+
+
+class OutboundRequestMiddleware(BaseRequestMiddleware):
+    """Bot session middleware: every send* call that was not already queued goes through the dispatcher.
+
+    Handlers keep calling ``message.answer(...)``; those run at the context priority, which is
+    INTERACTIVE unless a worker wrapped them in :func:`send_priority`.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        chat_id = getattr(method, "chat_id", None)
+        if _permit_var.get() or chat_id is None or not name.startswith(_SEND_METHOD_PREFIXES) or name in _UNTHROTTLED_METHODS:
+            return await make_request(bot, method)
+        return await get_outbound_dispatcher().send(chat_id, lambda: make_request(bot, method))
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Imported once per worker process so the first chart does not pay for matplotlib/reportlab start-up.
+_WARM_MODULES = (
+    "matplotlib.pyplot",
+    "reportlab.pdfgen.canvas",
+    "app.reports.charts",
+    "app.reports.pdf_weekly",
+    "app.notify.renderers",
+    "app.advice.memo_renderer",
+)
+
+
+class RenderTimeoutError(TimeoutError):
+    pass
+
+
+def _warm_worker() -> None:
+    import importlib
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    for name in _WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def _ping() -> int:
+    return 1
+
+
+class RenderPool:
+    """Runs chart and PDF renderers off the event loop: a warmed process pool, a concurrency cap and a timeout.
+
+    With ``workers=0`` renders run on one dedicated thread instead (pyplot keeps global state and is not
+    thread-safe), which still keeps polling and callbacks responsive.
+    """
+
+    def __init__(self, *, workers: int = 2, max_concurrency: int = 4, timeout_sec: float = 30.0) -> None:
+        self._workers = max(0, workers)
+        self._max_concurrency = max(1, max_concurrency)
+        self._timeout_sec = timeout_sec
+        self._executor: Executor | None = None
+        self._semaphores: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+        self._stats = {"rendered": 0, "failed": 0, "timeouts": 0, "restarts": 0, "in_flight": 0, "render_ms_max": 0.0}
+
+    @property
+    def mode(self) -> str:
+        return "process" if self._workers else "thread"
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            if self._workers:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    # Forking a process that already runs an event loop and client threads is unsafe.
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+        return self._executor
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            self._semaphores = {loop: asyncio.Semaphore(self._max_concurrency)}
+            semaphore = self._semaphores[loop]
+        return semaphore
+
+    async def warm_up(self) -> None:
+        """Starts every worker process now instead of on the first owner request."""
+        executor = self._ensure_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(max(1, self._workers))))
+
+    def _restart(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            # A hung render keeps its process busy; new work goes to a fresh pool.
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._stats["restarts"] += 1
+
+    async def run(self, fn: Callable[..., T], /, *args: Any, timeout: float | None = None, **kwargs: Any) -> T:
+        """Runs ``fn(*args, **kwargs)`` in the pool; ``fn`` and its arguments must be picklable in process mode."""
+        limit = self._timeout_sec if timeout is None else timeout
+        async with self._semaphore():
+            executor = self._ensure_executor()
+            loop = asyncio.get_running_loop()
+            started = time.monotonic()
+            self._stats["in_flight"] += 1
+            try:
+                result = await asyncio.wait_for(loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs)), timeout=limit)
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                if self._workers:
+                    self._restart()
+                raise RenderTimeoutError(f"render {getattr(fn, '__name__', 'call')} exceeded {limit}s") from None
+            except BrokenProcessPool:
+                self._stats["failed"] += 1
+                self._restart()
+                raise
+            except Exception:
+                self._stats["failed"] += 1
+                raise
+            finally:
+                self._stats["in_flight"] -= 1
+            self._stats["rendered"] += 1
+            self._stats["render_ms_max"] = max(self._stats["render_ms_max"], round((time.monotonic() - started) * 1000, 1))
+            return result
+
+    def close(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {"mode": self.mode, "workers": self._workers, "max_concurrency": self._max_concurrency, **self._stats}
+
+
+_POOL: RenderPool | None = None
+
+
+def get_render_pool() -> RenderPool:
+    """The pool started by :func:`start_render_pool`, or a single render thread when nothing started one (tests, CLI)."""
+    global _POOL
+    if _POOL is None:
+        _POOL = RenderPool(workers=0)
+    return _POOL
+
+
+async def start_render_pool() -> RenderPool:
+    global _POOL
+    from app.core.settings import get_settings
+
+    settings = get_settings()
+    if _POOL is not None:
+        _POOL.close()
+    _POOL = RenderPool(
+        workers=settings.render_pool_workers,
+        max_concurrency=settings.render_max_concurrency,
+        timeout_sec=settings.render_timeout_sec,
+    )
+    try:
+        await _POOL.warm_up()
+    except Exception as exc:
+        logger.warning("render_pool_warm_up_failed", extra={"error": str(exc)[:200]})
+        _POOL.close()
+        _POOL = RenderPool(workers=0, max_concurrency=_POOL._max_concurrency, timeout_sec=_POOL._timeout_sec)
+    return _POOL
+
+
+def close_render_pool() -> None:
+    global _POOL
+    pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
+
+
+async def run_render(fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    return await get_render_pool().run(fn, *args, **kwargs)
+
+
+def render_pool_stats() -> dict[str, Any]:
+    return _POOL.stats() if _POOL is not None else {}
@@ -49,6 +49,11 @@ class Settings(BaseSettings):
     sis_retry_backoff_base_sec: float = Field(default=0.7, alias="SIS_RETRY_BACKOFF_BASE_SEC")
     upstream_runtime_toggle_enabled: bool = Field(default=True, alias="UPSTREAM_RUNTIME_TOGGLE_ENABLED")
     upstream_redis_key: str = Field(default="ownerbot:upstream_mode", alias="UPSTREAM_REDIS_KEY")
+    upstream_health_monitor_enabled: bool = Field(default=True, alias="UPSTREAM_HEALTH_MONITOR_ENABLED")
+    upstream_health_interval_sec: int = Field(default=10, alias="UPSTREAM_HEALTH_INTERVAL_SEC")
+    upstream_health_ewma_alpha: float = Field(default=0.3, alias="UPSTREAM_HEALTH_EWMA_ALPHA")
+    upstream_health_down_below: float = Field(default=0.4, alias="UPSTREAM_HEALTH_DOWN_BELOW")
+    upstream_health_up_above: float = Field(default=0.8, alias="UPSTREAM_HEALTH_UP_ABOVE")
     diagnostics_enabled: bool = Field(default=True, alias="DIAGNOSTICS_ENABLED")
     preflight_fail_fast: bool = Field(default=True, alias="PREFLIGHT_FAIL_FAST")
     shadow_check_enabled: bool = Field(default=True, alias="SHADOW_CHECK_ENABLED")
@@ -86,6 +91,72 @@ class Settings(BaseSettings):
     access_deny_audit_ttl_sec: int = Field(default=60, alias="ACCESS_DENY_AUDIT_TTL_SEC")
     access_deny_notify_once: bool = Field(default=False, alias="ACCESS_DENY_NOTIFY_ONCE")
     notify_worker_enabled: bool = Field(default=True, alias="NOTIFY_WORKER_ENABLED")
+    notify_owner_concurrency: int = Field(default=4, alias="NOTIFY_OWNER_CONCURRENCY")
+    notify_owner_timeout_sec: int = Field(default=120, alias="NOTIFY_OWNER_TIMEOUT_SEC")
+    notify_condition_poll_sec: int = Field(default=300, alias="NOTIFY_CONDITION_POLL_SEC")
+    notify_scheduler_max_sleep_sec: int = Field(default=60, alias="NOTIFY_SCHEDULER_MAX_SLEEP_SEC")
+    notify_shard_count: int = Field(default=8, alias="NOTIFY_SHARD_COUNT")
+    notify_shard_lease_ttl_sec: int = Field(default=15, alias="NOTIFY_SHARD_LEASE_TTL_SEC")
+    notify_fanout_call_timeout_sec: float = Field(default=20.0, alias="NOTIFY_FANOUT_CALL_TIMEOUT_SEC")
+    notify_events_enabled: bool = Field(default=False, alias="NOTIFY_EVENTS_ENABLED")
+    notify_events_stream: str = Field(default="ownerbot:sis:events", alias="NOTIFY_EVENTS_STREAM")
+    notify_events_group: str = Field(default="ownerbot-notify", alias="NOTIFY_EVENTS_GROUP")
+    notify_events_block_ms: int = Field(default=5000, alias="NOTIFY_EVENTS_BLOCK_MS")
+    notify_events_reconcile_sec: int = Field(default=900, alias="NOTIFY_EVENTS_RECONCILE_SEC")
+    notify_outbox_enabled: bool = Field(default=True, alias="NOTIFY_OUTBOX_ENABLED")
+    notify_outbox_batch_size: int = Field(default=50, alias="NOTIFY_OUTBOX_BATCH_SIZE")
+    notify_outbox_max_attempts: int = Field(default=8, alias="NOTIFY_OUTBOX_MAX_ATTEMPTS")
+    notify_outbox_poll_sec: int = Field(default=5, alias="NOTIFY_OUTBOX_POLL_SEC")
+    notify_outbox_retention_days: int = Field(default=7, alias="NOTIFY_OUTBOX_RETENTION_DAYS")
+    outbound_global_rate_per_sec: float = Field(default=25.0, alias="OUTBOUND_GLOBAL_RATE_PER_SEC")
+    outbound_global_burst: float = Field(default=30.0, alias="OUTBOUND_GLOBAL_BURST")
+    outbound_chat_rate_per_sec: float = Field(default=1.0, alias="OUTBOUND_CHAT_RATE_PER_SEC")
+    outbound_group_per_minute: float = Field(default=20.0, alias="OUTBOUND_GROUP_PER_MINUTE")
+    outbound_interactive_reserve: float = Field(default=5.0, alias="OUTBOUND_INTERACTIVE_RESERVE")
+    render_pool_workers: int = Field(default=2, alias="RENDER_POOL_WORKERS")
+    render_max_concurrency: int = Field(default=4, alias="RENDER_MAX_CONCURRENCY")
+    render_timeout_sec: float = Field(default=30.0, alias="RENDER_TIMEOUT_SEC")
+    artifact_cache_ttl_sec: int = Field(default=900, alias="ARTIFACT_CACHE_TTL_SEC")
+    artifact_cache_max_entries: int = Field(default=256, alias="ARTIFACT_CACHE_MAX_ENTRIES")
+    artifact_cache_max_mb: int = Field(default=64, alias="ARTIFACT_CACHE_MAX_MB")
+    telegram_file_id_ttl_sec: int = Field(default=2592000, alias="TELEGRAM_FILE_ID_TTL_SEC")
+    analytics_cache_enabled: bool = Field(default=True, alias="ANALYTICS_CACHE_ENABLED")
+    analytics_cache_refresh_sec: float = Field(default=30.0, alias="ANALYTICS_CACHE_REFRESH_SEC")
+    analytics_cache_full_reload_sec: float = Field(default=3600.0, alias="ANALYTICS_CACHE_FULL_RELOAD_SEC")
+    analytics_cache_max_age_sec: float = Field(default=120.0, alias="ANALYTICS_CACHE_MAX_AGE_SEC")
+    forecast_precompute_enabled: bool = Field(default=True, alias="FORECAST_PRECOMPUTE_ENABLED")
+    forecast_precompute_interval_sec: float = Field(default=3600.0, alias="FORECAST_PRECOMPUTE_INTERVAL_SEC")
+    forecast_results_max_age_sec: float = Field(default=7200.0, alias="FORECAST_RESULTS_MAX_AGE_SEC")
+    audit_writer_enabled: bool = Field(default=True, alias="AUDIT_WRITER_ENABLED")
+    audit_queue_max_size: int = Field(default=5000, alias="AUDIT_QUEUE_MAX_SIZE")
+    audit_batch_size: int = Field(default=200, alias="AUDIT_BATCH_SIZE")
+    audit_flush_interval_sec: float = Field(default=1.0, alias="AUDIT_FLUSH_INTERVAL_SEC")
+    audit_backpressure_timeout_sec: float = Field(default=0.05, alias="AUDIT_BACKPRESSURE_TIMEOUT_SEC")
+    audit_overload_sample_every: int = Field(default=10, alias="AUDIT_OVERLOAD_SAMPLE_EVERY")
+    audit_retention_enabled: bool = Field(default=True, alias="AUDIT_RETENTION_ENABLED")
+    audit_hot_retention_days: int = Field(default=90, alias="AUDIT_HOT_RETENTION_DAYS")
+    audit_retention_interval_sec: int = Field(default=3600, alias="AUDIT_RETENTION_INTERVAL_SEC")
+    audit_partition_premake_months: int = Field(default=2, alias="AUDIT_PARTITION_PREMAKE_MONTHS")
+    audit_archive_dir: str = Field(default="data/audit_archive", alias="AUDIT_ARCHIVE_DIR")
+    retro_rollup_enabled: bool = Field(default=True, alias="RETRO_ROLLUP_ENABLED")
+    retro_rollup_refresh_sec: float = Field(default=60.0, alias="RETRO_ROLLUP_REFRESH_SEC")
+    http_max_connections: int = Field(default=100, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(default=20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    http_keepalive_expiry_sec: float = Field(default=30.0, alias="HTTP_KEEPALIVE_EXPIRY_SEC")
+    http2_enabled: bool = Field(default=False, alias="HTTP2_ENABLED")
+    sis_read_cache_enabled: bool = Field(default=True, alias="SIS_READ_CACHE_ENABLED")
+    sis_read_cache_lru_size: int = Field(default=512, alias="SIS_READ_CACHE_LRU_SIZE")
+    sis_singleflight_enabled: bool = Field(default=True, alias="SIS_SINGLEFLIGHT_ENABLED")
+    sis_singleflight_redis_enabled: bool = Field(default=False, alias="SIS_SINGLEFLIGHT_REDIS_ENABLED")
+    sis_singleflight_lease_ms: int = Field(default=3000, alias="SIS_SINGLEFLIGHT_LEASE_MS")
+    sis_circuit_breaker_enabled: bool = Field(default=True, alias="SIS_CIRCUIT_BREAKER_ENABLED")
+    sis_circuit_failure_rate: float = Field(default=0.5, alias="SIS_CIRCUIT_FAILURE_RATE")
+    sis_circuit_min_requests: int = Field(default=5, alias="SIS_CIRCUIT_MIN_REQUESTS")
+    sis_circuit_consecutive_failures: int = Field(default=3, alias="SIS_CIRCUIT_CONSECUTIVE_FAILURES")
+    sis_circuit_window_sec: int = Field(default=60, alias="SIS_CIRCUIT_WINDOW_SEC")
+    sis_circuit_open_sec: int = Field(default=30, alias="SIS_CIRCUIT_OPEN_SEC")
+    sis_capability_probe_concurrency: int = Field(default=3, alias="SIS_CAPABILITY_PROBE_CONCURRENCY")
+    sis_capability_push_invalidation_enabled: bool = Field(default=True, alias="SIS_CAPABILITY_PUSH_INVALIDATION_ENABLED")
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
 
     @field_validator("owner_ids", mode="before")
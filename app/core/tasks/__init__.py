@@ -1,3 +1,10 @@
+from app.core.tasks.analytics_cache import AnalyticsCacheWorker
+from app.core.tasks.audit_retention import AuditRetentionWorker
+from app.core.tasks.forecast_precompute import ForecastPrecomputeWorker
+from app.core.tasks.notify_outbox import NotifyOutboxWorker
 from app.core.tasks.notify_worker import NotifyWorker
+from app.core.tasks.retro_rollups import RetroRollupWorker
+from app.core.tasks.sis_events import SisEventConsumer
+from app.core.tasks.upstream_health import UpstreamHealthMonitor
 
-__all__ = ["NotifyWorker"]
+__all__ = ["AnalyticsCacheWorker", "AuditRetentionWorker", "ForecastPrecomputeWorker", "NotifyOutboxWorker", "NotifyWorker", "RetroRollupWorker", "SisEventConsumer", "UpstreamHealthMonitor"]
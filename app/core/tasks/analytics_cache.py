@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app.core.audit import write_audit_event
+from app.core.db import session_scope
+from app.core.settings import get_settings
+from app.storage.columnar import get_columnar_cache
+
+
+class AnalyticsCacheWorker:
+    """Keeps the columnar sales cache warm: incremental refresh every few seconds, full reload hourly."""
+
+    def __init__(self, session_factory=None) -> None:
+        self._session_factory = session_factory or session_scope
+        self._stopped = False
+        self._last_full: float | None = None
+
+    async def run_forever(self) -> None:
+        while not self._stopped:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await write_audit_event("analytics_cache_failed", {"message": str(exc)[:200]})
+            await asyncio.sleep(get_settings().analytics_cache_refresh_sec)
+
+    async def tick(self) -> dict[str, int]:
+        full_every = get_settings().analytics_cache_full_reload_sec
+        now = time.monotonic()
+        # Deleted or edited order lines are only seen by a full reload.
+        full = self._last_full is None or now - self._last_full >= full_every
+        async with self._session_factory() as session:
+            stats = await get_columnar_cache().refresh(session, full=full)
+        if full:
+            self._last_full = now
+        return stats
+
+    async def stop(self) -> None:
+        self._stopped = True
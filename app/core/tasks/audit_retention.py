@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+
+from app.core.audit import write_audit_event
+from app.core.db import session_scope
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.core.time import utcnow
+from app.retro.rollups import refresh_retro_rollups
+from app.storage.audit_archive import (
+    archive_detached_partitions,
+    archive_expired_rows,
+    detach_expired_partitions,
+    ensure_audit_partitions,
+    retention_cutoff,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AuditRetentionWorker:
+    """Keeps ownerbot_audit_events bounded to the hot window and moves older months to the cold archive."""
+
+    LOCK_KEY = "ownerbot:audit_retention:lock"
+    LOCK_TTL_SECONDS = 3600
+    BATCH_SIZE = 5000
+
+    def __init__(self) -> None:
+        self._stopped = False
+
+    async def run_forever(self) -> None:
+        while not self._stopped:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await write_audit_event("audit_retention_failed", {"message": str(exc)[:200]})
+            await asyncio.sleep(get_settings().audit_retention_interval_sec)
+
+    async def tick(self, *, now: datetime | None = None) -> dict[str, object] | None:
+        redis = await get_redis()
+        token = str(uuid.uuid4())
+        if not await redis.set(self.LOCK_KEY, token, ex=self.LOCK_TTL_SECONDS, nx=True):
+            return None
+        try:
+            stats = await run_audit_retention(now=now)
+        finally:
+            try:
+                if await redis.get(self.LOCK_KEY) == token:
+                    await redis.delete(self.LOCK_KEY)
+            except Exception:
+                pass
+        if stats["failed_stages"]:
+            await write_audit_event("audit_retention_failed", {"failed_stages": stats["failed_stages"]})
+        if stats["partitions_archived"] or stats["rows_archived"] or stats["partitions_created"]:
+            await write_audit_event("audit_retention_finished", stats)
+        return stats
+
+    async def stop(self) -> None:
+        self._stopped = True
+
+
+async def run_audit_retention(*, now: datetime | None = None, session_factory=None) -> dict[str, object]:
+    settings = get_settings()
+    factory = session_factory or session_scope
+    now = now or utcnow()
+    cutoff = retention_cutoff(now, settings.audit_hot_retention_days)
+    batch_size = AuditRetentionWorker.BATCH_SIZE
+    stages = (
+        # Fold pending events into the retro rollups first so archived rows still count in reports.
+        ("rollups", lambda session: refresh_retro_rollups(session, now=now)),
+        ("partitions_created", lambda session: ensure_audit_partitions(session, now=now, months_ahead=settings.audit_partition_premake_months)),
+        ("partitions_detached", lambda session: detach_expired_partitions(session, cutoff=cutoff)),
+        ("partitions_archived", lambda session: archive_detached_partitions(session, archive_dir=settings.audit_archive_dir, batch_size=batch_size)),
+        ("rows_archived", lambda session: archive_expired_rows(session, archive_dir=settings.audit_archive_dir, cutoff=cutoff, batch_size=batch_size)),
+    )
+    results: dict[str, object] = {}
+    failed: list[str] = []
+    async with factory() as session:
+        # Stages are independent: a failed rollup refresh must not keep partitions from being created or archived.
+        for name, stage in stages:
+            try:
+                results[name] = await stage(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("audit_retention_stage_failed", extra={"stage": name})
+                failed.append(name)
+                await session.rollback()
+    archived = results.get("partitions_archived") or {}
+    return {
+        "cutoff": cutoff.isoformat(),
+        "partitions_created": results.get("partitions_created") or [],
+        "partitions_detached": results.get("partitions_detached") or [],
+        "partitions_archived": sorted(archived),
+        "partition_rows_archived": sum(archived.values()),
+        "rows_archived": results.get("rows_archived") or 0,
+        "failed_stages": failed,
+    }
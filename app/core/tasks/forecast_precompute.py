@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.core.audit import write_audit_event
+from app.core.db import session_scope
+from app.core.settings import get_settings
+from app.tools.impl._forecast_store import refresh_forecast_results
+
+
+class ForecastPrecomputeWorker:
+    """Keeps ownerbot_forecast_results current for the standard forecast presets (DEMO data only)."""
+
+    def __init__(self, session_factory=None) -> None:
+        self._session_factory = session_factory or session_scope
+        self._stopped = False
+
+    async def run_forever(self) -> None:
+        while not self._stopped:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await write_audit_event("forecast_precompute_failed", {"message": str(exc)[:200]})
+            await asyncio.sleep(get_settings().forecast_precompute_interval_sec)
+
+    async def tick(self) -> dict[str, int] | None:
+        if get_settings().upstream_mode != "DEMO":
+            return None
+        async with self._session_factory() as session:
+            stats = await refresh_forecast_results(session)
+        if stats["recomputed"] or stats["deleted"]:
+            await write_audit_event("forecast_precompute_finished", stats)
+        return stats
+
+    async def stop(self) -> None:
+        self._stopped = True
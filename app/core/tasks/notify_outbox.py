@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+
+from app.core.audit import write_audit_event
+from app.core.db import session_scope
+from app.core.settings import get_settings
+from app.notify.outbox import drain_outbox, outbox_wake_event, purge_delivered
+
+
+class NotifyOutboxWorker:
+    """Drains ownerbot_notify_outbox: the notify worker only records what to send, this loop sends it."""
+
+    PURGE_EVERY_TICKS = 100
+
+    def __init__(self, bot: Bot, session_factory=None) -> None:
+        self._bot = bot
+        self._session_factory = session_factory or session_scope
+        self._stopped = False
+        self._ticks = 0
+
+    async def run_forever(self) -> None:
+        while not self._stopped:
+            delivered = 0
+            try:
+                delivered = (await self.tick())["delivered"]
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await write_audit_event("notify_error", {"stage": "outbox", "message": str(exc)[:200]})
+            if delivered:
+                # A full batch probably left more rows behind: go again without sleeping.
+                continue
+            wake = outbox_wake_event()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=float(get_settings().notify_outbox_poll_sec))
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+
+    async def tick(self, *, now: datetime | None = None) -> dict[str, object]:
+        settings = get_settings()
+        now = now or datetime.now(timezone.utc)
+        async with self._session_factory() as session:
+            stats = await drain_outbox(
+                session,
+                self._bot,
+                batch_size=settings.notify_outbox_batch_size,
+                max_attempts=settings.notify_outbox_max_attempts,
+                now=now,
+            )
+            self._ticks += 1
+            if self._ticks % self.PURGE_EVERY_TICKS == 1:
+                retention_days = settings.notify_outbox_retention_days
+                await purge_delivered(session, older_than=now - timedelta(days=retention_days))
+        for dead in stats["dead"]:
+            await write_audit_event("notify_outbox_dead", dead)
+        return stats
+
+    async def stop(self) -> None:
+        self._stopped = True
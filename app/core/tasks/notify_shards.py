@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import math
+import time
+import uuid
+import zlib
+
+SHARD_LEASE_KEY_PREFIX = "ownerbot:notify:shard:"
+MEMBERS_KEY = "ownerbot:notify:members"
+
+# Compare-and-expire / compare-and-delete: a lease that expired and was claimed by another replica
+# between a GET and the EXPIRE/DEL must not be extended or dropped by its previous holder.
+RENEW_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def owner_shard(owner_id: int, shard_count: int) -> int:
+    # crc32 rather than hash(): the mapping must be identical in every replica process.
+    return zlib.crc32(str(owner_id).encode()) % max(1, shard_count)
+
+
+def fair_share(shard_count: int, replicas: int) -> int:
+    return math.ceil(shard_count / max(1, replicas))
+
+
+class ShardLeases:
+    """Per-shard Redis leases for NotifyWorker replicas.
+
+    Every replica heartbeats its membership and renews the shards it holds; a replica that
+    dies stops renewing, its leases expire after ``lease_ttl_sec`` and the survivors claim
+    them on their next heartbeat. Each replica keeps at most its fair share of shards, so a
+    new replica picks up the shards others release at the start of their next tick.
+    """
+
+    def __init__(self, *, shard_count: int, lease_ttl_sec: int, replica_id: str | None = None) -> None:
+        self.shard_count = max(1, int(shard_count))
+        self.lease_ttl_sec = max(3, int(lease_ttl_sec))
+        self.replica_id = replica_id or uuid.uuid4().hex
+        self.held: set[int] = set()
+
+    @property
+    def renew_interval_sec(self) -> float:
+        return self.lease_ttl_sec / 3
+
+    def owns(self, owner_id: int) -> bool:
+        return owner_shard(owner_id, self.shard_count) in self.held
+
+    def _key(self, shard: int) -> str:
+        return f"{SHARD_LEASE_KEY_PREFIX}{shard}"
+
+    async def _live_replicas(self, redis) -> int:
+        now = time.time()
+        try:
+            await redis.zadd(MEMBERS_KEY, {self.replica_id: now})
+            await redis.zremrangebyscore(MEMBERS_KEY, "-inf", now - self.lease_ttl_sec)
+            return max(1, int(await redis.zcard(MEMBERS_KEY)))
+        except Exception:
+            # Without membership data behave as the only replica: leases still keep shards exclusive.
+            return 1
+
+    async def _renew(self, redis) -> None:
+        for shard in sorted(self.held):
+            if not await redis.eval(RENEW_LEASE_SCRIPT, 1, self._key(shard), self.replica_id, self.lease_ttl_sec):
+                self.held.discard(shard)
+
+    async def _release(self, redis, shard: int) -> None:
+        self.held.discard(shard)
+        await redis.eval(RELEASE_LEASE_SCRIPT, 1, self._key(shard), self.replica_id)
+
+    async def heartbeat(self, redis, *, rebalance: bool = False) -> set[int]:
+        """Renews held leases and claims free shards up to the fair share; returns newly claimed shards.
+
+        With ``rebalance`` the surplus over the fair share is released first. Callers pass it only
+        between ticks, so a shard is never handed over while its owners are being processed.
+        """
+        await self._renew(redis)
+        share = fair_share(self.shard_count, await self._live_replicas(redis))
+        if rebalance:
+            for shard in sorted(self.held, reverse=True)[: max(0, len(self.held) - share)]:
+                await self._release(redis, shard)
+
+        claimed: set[int] = set()
+        # Replicas scan from different offsets so they do not all race for shard 0 first.
+        start = zlib.crc32(self.replica_id.encode()) % self.shard_count
+        for step in range(self.shard_count):
+            if len(self.held) >= share:
+                break
+            shard = (start + step) % self.shard_count
+            if shard in self.held:
+                continue
+            if await redis.set(self._key(shard), self.replica_id, ex=self.lease_ttl_sec, nx=True):
+                self.held.add(shard)
+                claimed.add(shard)
+        return claimed
+
+    async def release_all(self, redis) -> None:
+        for shard in sorted(self.held):
+            await self._release(redis, shard)
+        try:
+            await redis.zrem(MEMBERS_KEY, self.replica_id)
+        except Exception:
+            return
@@ -1,18 +1,19 @@
 from __future__ import annotations
 
 import asyncio
-import uuid
-from dataclasses import dataclass
+import time
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 from aiogram import Bot
-from aiogram.types import BufferedInputFile
 
+from app.core.artifact_cache import render_cached, send_artifact
 from app.core.audit import write_audit_event
 from app.core.db import session_scope
+from app.core.outbound import SendPriority, get_outbound_dispatcher, send_priority
 from app.core.redis import get_redis
 from app.core.settings import get_settings
+from app.core.tasks.notify_shards import ShardLeases
 from app.notify import (
     NotificationSettingsService,
     build_daily_digest,
@@ -38,48 +39,189 @@ from app.notify import (
     make_critical_event_key,
     should_send_escalation,
 )
+from app.notify.outbox import OutboxMessage, enqueue_notification, outbox_wake_event
+from app.notify.schedule import NotifySchedule, due_owner_ids, next_due_at, seconds_until_next, wake_event
+from app.notify.tick_cache import call_tool, tick_cache_scope
 from app.tools.impl import kpi_compare, sis_fx_status
 
 
-@dataclass
-class LockResult:
-    acquired: bool
-    token: str
-
-
 class NotifyWorker:
     CHECK_INTERVAL_SECONDS = 300
-    LOCK_KEY = "ownerbot:notify:lock"
-    LOCK_TTL_SECONDS = 900
 
     def __init__(self, bot: Bot) -> None:
         self._bot = bot
         self._stopped = False
-        self._chat_last_send_ts: dict[int, float] = {}
+        self._leases: ShardLeases | None = None
+        self._owner_locks: dict[int, asyncio.Lock] = {}
 
     async def run_forever(self) -> None:
-        while not self._stopped:
+        lease_task = asyncio.create_task(self._lease_loop(), name="notify-shard-leases")
+        try:
+            while not self._stopped:
+                delay: float = self.CHECK_INTERVAL_SECONDS
+                try:
+                    delay = await self.run_due()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    await write_audit_event("notify_error", {"stage": "tick", "message": str(exc)[:200]})
+                wake = wake_event()
+                try:
+                    # Settings changes through the ntf_* tools set the event and cut the sleep short.
+                    await asyncio.wait_for(wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+        finally:
+            lease_task.cancel()
             try:
-                await self.tick()
+                await lease_task
             except asyncio.CancelledError:
-                raise
-            except Exception as exc:
-                await write_audit_event("notify_error", {"stage": "tick", "message": str(exc)[:200]})
-            await asyncio.sleep(self.CHECK_INTERVAL_SECONDS)
+                pass
+            # Hand the shards over right away instead of letting other replicas wait out the lease TTL.
+            try:
+                await self._shard_leases().release_all(await get_redis())
+            except Exception:
+                pass
 
-    async def tick(self) -> None:
-        lock = await self._acquire_lock()
-        if not lock.acquired:
-            return
+    async def run_due(self) -> float:
+        """Processes only the owners whose due time has come; returns seconds until the next one."""
+        settings = get_settings()
+        owner_ids = list(settings.owner_ids)
         try:
+            schedule = NotifySchedule(await get_redis())
+            scores = await schedule.load(owner_ids)
+        except Exception:
+            # Without the sorted set fall back to the old behaviour: everyone, every CHECK_INTERVAL_SECONDS.
+            await self.tick()
+            return self.CHECK_INTERVAL_SECONDS
+        due = due_owner_ids(scores, now_ts=time.time())
+        if due:
+            # tick() keeps only the owners of shards this replica holds.
+            await self.tick(owner_ids=due)
+            scores = await schedule.load(owner_ids)
+        leases = self._shard_leases()
+        owned = {owner_id: score for owner_id, score in scores.items() if leases.owns(owner_id)}
+        max_sleep = float(settings.notify_scheduler_max_sleep_sec)
+        return seconds_until_next(owned, now_ts=time.time(), max_sleep_sec=max_sleep)
+
+    async def tick(self, owner_ids: list[int] | None = None) -> None:
+        leases = self._shard_leases()
+        await self._heartbeat_shards(rebalance=True)
+        candidates = list(get_settings().owner_ids) if owner_ids is None else owner_ids
+        owner_ids = [owner_id for owner_id in candidates if leases.owns(owner_id)]
+        if not owner_ids:
+            return
+        # Owners share one snapshot of the shop per tick: identical tool calls run once, not once per owner.
+        with tick_cache_scope(), send_priority(SendPriority.DIGEST):
+            dues = await self._process_owners(owner_ids)
+        await self._store_schedule(dues)
+        if self._outbox_enabled():
+            outbox_wake_event().set()
+
+    async def react_to_events(self, triggers: set[str], *, rearm_others: bool = True) -> None:
+        """Runs the checks SIS events point at (fx apply, ops alerts, escalation) now instead of at the next poll.
+
+        The consuming replica also marks other replicas' owners due; those replicas react right away on the
+        broadcast (``rearm_others=False``), the due mark only covers a lost broadcast.
+        """
+        if not triggers:
+            return
+        leases = self._shard_leases()
+        owner_ids = list(get_settings().owner_ids)
+        others = [owner_id for owner_id in owner_ids if not leases.owns(owner_id)]
+        if others and rearm_others:
+            now_utc = datetime.now(timezone.utc)
+            await self._store_schedule({owner_id: now_utc for owner_id in others})
+        owned = [owner_id for owner_id in owner_ids if leases.owns(owner_id)]
+        if not owned:
+            return
+        with tick_cache_scope(), send_priority(SendPriority.DIGEST):
+            await self._process_owners(owned, process=lambda owner_id: self._react_owner(owner_id, triggers))
+        if self._outbox_enabled():
+            outbox_wake_event().set()
+
+    def _owner_lock(self, owner_id: int) -> asyncio.Lock:
+        # Event reactions and the scheduled pass must not evaluate the same owner's state concurrently.
+        lock = self._owner_locks.get(owner_id)
+        if lock is None:
+            lock = self._owner_locks[owner_id] = asyncio.Lock()
+        return lock
+
+    def _shard_leases(self) -> ShardLeases:
+        if self._leases is None:
             settings = get_settings()
-            for owner_id in settings.owner_ids:
-                await self._process_owner(owner_id)
-        finally:
-            await self._release_lock(lock.token)
+            self._leases = ShardLeases(
+                shard_count=settings.notify_shard_count,
+                lease_ttl_sec=settings.notify_shard_lease_ttl_sec,
+            )
+        return self._leases
+
+    async def _heartbeat_shards(self, *, rebalance: bool = False) -> set[int]:
+        leases = self._shard_leases()
+        before = set(leases.held)
+        claimed = await leases.heartbeat(await get_redis(), rebalance=rebalance)
+        if leases.held != before:
+            await write_audit_event(
+                "notify_shards_changed",
+                {"replica_id": leases.replica_id, "held": sorted(leases.held), "shard_count": leases.shard_count},
+            )
+        return claimed
 
-    async def _process_owner(self, owner_id: int) -> None:
-        async with session_scope() as session:
+    async def _lease_loop(self) -> None:
+        while True:
+            try:
+                if await self._heartbeat_shards():
+                    # Shards taken over from a dead replica may have owners that are already due.
+                    wake_event().set()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(self._shard_leases().renew_interval_sec)
+
+    async def _process_owners(self, owner_ids: list[int], process=None) -> dict[int, datetime | None]:
+        settings = get_settings()
+        process = process or self._process_owner
+        limit = asyncio.Semaphore(max(1, settings.notify_owner_concurrency))
+        timeout = float(settings.notify_owner_timeout_sec)
+        dues: dict[int, datetime | None] = {}
+
+        async def _guarded(owner_id: int) -> None:
+            # Each owner runs in its own session; a slow or failing owner only loses its own turn.
+            async with limit:
+                try:
+                    dues[owner_id] = await asyncio.wait_for(process(owner_id), timeout=timeout)
+                    return
+                except asyncio.TimeoutError:
+                    await write_audit_event("notify_error", {"stage": "owner_timeout", "owner_id": owner_id, "timeout_sec": timeout})
+                except Exception as exc:
+                    await write_audit_event("notify_error", {"stage": "owner", "owner_id": owner_id, "message": str(exc)[:200]})
+                # Failed owners are retried after one condition poll instead of waiting for their next digest.
+                dues[owner_id] = self._poll_due()
+
+        await asyncio.gather(*(_guarded(owner_id) for owner_id in owner_ids))
+        return dues
+
+    def _poll_interval_sec(self) -> int:
+        settings = get_settings()
+        if settings.notify_events_enabled:
+            # SIS events trigger the checks; polling only reconciles missed events.
+            return settings.notify_events_reconcile_sec
+        return settings.notify_condition_poll_sec
+
+    def _poll_due(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self._poll_interval_sec())
+
+    async def _store_schedule(self, dues: dict[int, datetime | None]) -> None:
+        try:
+            await NotifySchedule(await get_redis()).store(dues, now_utc=datetime.now(timezone.utc))
+        except Exception:
+            # Best effort: owners missing from the schedule are treated as due on the next pass.
+            return
+
+    async def _process_owner(self, owner_id: int) -> datetime | None:
+        async with self._owner_lock(owner_id), session_scope() as session:
             notify_settings = await NotificationSettingsService.get_or_create(session, owner_id)
             fx_status_response = None
             ops_snapshot = None
@@ -93,7 +235,8 @@ class NotifyWorker:
                 )
             )
             if needs_fx_status:
-                fx_status_response = await sis_fx_status.handle(
+                fx_status_response = await call_tool(
+                    sis_fx_status,
                     sis_fx_status.Payload(),
                     correlation_id=f"notify-fx-{owner_id}",
                     session=session,
@@ -131,12 +274,45 @@ class NotifyWorker:
             if notify_settings.weekly_enabled:
                 await self._maybe_send_weekly(owner_id, notify_settings, session)
 
+            return next_due_at(notify_settings, datetime.now(timezone.utc), poll_interval_sec=self._poll_interval_sec())
+
+    async def _react_owner(self, owner_id: int, triggers: set[str]) -> None:
+        async with self._owner_lock(owner_id), session_scope() as session:
+            notify_settings = await NotificationSettingsService.get_or_create(session, owner_id)
+            escalation_enabled = bool(getattr(notify_settings, "escalation_enabled", False))
+            fx_apply = "fx_apply" in triggers and bool(notify_settings.fx_apply_events_enabled)
+            ops_alerts = "ops" in triggers and bool(notify_settings.ops_alerts_enabled)
+
+            fx_status_response = None
+            if fx_apply or (escalation_enabled and bool(getattr(notify_settings, "escalation_on_fx_failed", True))):
+                fx_status_response = await call_tool(
+                    sis_fx_status,
+                    sis_fx_status.Payload(),
+                    correlation_id=f"notify-event-fx-{owner_id}",
+                    session=session,
+                )
+            if fx_apply:
+                await self._maybe_send_fx_apply_event(owner_id, notify_settings, session, fx_status_response)
+
+            ops_snapshot = None
+            if ops_alerts or escalation_enabled:
+                ops_snapshot = await build_ops_snapshot(
+                    session,
+                    correlation_id=f"notify-event-ops-{owner_id}",
+                    rules=self._ops_rules_from_settings(notify_settings),
+                )
+            if ops_alerts and ops_snapshot is not None:
+                await self._maybe_send_ops_alert(owner_id, notify_settings, session, ops_snapshot)
+            if escalation_enabled:
+                await self._maybe_send_escalation(owner_id, notify_settings, session, ops_snapshot=ops_snapshot, fx_status_response=fx_status_response)
+        return None
+
     async def _maybe_send_fx_delta(self, owner_id: int, notify_settings, session, fx_status_response) -> None:
         now = datetime.now(timezone.utc)
         try:
             response = fx_status_response
             if response is None:
-                response = await sis_fx_status.handle(sis_fx_status.Payload(), correlation_id=f"notify-fx-{owner_id}", session=session)
+                response = await call_tool(sis_fx_status, sis_fx_status.Payload(), correlation_id=f"notify-fx-{owner_id}", session=session)
             if response.status != "ok":
                 await self._notify_error_with_cooldown(notify_settings, session, owner_id, "fx_status_error")
                 return
@@ -155,7 +331,14 @@ class NotifyWorker:
             new_rate = float(snapshot.effective_rate or 0)
             delta_pct = ((new_rate - old_rate) / old_rate * 100) if old_rate else 0.0
             message = f"🔔 FX delta: {old_rate:.4f} → {new_rate:.4f} ({delta_pct:+.2f}%)"
-            sent = await self._safe_send_message(owner_id, message)
+            last_notified_at = notify_settings.fx_delta_last_notified_at
+            sent = await self._deliver(
+                session,
+                owner_id,
+                notification="fx_delta",
+                dedupe_key=f"fx_delta:{owner_id}:{last_notified_at.isoformat() if last_notified_at else 'first'}",
+                messages=[OutboxMessage.message(message)],
+            )
             if not sent:
                 return
 
@@ -176,7 +359,7 @@ class NotifyWorker:
         try:
             response = fx_status_response
             if response is None:
-                response = await sis_fx_status.handle(sis_fx_status.Payload(), correlation_id=f"notify-fx-{owner_id}", session=session)
+                response = await call_tool(sis_fx_status, sis_fx_status.Payload(), correlation_id=f"notify-fx-{owner_id}", session=session)
             if response.status != "ok":
                 await self._notify_error_with_cooldown(notify_settings, session, owner_id, "fx_apply_status_error")
                 return
@@ -209,7 +392,13 @@ class NotifyWorker:
                 return
 
             message = self._format_fx_apply_message(last_apply, str(notify_settings.digest_tz or "Europe/Berlin"))
-            sent = await self._safe_send_message(owner_id, message)
+            sent = await self._deliver(
+                session,
+                owner_id,
+                notification="fx_apply",
+                dedupe_key=f"fx_apply:{owner_id}:{event_key}",
+                messages=[OutboxMessage.message(message)],
+            )
             if not sent:
                 return
 
@@ -280,7 +469,15 @@ class NotifyWorker:
             return
 
         message = self._format_ops_alert_message(ops_snapshot, str(notify_settings.digest_tz or "Europe/Berlin"), reasons)
-        sent = await self._safe_send_message(owner_id, message)
+        # The same event may legitimately repeat after the cooldown, so the previous send time is part of the key.
+        last_sent_at = notify_settings.ops_alerts_last_sent_at
+        sent = await self._deliver(
+            session,
+            owner_id,
+            notification="ops_alert",
+            dedupe_key=f"ops:{owner_id}:{event_key}:{last_sent_at.isoformat() if last_sent_at else 'first'}",
+            messages=[OutboxMessage.message(message)],
+        )
         if not sent:
             return
 
@@ -441,7 +638,14 @@ class NotifyWorker:
             return
 
         message = self._format_escalation_message(snapshot, stage)
-        sent = await self._safe_send_message(owner_id, message)
+        repeat_count = int(getattr(notify_settings, "escalation_repeat_count", 0) or 0)
+        sent = await self._deliver(
+            session,
+            owner_id,
+            notification="escalation",
+            dedupe_key=f"escalation:{owner_id}:{event_key}:{repeat_count}",
+            messages=[OutboxMessage.message(message)],
+        )
         if not sent:
             return
 
@@ -508,7 +712,8 @@ class NotifyWorker:
 
             precheck_kpi = {}
             try:
-                kpi_res = await kpi_compare.handle(
+                kpi_res = await call_tool(
+                    kpi_compare,
                     kpi_compare.Payload(preset="wow"),
                     correlation_id=f"notify-digest-quiet-precheck-{owner_id}-kpi",
                     session=session,
@@ -531,7 +736,8 @@ class NotifyWorker:
                     rules=self._ops_rules_from_settings(notify_settings),
                 )
             if digest_include_fx and fx_status_response is None:
-                fx_status_response = await sis_fx_status.handle(
+                fx_status_response = await call_tool(
+                    sis_fx_status,
                     sis_fx_status.Payload(),
                     correlation_id=f"notify-fx-digest-precheck-{owner_id}",
                     session=session,
@@ -573,20 +779,25 @@ class NotifyWorker:
         bundle = await build_daily_digest(owner_id, session, correlation_id=f"notify-digest-{owner_id}", ops_snapshot=ops_snapshot)
         digest_format = normalize_digest_format(notify_settings.digest_format)
 
-        send_ok = await self._safe_send_message(owner_id, bundle.text)
-        if not send_ok:
-            return
+        messages = [OutboxMessage.message(bundle.text)]
         try:
             if digest_format == "png":
-                png = render_revenue_trend_png(bundle.series, "Daily revenue trend", str(notify_settings.digest_tz))
-                send_ok = await self._safe_send_photo(owner_id, png, "Daily digest chart")
+                png = await render_cached(render_revenue_trend_png, bundle.series, "Daily revenue trend", str(notify_settings.digest_tz))
+                messages.append(OutboxMessage.photo(png, "Daily digest chart"))
             elif digest_format == "pdf":
-                pdf = render_weekly_pdf(bundle)
-                send_ok = await self._safe_send_document(owner_id, pdf, filename="daily_digest.pdf", caption="Daily digest PDF")
+                pdf = await render_cached(render_weekly_pdf, bundle)
+                messages.append(OutboxMessage.document(pdf, filename="daily_digest.pdf", caption="Daily digest PDF"))
         except Exception as exc:
             await write_audit_event("notify_digest_render_failed", {"owner_id": owner_id, "format": digest_format, "message": str(exc)[:200]})
             return
 
+        send_ok = await self._deliver(
+            session,
+            owner_id,
+            notification="digest",
+            dedupe_key=f"digest:{owner_id}:{now_local.date().isoformat()}",
+            messages=messages,
+        )
         if not send_ok:
             return
 
@@ -615,22 +826,56 @@ class NotifyWorker:
 
         bundle = await build_weekly_digest(owner_id, session, correlation_id=f"notify-weekly-{owner_id}")
         try:
-            pdf = render_weekly_pdf(bundle)
+            pdf = await render_cached(render_weekly_pdf, bundle)
         except Exception as exc:
             await write_audit_event("notify_weekly_render_failed", {"owner_id": owner_id, "message": str(exc)[:200]})
             return
 
-        sent_doc = await self._safe_send_document(owner_id, pdf, filename="weekly_report.pdf", caption="📅 Weekly report")
-        if not sent_doc:
-            return
-        sent_msg = await self._safe_send_message(owner_id, bundle.text)
-        if not sent_msg:
+        iso_year, iso_week, _ = now_local.isocalendar()
+        sent = await self._deliver(
+            session,
+            owner_id,
+            notification="weekly",
+            dedupe_key=f"weekly:{owner_id}:{iso_year}-W{iso_week:02d}",
+            messages=[
+                OutboxMessage.document(pdf, filename="weekly_report.pdf", caption="📅 Weekly report"),
+                OutboxMessage.message(bundle.text),
+            ],
+        )
+        if not sent:
             return
 
         notify_settings.weekly_last_sent_at = now_utc
         await session.commit()
         await write_audit_event("notify_weekly_sent", {"owner_id": owner_id, "week": str(now_local.isocalendar()[:2])[:200]})
 
+    @staticmethod
+    def _outbox_enabled() -> bool:
+        return get_settings().notify_outbox_enabled
+
+    async def _deliver(self, session, owner_id: int, *, notification: str, dedupe_key: str, messages: list[OutboxMessage]) -> bool:
+        """Queues the messages in the outbox (committed with the caller's state update) or sends them directly."""
+        if self._outbox_enabled():
+            await enqueue_notification(
+                session,
+                owner_id=owner_id,
+                chat_id=owner_id,
+                notification=notification,
+                dedupe_key=dedupe_key,
+                messages=messages,
+            )
+            return True
+        for item in messages:
+            if item.kind == "photo":
+                ok = await self._safe_send_photo(owner_id, item.content, item.text or "")
+            elif item.kind == "document":
+                ok = await self._safe_send_document(owner_id, item.content, filename=item.filename or "document.pdf", caption=item.text or "")
+            else:
+                ok = await self._safe_send_message(owner_id, item.text or "")
+            if not ok:
+                return False
+        return True
+
     async def _safe_send_message(self, chat_id: int, text: str, max_retries: int = 3) -> bool:
         async def _sender():
             await self._bot.send_message(chat_id=chat_id, text=text, disable_notification=False)
@@ -639,43 +884,24 @@ class NotifyWorker:
 
     async def _safe_send_document(self, chat_id: int, content: bytes, filename: str, caption: str, max_retries: int = 3) -> bool:
         async def _sender():
-            await self._bot.send_document(chat_id=chat_id, document=BufferedInputFile(content, filename=filename), caption=caption)
+            await send_artifact(self._bot, chat_id, "document", content, filename=filename, caption=caption)
 
         return await self._safe_send_with_retry(chat_id, _sender, max_retries=max_retries)
 
     async def _safe_send_photo(self, chat_id: int, content: bytes, caption: str, max_retries: int = 3) -> bool:
         async def _sender():
-            await self._bot.send_photo(chat_id=chat_id, photo=BufferedInputFile(content, filename="digest.png"), caption=caption)
+            await send_artifact(self._bot, chat_id, "photo", content, filename="digest.png", caption=caption)
 
         return await self._safe_send_with_retry(chat_id, _sender, max_retries=max_retries)
 
     async def _safe_send_with_retry(self, chat_id: int, sender, max_retries: int = 3) -> bool:
-        loop = asyncio.get_running_loop()
-        last_sent = self._chat_last_send_ts.get(chat_id)
-        if last_sent is not None:
-            wait = 1.0 - (loop.time() - last_sent)
-            if wait > 0:
-                await asyncio.sleep(wait)
-
-        for attempt in range(max_retries):
-            try:
-                await sender()
-                self._chat_last_send_ts[chat_id] = loop.time()
-                return True
-            except Exception as exc:
-                retry_after = getattr(exc, "retry_after", None)
-                if retry_after is None and hasattr(exc, "message") and isinstance(exc.message, str):
-                    parts = exc.message.split("retry after ")
-                    if len(parts) > 1:
-                        token = parts[-1].split()[0]
-                        if token.isdigit():
-                            retry_after = int(token)
-                if retry_after is not None and attempt < max_retries - 1:
-                    await asyncio.sleep(float(retry_after))
-                    continue
-                await write_audit_event("notify_error", {"stage": "send", "chat_id": chat_id, "message": str(exc)[:200]})
-                return False
-        return False
+        # Rate limits and RetryAfter waits are handled by the shared outbound dispatcher.
+        try:
+            await get_outbound_dispatcher().send(chat_id, sender, max_retries=max_retries)
+        except Exception as exc:
+            await write_audit_event("notify_error", {"stage": "send", "chat_id": chat_id, "message": str(exc)[:200]})
+            return False
+        return True
 
     async def _notify_error_with_cooldown(self, notify_settings, session, owner_id: int, message: str) -> None:
         now = datetime.now(timezone.utc)
@@ -685,20 +911,5 @@ class NotifyWorker:
         await session.commit()
         await write_audit_event("notify_error", {"owner_id": owner_id, "message": message[:200]})
 
-    async def _acquire_lock(self) -> LockResult:
-        redis = await get_redis()
-        token = str(uuid.uuid4())
-        acquired = await redis.set(self.LOCK_KEY, token, ex=self.LOCK_TTL_SECONDS, nx=True)
-        return LockResult(acquired=bool(acquired), token=token)
-
-    async def _release_lock(self, token: str) -> None:
-        redis = await get_redis()
-        try:
-            current = await redis.get(self.LOCK_KEY)
-            if current == token:
-                await redis.delete(self.LOCK_KEY)
-        except Exception:
-            return
-
     async def stop(self) -> None:
         self._stopped = True
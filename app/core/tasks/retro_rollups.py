@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.core.audit import write_audit_event
+from app.core.db import session_scope
+from app.core.settings import get_settings
+from app.retro.rollups import refresh_retro_rollups
+
+
+class RetroRollupWorker:
+    """Folds new audit events into the hourly retro rollups so retro tools only read them."""
+
+    def __init__(self, session_factory=None) -> None:
+        self._session_factory = session_factory or session_scope
+        self._stopped = False
+
+    async def run_forever(self) -> None:
+        while not self._stopped:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await write_audit_event("retro_rollup_failed", {"message": str(exc)[:200]})
+            await asyncio.sleep(get_settings().retro_rollup_refresh_sec)
+
+    async def tick(self) -> int:
+        # Replicas may tick at once: the watermark moves by compare-and-set, so each event is folded once.
+        async with self._session_factory() as session:
+            return await refresh_retro_rollups(session)
+
+    async def stop(self) -> None:
+        self._stopped = True
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any
+
+from app.core.audit import write_audit_event
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.notify.events import BROADCAST_CHANNEL, SisEvent, count_events, ensure_group, parse_entry, triggers_for
+from app.upstream.read_cache import invalidate_for_events
+
+logger = logging.getLogger(__name__)
+
+
+class SisEventConsumer:
+    """Reads SIS events from a Redis Streams consumer group and makes the notify worker react within seconds.
+
+    Each event is delivered to one replica of the group. Entries are acknowledged after the reaction;
+    entries left pending by a dead consumer are claimed after ``CLAIM_IDLE_MS``. The consuming replica then
+    publishes the batch on ``BROADCAST_CHANNEL`` so every other replica drops its in-process cache entries
+    and reacts for the owners of its own shards.
+    """
+
+    READ_COUNT = 100
+    CLAIM_IDLE_MS = 60_000
+    ERROR_BACKOFF_SECONDS = 5
+
+    def __init__(self, notify_worker, *, consumer_name: str | None = None) -> None:
+        settings = get_settings()
+        self._worker = notify_worker
+        self._stream = settings.notify_events_stream
+        self._group = settings.notify_events_group
+        self._block_ms = settings.notify_events_block_ms
+        self._consumer = consumer_name or uuid.uuid4().hex
+        self._stopped = False
+        self._group_ready = False
+        self._stats: dict[str, Any] = {
+            "received": 0,
+            "acked": 0,
+            "claimed": 0,
+            "batches": 0,
+            "broadcasts_sent": 0,
+            "broadcasts_received": 0,
+            "lag_ms_last": None,
+            "lag_ms_max": 0,
+        }
+
+    async def run_forever(self) -> None:
+        listen_task = asyncio.create_task(self._listen_forever(), name="sis-events-broadcast")
+        try:
+            while not self._stopped:
+                try:
+                    await self.poll_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    self._group_ready = False
+                    await write_audit_event("notify_error", {"stage": "sis_events", "message": str(exc)[:200]})
+                    await asyncio.sleep(self.ERROR_BACKOFF_SECONDS)
+        finally:
+            listen_task.cancel()
+            try:
+                await listen_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _listen_forever(self) -> None:
+        while not self._stopped:
+            pubsub = None
+            try:
+                pubsub = (await get_redis()).pubsub()
+                await pubsub.subscribe(BROADCAST_CHANNEL)
+                while not self._stopped:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        await self.handle_broadcast(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await write_audit_event("notify_error", {"stage": "sis_events_broadcast", "message": str(exc)[:200]})
+                await asyncio.sleep(self.ERROR_BACKOFF_SECONDS)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    async def handle_broadcast(self, data: Any) -> None:
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(message, dict) or message.get("origin") == self._consumer:
+            return
+        self._stats["broadcasts_received"] += 1
+        # The publishing replica already cleared Redis and marked our owners due; we only catch up locally.
+        await invalidate_for_events(settings=get_settings(), event_types=set(message.get("event_types") or []), local_only=True)
+        await self._worker.react_to_events(set(message.get("triggers") or []), rearm_others=False)
+
+    async def _broadcast(self, redis, events: list[SisEvent]) -> None:
+        message = {"origin": self._consumer, "event_types": sorted({event.type for event in events}), "triggers": sorted(triggers_for(events))}
+        try:
+            await redis.publish(BROADCAST_CHANNEL, json.dumps(message))
+        except Exception:
+            # Other replicas still pick their owners up from the due marks on their next pass.
+            logger.warning("sis_events_broadcast_failed")
+            return
+        self._stats["broadcasts_sent"] += 1
+
+    async def poll_once(self) -> int:
+        redis = await get_redis()
+        if not self._group_ready:
+            await ensure_group(redis, stream=self._stream, group=self._group)
+            self._group_ready = True
+            # Our own entries still pending from before a restart come first.
+            await self._handle(redis, await self._read(redis, "0", block_ms=None))
+            await self._claim_stale(redis)
+        handled = await self._handle(redis, await self._read(redis, ">", block_ms=self._block_ms))
+        if not handled:
+            await self._claim_stale(redis)
+        return handled
+
+    async def _read(self, redis, start: str, *, block_ms: int | None) -> list[SisEvent]:
+        response = await redis.xreadgroup(self._group, self._consumer, {self._stream: start}, count=self.READ_COUNT, block=block_ms)
+        events: list[SisEvent] = []
+        for _stream, entries in response or []:
+            events.extend(parse_entry(entry_id, fields) for entry_id, fields in entries if fields)
+        return events
+
+    async def _claim_stale(self, redis) -> None:
+        try:
+            result = await redis.xautoclaim(self._stream, self._group, self._consumer, min_idle_time=self.CLAIM_IDLE_MS, start_id="0-0", count=self.READ_COUNT)
+        except Exception:
+            return
+        entries = result[1] if isinstance(result, (list, tuple)) and len(result) > 1 else []
+        events = [parse_entry(entry_id, fields) for entry_id, fields in entries if fields]
+        self._stats["claimed"] += len(events)
+        await self._handle(redis, events)
+
+    async def _handle(self, redis, events: list[SisEvent]) -> int:
+        if not events:
+            return 0
+        self._stats["received"] += len(events)
+        self._stats["batches"] += 1
+        try:
+            await count_events(redis, events)
+        except Exception:
+            pass
+        await invalidate_for_events(settings=get_settings(), event_types={event.type for event in events})
+        # A burst of events collapses into one reaction per trigger kind.
+        await self._worker.react_to_events(triggers_for(events))
+        await self._broadcast(redis, events)
+        await redis.xack(self._stream, self._group, *[event.entry_id for event in events])
+        self._stats["acked"] += len(events)
+        now_ms = int(time.time() * 1000)
+        published = [event.published_at_ms for event in events if event.published_at_ms is not None]
+        if published:
+            lag_ms = max(0, now_ms - min(published))
+            self._stats["lag_ms_last"] = lag_ms
+            self._stats["lag_ms_max"] = max(self._stats["lag_ms_max"], lag_ms)
+        return len(events)
+
+    def stats(self) -> dict[str, Any]:
+        return {"consumer": self._consumer, "stream": self._stream, **self._stats}
+
+    async def stop(self) -> None:
+        self._stopped = True
+
+
+_CONSUMER: SisEventConsumer | None = None
+
+
+def register_sis_event_consumer(consumer: SisEventConsumer | None) -> None:
+    global _CONSUMER
+    _CONSUMER = consumer
+
+
+def sis_event_stats() -> dict[str, Any]:
+    return _CONSUMER.stats() if _CONSUMER is not None else {}
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+from app.actions.capabilities import refresh_capabilities_if_due
+from app.core.audit import write_audit_event
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.upstream.health import UpstreamHealth, health_policy, health_ttl_sec, record_ping
+from app.upstream.sis_client import SisClient
+
+
+class UpstreamHealthMonitor:
+    """Pings SIS on its own cadence and keeps the EWMA health state that AUTO mode reads."""
+
+    LOCK_KEY = "ownerbot:upstream_health:lock"
+
+    def __init__(self) -> None:
+        self._stopped = False
+
+    async def run_forever(self) -> None:
+        while not self._stopped:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await write_audit_event("upstream_health_check_failed", {"message": str(exc)[:200]})
+            await asyncio.sleep(get_settings().upstream_health_interval_sec)
+
+    async def tick(self) -> UpstreamHealth | None:
+        settings = get_settings()
+        if not settings.sis_base_url:
+            return None
+        redis = await get_redis()
+        # The lock is left to expire: it rate-limits pings to one per interval across all replicas.
+        lock_ttl = max(1, settings.upstream_health_interval_sec - 1)
+        if not await redis.set(self.LOCK_KEY, str(uuid.uuid4()), ex=lock_ttl, nx=True):
+            return None
+
+        correlation_id = f"upstream-health-{uuid.uuid4()}"
+        state, flipped = await record_ping(
+            redis,
+            ping=lambda: SisClient(settings).ping(correlation_id),
+            policy=health_policy(settings),
+            ttl_sec=health_ttl_sec(settings),
+        )
+        if flipped:
+            payload = {
+                "mode": "AUTO",
+                "availability": round(state.availability, 3),
+                "latency_ms": int(state.latency_ms) if state.latency_ms is not None else None,
+                "error_class": state.last_error_code,
+            }
+            event_type = "upstream_recovered" if state.available else "upstream_unavailable"
+            await write_audit_event(event_type, payload, correlation_id=correlation_id)
+        if state.available:
+            # Refresh-ahead for the capability report, so tool guards keep reading it from Redis.
+            await refresh_capabilities_if_due(settings=settings, correlation_id=correlation_id)
+        return state
+
+    async def stop(self) -> None:
+        self._stopped = True
@@ -9,12 +9,14 @@ from typing import Any
 from app.bot.services.tool_runner import run_tool
 from app.core.audit import write_audit_event
 from app.core.db import check_db
+from app.core.http import http_pool_stats
 from app.core.preflight import preflight_validate_settings
 from app.core.redis import check_redis
 from app.diagnostics.diff import DiffItem, collect_differences
 from app.tools.contracts import ToolActor, ToolResponse, ToolTenant
 from app.tools.providers.sis_gateway import run_sis_tool
 from app.tools.registry_setup import build_registry
+from app.upstream.circuit_breaker import circuit_breaker_snapshot
 from app.upstream.selector import resolve_effective_mode
 from app.upstream.sis_client import SisClient
 
@@ -56,6 +58,8 @@ class SystemsReport:
     sizebot_check_enabled: bool = False
     sizebot_base_url_present: bool = False
     sizebot_api_key_present: bool = False
+    http_pools: dict[str, dict[str, Any]] = field(default_factory=dict)
+    circuit_breakers: dict[str, dict[str, Any]] = field(default_factory=dict)
 
 
 @dataclass(frozen=True)
@@ -177,6 +181,8 @@ async def run_systems_check(ctx: DiagnosticsContext) -> SystemsReport:
         sizebot_check_enabled=ctx.settings.sizebot_check_enabled,
         sizebot_base_url_present=bool(str(ctx.settings.sizebot_base_url or "").strip()),
         sizebot_api_key_present=bool(str(ctx.settings.sizebot_api_key or "").strip()),
+        http_pools=http_pool_stats(),
+        circuit_breakers=await circuit_breaker_snapshot(ctx.settings),
     )
     await _safe_audit(
         "systems_check_finished",
@@ -240,6 +246,7 @@ async def _run_shadow_preset(ctx: DiagnosticsContext, preset: str) -> ShadowPres
         payload=payload,
         correlation_id=ctx.correlation_id,
         settings=ctx.settings,
+        use_cache=False,
     )
     if sis_response.status != "ok":
         return ShadowPresetResult(name=preset, status="UNAVAILABLE", error_code=sis_response.error.code if sis_response.error else None)
@@ -313,6 +320,18 @@ def format_systems_report(report: SystemsReport) -> str:
         f"SizeBot: check_enabled={report.sizebot_check_enabled}, base_url_present={'yes' if report.sizebot_base_url_present else 'no'}, "
         f"api_key_present={'yes' if report.sizebot_api_key_present else 'no'}, status={report.sizebot_status}"
     )
+    if report.http_pools:
+        pools = ", ".join(
+            f"{name} req={pool['requests']} conn={pool['connections']} idle={pool['idle']}"
+            for name, pool in sorted(report.http_pools.items())
+        )
+        lines.append(f"HTTP pools: {pools}")
+    if report.circuit_breakers:
+        circuits = ", ".join(
+            f"{family}={circuit['state']} ({circuit['failures']}/{circuit['total']})"
+            for family, circuit in sorted(report.circuit_breakers.items())
+        )
+        lines.append(f"SIS circuits: {circuits}")
     suffix = f"Preflight: {report.preflight_status}; codes={preflight_codes}"
     if report.preflight_status == "FAIL":
         suffix += ". Fix env and restart."
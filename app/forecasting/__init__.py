@@ -0,0 +1,12 @@
+from app.forecasting.engine import AUTO, FORECASTERS, METHODS, ForecastBatch, ForecastParams, forecast_batch, holdout_errors, is_intermittent
+
+__all__ = [
+    "AUTO",
+    "FORECASTERS",
+    "METHODS",
+    "ForecastBatch",
+    "ForecastParams",
+    "forecast_batch",
+    "holdout_errors",
+    "is_intermittent",
+]
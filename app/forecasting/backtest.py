@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import session_scope
+from app.core.time import utcnow
+from app.forecasting.engine import AUTO, METHODS, ForecastParams, forecast_batch, is_intermittent
+from app.storage.models import Base, OwnerbotDemoProduct, OwnerbotSalesDaily
+from app.storage.sales_daily import sales_day
+from app.tools.impl._forecasting import build_daily_qty_matrix, list_products
+
+PROFILES = ("intermittent", "smooth", "seasonal", "trend", "dead")
+PROFILE_SHARES = (0.4, 0.25, 0.15, 0.1, 0.1)
+DEFAULT_OUT_DIR = Path("data/forecast_bench")
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    history_days: int = 30
+    horizon_days: int = 7
+    origins: int = 4
+    step_days: int = 7
+    methods: tuple[str, ...] = (*METHODS, AUTO)
+
+
+def synthetic_shop(n_skus: int, days: int, *, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Daily qty for a generated catalog (SKUs x days) and the demand profile of every SKU."""
+    rng = np.random.default_rng(seed)
+    profiles = rng.choice(len(PROFILES), size=n_skus, p=PROFILE_SHARES)
+    t = np.arange(days)[None, :]
+    level = rng.uniform(1.0, 12.0, size=(n_skus, 1))
+    rate = np.empty((n_skus, days))
+
+    rate[:] = level
+    intermittent = profiles == PROFILES.index("intermittent")
+    rate[intermittent] = rng.uniform(0.02, 0.5, size=(int(intermittent.sum()), 1))
+    seasonal = profiles == PROFILES.index("seasonal")
+    amplitude = rng.uniform(0.3, 1.0, size=(int(seasonal.sum()), 1))
+    rate[seasonal] = level[seasonal] * (1.0 + amplitude * (t % 7 >= 5))
+    trend = profiles == PROFILES.index("trend")
+    slope = rng.uniform(-0.01, 0.03, size=(int(trend.sum()), 1))
+    rate[trend] = np.maximum(level[trend] * (1.0 + slope * t), 0.0)
+    dead = profiles == PROFILES.index("dead")
+    stop = rng.integers(days // 2, days, size=(int(dead.sum()), 1))
+    rate[dead] = np.where(t < stop, level[dead] / 3.0, 0.0)
+
+    return rng.poisson(rate).astype(np.float64), np.array(PROFILES, dtype=object)[profiles]
+
+
+def error_metrics(forecast: np.ndarray, actual: np.ndarray) -> dict[str, float | None]:
+    """MAPE over SKUs with sales, WAPE and bias (share of actual volume) on horizon totals."""
+    volume = float(actual.sum())
+    sold = actual > 0
+    return {
+        "mape": float((np.abs(forecast[sold] - actual[sold]) / actual[sold]).mean()) if sold.any() else None,
+        "wape": float(np.abs(forecast - actual).sum() / volume) if volume else None,
+        "bias": float((forecast.sum() - volume) / volume) if volume else None,
+    }
+
+
+def rolling_origin(
+    history: np.ndarray,
+    config: BacktestConfig = BacktestConfig(),
+    *,
+    params: ForecastParams | None = None,
+    segments: np.ndarray | None = None,
+) -> dict[str, Any]:
+    """Refits every method at ``origins`` cutoffs ``step_days`` apart and scores the next ``horizon_days`` totals.
+
+    Each origin sees the ``history_days`` days before it, like the tools do. ``segments`` (one label per SKU)
+    adds per-segment metrics.
+    """
+    days = history.shape[1]
+    cutoffs = [days - config.horizon_days - idx * config.step_days for idx in range(config.origins)]
+    cutoffs = sorted(cutoff for cutoff in cutoffs if cutoff >= max(config.history_days, 1))
+    if not cutoffs:
+        raise ValueError(f"need at least {config.history_days + config.horizon_days} days of history, got {days}")
+    actual = np.concatenate([history[:, cutoff : cutoff + config.horizon_days].sum(axis=1) for cutoff in cutoffs])
+    labels = None if segments is None else np.tile(np.asarray(segments, dtype=object), len(cutoffs))
+
+    report: dict[str, Any] = {"skus": int(history.shape[0]), "origins": len(cutoffs), "methods": {}}
+    for method in config.methods:
+        started = time.perf_counter()
+        forecast = np.concatenate(
+            [
+                forecast_batch(history[:, cutoff - config.history_days : cutoff], config.horizon_days, method=method, params=params).totals
+                for cutoff in cutoffs
+            ]
+        )
+        entry: dict[str, Any] = {**error_metrics(forecast, actual), "ms": round((time.perf_counter() - started) * 1000, 1)}
+        if labels is not None:
+            entry["segments"] = {str(label): error_metrics(forecast[labels == label], actual[labels == label]) for label in sorted(set(labels))}
+        report["methods"][method] = entry
+    return report
+
+
+def intermittency_labels(history: np.ndarray) -> np.ndarray:
+    return np.where(is_intermittent(history), "intermittent", "regular").astype(object)
+
+
+async def backtest_sales_history(session, config: BacktestConfig = BacktestConfig(), *, days: int | None = None) -> dict[str, Any]:
+    """Rolling-origin backtest over the paid order lines of the current database (via ``ownerbot_sales_daily``)."""
+    days = days or config.history_days + config.horizon_days + (config.origins - 1) * config.step_days
+    products = await list_products(session, None)
+    history = await build_daily_qty_matrix(session, days, None, products=products)
+    return rolling_origin(history, config, segments=intermittency_labels(history))
+
+
+def _measure(fn: Callable[[], Any]) -> dict[str, float]:
+    # Timed without tracing first: tracemalloc slows down every allocation.
+    started = time.perf_counter()
+    fn()
+    wall_ms = (time.perf_counter() - started) * 1000
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall_ms": round(wall_ms, 1), "peak_mb": round(peak / 2**20, 2)}
+
+
+async def _sales_db(history: np.ndarray, end_day: date):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    start_day = end_day - timedelta(days=history.shape[1] - 1)
+    skus, offsets = np.nonzero(history)
+    async with async_session() as session:
+        await session.execute(
+            insert(OwnerbotDemoProduct),
+            [
+                {"product_id": f"SKU-{idx:06d}", "title": f"SKU {idx}", "category": "bench", "price": 10, "currency": "EUR", "stock_qty": 0}
+                for idx in range(history.shape[0])
+            ],
+        )
+        await session.execute(
+            insert(OwnerbotSalesDaily),
+            [
+                {"product_id": f"SKU-{sku:06d}", "day": start_day + timedelta(days=int(offset)), "category": "bench", "qty": int(history[sku, offset]), "revenue": 0}
+                for sku, offset in zip(skus.tolist(), offsets.tolist())
+            ],
+        )
+        await session.commit()
+    return engine, async_session
+
+
+async def benchmark_catalog(n_skus: int, config: BacktestConfig = BacktestConfig(), *, with_db: bool = False, seed: int = 0) -> dict[str, Any]:
+    """Wall time and peak memory of forecasting ``n_skus`` SKUs (and of loading their series from SQL with ``with_db``)."""
+    history, _ = synthetic_shop(n_skus, config.history_days, seed=seed)
+    result: dict[str, Any] = {"skus": n_skus, "history_days": config.history_days}
+    for method in ("sma", AUTO):
+        result[f"forecast_{method}"] = _measure(lambda: forecast_batch(history, config.horizon_days, method=method))
+    if with_db:
+        end_day = sales_day(utcnow())
+        engine, async_session = await _sales_db(history, end_day)
+        try:
+            async with async_session() as session:
+
+                async def load() -> np.ndarray:
+                    products = await list_products(session, None)
+                    return await build_daily_qty_matrix(session, config.history_days, None, products=products, end_day=end_day)
+
+                # Two loads per measurement as in _measure; the event loop is already running here.
+                started = time.perf_counter()
+                loaded = await load()
+                wall_ms = (time.perf_counter() - started) * 1000
+                tracemalloc.start()
+                try:
+                    await load()
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+        finally:
+            await engine.dispose()
+        if not np.array_equal(loaded, history):
+            raise RuntimeError("series loaded from SQL differ from the generated history")
+        result["load_matrix"] = {"wall_ms": round(wall_ms, 1), "peak_mb": round(peak / 2**20, 2)}
+    return result
+
+
+def _git_revision() -> str | None:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+async def run_suite(
+    *,
+    sizes: tuple[int, ...] = (1000, 10000, 100000),
+    config: BacktestConfig = BacktestConfig(),
+    synthetic_skus: int = 5000,
+    with_db: bool = False,
+    demo_history: bool = False,
+    seed: int = 0,
+) -> dict[str, Any]:
+    days = config.history_days + config.horizon_days + (config.origins - 1) * config.step_days
+    history, profiles = synthetic_shop(synthetic_skus, days, seed=seed)
+    report: dict[str, Any] = {
+        "revision": _git_revision(),
+        "created_at": utcnow().isoformat(),
+        "config": asdict(config),
+        "backtest": {"synthetic": rolling_origin(history, config, segments=profiles)},
+        "benchmark": [await benchmark_catalog(size, config, with_db=with_db, seed=seed) for size in sizes],
+    }
+    if demo_history:
+        async with session_scope() as session:
+            report["backtest"]["sales_history"] = await backtest_sales_history(session, config)
+    return report
+
+
+def write_report(report: dict[str, Any], out: Path) -> Path:
+    if out.suffix != ".json":
+        out = out / f"forecast_{report.get('revision') or 'local'}_{utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    return out
+
+
+def compare_reports(current: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """One line per method / catalog size: current value and change against ``baseline``."""
+    lines: list[str] = []
+    for source, backtest in current.get("backtest", {}).items():
+        previous = baseline.get("backtest", {}).get(source, {}).get("methods", {})
+        for method, entry in backtest["methods"].items():
+            before = previous.get(method, {}).get("wape")
+            if entry["wape"] is None:
+                lines.append(f"{source} {method}: no sales in the holdout")
+                continue
+            delta = "" if before is None else f" ({entry['wape'] - before:+.3f})"
+            lines.append(f"{source} {method}: wape {entry['wape']:.3f}{delta}, bias {entry['bias']:+.3f}")
+    previous_bench = {entry["skus"]: entry for entry in baseline.get("benchmark", [])}
+    for entry in current.get("benchmark", []):
+        before = previous_bench.get(entry["skus"], {})
+        for phase, measured in entry.items():
+            if not isinstance(measured, dict):
+                continue
+            old = before.get(phase, {}).get("wall_ms")
+            delta = "" if not old else f" ({measured['wall_ms'] / old:.2f}x)"
+            lines.append(f"{entry['skus']} skus {phase}: {measured['wall_ms']} ms{delta}, peak {measured['peak_mb']} MB")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backtest forecast methods and benchmark forecasting at catalog scale.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="catalog sizes for the benchmark")
+    parser.add_argument("--synthetic-skus", type=int, default=5000, help="SKUs in the generated shop for the backtest")
+    parser.add_argument("--db", action="store_true", help="also time loading the series from an in-memory SQLite")
+    parser.add_argument("--demo-history", action="store_true", help="also backtest the configured database")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT_DIR, help="JSON file or directory for the report")
+    parser.add_argument("--baseline", type=Path, default=None, help="earlier report to compare with")
+    args = parser.parse_args()
+
+    sizes = tuple(int(size) for size in args.sizes.split(",") if size.strip())
+    report = asyncio.run(run_suite(sizes=sizes, synthetic_skus=args.synthetic_skus, with_db=args.db, demo_history=args.demo_history))
+    path = write_report(report, args.out)
+    print(f"forecast backtest: report written to {path}")
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else {}
+    for line in compare_reports(report, baseline):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+# Order matters: on equal holdout error the earlier (simpler) method wins.
+METHODS: tuple[str, ...] = ("sma", "ses", "croston", "tsb", "holt", "holt_winters")
+AUTO = "auto"
+SEASON_DAYS = 7
+INTERMITTENT_METHODS = frozenset({"croston", "tsb"})
+# Syntetos-Boylan cut-off: with a demand every 1.32+ days on average only Croston-type methods compete;
+# a short holdout of mostly zero days cannot tell the others apart and picks one at random.
+INTERMITTENT_ADI = 1.32
+
+
+@dataclass(frozen=True)
+class ForecastParams:
+    window_days: int = 14
+    alpha: float = 0.35
+    # Trend and season models smooth their level slower than ``ses``: daily sales are mostly noise.
+    trend_alpha: float = 0.1
+    beta: float = 0.05
+    gamma: float = 0.2
+    phi: float = 0.98
+    intermittent_alpha: float = 0.1
+    intermittent_beta: float = 0.1
+    holdout_days: int = 7
+    holdout_folds: int = 3
+
+
+@dataclass(frozen=True)
+class ForecastBatch:
+    """Daily forecasts for a products x days history: ``daily`` is products x horizon, one method per row."""
+
+    daily: np.ndarray
+    methods: np.ndarray
+    holdout_mse: np.ndarray | None = None
+
+    @property
+    def totals(self) -> np.ndarray:
+        return self.daily.sum(axis=1)
+
+    @property
+    def daily_rate(self) -> np.ndarray:
+        return self.daily.mean(axis=1) if self.daily.shape[1] else np.zeros(self.daily.shape[0])
+
+
+def _flat(level: np.ndarray, horizon: int) -> np.ndarray:
+    return np.repeat(np.maximum(level, 0.0)[:, None], horizon, axis=1)
+
+
+def forecast_sma(history: np.ndarray, horizon: int, params: ForecastParams) -> np.ndarray:
+    if history.shape[1] == 0:
+        return np.zeros((history.shape[0], horizon))
+    return _flat(history[:, -params.window_days :].mean(axis=1), horizon)
+
+
+def forecast_ses(history: np.ndarray, horizon: int, params: ForecastParams) -> np.ndarray:
+    if history.shape[1] == 0:
+        return np.zeros((history.shape[0], horizon))
+    level = history[:, 0].copy()
+    for t in range(1, history.shape[1]):
+        level = params.alpha * history[:, t] + (1.0 - params.alpha) * level
+    return _flat(level, horizon)
+
+
+def _initial_state(history: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Level just before the first day and a trend from the first two weeks (a day-to-day difference is pure noise)."""
+    span = max(1, min(SEASON_DAYS, history.shape[1] // 2))
+    first = history[:, :span].mean(axis=1)
+    if history.shape[1] < 2 * span:
+        return first, np.zeros(history.shape[0])
+    trend = (history[:, span : 2 * span].mean(axis=1) - first) / span
+    return first - trend * (span + 1) / 2.0, trend
+
+
+def _holt_state(history: np.ndarray, params: ForecastParams) -> tuple[np.ndarray, np.ndarray]:
+    alpha, beta, phi = params.trend_alpha, params.beta, params.phi
+    level, trend = _initial_state(history)
+    for t in range(history.shape[1]):
+        previous = level
+        level = alpha * history[:, t] + (1.0 - alpha) * (previous + phi * trend)
+        trend = beta * (level - previous) + (1.0 - beta) * phi * trend
+    return level, trend
+
+
+def _damped_steps(horizon: int, phi: float) -> np.ndarray:
+    # Sum of phi^1..phi^h for each step h: a damped trend flattens instead of running away.
+    return np.cumsum(phi ** np.arange(1, horizon + 1))
+
+
+def forecast_holt(history: np.ndarray, horizon: int, params: ForecastParams) -> np.ndarray:
+    if history.shape[1] == 0:
+        return np.zeros((history.shape[0], horizon))
+    level, trend = _holt_state(history, params)
+    return np.maximum(level[:, None] + trend[:, None] * _damped_steps(horizon, params.phi)[None, :], 0.0)
+
+
+def forecast_holt_winters(history: np.ndarray, horizon: int, params: ForecastParams) -> np.ndarray:
+    """Additive Holt-Winters with a weekly season; needs two full weeks, otherwise plain Holt."""
+    m = SEASON_DAYS
+    days = history.shape[1]
+    if days < 2 * m:
+        return forecast_holt(history, horizon, params)
+    alpha, beta, gamma, phi = params.trend_alpha, params.beta, params.gamma, params.phi
+    level = history[:, :m].mean(axis=1)
+    trend = (history[:, m : 2 * m].mean(axis=1) - level) / m
+    season = history[:, :m] - level[:, None]
+    for t in range(m, days):
+        slot = t % m
+        previous = level
+        level = alpha * (history[:, t] - season[:, slot]) + (1.0 - alpha) * (previous + phi * trend)
+        trend = beta * (level - previous) + (1.0 - beta) * phi * trend
+        season[:, slot] = gamma * (history[:, t] - level) + (1.0 - gamma) * season[:, slot]
+    slots = (days + np.arange(horizon)) % m
+    return np.maximum(level[:, None] + trend[:, None] * _damped_steps(horizon, params.phi)[None, :] + season[:, slots], 0.0)
+
+
+def _intermittent_init(history: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    nonzero = history > 0
+    counts = nonzero.sum(axis=1)
+    size = np.divide(np.where(nonzero, history, 0.0).sum(axis=1), counts, out=np.zeros(history.shape[0]), where=counts > 0)
+    interval = np.divide(history.shape[1], counts, out=np.ones(history.shape[0]), where=counts > 0)
+    return size, interval, counts
+
+
+def forecast_croston(history: np.ndarray, horizon: int, params: ForecastParams) -> np.ndarray:
+    """Croston with the Syntetos-Boylan correction: size and interval are smoothed only on demand days."""
+    if history.shape[1] == 0:
+        return np.zeros((history.shape[0], horizon))
+    alpha = params.intermittent_alpha
+    size, interval, counts = _intermittent_init(history)
+    since = np.ones(history.shape[0])
+    for t in range(history.shape[1]):
+        demand = history[:, t] > 0
+        size = np.where(demand, alpha * history[:, t] + (1.0 - alpha) * size, size)
+        interval = np.where(demand, alpha * since + (1.0 - alpha) * interval, interval)
+        since = np.where(demand, 1.0, since + 1.0)
+    rate = np.where(counts > 0, (1.0 - alpha / 2.0) * size / np.maximum(interval, 1.0), 0.0)
+    return _flat(rate, horizon)
+
+
+def forecast_tsb(history: np.ndarray, horizon: int, params: ForecastParams) -> np.ndarray:
+    """Teunter-Syntetos-Babai: the demand probability decays every day, so dead items fade to zero."""
+    if history.shape[1] == 0:
+        return np.zeros((history.shape[0], horizon))
+    size, _interval, counts = _intermittent_init(history)
+    probability = (history > 0).mean(axis=1)
+    for t in range(history.shape[1]):
+        demand = history[:, t] > 0
+        probability = params.intermittent_beta * demand + (1.0 - params.intermittent_beta) * probability
+        size = np.where(demand, params.intermittent_alpha * history[:, t] + (1.0 - params.intermittent_alpha) * size, size)
+    return _flat(np.where(counts > 0, probability * size, 0.0), horizon)
+
+
+FORECASTERS: dict[str, Callable[[np.ndarray, int, ForecastParams], np.ndarray]] = {
+    "sma": forecast_sma,
+    "ses": forecast_ses,
+    "croston": forecast_croston,
+    "tsb": forecast_tsb,
+    "holt": forecast_holt,
+    "holt_winters": forecast_holt_winters,
+}
+
+
+def is_intermittent(history: np.ndarray) -> np.ndarray:
+    """Average inter-demand interval at or above ``INTERMITTENT_ADI`` (series without any demand count as intermittent)."""
+    demand_days = (history > 0).sum(axis=1)
+    adi = np.divide(history.shape[1], demand_days, out=np.full(history.shape[0], np.inf), where=demand_days > 0)
+    return adi >= INTERMITTENT_ADI
+
+
+def holdout_errors(history: np.ndarray, params: ForecastParams, methods: tuple[str, ...] = METHODS) -> np.ndarray:
+    """Mean squared error of each method over rolling holdouts: methods x products.
+
+    Fold ``k`` fits on everything before the ``k``-th last block of ``holdout_days`` and scores that block;
+    folds stop once the training part would be shorter than the block (``holdout_days`` shrinks to a quarter
+    of a short history).
+    """
+    days = history.shape[1]
+    block = min(params.holdout_days, days // 4)
+    if block <= 0:
+        return np.zeros((len(methods), history.shape[0]))
+    total = np.zeros((len(methods), history.shape[0]))
+    folds = 0
+    for fold in range(max(1, params.holdout_folds)):
+        end = days - fold * block
+        if end - block < block and folds:
+            break
+        train, actual = history[:, : end - block], history[:, end - block : end]
+        total += np.stack([((FORECASTERS[name](train, block, params) - actual) ** 2).mean(axis=1) for name in methods])
+        folds += 1
+    return total / folds
+
+
+def forecast_batch(
+    history: np.ndarray,
+    horizon: int,
+    *,
+    method: str = AUTO,
+    params: ForecastParams | None = None,
+    methods: tuple[str, ...] = METHODS,
+) -> ForecastBatch:
+    """Forecasts every row of ``history`` (products x days, oldest first) in one pass.
+
+    ``method="auto"`` scores each method on rolling holdouts and keeps, per product, the one with the lowest error;
+    intermittent rows only choose between Croston and TSB, the others between the remaining methods.
+    """
+    params = params or ForecastParams()
+    history = np.asarray(history, dtype=np.float64)
+    if history.ndim == 1:
+        history = history[None, :]
+    if method != AUTO:
+        daily = FORECASTERS[method](history, horizon, params)
+        return ForecastBatch(daily=daily, methods=np.full(history.shape[0], method, dtype=object))
+    errors = holdout_errors(history, params, methods)
+    pool = np.array([name in INTERMITTENT_METHODS for name in methods])
+    if pool.any() and not pool.all():
+        intermittent = is_intermittent(history)
+        errors[np.ix_(~pool, intermittent)] = np.inf
+        errors[np.ix_(pool, ~intermittent)] = np.inf
+    best = errors.argmin(axis=0) if history.shape[0] else np.empty(0, dtype=np.int64)
+    candidates = np.stack([FORECASTERS[name](history, horizon, params) for name in methods])
+    daily = candidates[best, np.arange(history.shape[0])] if history.shape[0] else np.zeros((0, horizon))
+    return ForecastBatch(daily=daily, methods=np.array(methods, dtype=object)[best], holdout_mse=errors[best, np.arange(history.shape[0])])
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import json
 
-import httpx
 from pydantic import ValidationError
 
+from app.core.http import OPENAI_CLIENT, get_http_client
 from app.core.settings import Settings
 from app.llm.schema import LLMIntent
 
@@ -88,9 +88,13 @@ class OpenAIPlanner:
         }
         base_url = self._settings.openai_base_url.rstrip("/")
         headers = {"Authorization": f"Bearer {self._settings.openai_api_key}", "Content-Type": "application/json"}
-        async with httpx.AsyncClient(timeout=self._settings.llm_timeout_seconds) as client:
-            response = await client.post(f"{base_url}/v1/responses", headers=headers, json=payload)
-            response.raise_for_status()
+        response = await get_http_client(OPENAI_CLIENT).post(
+            f"{base_url}/v1/responses",
+            headers=headers,
+            json=payload,
+            timeout=self._settings.llm_timeout_seconds,
+        )
+        response.raise_for_status()
         body = response.json()
         output_text = body.get("output_text")
         if not output_text:
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from datetime import date
 
 from app.notify import extract_fx_rate_and_schedule
+from app.notify.fanout import ToolCall, fan_out
 from app.tools.impl import (
     chats_unanswered,
     inventory_status,
@@ -29,18 +30,24 @@ class DigestBundle:
 async def build_daily_digest(owner_id: int, session, correlation_id: str, ops_snapshot: dict[str, object] | None = None) -> DigestBundle:
     warnings: list[str] = []
 
-    kpi_res = await kpi_compare.handle(kpi_compare.Payload(preset="wow"), correlation_id=f"{correlation_id}-kpi", session=session)
-    trend_res = await revenue_trend.handle(revenue_trend.Payload(days=14), correlation_id=f"{correlation_id}-trend", session=session)
-    chats_res = None
-    errors_res = None
-    orders_res = None
-    inventory_res = None
+    calls = [
+        ToolCall("kpi", kpi_compare, kpi_compare.Payload(preset="wow"), f"{correlation_id}-kpi"),
+        ToolCall("trend", revenue_trend, revenue_trend.Payload(days=14), f"{correlation_id}-trend"),
+        ToolCall("fx", sis_fx_status, sis_fx_status.Payload(), f"{correlation_id}-fx"),
+    ]
     if ops_snapshot is None:
-        chats_res = await chats_unanswered.handle(chats_unanswered.Payload(threshold_hours=2, limit=5), correlation_id=f"{correlation_id}-chat", session=session)
-        errors_res = await sys_last_errors.handle(sys_last_errors.Payload(limit=5), correlation_id=f"{correlation_id}-err", session=session)
-        orders_res = await orders_search.handle(orders_search.OrdersSearchPayload(preset="stuck", limit=1), correlation_id=f"{correlation_id}-stuck", session=session)
-        inventory_res = await inventory_status.handle(inventory_status.Payload(section="all", limit=1), correlation_id=f"{correlation_id}-inv", session=session)
-    fx_res = await sis_fx_status.handle(sis_fx_status.Payload(), correlation_id=f"{correlation_id}-fx", session=session)
+        calls += [
+            ToolCall("chats", chats_unanswered, chats_unanswered.Payload(threshold_hours=2, limit=5), f"{correlation_id}-chat"),
+            ToolCall("errors", sys_last_errors, sys_last_errors.Payload(limit=5), f"{correlation_id}-err"),
+            ToolCall("orders", orders_search, orders_search.OrdersSearchPayload(preset="stuck", limit=1), f"{correlation_id}-stuck"),
+            ToolCall("inventory", inventory_status, inventory_status.Payload(section="all", limit=1), f"{correlation_id}-inv"),
+        ]
+    results = await fan_out(calls, session=session)
+    kpi_res, trend_res, fx_res = results["kpi"], results["trend"], results["fx"]
+    chats_res = results.get("chats")
+    errors_res = results.get("errors")
+    orders_res = results.get("orders")
+    inventory_res = results.get("inventory")
 
     for name, res in (("kpi_compare", kpi_res), ("revenue_trend", trend_res), ("sis_fx_status", fx_res)):
         if res.status != "ok":
@@ -132,12 +139,19 @@ async def build_daily_digest(owner_id: int, session, correlation_id: str, ops_sn
 async def build_weekly_digest(owner_id: int, session, correlation_id: str) -> DigestBundle:
     del owner_id
     warnings: list[str] = []
-    kpi_res = await kpi_compare.handle(kpi_compare.Payload(preset="wow", days=7), correlation_id=f"{correlation_id}-kpi", session=session)
-    trend_res = await revenue_trend.handle(revenue_trend.Payload(days=30), correlation_id=f"{correlation_id}-trend", session=session)
-    chats_res = await chats_unanswered.handle(chats_unanswered.Payload(threshold_hours=2, limit=5), correlation_id=f"{correlation_id}-chat", session=session)
-    errors_res = await sys_last_errors.handle(sys_last_errors.Payload(limit=5), correlation_id=f"{correlation_id}-err", session=session)
-    stuck_res = await orders_search.handle(orders_search.OrdersSearchPayload(preset="stuck", limit=1), correlation_id=f"{correlation_id}-stuck", session=session)
-    top_res = await top_products.handle(top_products.Payload(limit=5, metric="revenue", direction="top", group_by="product", days=7), correlation_id=f"{correlation_id}-top", session=session)
+    results = await fan_out(
+        [
+            ToolCall("kpi", kpi_compare, kpi_compare.Payload(preset="wow", days=7), f"{correlation_id}-kpi"),
+            ToolCall("trend", revenue_trend, revenue_trend.Payload(days=30), f"{correlation_id}-trend"),
+            ToolCall("chats", chats_unanswered, chats_unanswered.Payload(threshold_hours=2, limit=5), f"{correlation_id}-chat"),
+            ToolCall("errors", sys_last_errors, sys_last_errors.Payload(limit=5), f"{correlation_id}-err"),
+            ToolCall("stuck", orders_search, orders_search.OrdersSearchPayload(preset="stuck", limit=1), f"{correlation_id}-stuck"),
+            ToolCall("top", top_products, top_products.Payload(limit=5, metric="revenue", direction="top", group_by="product", days=7), f"{correlation_id}-top"),
+        ],
+        session=session,
+    )
+    kpi_res, trend_res, chats_res = results["kpi"], results["trend"], results["chats"]
+    errors_res, stuck_res, top_res = results["errors"], results["stuck"], results["top"]
 
     for name, res in (("kpi_compare", kpi_res), ("revenue_trend", trend_res), ("chats_unanswered", chats_res), ("sys_last_errors", errors_res), ("orders_search", stuck_res), ("top_products", top_res)):
         if res.status != "ok":
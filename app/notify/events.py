@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+STREAM_KEY = "ownerbot:sis:events"
+GROUP_NAME = "ownerbot-notify"
+COUNTERS_KEY = "ownerbot:sis:event_counters"
+# Fan-out to every replica: the stream group hands each event to one consumer only.
+BROADCAST_CHANNEL = "ownerbot:sis:events:broadcast"
+STREAM_MAXLEN = 10000
+
+# SIS event type → notify checks it makes worth running right away.
+EVENT_TRIGGERS: dict[str, str] = {
+    "fx_apply": "fx_apply",
+    "order_stuck": "ops",
+    "payment_failed": "ops",
+    "stock_out": "ops",
+}
+
+
+@dataclass(frozen=True)
+class SisEvent:
+    entry_id: str
+    type: str
+    payload: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def trigger(self) -> str | None:
+        return EVENT_TRIGGERS.get(self.type)
+
+    @property
+    def published_at_ms(self) -> int | None:
+        # Stream ids are "<unix ms>-<seq>", assigned by Redis on XADD.
+        head = self.entry_id.split("-", 1)[0]
+        return int(head) if head.isdigit() else None
+
+
+def parse_entry(entry_id: Any, fields: dict[Any, Any]) -> SisEvent:
+    def _text(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    data = {_text(key): _text(value) for key, value in (fields or {}).items()}
+    try:
+        payload = json.loads(data.get("payload") or "{}")
+    except ValueError:
+        payload = {}
+    return SisEvent(entry_id=_text(entry_id), type=data.get("type", ""), payload=payload if isinstance(payload, dict) else {})
+
+
+def triggers_for(events: list[SisEvent]) -> set[str]:
+    return {event.trigger for event in events if event.trigger is not None}
+
+
+async def publish_sis_event(redis, event_type: str, payload: dict[str, Any] | None = None, *, stream: str = STREAM_KEY) -> str:
+    """XADD one event; stands in for the SIS webhook/event feed (and is what a webhook endpoint would call)."""
+    fields = {
+        "type": event_type,
+        "payload": json.dumps(payload or {}, ensure_ascii=False, default=str),
+        "ts": datetime.now(timezone.utc).isoformat(),
+    }
+    return await redis.xadd(stream, fields, maxlen=STREAM_MAXLEN, approximate=True)
+
+
+async def ensure_group(redis, *, stream: str = STREAM_KEY, group: str = GROUP_NAME) -> None:
+    try:
+        # "$": a new group starts at the tail; history before the first deploy is covered by reconciliation polling.
+        await redis.xgroup_create(stream, group, id="$", mkstream=True)
+    except Exception as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+async def count_events(redis, events: list[SisEvent]) -> None:
+    """Incremental per-type counters shared by all replicas (``sys_health.sis_events``)."""
+    if not events:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    for event in events:
+        await redis.hincrby(COUNTERS_KEY, event.type or "unknown", 1)
+    await redis.hset(COUNTERS_KEY, "last_event_at", now)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.notify.tick_cache import call_tool
+from app.tools.contracts import ToolResponse
+
+
+@dataclass(frozen=True)
+class ToolCall:
+    name: str
+    tool: Any
+    payload: BaseModel
+    correlation_id: str
+
+
+async def _call_with_own_session(call: ToolCall, session) -> Any:
+    # An AsyncSession cannot serve concurrent queries: each call gets its own session on the same engine.
+    if isinstance(session, AsyncSession) and session.bind is not None:
+        async with AsyncSession(bind=session.bind, expire_on_commit=False) as own_session:
+            return await call_tool(call.tool, call.payload, correlation_id=call.correlation_id, session=own_session)
+    return await call_tool(call.tool, call.payload, correlation_id=call.correlation_id, session=session)
+
+
+async def _guarded(call: ToolCall, session, timeout_sec: float) -> Any:
+    try:
+        return await asyncio.wait_for(_call_with_own_session(call, session), timeout=timeout_sec)
+    except asyncio.TimeoutError:
+        return ToolResponse.fail(correlation_id=call.correlation_id, code="UPSTREAM_TIMEOUT", message=f"{call.name} exceeded {timeout_sec:g}s")
+    except Exception as exc:
+        return ToolResponse.fail(correlation_id=call.correlation_id, code="UPSTREAM_UNAVAILABLE", message=str(exc)[:200])
+
+
+async def fan_out(calls: list[ToolCall], *, session, timeout_sec: float | None = None) -> dict[str, Any]:
+    """Runs independent read-only tool calls concurrently; returns responses by ``ToolCall.name``.
+
+    A call that times out or raises comes back as an error ``ToolResponse``, so builders keep
+    their partial-result behaviour: the section is empty and a warning names the tool.
+    """
+    if timeout_sec is None:
+        timeout_sec = get_settings().notify_fanout_call_timeout_sec
+    results = await asyncio.gather(*(_guarded(call, session, timeout_sec) for call in calls))
+    return {call.name: result for call, result in zip(calls, results)}
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Any
 
+from app.notify.fanout import ToolCall, fan_out
 from app.tools.impl import chats_unanswered, inventory_status, orders_search, sys_last_errors
 
 
@@ -15,31 +16,23 @@ async def build_ops_snapshot(session, correlation_id: str, rules: dict[str, Any]
     stuck_preset = str(rules.get("ops_stuck_orders_preset", "stuck") or "stuck")
     payment_preset = str(rules.get("ops_payment_issues_preset", "payment_issues") or "payment_issues")
 
-    chats_res = await chats_unanswered.handle(
-        chats_unanswered.Payload(threshold_hours=unanswered_threshold, limit=3),
-        correlation_id=f"{correlation_id}-ops-chats",
-        session=session,
-    )
-    stuck_res = await orders_search.handle(
-        orders_search.OrdersSearchPayload(preset=stuck_preset, limit=3),
-        correlation_id=f"{correlation_id}-ops-stuck",
-        session=session,
-    )
-    payment_res = await orders_search.handle(
-        orders_search.OrdersSearchPayload(preset=payment_preset, limit=3),
-        correlation_id=f"{correlation_id}-ops-pay",
-        session=session,
-    )
-    errors_res = await sys_last_errors.handle(
-        sys_last_errors.Payload(limit=20),
-        correlation_id=f"{correlation_id}-ops-errors",
-        session=session,
-    )
-    inventory_res = await inventory_status.handle(
-        inventory_status.Payload(low_stock_lte=low_stock_lte, limit=3, section="all"),
-        correlation_id=f"{correlation_id}-ops-inventory",
+    results = await fan_out(
+        [
+            ToolCall("chats", chats_unanswered, chats_unanswered.Payload(threshold_hours=unanswered_threshold, limit=3), f"{correlation_id}-ops-chats"),
+            ToolCall("stuck", orders_search, orders_search.OrdersSearchPayload(preset=stuck_preset, limit=3), f"{correlation_id}-ops-stuck"),
+            ToolCall("payment", orders_search, orders_search.OrdersSearchPayload(preset=payment_preset, limit=3), f"{correlation_id}-ops-pay"),
+            ToolCall("errors", sys_last_errors, sys_last_errors.Payload(limit=20), f"{correlation_id}-ops-errors"),
+            ToolCall(
+                "inventory",
+                inventory_status,
+                inventory_status.Payload(low_stock_lte=low_stock_lte, limit=3, section="all"),
+                f"{correlation_id}-ops-inventory",
+            ),
+        ],
         session=session,
     )
+    chats_res, stuck_res, payment_res = results["chats"], results["stuck"], results["payment"]
+    errors_res, inventory_res = results["errors"], results["inventory"]
 
     for name, res in (
         ("chats_unanswered", chats_res),
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, func, select, update
+
+from app.core.artifact_cache import send_artifact
+from app.core.outbound import SendPriority, get_outbound_dispatcher
+from app.storage.models import OwnerbotNotifyOutbox
+
+PENDING = "pending"
+SENDING = "sending"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+# A row stuck in "sending" longer than this belonged to a process that died mid-send.
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+_WAKE: asyncio.Event | None = None
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    kind: str
+    text: str | None = None
+    content: bytes | None = None
+    filename: str | None = None
+
+    @classmethod
+    def message(cls, text: str) -> "OutboxMessage":
+        return cls(kind="text", text=text)
+
+    @classmethod
+    def photo(cls, content: bytes, caption: str, filename: str = "digest.png") -> "OutboxMessage":
+        return cls(kind="photo", text=caption, content=content, filename=filename)
+
+    @classmethod
+    def document(cls, content: bytes, filename: str, caption: str) -> "OutboxMessage":
+        return cls(kind="document", text=caption, content=content, filename=filename)
+
+
+def outbox_wake_event() -> asyncio.Event:
+    global _WAKE
+    if _WAKE is None:
+        _WAKE = asyncio.Event()
+    return _WAKE
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1)))
+
+
+async def enqueue_notification(
+    session,
+    *,
+    owner_id: int,
+    chat_id: int,
+    notification: str,
+    dedupe_key: str,
+    messages: list[OutboxMessage],
+    now: datetime | None = None,
+) -> bool:
+    """Adds the rendered messages to the session without committing; returns False for a known dedupe key.
+
+    The caller commits together with its ``*_last_sent_at`` update, so a notification is either
+    recorded as built and queued, or neither.
+    """
+    # Every group has a "#0" part, so the unique dedupe_key index answers this without touching group_key.
+    existing = await session.execute(
+        select(OwnerbotNotifyOutbox.id).where(OwnerbotNotifyOutbox.dedupe_key == f"{dedupe_key}#0").limit(1)
+    )
+    if existing.first() is not None:
+        return False
+    now = now or datetime.now(timezone.utc)
+    for index, item in enumerate(messages):
+        session.add(
+            OwnerbotNotifyOutbox(
+                dedupe_key=f"{dedupe_key}#{index}",
+                group_key=dedupe_key,
+                notification=notification,
+                owner_id=owner_id,
+                chat_id=chat_id,
+                message_kind=item.kind,
+                text=item.text,
+                content=item.content,
+                filename=item.filename,
+                status=PENDING,
+                attempts=0,
+                next_attempt_at=now,
+            )
+        )
+    return True
+
+
+async def _send_row(bot, row: OwnerbotNotifyOutbox) -> None:
+    if row.message_kind == "photo":
+        call = lambda: send_artifact(bot, row.chat_id, "photo", row.content, filename=row.filename or "image.png", caption=row.text)
+    elif row.message_kind == "document":
+        call = lambda: send_artifact(bot, row.chat_id, "document", row.content, filename=row.filename or "document.pdf", caption=row.text)
+    else:
+        call = lambda: bot.send_message(chat_id=row.chat_id, text=row.text or "", disable_notification=False)
+    await get_outbound_dispatcher().send(row.chat_id, call, priority=SendPriority.DIGEST)
+
+
+async def drain_outbox(
+    session,
+    bot,
+    *,
+    batch_size: int = 50,
+    max_attempts: int = 8,
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    """Delivers up to ``batch_size`` due groups, each in id order; a failed part backs off the rest of its group."""
+    now = now or datetime.now(timezone.utc)
+    stats: dict[str, Any] = {"delivered": 0, "retried": 0, "failed": 0, "dead": []}
+
+    await session.execute(
+        update(OwnerbotNotifyOutbox)
+        .where(OwnerbotNotifyOutbox.status == SENDING, OwnerbotNotifyOutbox.claimed_at < now - CLAIM_TIMEOUT)
+        .values(status=PENDING)
+    )
+    due_groups = (
+        await session.execute(
+            select(OwnerbotNotifyOutbox.group_key)
+            .where(OwnerbotNotifyOutbox.status == PENDING, OwnerbotNotifyOutbox.next_attempt_at <= now)
+            .group_by(OwnerbotNotifyOutbox.group_key)
+            .order_by(func.min(OwnerbotNotifyOutbox.id))
+            .limit(batch_size)
+        )
+    ).scalars().all()
+    await session.commit()
+
+    for group_key in due_groups:
+        # One conditional UPDATE claims every pending part, so two replicas never split a group between them.
+        claimed_ids = (
+            await session.execute(
+                update(OwnerbotNotifyOutbox)
+                .where(
+                    OwnerbotNotifyOutbox.group_key == group_key,
+                    OwnerbotNotifyOutbox.status == PENDING,
+                    OwnerbotNotifyOutbox.next_attempt_at <= now,
+                )
+                .values(status=SENDING, claimed_at=now)
+                .returning(OwnerbotNotifyOutbox.id)
+            )
+        ).scalars().all()
+        await session.commit()
+        if not claimed_ids:
+            continue
+        rows = (
+            await session.execute(
+                select(OwnerbotNotifyOutbox).where(OwnerbotNotifyOutbox.id.in_(claimed_ids)).order_by(OwnerbotNotifyOutbox.id)
+            )
+        ).scalars().all()
+        for index, row in enumerate(rows):
+            try:
+                await _send_row(bot, row)
+            except Exception as exc:
+                attempts = int(row.attempts or 0) + 1
+                dead = attempts >= max_attempts
+                retry_at = now + backoff_delay(attempts)
+                await session.execute(
+                    update(OwnerbotNotifyOutbox)
+                    .where(OwnerbotNotifyOutbox.id == row.id)
+                    .values(
+                        status=FAILED if dead else PENDING,
+                        attempts=attempts,
+                        next_attempt_at=retry_at,
+                        last_error=str(exc)[:255],
+                    )
+                )
+                # Later parts of the same notification (caption after chart, text after PDF) wait for this one.
+                rest = [later.id for later in rows[index + 1 :]]
+                if rest:
+                    await session.execute(
+                        update(OwnerbotNotifyOutbox)
+                        .where(OwnerbotNotifyOutbox.id.in_(rest))
+                        .values(status=FAILED if dead else PENDING, next_attempt_at=retry_at)
+                    )
+                await session.commit()
+                if dead:
+                    stats["failed"] += 1
+                    stats["dead"].append({"owner_id": row.owner_id, "notification": row.notification, "message": str(exc)[:200]})
+                else:
+                    stats["retried"] += 1
+                break
+            await session.execute(
+                update(OwnerbotNotifyOutbox)
+                .where(OwnerbotNotifyOutbox.id == row.id)
+                .values(status=DELIVERED, delivered_at=datetime.now(timezone.utc), content=None)
+            )
+            await session.commit()
+            stats["delivered"] += 1
+    return stats
+
+
+async def purge_delivered(session, *, older_than: datetime) -> int:
+    result = await session.execute(
+        delete(OwnerbotNotifyOutbox).where(OwnerbotNotifyOutbox.status == DELIVERED, OwnerbotNotifyOutbox.delivered_at < older_than)
+    )
+    await session.commit()
+    return int(result.rowcount or 0)
@@ -39,7 +39,7 @@ def render_weekly_pdf(bundle: DigestBundle, report_title: str = "OwnerBot Weekly
     chart = render_revenue_trend_png(bundle.series, "Revenue trend", "weekly context")
 
     buf = BytesIO()
-    pdf = canvas.Canvas(buf, pagesize=A4)
+    pdf = canvas.Canvas(buf, pagesize=A4, invariant=1)
     y = A4[1] - 18 * mm
 
     y = _line(pdf, report_title, y, size=14, bold=True)
@@ -99,7 +99,7 @@ def render_ops_pdf(snapshot: dict, report_title: str = "OwnerBot Ops Report", tz
         correlation_id = meta.get("correlation_id")
 
     buf = BytesIO()
-    pdf = canvas.Canvas(buf, pagesize=A4)
+    pdf = canvas.Canvas(buf, pagesize=A4, invariant=1)
     y = A4[1] - 18 * mm
 
     y = _line(pdf, report_title, y, size=14, bold=True)
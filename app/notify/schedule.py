@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from app.core.redis import get_redis
+from app.notify.engine import clamp_int, normalize_weekly_day_of_week, parse_time_local_or_default
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_KEY = "ownerbot:notify:schedule"
+# Owners with nothing scheduled are still looked at once a day, in case settings changed outside the ntf_* tools.
+IDLE_RECHECK = timedelta(days=1)
+
+_WAKE: asyncio.Event | None = None
+
+
+def _tz(name: str | None) -> ZoneInfo:
+    try:
+        return ZoneInfo(str(name))
+    except Exception:
+        return ZoneInfo("Europe/Berlin")
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _at_local(day, hour: int, minute: int, tz: ZoneInfo) -> datetime:
+    # combine() keeps the wall-clock time across DST changes, unlike adding timedelta(days=1).
+    return datetime.combine(day, dt_time(hour, minute), tzinfo=tz)
+
+
+def _cooldown_due(last_at: datetime | None, cooldown_hours: int, poll_at: datetime) -> datetime:
+    last_at = _as_utc(last_at)
+    if last_at is None:
+        return poll_at
+    return max(poll_at, last_at + timedelta(hours=max(1, int(cooldown_hours or 1))))
+
+
+def next_digest_due(notify_settings: Any, now_utc: datetime) -> datetime:
+    tz = _tz(notify_settings.digest_tz)
+    now_local = now_utc.astimezone(tz)
+    hour, minute = parse_time_local_or_default(notify_settings.digest_time_local)
+    today_at = _at_local(now_local.date(), hour, minute, tz)
+    tomorrow_at = _at_local(now_local.date() + timedelta(days=1), hour, minute, tz)
+    last_sent = notify_settings.digest_last_sent_at.astimezone(tz) if notify_settings.digest_last_sent_at else None
+
+    if last_sent is not None and last_sent.date() >= now_local.date():
+        return tomorrow_at.astimezone(timezone.utc)
+    if now_local < today_at:
+        return today_at.astimezone(timezone.utc)
+    if not bool(getattr(notify_settings, "digest_quiet_enabled", False)):
+        return now_utc
+    last_attempt = _as_utc(getattr(notify_settings, "digest_last_attempt_at", None))
+    if last_attempt is None:
+        return now_utc
+    interval = clamp_int(int(getattr(notify_settings, "digest_quiet_attempt_interval_minutes", 60) or 60), min_value=15, max_value=360)
+    return max(now_utc, last_attempt + timedelta(minutes=interval))
+
+
+def next_weekly_due(notify_settings: Any, now_utc: datetime) -> datetime:
+    tz = _tz(notify_settings.weekly_tz or notify_settings.digest_tz)
+    now_local = now_utc.astimezone(tz)
+    hour, minute = parse_time_local_or_default(notify_settings.weekly_time_local, default=(9, 30))
+    week_start = now_local.date() - timedelta(days=now_local.weekday())
+    scheduled_day = week_start + timedelta(days=normalize_weekly_day_of_week(notify_settings.weekly_day_of_week))
+    this_week = _at_local(scheduled_day, hour, minute, tz)
+    last_sent = notify_settings.weekly_last_sent_at.astimezone(tz) if notify_settings.weekly_last_sent_at else None
+
+    if last_sent is not None and last_sent.isocalendar()[:2] == now_local.isocalendar()[:2]:
+        return _at_local(scheduled_day + timedelta(days=7), hour, minute, tz).astimezone(timezone.utc)
+    if now_local < this_week:
+        return this_week.astimezone(timezone.utc)
+    return now_utc
+
+
+def next_escalation_due(notify_settings: Any, now_utc: datetime, poll_at: datetime) -> datetime:
+    snoozed_until = _as_utc(getattr(notify_settings, "escalation_snoozed_until", None))
+    if snoozed_until is not None and snoozed_until > now_utc:
+        return snoozed_until
+    first_seen = _as_utc(getattr(notify_settings, "escalation_first_seen_at", None))
+    if first_seen is None or not getattr(notify_settings, "escalation_last_event_key", None):
+        return poll_at
+    stage1 = clamp_int(int(getattr(notify_settings, "escalation_stage1_after_minutes", 120) or 120), min_value=30, max_value=1440)
+    repeat = clamp_int(int(getattr(notify_settings, "escalation_repeat_every_minutes", 360) or 360), min_value=60, max_value=2880)
+    precise = first_seen + timedelta(minutes=stage1)
+    last_sent = _as_utc(getattr(notify_settings, "escalation_last_sent_at", None))
+    if last_sent is not None:
+        precise = max(precise, last_sent + timedelta(minutes=repeat))
+    # The incident itself can change at any time, so never wait longer than one condition poll.
+    return min(poll_at, max(now_utc, precise))
+
+
+def next_due_at(notify_settings: Any, now_utc: datetime, *, poll_interval_sec: int) -> datetime | None:
+    """Earliest moment any enabled notification of this owner can fire; None when nothing is enabled.
+
+    Digests, weekly reports and escalation stages have exact due times. FX and ops alerts depend on
+    upstream state, so they are polled every ``poll_interval_sec`` once their cooldown has passed.
+    """
+    poll_at = now_utc + timedelta(seconds=poll_interval_sec)
+    candidates: list[datetime] = []
+    if notify_settings.digest_enabled:
+        candidates.append(next_digest_due(notify_settings, now_utc))
+    if notify_settings.weekly_enabled:
+        candidates.append(next_weekly_due(notify_settings, now_utc))
+    if notify_settings.fx_delta_enabled:
+        candidates.append(_cooldown_due(notify_settings.fx_delta_last_notified_at, notify_settings.fx_delta_cooldown_hours, poll_at))
+    if notify_settings.fx_apply_events_enabled:
+        candidates.append(_cooldown_due(notify_settings.fx_apply_last_sent_at, notify_settings.fx_apply_events_cooldown_hours, poll_at))
+    if notify_settings.ops_alerts_enabled:
+        candidates.append(_cooldown_due(notify_settings.ops_alerts_last_sent_at, notify_settings.ops_alerts_cooldown_hours, poll_at))
+    if bool(getattr(notify_settings, "escalation_enabled", False)):
+        candidates.append(next_escalation_due(notify_settings, now_utc, poll_at))
+    return min(candidates) if candidates else None
+
+
+class NotifySchedule:
+    """Per-owner due times in a Redis sorted set (score = unix seconds), shared by all replicas."""
+
+    def __init__(self, redis) -> None:
+        self._redis = redis
+
+    async def load(self, owner_ids: list[int]) -> dict[int, float]:
+        rows = await self._redis.zrange(SCHEDULE_KEY, 0, -1, withscores=True)
+        scores = {int(member): float(score) for member, score in rows}
+        stale = [member for member in scores if member not in owner_ids]
+        if stale:
+            await self._redis.zrem(SCHEDULE_KEY, *stale)
+        # Owners never scheduled (new OWNER_IDS, empty Redis) are due immediately.
+        return {owner_id: scores.get(owner_id, 0.0) for owner_id in owner_ids}
+
+    async def store(self, dues: dict[int, datetime | None], *, now_utc: datetime) -> None:
+        if not dues:
+            return
+        mapping = {str(owner_id): (due or now_utc + IDLE_RECHECK).timestamp() for owner_id, due in dues.items()}
+        await self._redis.zadd(SCHEDULE_KEY, mapping)
+
+
+def due_owner_ids(scores: dict[int, float], *, now_ts: float) -> list[int]:
+    return [owner_id for owner_id, score in scores.items() if score <= now_ts]
+
+
+def seconds_until_next(scores: dict[int, float], *, now_ts: float, max_sleep_sec: float) -> float:
+    if not scores:
+        return max_sleep_sec
+    return max(0.0, min(min(scores.values()) - now_ts, max_sleep_sec))
+
+
+def wake_event() -> asyncio.Event:
+    global _WAKE
+    if _WAKE is None:
+        _WAKE = asyncio.Event()
+    return _WAKE
+
+
+async def rearm_owner(owner_id: int) -> None:
+    """Marks the owner due now after a settings change; the worker recomputes the real due time."""
+    try:
+        redis = await get_redis()
+        await redis.zadd(SCHEDULE_KEY, {str(owner_id): time.time()})
+    except Exception:
+        logger.warning("notify_schedule_rearm_failed", extra={"owner_id": owner_id})
+    wake_event().set()
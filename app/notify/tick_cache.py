@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from pydantic import BaseModel
+
+from app.tools.contracts import ToolResponse
+
+_tick_cache_var: ContextVar["TickSnapshotCache | None"] = ContextVar("notify_tick_cache", default=None)
+
+
+class TickSnapshotCache:
+    """Memoizes read-only tool calls for one notify tick, shared by all owners processed in it.
+
+    Entries are keyed by tool and payload, so owners whose ops rules differ only in
+    thresholds applied after the fetch (``*_min_count``, ``*_enabled``) reuse the same
+    calls, and a different ``ops_low_stock_lte`` or preset only refetches that one call.
+    Results are shared objects and must be treated as read-only.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(tool: Any, payload: BaseModel) -> tuple[str, str]:
+        return tool.__name__, json.dumps(payload.model_dump(mode="json"), sort_keys=True, default=str)
+
+    async def call(self, tool: Any, payload: BaseModel, *, correlation_id: str, session) -> ToolResponse:
+        key = self.key(tool, payload)
+        while True:
+            entry = self._entries.get(key)
+            if entry is None:
+                return await self._compute(key, tool, payload, correlation_id=correlation_id, session=session)
+            self.hits += 1
+            try:
+                return await asyncio.shield(entry)
+            except asyncio.CancelledError:
+                # The owner that started the call timed out; compute it ourselves unless we were cancelled too.
+                if entry.cancelled():
+                    continue
+                raise
+
+    async def _compute(self, key: tuple[str, str], tool: Any, payload: BaseModel, *, correlation_id: str, session) -> ToolResponse:
+        self.misses += 1
+        entry = asyncio.get_running_loop().create_future()
+        self._entries[key] = entry
+        try:
+            result = await tool.handle(payload, correlation_id=correlation_id, session=session)
+        except asyncio.CancelledError:
+            self._entries.pop(key, None)
+            entry.cancel()
+            raise
+        except Exception as exc:
+            # Failures are not cached: the next owner retries with its own session.
+            self._entries.pop(key, None)
+            entry.set_exception(exc)
+            entry.exception()
+            raise
+        entry.set_result(result)
+        return result
+
+
+async def call_tool(tool: Any, payload: BaseModel, *, correlation_id: str, session) -> ToolResponse:
+    """Calls ``tool.handle`` through the active tick cache, or directly outside a notify tick."""
+    cache = _tick_cache_var.get()
+    if cache is None:
+        return await tool.handle(payload, correlation_id=correlation_id, session=session)
+    return await cache.call(tool, payload, correlation_id=correlation_id, session=session)
+
+
+@contextmanager
+def tick_cache_scope() -> Iterator[TickSnapshotCache]:
+    cache = TickSnapshotCache()
+    token = _tick_cache_var.set(cache)
+    try:
+        yield cache
+    finally:
+        _tick_cache_var.reset(token)
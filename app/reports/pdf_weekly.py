@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from datetime import datetime
 from io import BytesIO
 from typing import Any
 
@@ -20,11 +19,10 @@ def _line(c: canvas.Canvas, text: str, y: float, *, x: float = 20 * mm, font: st
 
 def build_weekly_report_pdf(payload: dict[str, Any]) -> bytes:
     buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
+    # invariant: no creation date or random document id, so equal payloads give equal bytes (and one Telegram upload).
+    c = canvas.Canvas(buf, pagesize=A4, invariant=1)
     y = A4[1] - 20 * mm
 
-    generated_at = payload.get("generated_at") or datetime.utcnow().isoformat()
-    correlation_id = payload.get("correlation_id", "n/a")
     currency = payload.get("currency", "EUR")
     kpi = payload.get("kpi") or {}
     trend = payload.get("trend") or {}
@@ -34,7 +32,6 @@ def build_weekly_report_pdf(payload: dict[str, Any]) -> bytes:
     unanswered_chats = chats_raw.get("threads", []) if isinstance(chats_raw, dict) else chats_raw
 
     y = _line(c, "OwnerBot Weekly Report", y, font="Helvetica-Bold", size=14)
-    y = _line(c, f"Generated at: {generated_at}", y)
 
     series = trend.get("series", [])
     start_day = series[0].get("day") if series else "n/a"
@@ -77,7 +74,5 @@ def build_weekly_report_pdf(payload: dict[str, Any]) -> bytes:
             line = f"- {item}"
         y = _line(c, line, y)
 
-    c.setFont("Helvetica", 9)
-    c.drawString(20 * mm, 12 * mm, f"correlation_id: {correlation_id}")
     c.save()
     return buf.getvalue()
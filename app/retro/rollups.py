@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import json
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.time import utcnow
+from app.storage.models import (
+    OwnerbotAuditEvent,
+    OwnerbotRetroFunnelHourly,
+    OwnerbotRetroLabelHourly,
+    OwnerbotRetroRollupHourly,
+    OwnerbotRetroRollupState,
+)
+
+ROLLUP_STATE_NAME = "retro_hourly"
+ROLLUP_BATCH_SIZE = 5000
+# Events younger than this are left for the next refresh.
+ROLLUP_SETTLE_SECONDS = 5
+# Ids are assigned at insert but become visible at commit, so a hole below the watermark may be a transaction
+# still in flight: holes are kept in the state row and rechecked until this old, then treated as rolled back.
+ROLLUP_GAP_TTL_SECONDS = 600
+ROLLUP_MAX_GAPS = 5000
+
+SUMMARY_EVENT_TYPES = frozenset(
+    {
+        "llm_intent_planned",
+        "quality_assessment",
+        "tool_call_started",
+        "tool_call_finished",
+        "agent_plan_previewed_v2",
+        "agent_plan_committed_v2",
+        "advice_memo_generated",
+        "advice_data_brief_built",
+        "llm_intent_failed",
+        "agent_action_wizard_started",
+    }
+)
+
+GAPS_EVENT_TYPES = frozenset({"tool_call_finished", "agent_action_wizard_started"})
+
+FUNNEL_STAGES: dict[str, tuple[str, str]] = {
+    "agent_plan_built": ("plan", "built"),
+    "agent_plan_previewed": ("plan", "previewed"),
+    "agent_plan_previewed_v2": ("plan", "previewed"),
+    "agent_plan_committed": ("plan", "committed"),
+    "agent_plan_committed_v2": ("plan", "committed"),
+    "agent_plan_cancelled": ("plan", "cancelled"),
+    "advice_data_brief_requested": ("advice", "brief"),
+    "advice_data_brief_built": ("advice", "brief"),
+    "advice_data_brief_cache_hit": ("advice", "brief"),
+    "advice_playbook_used": ("advice", "advice"),
+    "advice_generated": ("advice", "advice"),
+    "advice_actions_suggested": ("advice", "advice"),
+    "advice_memo_generated": ("advice", "memo"),
+}
+
+FUNNEL_EVENT_TYPES = frozenset(FUNNEL_STAGES)
+
+ROLLUP_EVENT_TYPES = SUMMARY_EVENT_TYPES | GAPS_EVENT_TYPES | FUNNEL_EVENT_TYPES
+
+TOOL_EVENT_TYPES = frozenset({"tool_call_started", "tool_call_finished"})
+# Event types whose rollup dimensions live in list/enum payload fields rather than typed columns.
+PAYLOAD_EVENT_TYPES = frozenset({"quality_assessment", "agent_action_wizard_started"})
+
+LABEL_WARNING_CODE = "warning_code"
+LABEL_MISSING_PARAM = "missing_param"
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def hour_bucket(value: datetime) -> datetime:
+    return _as_utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+def _parse_payload(raw_payload: str) -> dict[str, object]:
+    try:
+        parsed = json.loads(raw_payload)
+    except (TypeError, json.JSONDecodeError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _dim(value: object, limit: int) -> str:
+    return str(value or "").strip()[:limit]
+
+
+def _has_correlation(event_corr: str) -> bool:
+    corr = str(event_corr or "").strip()
+    return bool(corr) and corr.lower() != "n/a"
+
+
+def _safe_correlation(event_corr: str, payload: dict[str, object]) -> str:
+    if _has_correlation(event_corr):
+        return str(event_corr).strip()[:64]
+    return _dim(payload.get("correlation_id"), 64)
+
+
+@dataclass
+class RollupDelta:
+    counts: Counter[tuple] = field(default_factory=Counter)
+    labels: Counter[tuple] = field(default_factory=Counter)
+    funnel_buckets: set[datetime] = field(default_factory=set)
+
+    def add(
+        self,
+        *,
+        occurred_at: datetime,
+        event_type: str,
+        correlation_id: str,
+        payload_json: str,
+        tool: str | None = None,
+        error_code: str | None = None,
+        severity: str | None = None,
+    ) -> None:
+        bucket = hour_bucket(occurred_at)
+        # Rows written with typed hot columns (severity set) only need payload_json for list-valued fields.
+        classified = severity is not None
+        needs_payload = not classified or event_type in PAYLOAD_EVENT_TYPES
+        payload = _parse_payload(payload_json) if needs_payload else {}
+        intent_source = intent_kind = confidence = ""
+        if classified:
+            tool = _dim(tool, 128) if event_type in TOOL_EVENT_TYPES else ""
+            error_code = _dim(error_code, 64) if event_type in TOOL_EVENT_TYPES | {"llm_intent_failed"} else ""
+        else:
+            tool = error_code = ""
+            if event_type in TOOL_EVENT_TYPES:
+                tool = _dim(payload.get("tool"), 128)
+                error_code = _dim(payload.get("error_code"), 64)
+            elif event_type == "llm_intent_failed":
+                error_code = _dim(payload.get("error_class"), 64)
+
+        if event_type == "quality_assessment":
+            intent_source = _dim(payload.get("intent_source"), 16).upper()
+            intent_kind = _dim(payload.get("intent_kind"), 16).upper()
+            confidence = _dim(payload.get("confidence"), 16).lower()
+            for warning in list(payload.get("top_warning_codes") or []):
+                if isinstance(warning, str) and warning:
+                    self.labels[(bucket, LABEL_WARNING_CODE, warning[:128])] += 1
+        elif event_type == "agent_action_wizard_started":
+            for field_name in list(payload.get("missing_fields") or []):
+                if isinstance(field_name, str) and field_name:
+                    self.labels[(bucket, LABEL_MISSING_PARAM, field_name[:128])] += 1
+
+        self.counts[(bucket, event_type, tool, error_code, intent_source, intent_kind, confidence)] += 1
+
+        if event_type in FUNNEL_EVENT_TYPES:
+            self.funnel_buckets.add(bucket)
+
+
+def _parse_gaps(raw: str | None) -> dict[int, float]:
+    try:
+        pairs = json.loads(raw or "[]")
+        return {int(event_id): float(seen_at) for event_id, seen_at in pairs}
+    except (TypeError, ValueError):
+        return {}
+
+
+def _dump_gaps(gaps: dict[int, float]) -> str:
+    newest = sorted(gaps)[-ROLLUP_MAX_GAPS:]
+    return json.dumps([[event_id, gaps[event_id]] for event_id in newest])
+
+
+async def _load_watermark(session: AsyncSession) -> tuple[int, str]:
+    row = (
+        await session.execute(
+            select(OwnerbotRetroRollupState.last_event_id, OwnerbotRetroRollupState.pending_gap_ids).where(
+                OwnerbotRetroRollupState.name == ROLLUP_STATE_NAME
+            )
+        )
+    ).first()
+    if row is not None:
+        return int(row[0] or 0), row[1]
+    session.add(OwnerbotRetroRollupState(name=ROLLUP_STATE_NAME, last_event_id=0, pending_gap_ids="[]"))
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        return await _load_watermark(session)
+    return 0, "[]"
+
+
+async def _advance_watermark(session: AsyncSession, previous: tuple[int, str], next_id: int, next_gaps: str) -> bool:
+    previous_id, previous_gaps = previous
+    result = await session.execute(
+        update(OwnerbotRetroRollupState)
+        .where(OwnerbotRetroRollupState.name == ROLLUP_STATE_NAME)
+        .where(OwnerbotRetroRollupState.last_event_id == previous_id)
+        .where(OwnerbotRetroRollupState.pending_gap_ids == previous_gaps)
+        .values(last_event_id=next_id, pending_gap_ids=next_gaps)
+        .execution_options(synchronize_session=False)
+    )
+    return bool(result.rowcount)
+
+
+async def _increment(session: AsyncSession, model, key_columns: dict[str, object], count_column: str, amount: int) -> None:
+    dialect_insert = sqlite_insert if session.get_bind().dialect.name == "sqlite" else postgresql_insert
+    stmt = dialect_insert(model).values(**key_columns, **{count_column: amount})
+    counter = getattr(model, count_column)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={count_column: counter + stmt.excluded[count_column]},
+        )
+    )
+
+
+async def _rebuild_funnel_bucket(session: AsyncSession, bucket: datetime) -> None:
+    """Recompute one hour of funnel rows from the audit events: distinct correlations do not add up across batches."""
+    rows = await session.execute(
+        select(OwnerbotAuditEvent.event_type, OwnerbotAuditEvent.correlation_id, OwnerbotAuditEvent.payload_json)
+        .where(OwnerbotAuditEvent.event_type.in_(sorted(FUNNEL_EVENT_TYPES)))
+        .where(OwnerbotAuditEvent.occurred_at >= bucket)
+        .where(OwnerbotAuditEvent.occurred_at < bucket + timedelta(hours=1))
+    )
+    events: Counter[tuple[str, str]] = Counter()
+    missing: Counter[tuple[str, str]] = Counter()
+    correlations: dict[tuple[str, str], set[str]] = defaultdict(set)
+    for event_type, correlation_id, payload_json in rows.all():
+        stage = FUNNEL_STAGES[event_type]
+        payload = {} if _has_correlation(correlation_id) else _parse_payload(payload_json)
+        corr = _safe_correlation(correlation_id, payload)
+        events[stage] += 1
+        if corr:
+            correlations[stage].add(corr)
+        else:
+            missing[stage] += 1
+
+    await session.execute(
+        delete(OwnerbotRetroFunnelHourly)
+        .where(OwnerbotRetroFunnelHourly.bucket_start == bucket)
+        .execution_options(synchronize_session=False)
+    )
+    if events:
+        await session.execute(
+            insert(OwnerbotRetroFunnelHourly),
+            [
+                {
+                    "bucket_start": bucket,
+                    "funnel": funnel,
+                    "stage": stage_name,
+                    "event_count": count,
+                    "correlation_count": len(correlations[(funnel, stage_name)]),
+                    "missing_correlation_count": missing[(funnel, stage_name)],
+                }
+                for (funnel, stage_name), count in sorted(events.items())
+            ],
+        )
+
+
+async def _apply_delta(session: AsyncSession, delta: RollupDelta) -> None:
+    for (bucket, event_type, tool, error_code, intent_source, intent_kind, confidence), amount in delta.counts.items():
+        await _increment(
+            session,
+            OwnerbotRetroRollupHourly,
+            {
+                "bucket_start": bucket,
+                "event_type": event_type,
+                "tool": tool,
+                "error_code": error_code,
+                "intent_source": intent_source,
+                "intent_kind": intent_kind,
+                "confidence": confidence,
+            },
+            "event_count",
+            amount,
+        )
+    for (bucket, label_kind, label), amount in delta.labels.items():
+        await _increment(
+            session,
+            OwnerbotRetroLabelHourly,
+            {"bucket_start": bucket, "label_kind": label_kind, "label": label},
+            "label_count",
+            amount,
+        )
+    for bucket in sorted(delta.funnel_buckets):
+        await _rebuild_funnel_bucket(session, bucket)
+
+
+def _event_columns():
+    # payload_json is only needed for rollup types; the rest of the batch is read just to tell holes from other events.
+    return (
+        OwnerbotAuditEvent.id,
+        OwnerbotAuditEvent.occurred_at,
+        OwnerbotAuditEvent.event_type,
+        OwnerbotAuditEvent.correlation_id,
+        case((OwnerbotAuditEvent.event_type.in_(sorted(ROLLUP_EVENT_TYPES)), OwnerbotAuditEvent.payload_json), else_=None),
+        OwnerbotAuditEvent.tool,
+        OwnerbotAuditEvent.error_code,
+        OwnerbotAuditEvent.severity,
+    )
+
+
+async def refresh_retro_rollups(session: AsyncSession, *, now: datetime | None = None, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    """Fold audit events past the stored watermark into the hourly rollups; returns events applied.
+
+    Ids below the watermark that were missing when it moved are rechecked on every refresh, so an event
+    whose transaction commits after a higher id has been folded is still counted once.
+    """
+    now = now or utcnow()
+    cutoff = now - timedelta(seconds=ROLLUP_SETTLE_SECONDS)
+    now_ts = now.timestamp()
+    applied = 0
+    while True:
+        watermark = await _load_watermark(session)
+        last_id, raw_gaps = watermark
+        gaps = _parse_gaps(raw_gaps)
+        late_rows = []
+        if gaps:
+            late_rows = list((await session.execute(select(*_event_columns()).where(OwnerbotAuditEvent.id.in_(sorted(gaps))))).all())
+        rows = list(
+            (
+                await session.execute(
+                    select(*_event_columns()).where(OwnerbotAuditEvent.id > last_id).order_by(OwnerbotAuditEvent.id).limit(batch_size)
+                )
+            ).all()
+        )
+
+        next_gaps = {event_id: seen_at for event_id, seen_at in gaps.items() if now_ts - seen_at < ROLLUP_GAP_TTL_SECONDS}
+        for row in late_rows:
+            next_gaps.pop(int(row[0]), None)
+        folded = list(late_rows)
+        next_id = last_id
+        settled = True
+        for row in rows:
+            occurred_at = row[1]
+            if occurred_at is not None and _as_utc(occurred_at) >= cutoff:
+                settled = False
+                break
+            event_id = int(row[0])
+            # The very first refresh starts at 0: ids before the first event are not in flight.
+            if next_id:
+                next_gaps.update((missing_id, now_ts) for missing_id in range(max(next_id + 1, event_id - ROLLUP_MAX_GAPS), event_id))
+            next_id = event_id
+            folded.append(row)
+
+        next_raw_gaps = _dump_gaps(next_gaps)
+        if next_id == last_id and next_raw_gaps == raw_gaps:
+            break
+        if not await _advance_watermark(session, watermark, next_id, next_raw_gaps):
+            await session.rollback()
+            break
+        delta = RollupDelta()
+        for _event_id, occurred_at, event_type, correlation_id, payload_json, tool, error_code, severity in folded:
+            if event_type not in ROLLUP_EVENT_TYPES:
+                continue
+            delta.add(
+                occurred_at=_as_utc(occurred_at) if occurred_at is not None else cutoff - timedelta(seconds=1),
+                event_type=event_type,
+                correlation_id=correlation_id,
+                payload_json=payload_json,
+                tool=tool,
+                error_code=error_code,
+                severity=severity,
+            )
+        await _apply_delta(session, delta)
+        await session.commit()
+        applied += sum(delta.counts.values())
+        if not settled or len(rows) < batch_size:
+            break
+    return applied
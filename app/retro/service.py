@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-import json
 from collections import Counter
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.time import utcnow
-from app.storage.models import OwnerbotAuditEvent
-
-_ALLOWED_PERIODS = {7, 30}
+from app.retro.rollups import (
+    GAPS_EVENT_TYPES,
+    LABEL_MISSING_PARAM,
+    LABEL_WARNING_CODE,
+    SUMMARY_EVENT_TYPES,
+    hour_bucket,
+)
+from app.storage.models import OwnerbotRetroFunnelHourly, OwnerbotRetroLabelHourly, OwnerbotRetroRollupHourly
+
+MAX_PERIOD_DAYS = 180
 _UNKNOWN_REASON_CODES = {
     "MISSING_PARAMETERS": "missing_params",
     "VALIDATION_ERROR": "invalid_payload",
@@ -19,36 +25,8 @@ _UNKNOWN_REASON_CODES = {
     "UPSTREAM_NOT_IMPLEMENTED": "upstream_not_implemented",
 }
 
-_SUMMARY_EVENT_TYPES = {
-    "llm_intent_planned",
-    "quality_assessment",
-    "tool_call_started",
-    "tool_call_finished",
-    "agent_plan_previewed_v2",
-    "agent_plan_committed_v2",
-    "advice_memo_generated",
-    "advice_data_brief_built",
-    "llm_intent_failed",
-    "agent_action_wizard_started",
-}
-
-_GAPS_EVENT_TYPES = {"tool_call_finished", "agent_action_wizard_started"}
-
-_FUNNEL_EVENT_TYPES = {
-    "agent_plan_built",
-    "agent_plan_previewed",
-    "agent_plan_previewed_v2",
-    "agent_plan_committed",
-    "agent_plan_committed_v2",
-    "agent_plan_cancelled",
-    "advice_data_brief_requested",
-    "advice_data_brief_built",
-    "advice_data_brief_cache_hit",
-    "advice_playbook_used",
-    "advice_generated",
-    "advice_actions_suggested",
-    "advice_memo_generated",
-}
+# (event_type, tool, error_code, intent_source, intent_kind, confidence, count)
+RollupRow = tuple[str, str, str, str, str, str, int]
 
 
 @dataclass
@@ -108,16 +86,8 @@ class FunnelReport:
 
 
 def _validate_period_days(period_days: int) -> None:
-    if period_days not in _ALLOWED_PERIODS:
-        raise ValueError("period_days must be 7 or 30")
-
-
-def _parse_payload(raw_payload: str) -> dict[str, object]:
-    try:
-        parsed = json.loads(raw_payload)
-    except json.JSONDecodeError:
-        return {}
-    return parsed if isinstance(parsed, dict) else {}
+    if not 1 <= period_days <= MAX_PERIOD_DAYS:
+        raise ValueError(f"period_days must be between 1 and {MAX_PERIOD_DAYS}")
 
 
 def _delta_value(current: int, previous: int) -> dict[str, float | int | None]:
@@ -139,75 +109,82 @@ def _counter_delta(current: Counter[str], previous: Counter[str], key_name: str)
     return diffs[:5]
 
 
-async def _query_window(
-    session: AsyncSession,
-    start_at: datetime,
-    end_at: datetime,
-    event_types: set[str] | None = None,
-) -> list[tuple[str, str, str]]:
+def _windows(period_days: int, now: datetime | None = None) -> tuple[tuple[datetime, datetime], tuple[datetime, datetime]]:
+    """Current and previous windows, aligned to the hourly rollup buckets and ending after the current hour."""
+    end_at = hour_bucket(now or utcnow()) + timedelta(hours=1)
+    period = timedelta(days=period_days)
+    return (end_at - period, end_at), (end_at - period * 2, end_at - period)
+
+
+async def _query_rollups(session: AsyncSession, start_at: datetime, end_at: datetime, event_types: frozenset[str]) -> list[RollupRow]:
     stmt = (
-        select(OwnerbotAuditEvent.event_type, OwnerbotAuditEvent.payload_json, OwnerbotAuditEvent.correlation_id)
-        .where(OwnerbotAuditEvent.occurred_at >= start_at)
-        .where(OwnerbotAuditEvent.occurred_at < end_at)
+        select(
+            OwnerbotRetroRollupHourly.event_type,
+            OwnerbotRetroRollupHourly.tool,
+            OwnerbotRetroRollupHourly.error_code,
+            OwnerbotRetroRollupHourly.intent_source,
+            OwnerbotRetroRollupHourly.intent_kind,
+            OwnerbotRetroRollupHourly.confidence,
+            func.sum(OwnerbotRetroRollupHourly.event_count),
+        )
+        .where(OwnerbotRetroRollupHourly.bucket_start >= start_at)
+        .where(OwnerbotRetroRollupHourly.bucket_start < end_at)
+        .where(OwnerbotRetroRollupHourly.event_type.in_(sorted(event_types)))
+        .group_by(
+            OwnerbotRetroRollupHourly.event_type,
+            OwnerbotRetroRollupHourly.tool,
+            OwnerbotRetroRollupHourly.error_code,
+            OwnerbotRetroRollupHourly.intent_source,
+            OwnerbotRetroRollupHourly.intent_kind,
+            OwnerbotRetroRollupHourly.confidence,
+        )
     )
-    if event_types:
-        stmt = stmt.where(OwnerbotAuditEvent.event_type.in_(sorted(event_types)))
     result = await session.execute(stmt)
-    return list(result.all())
+    return [(str(a), str(b or ""), str(c or ""), str(d or ""), str(e or ""), str(f or ""), int(n or 0)) for a, b, c, d, e, f, n in result.all()]
 
 
-async def _load_event_rows(session: AsyncSession, period_days: int, event_types: set[str]) -> list[tuple[str, str, str]]:
-    _validate_period_days(period_days)
-    now = utcnow()
-    return await _query_window(
-        session,
-        start_at=now - timedelta(days=period_days),
-        end_at=now,
-        event_types=event_types,
+async def _query_labels(session: AsyncSession, start_at: datetime, end_at: datetime, label_kind: str) -> Counter[str]:
+    stmt = (
+        select(OwnerbotRetroLabelHourly.label, func.sum(OwnerbotRetroLabelHourly.label_count))
+        .where(OwnerbotRetroLabelHourly.label_kind == label_kind)
+        .where(OwnerbotRetroLabelHourly.bucket_start >= start_at)
+        .where(OwnerbotRetroLabelHourly.bucket_start < end_at)
+        .group_by(OwnerbotRetroLabelHourly.label)
     )
+    result = await session.execute(stmt)
+    return Counter({str(label): int(count or 0) for label, count in result.all()})
 
 
-def _build_summary(rows: list[tuple[str, str, str]], period_days: int) -> RetroSummary:
+def _build_summary(rows: list[RollupRow], warning_counts: Counter[str], period_days: int) -> RetroSummary:
     event_counts: Counter[str] = Counter()
     rule_hits_total = 0
     llm_plans_total = 0
     tool_counts: Counter[str] = Counter()
     quality_confidence_counts: dict[str, Counter[str]] = {"TOOL": Counter(), "ADVICE": Counter()}
-    warning_counts: Counter[str] = Counter()
     unknown_reasons: Counter[str] = Counter()
 
-    for event_type, payload_json, _ in rows:
-        event_counts[event_type] += 1
-        payload = _parse_payload(payload_json)
+    for event_type, tool_name, error_code, intent_source, intent_kind, confidence, count in rows:
+        event_counts[event_type] += count
 
         if event_type == "quality_assessment":
-            source = str(payload.get("intent_source") or "").upper()
-            if source == "RULE":
-                rule_hits_total += 1
-            intent_kind = str(payload.get("intent_kind") or "").upper()
-            confidence = str(payload.get("confidence") or "").lower()
+            if intent_source == "RULE":
+                rule_hits_total += count
             if intent_kind in {"TOOL", "ADVICE"} and confidence in {"high", "med", "low"}:
-                quality_confidence_counts[intent_kind][confidence] += 1
-            for warning in list(payload.get("top_warning_codes") or []):
-                if isinstance(warning, str) and warning:
-                    warning_counts[warning] += 1
+                quality_confidence_counts[intent_kind][confidence] += count
 
         if event_type == "llm_intent_planned":
-            llm_plans_total += 1
+            llm_plans_total += count
 
-        if event_type == "tool_call_started":
-            tool_name = str(payload.get("tool") or "").strip()
-            if tool_name:
-                tool_counts[tool_name] += 1
+        if event_type == "tool_call_started" and tool_name:
+            tool_counts[tool_name] += count
 
         if event_type == "llm_intent_failed":
-            unknown_reasons[_UNKNOWN_REASON_CODES.get(str(payload.get("error_class") or ""), "no_match")] += 1
+            unknown_reasons[_UNKNOWN_REASON_CODES.get(error_code, "no_match")] += count
 
         if event_type == "tool_call_finished":
-            error_code = str(payload.get("error_code") or "")
             mapped_reason = _UNKNOWN_REASON_CODES.get(error_code)
             if mapped_reason:
-                unknown_reasons[mapped_reason] += 1
+                unknown_reasons[mapped_reason] += count
 
     intents_total = rule_hits_total + llm_plans_total
     totals = {
@@ -252,26 +229,17 @@ def _build_summary(rows: list[tuple[str, str, str]], period_days: int) -> RetroS
     return RetroSummary(period_days=period_days, totals=totals, routing=routing, top_tools=top_tools, quality=quality, failures=failures)
 
 
-def _build_gaps(rows: list[tuple[str, str, str]], period_days: int) -> tuple[RetroGaps, Counter[str], Counter[str], Counter[str]]:
+def _build_gaps(rows: list[RollupRow], missing_params: Counter[str], period_days: int) -> tuple[RetroGaps, Counter[str], Counter[str], Counter[str]]:
     unimplemented_tools: Counter[str] = Counter()
     disallowed_actions: Counter[str] = Counter()
-    missing_params: Counter[str] = Counter()
-
-    for event_type, payload_json, _ in rows:
-        payload = _parse_payload(payload_json)
 
-        if event_type == "tool_call_finished":
-            error_code = str(payload.get("error_code") or "")
-            tool_name = str(payload.get("tool") or "unknown")
-            if error_code == "UPSTREAM_NOT_IMPLEMENTED":
-                unimplemented_tools[tool_name] += 1
-            if error_code == "ACTION_TOOL_NOT_ALLOWED":
-                disallowed_actions[tool_name] += 1
-
-        if event_type == "agent_action_wizard_started":
-            for field_name in list(payload.get("missing_fields") or []):
-                if isinstance(field_name, str) and field_name:
-                    missing_params[field_name] += 1
+    for event_type, tool_name, error_code, _source, _kind, _confidence, count in rows:
+        if event_type != "tool_call_finished":
+            continue
+        if error_code == "UPSTREAM_NOT_IMPLEMENTED":
+            unimplemented_tools[tool_name or "unknown"] += count
+        if error_code == "ACTION_TOOL_NOT_ALLOWED":
+            disallowed_actions[tool_name or "unknown"] += count
 
     return (
         RetroGaps(
@@ -286,41 +254,33 @@ def _build_gaps(rows: list[tuple[str, str, str]], period_days: int) -> tuple[Ret
     )
 
 
-def _safe_correlation(event_corr: str, payload_json: str) -> str | None:
-    corr = str(event_corr or "").strip()
-    if corr and corr.lower() != "n/a":
-        return corr
-    payload = _parse_payload(payload_json)
-    payload_corr = str(payload.get("correlation_id") or "").strip()
-    return payload_corr or None
-
-
 def _rate(numerator: int, denominator: int) -> float:
     return round(numerator / denominator, 4) if denominator > 0 else 0.0
 
 
+async def _summary_for_window(session: AsyncSession, window: tuple[datetime, datetime], period_days: int) -> RetroSummary:
+    rows = await _query_rollups(session, *window, SUMMARY_EVENT_TYPES)
+    warnings = await _query_labels(session, *window, LABEL_WARNING_CODE)
+    return _build_summary(rows, warnings, period_days)
+
+
+async def _gaps_for_window(session: AsyncSession, window: tuple[datetime, datetime], period_days: int) -> tuple[RetroGaps, Counter[str], Counter[str], Counter[str]]:
+    rows = await _query_rollups(session, *window, GAPS_EVENT_TYPES)
+    missing_params = await _query_labels(session, *window, LABEL_MISSING_PARAM)
+    return _build_gaps(rows, missing_params, period_days)
+
+
 async def retro_summary(session: AsyncSession, period_days: int) -> RetroSummary:
-    rows = await _load_event_rows(session, period_days, _SUMMARY_EVENT_TYPES)
-    return _build_summary(rows, period_days)
+    _validate_period_days(period_days)
+    current_window, _ = _windows(period_days)
+    return await _summary_for_window(session, current_window, period_days)
 
 
 async def retro_summary_with_deltas(session: AsyncSession, period_days: int) -> RetroSummaryWithDeltas:
     _validate_period_days(period_days)
-    now = utcnow()
-    current_rows = await _query_window(
-        session,
-        start_at=now - timedelta(days=period_days),
-        end_at=now,
-        event_types=_SUMMARY_EVENT_TYPES,
-    )
-    previous_rows = await _query_window(
-        session,
-        start_at=now - timedelta(days=period_days * 2),
-        end_at=now - timedelta(days=period_days),
-        event_types=_SUMMARY_EVENT_TYPES,
-    )
-    current = _build_summary(current_rows, period_days)
-    previous = _build_summary(previous_rows, period_days)
+    current_window, previous_window = _windows(period_days)
+    current = await _summary_for_window(session, current_window, period_days)
+    previous = await _summary_for_window(session, previous_window, period_days)
 
     deltas = {
         "advice_total_delta": _delta_value(current.totals["advice_total"], previous.totals["advice_total"]),
@@ -354,29 +314,17 @@ async def retro_summary_with_deltas(session: AsyncSession, period_days: int) ->
 
 
 async def retro_gaps(session: AsyncSession, period_days: int) -> RetroGaps:
-    rows = await _load_event_rows(session, period_days, _GAPS_EVENT_TYPES)
-    gaps, _, _, _ = _build_gaps(rows, period_days)
+    _validate_period_days(period_days)
+    current_window, _ = _windows(period_days)
+    gaps, _, _, _ = await _gaps_for_window(session, current_window, period_days)
     return gaps
 
 
 async def retro_gaps_with_deltas(session: AsyncSession, period_days: int) -> RetroGapsWithDeltas:
     _validate_period_days(period_days)
-    now = utcnow()
-    current_rows = await _query_window(
-        session,
-        start_at=now - timedelta(days=period_days),
-        end_at=now,
-        event_types=_GAPS_EVENT_TYPES,
-    )
-    previous_rows = await _query_window(
-        session,
-        start_at=now - timedelta(days=period_days * 2),
-        end_at=now - timedelta(days=period_days),
-        event_types=_GAPS_EVENT_TYPES,
-    )
-
-    current, current_unimpl, _, current_missing = _build_gaps(current_rows, period_days)
-    previous, previous_unimpl, _, previous_missing = _build_gaps(previous_rows, period_days)
+    current_window, previous_window = _windows(period_days)
+    current, current_unimpl, _, current_missing = await _gaps_for_window(session, current_window, period_days)
+    previous, previous_unimpl, _, previous_missing = await _gaps_for_window(session, previous_window, period_days)
 
     deltas = {
         "top_unimplemented_tools_delta": _counter_delta(current_unimpl, previous_unimpl, "tool_name"),
@@ -387,58 +335,49 @@ async def retro_gaps_with_deltas(session: AsyncSession, period_days: int) -> Ret
 
 
 async def retro_funnels(session: AsyncSession, period_days: int) -> FunnelReport:
-    rows = await _load_event_rows(session, period_days, _FUNNEL_EVENT_TYPES)
-
-    plan_map = {
-        "agent_plan_built": "built",
-        "agent_plan_previewed": "previewed",
-        "agent_plan_previewed_v2": "previewed",
-        "agent_plan_committed": "committed",
-        "agent_plan_committed_v2": "committed",
-        "agent_plan_cancelled": "cancelled",
-    }
-    advice_map = {
-        "advice_data_brief_requested": "brief",
-        "advice_data_brief_built": "brief",
-        "advice_data_brief_cache_hit": "brief",
-        "advice_playbook_used": "advice",
-        "advice_generated": "advice",
-        "advice_actions_suggested": "advice",
-        "advice_memo_generated": "memo",
-    }
+    _validate_period_days(period_days)
+    (start_at, end_at), _ = _windows(period_days)
+    window_filter = (
+        OwnerbotRetroFunnelHourly.bucket_start >= start_at,
+        OwnerbotRetroFunnelHourly.bucket_start < end_at,
+    )
 
-    by_corr_plan: dict[str, set[str]] = {}
-    by_corr_advice: dict[str, set[str]] = {}
+    rows = await session.execute(
+        select(
+            OwnerbotRetroFunnelHourly.funnel,
+            OwnerbotRetroFunnelHourly.stage,
+            func.sum(OwnerbotRetroFunnelHourly.event_count),
+            func.sum(OwnerbotRetroFunnelHourly.correlation_count),
+            func.sum(OwnerbotRetroFunnelHourly.missing_correlation_count),
+        )
+        .where(*window_filter)
+        .group_by(OwnerbotRetroFunnelHourly.funnel, OwnerbotRetroFunnelHourly.stage)
+    )
+    fallback_counters: dict[str, Counter[str]] = {"plan": Counter(), "advice": Counter()}
+    # Distinct correlations per hour, summed: a flow whose stage events straddle an hour boundary counts once per hour.
+    by_corr: dict[str, Counter[str]] = {"plan": Counter(), "advice": Counter()}
     missing_corr = 0
-    plan_fallback_counter: Counter[str] = Counter()
-    advice_fallback_counter: Counter[str] = Counter()
-
-    for event_type, payload_json, event_corr in rows:
-        stage = plan_map.get(event_type)
-        if stage:
-            plan_fallback_counter[stage] += 1
-            corr = _safe_correlation(event_corr, payload_json)
-            if corr:
-                by_corr_plan.setdefault(corr, set()).add(stage)
-            else:
-                missing_corr += 1
-
-        advice_stage = advice_map.get(event_type)
-        if advice_stage:
-            advice_fallback_counter[advice_stage] += 1
-            corr = _safe_correlation(event_corr, payload_json)
-            if corr:
-                by_corr_advice.setdefault(corr, set()).add(advice_stage)
-            else:
-                missing_corr += 1
+    events_total = 0
+    for funnel, stage, count, correlated, missing in rows.all():
+        count = int(count or 0)
+        fallback_counters.setdefault(str(funnel), Counter())[str(stage)] += count
+        events_total += count
+        missing_corr += int(missing or 0)
+        if correlated:
+            by_corr.setdefault(str(funnel), Counter())[str(stage)] = int(correlated)
+
+    by_corr_plan = by_corr["plan"]
+    by_corr_advice = by_corr["advice"]
+    plan_fallback_counter = fallback_counters["plan"]
+    advice_fallback_counter = fallback_counters["advice"]
 
     notes: list[str] = []
 
     if by_corr_plan:
-        built = sum(1 for stages in by_corr_plan.values() if "built" in stages)
-        previewed = sum(1 for stages in by_corr_plan.values() if "previewed" in stages)
-        committed = sum(1 for stages in by_corr_plan.values() if "committed" in stages)
-        cancelled = sum(1 for stages in by_corr_plan.values() if "cancelled" in stages)
+        built = by_corr_plan["built"]
+        previewed = by_corr_plan["previewed"]
+        committed = by_corr_plan["committed"]
+        cancelled = by_corr_plan["cancelled"]
     else:
         built = plan_fallback_counter["built"]
         previewed = plan_fallback_counter["previewed"]
@@ -447,16 +386,16 @@ async def retro_funnels(session: AsyncSession, period_days: int) -> FunnelReport
         notes.append("Plan funnel fallback: correlation_id unavailable, used event ordering counts.")
 
     if by_corr_advice:
-        brief = sum(1 for stages in by_corr_advice.values() if "brief" in stages)
-        advice = sum(1 for stages in by_corr_advice.values() if "advice" in stages)
-        memo = sum(1 for stages in by_corr_advice.values() if "memo" in stages)
+        brief = by_corr_advice["brief"]
+        advice = by_corr_advice["advice"]
+        memo = by_corr_advice["memo"]
     else:
         brief = advice_fallback_counter["brief"]
         advice = advice_fallback_counter["advice"]
         memo = advice_fallback_counter["memo"]
         notes.append("Advice funnel fallback: correlation_id unavailable, used event ordering counts.")
 
-    total_events = max(1, len(rows) * 2)
+    total_events = max(1, events_total * 2)
     corr_coverage = 1 - (missing_corr / total_events)
     if corr_coverage > 0.9:
         confidence = "high"
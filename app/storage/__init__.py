@@ -0,0 +1,2 @@
+# Registers the ORM flush listeners that keep ownerbot_sales_daily in step with order changes.
+from app.storage import sales_daily as _sales_daily  # noqa: F401
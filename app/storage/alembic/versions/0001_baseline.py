@@ -9,6 +9,8 @@ from __future__ import annotations
 from alembic import op
 import sqlalchemy as sa
 
+from app.storage.partitioning import AUDIT_EVENTS_DEFAULT_PARTITION_DDL, AUDIT_EVENTS_PARTITION_BY, partitioned_table_kwargs
+
 revision = "0001_baseline"
 down_revision = None
 branch_labels = None
@@ -29,11 +31,88 @@ def upgrade() -> None:
     )
     op.create_table(
         "ownerbot_audit_events",
-        sa.Column("id", sa.Integer(), primary_key=True),
-        sa.Column("occurred_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("id", sa.Integer(), sa.Identity(), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
         sa.Column("correlation_id", sa.String(length=64), nullable=False),
         sa.Column("event_type", sa.String(length=128), nullable=False),
         sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("severity", sa.String(length=16), nullable=True),
+        sa.Column("tool", sa.String(length=128), nullable=True),
+        sa.Column("status", sa.String(length=32), nullable=True),
+        sa.Column("latency_ms", sa.Integer(), nullable=True),
+        sa.Column("error_code", sa.String(length=64), nullable=True),
+        sa.PrimaryKeyConstraint("id", "occurred_at"),
+        **partitioned_table_kwargs(AUDIT_EVENTS_PARTITION_BY),
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(AUDIT_EVENTS_DEFAULT_PARTITION_DDL)
+        # Current and next months; AuditRetentionWorker keeps creating partitions ahead of time.
+        op.execute(
+            """
+            DO $$
+            DECLARE
+                month_start date := date_trunc('month', now() AT TIME ZONE 'UTC')::date;
+            BEGIN
+                FOR i IN 0..2 LOOP
+                    EXECUTE format(
+                        'CREATE TABLE IF NOT EXISTS ownerbot_audit_events_p%s PARTITION OF ownerbot_audit_events '
+                        'FOR VALUES FROM (%L) TO (%L)',
+                        to_char(month_start + make_interval(months => i), 'YYYYMM'),
+                        (month_start + make_interval(months => i))::timestamp AT TIME ZONE 'UTC',
+                        (month_start + make_interval(months => i + 1))::timestamp AT TIME ZONE 'UTC'
+                    );
+                END LOOP;
+            END $$;
+            """
+        )
+    op.create_table(
+        "ownerbot_retro_rollup_hourly",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("event_type", sa.String(length=128), nullable=False),
+        sa.Column("tool", sa.String(length=128), nullable=False, server_default=""),
+        sa.Column("error_code", sa.String(length=64), nullable=False, server_default=""),
+        sa.Column("intent_source", sa.String(length=16), nullable=False, server_default=""),
+        sa.Column("intent_kind", sa.String(length=16), nullable=False, server_default=""),
+        sa.Column("confidence", sa.String(length=16), nullable=False, server_default=""),
+        sa.Column("event_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "bucket_start",
+            "event_type",
+            "tool",
+            "error_code",
+            "intent_source",
+            "intent_kind",
+            "confidence",
+            name="uq_ownerbot_retro_rollup_hourly_key",
+        ),
+    )
+    op.create_table(
+        "ownerbot_retro_label_hourly",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("label_kind", sa.String(length=32), nullable=False),
+        sa.Column("label", sa.String(length=128), nullable=False),
+        sa.Column("label_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("bucket_start", "label_kind", "label", name="uq_ownerbot_retro_label_hourly_key"),
+    )
+    op.create_table(
+        "ownerbot_retro_funnel_hourly",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("funnel", sa.String(length=16), nullable=False),
+        sa.Column("stage", sa.String(length=16), nullable=False),
+        sa.Column("event_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("correlation_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("missing_correlation_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("bucket_start", "funnel", "stage", name="uq_ownerbot_retro_funnel_hourly_key"),
+    )
+    op.create_table(
+        "ownerbot_retro_rollup_state",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("last_event_id", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("pending_gap_ids", sa.Text(), nullable=False, server_default="[]"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
     )
     op.create_table(
         "owner_notify_settings",
@@ -124,6 +203,37 @@ def upgrade() -> None:
         sa.Column("last_error_notice_at", sa.DateTime(timezone=True), nullable=True),
     )
 
+    op.create_table(
+        "ownerbot_notify_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("dedupe_key", sa.String(length=255), nullable=False, unique=True),
+        sa.Column("group_key", sa.String(length=255), nullable=False),
+        sa.Column("notification", sa.String(length=32), nullable=False),
+        sa.Column("owner_id", sa.BigInteger(), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("message_kind", sa.String(length=16), nullable=False),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("content", sa.LargeBinary(), nullable=True),
+        sa.Column("filename", sa.String(length=128), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("delivered_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.String(length=255), nullable=True),
+    )
+    op.create_index(
+        "idx_ownerbot_notify_outbox_status_next_attempt",
+        "ownerbot_notify_outbox",
+        ["status", "next_attempt_at"],
+    )
+    op.create_index(
+        "idx_ownerbot_notify_outbox_group_key",
+        "ownerbot_notify_outbox",
+        ["group_key", "id"],
+    )
+
     op.create_table(
         "ownerbot_demo_orders",
         sa.Column("order_id", sa.String(length=64), primary_key=True),
@@ -154,6 +264,34 @@ def upgrade() -> None:
         sa.Column("orders_created", sa.Integer(), nullable=False),
         sa.Column("aov", sa.Numeric(12, 2), nullable=False),
     )
+    op.create_table(
+        "ownerbot_sales_daily",
+        sa.Column("product_id", sa.String(length=64), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("category", sa.String(length=64), nullable=False, server_default=""),
+        sa.Column("qty", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Numeric(14, 2), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "ownerbot_forecast_results",
+        sa.Column("preset", sa.String(length=64), primary_key=True),
+        sa.Column("product_id", sa.String(length=64), primary_key=True),
+        sa.Column("history_end", sa.Date(), nullable=False),
+        sa.Column("as_of", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("fingerprint", sa.String(length=40), nullable=False),
+        sa.Column("model", sa.String(length=32), nullable=False),
+        sa.Column("params", sa.Text(), nullable=False),
+        sa.Column("holdout_mse", sa.Float(), nullable=True),
+        sa.Column("avg_daily_qty", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("forecast_daily_qty", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("forecast_total_qty", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("nonzero_days", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("confidence", sa.String(length=8), nullable=False),
+        sa.Column("stock_qty", sa.Integer(), nullable=True),
+        sa.Column("reorder_point", sa.Float(), nullable=True),
+        sa.Column("recommended_order_qty", sa.Integer(), nullable=True),
+    )
     op.create_table(
         "ownerbot_demo_products",
         sa.Column("product_id", sa.String(length=64), primary_key=True),
@@ -246,6 +384,46 @@ def upgrade() -> None:
         "ownerbot_audit_events",
         ["correlation_id"],
     )
+    op.create_index(
+        "idx_ownerbot_audit_events_errors_occurred_at",
+        "ownerbot_audit_events",
+        ["occurred_at"],
+        postgresql_where=sa.text("severity = 'error'"),
+        sqlite_where=sa.text("severity = 'error'"),
+    )
+    op.create_index(
+        "idx_ownerbot_audit_events_severity_occurred_at",
+        "ownerbot_audit_events",
+        ["severity", "occurred_at"],
+    )
+    op.create_index(
+        "idx_ownerbot_audit_events_tool_occurred_at",
+        "ownerbot_audit_events",
+        ["tool", "occurred_at"],
+    )
+    op.create_index(
+        "idx_ownerbot_audit_events_unclassified_id",
+        "ownerbot_audit_events",
+        ["id"],
+        postgresql_where=sa.text("severity IS NULL"),
+        sqlite_where=sa.text("severity IS NULL"),
+    )
+
+    op.create_index(
+        "idx_ownerbot_retro_rollup_hourly_bucket_event_type",
+        "ownerbot_retro_rollup_hourly",
+        ["bucket_start", "event_type"],
+    )
+    op.create_index(
+        "idx_ownerbot_retro_label_hourly_kind_bucket",
+        "ownerbot_retro_label_hourly",
+        ["label_kind", "bucket_start"],
+    )
+    op.create_index(
+        "idx_ownerbot_retro_funnel_hourly_funnel_bucket",
+        "ownerbot_retro_funnel_hourly",
+        ["funnel", "bucket_start"],
+    )
 
     op.create_index(
         "idx_ownerbot_action_log_status_committed_at",
@@ -269,6 +447,12 @@ def upgrade() -> None:
         ["status", "created_at"],
     )
 
+    op.create_index(
+        "idx_ownerbot_demo_orders_created_at",
+        "ownerbot_demo_orders",
+        ["created_at"],
+    )
+
     op.create_index(
         "idx_ownerbot_demo_orders_customer_phone",
         "ownerbot_demo_orders",
@@ -300,19 +484,39 @@ def upgrade() -> None:
         "ownerbot_demo_order_items",
         ["product_id"],
     )
+    op.create_index(
+        "idx_ownerbot_sales_daily_day",
+        "ownerbot_sales_daily",
+        ["day"],
+    )
+    op.create_index(
+        "idx_ownerbot_sales_daily_category_day",
+        "ownerbot_sales_daily",
+        ["category", "day"],
+    )
 
 
 def downgrade() -> None:
+    op.drop_index("idx_ownerbot_sales_daily_category_day", table_name="ownerbot_sales_daily")
+    op.drop_index("idx_ownerbot_sales_daily_day", table_name="ownerbot_sales_daily")
     op.drop_index("idx_ownerbot_demo_order_items_product_id", table_name="ownerbot_demo_order_items")
     op.drop_index("idx_ownerbot_demo_order_items_order_id", table_name="ownerbot_demo_order_items")
     op.drop_index("idx_ownerbot_demo_products_stock_qty", table_name="ownerbot_demo_products")
     op.drop_index("idx_ownerbot_demo_products_published", table_name="ownerbot_demo_products")
     op.drop_index("idx_ownerbot_demo_products_category", table_name="ownerbot_demo_products")
     op.drop_index("idx_ownerbot_demo_orders_customer_phone", table_name="ownerbot_demo_orders")
+    op.drop_index("idx_ownerbot_demo_orders_created_at", table_name="ownerbot_demo_orders")
     op.drop_index("idx_ownerbot_demo_orders_status_created_at", table_name="ownerbot_demo_orders")
     op.drop_index("idx_ownerbot_action_log_correlation_id", table_name="ownerbot_action_log")
     op.drop_index("idx_ownerbot_action_log_tool_committed_at", table_name="ownerbot_action_log")
     op.drop_index("idx_ownerbot_action_log_status_committed_at", table_name="ownerbot_action_log")
+    op.drop_index("idx_ownerbot_retro_funnel_hourly_funnel_bucket", table_name="ownerbot_retro_funnel_hourly")
+    op.drop_index("idx_ownerbot_retro_label_hourly_kind_bucket", table_name="ownerbot_retro_label_hourly")
+    op.drop_index("idx_ownerbot_retro_rollup_hourly_bucket_event_type", table_name="ownerbot_retro_rollup_hourly")
+    op.drop_index("idx_ownerbot_audit_events_unclassified_id", table_name="ownerbot_audit_events")
+    op.drop_index("idx_ownerbot_audit_events_tool_occurred_at", table_name="ownerbot_audit_events")
+    op.drop_index("idx_ownerbot_audit_events_severity_occurred_at", table_name="ownerbot_audit_events")
+    op.drop_index("idx_ownerbot_audit_events_errors_occurred_at", table_name="ownerbot_audit_events")
     op.drop_index("idx_ownerbot_audit_events_correlation_id", table_name="ownerbot_audit_events")
     op.drop_index("idx_ownerbot_audit_events_event_type_occurred_at", table_name="ownerbot_audit_events")
     op.drop_index("idx_ownerbot_audit_events_occurred_at", table_name="ownerbot_audit_events")
@@ -322,11 +526,20 @@ def downgrade() -> None:
     op.drop_index("idx_owner_notify_settings_digest_enabled", table_name="owner_notify_settings")
     op.drop_index("idx_owner_notify_settings_fx_delta_enabled", table_name="owner_notify_settings")
     op.drop_table("ownerbot_demo_chat_threads")
+    op.drop_index("idx_ownerbot_notify_outbox_group_key", table_name="ownerbot_notify_outbox")
+    op.drop_index("idx_ownerbot_notify_outbox_status_next_attempt", table_name="ownerbot_notify_outbox")
+    op.drop_table("ownerbot_notify_outbox")
     op.drop_table("owner_notify_settings")
     op.drop_table("ownerbot_demo_coupons")
     op.drop_table("ownerbot_demo_order_items")
+    op.drop_table("ownerbot_forecast_results")
+    op.drop_table("ownerbot_sales_daily")
     op.drop_table("ownerbot_demo_products")
     op.drop_table("ownerbot_demo_kpi_daily")
     op.drop_table("ownerbot_demo_orders")
+    op.drop_table("ownerbot_retro_rollup_state")
+    op.drop_table("ownerbot_retro_funnel_hourly")
+    op.drop_table("ownerbot_retro_label_hourly")
+    op.drop_table("ownerbot_retro_rollup_hourly")
     op.drop_table("ownerbot_audit_events")
     op.drop_table("ownerbot_action_log")
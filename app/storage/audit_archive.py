@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import re
+from collections import defaultdict, deque
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.storage.models import OwnerbotAuditEvent
+
+logger = logging.getLogger(__name__)
+
+AUDIT_TABLE = "ownerbot_audit_events"
+DEFAULT_PARTITION = f"{AUDIT_TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{AUDIT_TABLE}_p(\d{{4}})(\d{{2}})$")
+ARCHIVE_FILE_PREFIX = f"{AUDIT_TABLE}_"
+ARCHIVE_COLUMNS = (
+    "id",
+    "occurred_at",
+    "correlation_id",
+    "event_type",
+    "payload_json",
+    "severity",
+    "tool",
+    "status",
+    "latency_ms",
+    "error_code",
+)
+
+
+def month_start(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + (value.month - 1) + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{AUDIT_TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> datetime | None:
+    match = _PARTITION_RE.match(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def archive_path(archive_dir: str | Path, month: datetime) -> Path:
+    return Path(archive_dir) / f"{ARCHIVE_FILE_PREFIX}{month.year:04d}_{month.month:02d}.jsonl.gz"
+
+
+def retention_cutoff(now: datetime, hot_retention_days: int) -> datetime:
+    """Rows before this instant are archived; whole months only, so hot partitions are never row-deleted."""
+    return month_start(now - timedelta(days=max(1, hot_retention_days)))
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    return value
+
+
+def _row_line(row: dict[str, Any]) -> str:
+    return json.dumps({column: _jsonable(row.get(column)) for column in ARCHIVE_COLUMNS}, ensure_ascii=False)
+
+
+def append_archive_rows(archive_dir: str | Path, rows: list[dict[str, Any]]) -> int:
+    """Append rows to monthly gzip archives; each call adds a gzip member, which readers see as one stream."""
+    by_month: dict[datetime, list[str]] = defaultdict(list)
+    for row in rows:
+        occurred_at = row.get("occurred_at")
+        month = month_start(occurred_at) if isinstance(occurred_at, datetime) else datetime(1970, 1, 1, tzinfo=timezone.utc)
+        by_month[month].append(_row_line(row))
+    for month, lines in by_month.items():
+        path = archive_path(archive_dir, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "at", encoding="utf-8") as handle:
+            handle.write("\n".join(lines) + "\n")
+    return len(rows)
+
+
+def _filter_fragment(key: str, value: str) -> str:
+    # Must match the separators used by _row_line so the substring check never rejects a real match.
+    return json.dumps({key: value}, ensure_ascii=False)[1:-1]
+
+
+def iter_archive_rows(archive_dir: str | Path, date_from: date, date_to: date, *, fragments: tuple[str, ...] = ()) -> Iterator[dict[str, Any]]:
+    start = datetime.combine(date_from, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    month = month_start(start)
+    while month < end:
+        path = archive_path(archive_dir, month)
+        month = add_months(month, 1)
+        if not path.exists():
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                if any(fragment not in line for fragment in fragments):
+                    continue
+                try:
+                    row = json.loads(line)
+                    occurred_at = datetime.fromisoformat(row["occurred_at"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if start <= occurred_at < end:
+                    yield row
+
+
+def query_archive(
+    archive_dir: str | Path,
+    date_from: date,
+    date_to: date,
+    *,
+    filters: dict[str, str | None],
+    limit: int,
+) -> tuple[int, list[dict[str, Any]]]:
+    """Scan archives for the period; returns (matched, newest `limit` rows). Duplicates from retried exports are skipped by id."""
+    active = {key: value for key, value in filters.items() if value}
+    fragments = tuple(_filter_fragment(key, value) for key, value in active.items())
+    seen: set[int] = set()
+    newest: deque[dict[str, Any]] = deque(maxlen=max(1, limit))
+    matched = 0
+    for row in iter_archive_rows(archive_dir, date_from, date_to, fragments=fragments):
+        if any(row.get(key) != value for key, value in active.items()):
+            continue
+        row_id = row.get("id")
+        if row_id in seen:
+            continue
+        seen.add(row_id)
+        matched += 1
+        newest.append(row)
+    events = sorted(newest, key=lambda item: item["occurred_at"], reverse=True)
+    return matched, events
+
+
+def _is_postgres(session: AsyncSession) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+async def ensure_audit_partitions(session: AsyncSession, *, now: datetime, months_ahead: int) -> list[str]:
+    """Create monthly partitions up to `months_ahead` ahead so new rows never land in the default partition.
+
+    Rows already stranded in the default partition for a missing month are moved into the new partition.
+    """
+    if not _is_postgres(session):
+        return []
+    created = []
+    current = month_start(now)
+    for offset in range(max(0, months_ahead) + 1):
+        start = add_months(current, offset)
+        name = partition_name(start)
+        exists = (await session.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar()
+        if exists is not None:
+            continue
+        end = add_months(start, 1)
+        stranded = (
+            await session.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE occurred_at >= :start AND occurred_at < :end)"),
+                {"start": start, "end": end},
+            )
+        ).scalar()
+        if stranded:
+            # The worker missed the month boundary and rows landed in DEFAULT; Postgres refuses to create a
+            # partition overlapping them, so they are moved while DEFAULT is detached (one transaction).
+            await session.execute(text(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+        await session.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {AUDIT_TABLE} FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')")
+        )
+        if stranded:
+            bounds = {"start": start, "end": end}
+            columns = ", ".join(ARCHIVE_COLUMNS)
+            await session.execute(
+                text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} WHERE occurred_at >= :start AND occurred_at < :end"),
+                bounds,
+            )
+            await session.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE occurred_at >= :start AND occurred_at < :end"), bounds)
+            await session.execute(text(f"ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+        await session.commit()
+        created.append(name)
+    return created
+
+
+async def detach_expired_partitions(session: AsyncSession, *, cutoff: datetime) -> list[str]:
+    if not _is_postgres(session):
+        return []
+    rows = await session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": AUDIT_TABLE},
+    )
+    detached = []
+    for (name,) in rows.all():
+        month = partition_month(name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+        await session.execute(text(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {name}"))
+        await session.commit()
+        detached.append(name)
+    return detached
+
+
+async def archive_detached_partitions(session: AsyncSession, *, archive_dir: str | Path, batch_size: int) -> dict[str, int]:
+    """Stream every detached audit partition to the archive, then drop it; a crash before DROP only re-exports."""
+    if not _is_postgres(session):
+        return {}
+    rows = await session.execute(
+        text("SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition AND relname ~ :pattern"),
+        {"pattern": _PARTITION_RE.pattern},
+    )
+    archived: dict[str, int] = {}
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    for (name,) in rows.all():
+        if partition_month(name) is None:
+            continue
+        last_id = 0
+        total = 0
+        while True:
+            batch = (
+                await session.execute(
+                    text(f"SELECT {columns} FROM {name} WHERE id > :last_id ORDER BY id LIMIT :limit"),
+                    {"last_id": last_id, "limit": batch_size},
+                )
+            ).mappings().all()
+            if not batch:
+                break
+            total += await asyncio.to_thread(append_archive_rows, archive_dir, [dict(row) for row in batch])
+            last_id = int(batch[-1]["id"])
+        await session.execute(text(f"DROP TABLE {name}"))
+        await session.commit()
+        archived[name] = total
+    return archived
+
+
+async def archive_expired_rows(session: AsyncSession, *, archive_dir: str | Path, cutoff: datetime, batch_size: int) -> int:
+    """Archive-and-delete fallback for unpartitioned tables and rows that landed in the default partition."""
+    columns = [getattr(OwnerbotAuditEvent, column) for column in ARCHIVE_COLUMNS]
+    total = 0
+    while True:
+        batch = (
+            await session.execute(
+                select(*columns)
+                .where(OwnerbotAuditEvent.occurred_at < cutoff)
+                .order_by(OwnerbotAuditEvent.id)
+                .limit(batch_size)
+            )
+        ).mappings().all()
+        if not batch:
+            break
+        await asyncio.to_thread(append_archive_rows, archive_dir, [dict(row) for row in batch])
+        await session.execute(
+            delete(OwnerbotAuditEvent)
+            .where(OwnerbotAuditEvent.id.in_([row["id"] for row in batch]))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        total += len(batch)
+        if len(batch) < batch_size:
+            break
+    return total
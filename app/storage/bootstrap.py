@@ -19,6 +19,7 @@ from app.storage.models import (
     OwnerbotDemoProduct,
     OwnerbotDemoCoupon,
 )
+from app.storage.sales_daily import ensure_sales_daily
 
 
 _PRODUCT_SEED = [
@@ -395,3 +396,5 @@ async def seed_demo_data() -> None:
         session.add_all(order_items)
         session.add_all(coupons)
         await session.commit()
+        # New rows reach ownerbot_sales_daily through the flush listener; this covers databases seeded before it existed.
+        await ensure_sales_daily(session)
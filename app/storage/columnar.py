@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from functools import cached_property
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.settings import get_settings
+from app.storage.models import OwnerbotDemoCoupon, OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct
+from app.storage.sales_daily import sales_day
+
+EPOCH = date(1970, 1, 1)
+# Rows whose updated_at is this close to the watermark are read again: timestamps tie and commits land late.
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+PRODUCT_COLUMNS: dict[str, Any] = {
+    "title": object,
+    "category": object,
+    "price": np.float64,
+    "stock_qty": np.int64,
+    "published": np.bool_,
+    "has_photo": np.bool_,
+    "has_video": np.bool_,
+    "return_flagged": np.bool_,
+}
+COUPON_COLUMNS: dict[str, Any] = {
+    "used_count": np.int64,
+    "active": np.bool_,
+    "percent_off": object,
+    "amount_off": np.float64,
+}
+ORDER_COLUMNS: dict[str, Any] = {"day": np.int32, "paid": np.bool_}
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def day_number(day: date) -> int:
+    return (day - EPOCH).days
+
+
+def group_sum(keys: np.ndarray, size: int, weights: np.ndarray | None = None) -> np.ndarray:
+    """Per-key sums of ``weights`` (row counts without weights) for integer keys in ``[0, size)``."""
+    return np.bincount(keys, weights=weights, minlength=size)[:size]
+
+
+def top_k(
+    values: np.ndarray,
+    k: int,
+    *,
+    largest: bool = True,
+    tiebreak: np.ndarray | None = None,
+    candidates: np.ndarray | None = None,
+) -> np.ndarray:
+    """Indices of the ``k`` best ``values`` among ``candidates``, best first; ties go to the lower ``tiebreak``."""
+    idx = np.arange(len(values)) if candidates is None else np.asarray(candidates)
+    if k <= 0 or idx.size == 0:
+        return np.empty(0, dtype=np.int64)
+    score = -values[idx] if largest else values[idx]
+    if idx.size > k:
+        # Partition instead of a full sort; everything tied with the k-th value stays in for the tiebreak.
+        threshold = np.partition(score, k - 1)[k - 1]
+        keep = score <= threshold
+        idx, score = idx[keep], score[keep]
+    secondary = idx if tiebreak is None else tiebreak[idx]
+    return idx[np.lexsort((secondary, score))[:k]]
+
+
+@dataclass
+class KeyedColumns:
+    """Rows keyed by a string id, stored as one numpy array per column; treated as immutable once built."""
+
+    keys: np.ndarray
+    index: dict[str, int]
+    columns: dict[str, np.ndarray]
+
+    @classmethod
+    def empty(cls, dtypes: dict[str, Any]) -> KeyedColumns:
+        return cls(np.empty(0, dtype=object), {}, {name: np.empty(0, dtype=dtype) for name, dtype in dtypes.items()})
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @cached_property
+    def order(self) -> np.ndarray:
+        return np.argsort(self.keys.astype(str), kind="stable")
+
+    @cached_property
+    def rank(self) -> np.ndarray:
+        rank = np.empty(len(self), dtype=np.int64)
+        rank[self.order] = np.arange(len(self))
+        return rank
+
+    def upsert(self, rows: dict[str, dict[str, Any]]) -> KeyedColumns:
+        """Returns a copy with ``rows`` updated in place or appended; readers of ``self`` are not affected."""
+        if not rows:
+            return self
+        columns = {name: array.copy() for name, array in self.columns.items()}
+        index = dict(self.index)
+        appended: list[str] = []
+        for key, values in rows.items():
+            position = index.get(key)
+            if position is None:
+                index[key] = len(self.keys) + len(appended)
+                appended.append(key)
+                continue
+            for name, array in columns.items():
+                array[position] = values[name]
+        if appended:
+            for name, array in columns.items():
+                extra = np.array([rows[key][name] for key in appended], dtype=array.dtype)
+                columns[name] = np.concatenate([array, extra])
+        keys = np.concatenate([self.keys, np.array(appended, dtype=object)]) if appended else self.keys
+        return KeyedColumns(keys, index, columns)
+
+
+@dataclass
+class SalesColumns:
+    """One consistent snapshot of products, coupons, orders and order lines in columnar form."""
+
+    products: KeyedColumns
+    coupons: KeyedColumns
+    orders: KeyedColumns
+    line_item_id: np.ndarray
+    line_order: np.ndarray
+    line_product: np.ndarray
+    line_qty: np.ndarray
+    line_price: np.ndarray
+    built_at: float = field(default_factory=time.monotonic)
+
+    @cached_property
+    def line_day(self) -> np.ndarray:
+        return np.where(self.line_order >= 0, self.orders.columns["day"][np.maximum(self.line_order, 0)], -1)
+
+    @cached_property
+    def line_paid(self) -> np.ndarray:
+        return (self.line_order >= 0) & self.orders.columns["paid"][np.maximum(self.line_order, 0)]
+
+    @cached_property
+    def line_revenue(self) -> np.ndarray:
+        return self.line_qty * self.line_price
+
+    @cached_property
+    def category_index(self) -> tuple[np.ndarray, np.ndarray]:
+        """Distinct categories and, per product row, the position of its category."""
+        names, inverse = np.unique(self.products.columns["category"].astype(str), return_inverse=True)
+        return names, inverse.reshape(-1)
+
+    def paid_lines(self, start_day: date, end_day: date) -> np.ndarray:
+        day = self.line_day
+        return self.line_paid & (self.line_product >= 0) & (day >= day_number(start_day)) & (day <= day_number(end_day))
+
+    def sales_by_product(self, start_day: date, end_day: date) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(qty, revenue, line count) per product row over paid lines of orders created in the window."""
+        mask = self.paid_lines(start_day, end_day)
+        keys = self.line_product[mask]
+        size = len(self.products)
+        return (
+            group_sum(keys, size, self.line_qty[mask].astype(np.float64)),
+            group_sum(keys, size, self.line_revenue[mask]),
+            group_sum(keys, size),
+        )
+
+    def sales_by_category(self, start_day: date, end_day: date) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        names, product_category = self.category_index
+        qty, revenue, lines = self.sales_by_product(start_day, end_day)
+        size = len(names)
+        return group_sum(product_category, size, qty), group_sum(product_category, size, revenue), group_sum(product_category, size, lines)
+
+
+def _is_paid(status: str | None, payment_status: str | None) -> bool:
+    return status == "paid" or payment_status == "paid"
+
+
+def _bind_of(session) -> Any:
+    return getattr(session, "bind", None)
+
+
+class ColumnarSalesCache:
+    """Process-local columnar copy of the demo catalog and order lines for interactive rankings.
+
+    Refreshes are incremental: products, coupons and orders by ``updated_at`` watermark, order lines by id.
+    Lines deleted or edited in place are only picked up by a full reload.
+    """
+
+    def __init__(self) -> None:
+        self._columns: SalesColumns | None = None
+        self._bind: Any = None
+        self._watermarks: dict[str, datetime] = {}
+        self._max_item_id = 0
+        # Lines whose order or product was not visible yet when they were read: (line position, order_id, product_id).
+        self._unresolved: list[tuple[int, str, str]] = []
+        self._stats: dict[str, Any] = {"full_refreshes": 0, "incremental_refreshes": 0, "hits": 0, "fallbacks": 0, "refresh_ms_last": None}
+
+    async def refresh(self, session, *, full: bool = False) -> dict[str, int]:
+        started = time.perf_counter()
+        full = full or self._columns is None or self._bind is not _bind_of(session)
+        current = None if full else self._columns
+        watermarks = {} if full else dict(self._watermarks)
+        # Lines first: an order committed after this read is still found below, so its lines resolve now.
+        item_rows = await self._load_items(session, after_id=0 if full else self._max_item_id)
+        product_rows = await self._load_changed(
+            session,
+            OwnerbotDemoProduct,
+            [OwnerbotDemoProduct.product_id, *(getattr(OwnerbotDemoProduct, name) for name in PRODUCT_COLUMNS)],
+            watermarks,
+            "products",
+        )
+        coupon_rows = await self._load_changed(
+            session,
+            OwnerbotDemoCoupon,
+            [OwnerbotDemoCoupon.code, *(getattr(OwnerbotDemoCoupon, name) for name in COUPON_COLUMNS)],
+            watermarks,
+            "coupons",
+        )
+        order_rows = await self._load_changed(
+            session,
+            OwnerbotDemoOrder,
+            [OwnerbotDemoOrder.order_id, OwnerbotDemoOrder.created_at, OwnerbotDemoOrder.status, OwnerbotDemoOrder.payment_status],
+            watermarks,
+            "orders",
+        )
+
+        products = (current.products if current else KeyedColumns.empty(PRODUCT_COLUMNS)).upsert(
+            {
+                row.product_id: {
+                    "title": row.title,
+                    "category": row.category or "",
+                    "price": float(row.price or 0),
+                    "stock_qty": int(row.stock_qty or 0),
+                    "published": bool(row.published),
+                    "has_photo": bool(row.has_photo),
+                    "has_video": bool(row.has_video),
+                    "return_flagged": bool(row.return_flagged),
+                }
+                for row in product_rows
+            }
+        )
+        coupons = (current.coupons if current else KeyedColumns.empty(COUPON_COLUMNS)).upsert(
+            {
+                row.code: {
+                    "used_count": int(row.used_count or 0),
+                    "active": bool(row.active),
+                    "percent_off": row.percent_off,
+                    "amount_off": float(row.amount_off or 0),
+                }
+                for row in coupon_rows
+            }
+        )
+        orders = (current.orders if current else KeyedColumns.empty(ORDER_COLUMNS)).upsert(
+            {
+                row.order_id: {
+                    "day": day_number(sales_day(row.created_at)) if row.created_at is not None else -1,
+                    "paid": _is_paid(row.status, row.payment_status),
+                }
+                for row in order_rows
+            }
+        )
+
+        offset = len(current.line_item_id) if current else 0
+        unresolved = [] if full else list(self._unresolved)
+        new_order = np.empty(len(item_rows), dtype=np.int32)
+        new_product = np.empty(len(item_rows), dtype=np.int32)
+        for position, row in enumerate(item_rows):
+            new_order[position] = orders.index.get(row.order_id, -1)
+            new_product[position] = products.index.get(row.product_id, -1)
+            if new_order[position] < 0 or new_product[position] < 0:
+                unresolved.append((offset + position, row.order_id, row.product_id))
+
+        # concatenate copies, so resolving old positions below never touches the snapshot readers hold.
+        line_order = np.concatenate([current.line_order, new_order]) if current else new_order
+        line_product = np.concatenate([current.line_product, new_product]) if current else new_product
+        still_unresolved: list[tuple[int, str, str]] = []
+        for position, order_id, product_id in unresolved:
+            line_order[position] = orders.index.get(order_id, -1)
+            line_product[position] = products.index.get(product_id, -1)
+            if line_order[position] < 0 or line_product[position] < 0:
+                still_unresolved.append((position, order_id, product_id))
+
+        new_ids = np.fromiter((row.id for row in item_rows), dtype=np.int64, count=len(item_rows))
+        new_qty = np.fromiter((row.qty or 0 for row in item_rows), dtype=np.int64, count=len(item_rows))
+        new_price = np.fromiter((float(row.unit_price or 0) for row in item_rows), dtype=np.float64, count=len(item_rows))
+        columns = SalesColumns(
+            products=products,
+            coupons=coupons,
+            orders=orders,
+            line_item_id=np.concatenate([current.line_item_id, new_ids]) if current else new_ids,
+            line_order=line_order,
+            line_product=line_product,
+            line_qty=np.concatenate([current.line_qty, new_qty]) if current else new_qty,
+            line_price=np.concatenate([current.line_price, new_price]) if current else new_price,
+        )
+
+        # Swap in one step: readers keep whichever snapshot they already hold.
+        self._columns = columns
+        self._bind = _bind_of(session)
+        self._watermarks = watermarks
+        self._unresolved = still_unresolved
+        if len(new_ids) or full:
+            self._max_item_id = int(new_ids.max()) if len(new_ids) else 0
+        self._stats["full_refreshes" if full else "incremental_refreshes"] += 1
+        self._stats["refresh_ms_last"] = int((time.perf_counter() - started) * 1000)
+        return {
+            "full": int(full),
+            "products": len(product_rows),
+            "coupons": len(coupon_rows),
+            "orders": len(order_rows),
+            "lines": len(item_rows),
+        }
+
+    @staticmethod
+    async def _load_items(session, *, after_id: int) -> list:
+        stmt = (
+            select(
+                OwnerbotDemoOrderItem.id,
+                OwnerbotDemoOrderItem.order_id,
+                OwnerbotDemoOrderItem.product_id,
+                OwnerbotDemoOrderItem.qty,
+                OwnerbotDemoOrderItem.unit_price,
+            )
+            .where(OwnerbotDemoOrderItem.id > after_id)
+            .order_by(OwnerbotDemoOrderItem.id)
+        )
+        return list((await session.execute(stmt)).all())
+
+    @staticmethod
+    async def _load_changed(session, model, columns: list, watermarks: dict[str, datetime], name: str) -> list:
+        stmt = select(*columns, model.updated_at)
+        since = watermarks.get(name)
+        if since is not None:
+            stmt = stmt.where(model.updated_at >= since - WATERMARK_OVERLAP)
+        rows = list((await session.execute(stmt)).all())
+        stamps = [_as_utc(row.updated_at) for row in rows if row.updated_at is not None]
+        if stamps:
+            watermarks[name] = max([*stamps, *([since] if since is not None else [])])
+        return rows
+
+    def snapshot_for(self, session, *, max_age_sec: float) -> SalesColumns | None:
+        """The current snapshot if it was built from this session's database recently enough, else None."""
+        columns = self._columns
+        if columns is None or self._bind is None or self._bind is not _bind_of(session) or time.monotonic() - columns.built_at > max_age_sec:
+            self._stats["fallbacks"] += 1
+            return None
+        self._stats["hits"] += 1
+        return columns
+
+    def stats(self) -> dict[str, Any]:
+        columns = self._columns
+        return {
+            **self._stats,
+            "warm": columns is not None,
+            "age_sec": round(time.monotonic() - columns.built_at, 1) if columns is not None else None,
+            "products": len(columns.products) if columns is not None else 0,
+            "lines": int(len(columns.line_item_id)) if columns is not None else 0,
+            "unresolved_lines": len(self._unresolved),
+        }
+
+
+_CACHE: ColumnarSalesCache | None = None
+
+
+def get_columnar_cache() -> ColumnarSalesCache:
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ColumnarSalesCache()
+    return _CACHE
+
+
+def analytics_snapshot(session) -> SalesColumns | None:
+    """Columns for ranking queries, or None when the cache is cold or stale: callers then go to SQL."""
+    max_age_sec = get_settings().analytics_cache_max_age_sec
+    return get_columnar_cache().snapshot_for(session, max_age_sec=max_age_sec)
+
+
+def columnar_cache_stats() -> dict[str, Any]:
+    return get_columnar_cache().stats() if _CACHE is not None else {}
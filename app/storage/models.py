@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from datetime import datetime, date
 
-from sqlalchemy import BigInteger, Date, DateTime, Integer, String, Numeric, Text, func, Boolean, Index
+from sqlalchemy import DDL, BigInteger, Date, DateTime, Float, Identity, Integer, LargeBinary, String, Numeric, Text, event, func, Boolean, Index, UniqueConstraint, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from app.storage.partitioning import AUDIT_EVENTS_DEFAULT_PARTITION_DDL, AUDIT_EVENTS_PARTITION_BY, partitioned_table_kwargs
+
 
 class Base(DeclarativeBase):
     pass
@@ -25,12 +27,104 @@ class OwnerbotActionLog(Base):
 
 class OwnerbotAuditEvent(Base):
     __tablename__ = "ownerbot_audit_events"
+    __table_args__ = (
+        Index(
+            "idx_ownerbot_audit_events_errors_occurred_at",
+            "occurred_at",
+            postgresql_where=text("severity = 'error'"),
+            sqlite_where=text("severity = 'error'"),
+        ),
+        Index("idx_ownerbot_audit_events_severity_occurred_at", "severity", "occurred_at"),
+        Index("idx_ownerbot_audit_events_tool_occurred_at", "tool", "occurred_at"),
+        Index(
+            "idx_ownerbot_audit_events_unclassified_id",
+            "id",
+            postgresql_where=text("severity IS NULL"),
+            sqlite_where=text("severity IS NULL"),
+        ),
+        partitioned_table_kwargs(AUDIT_EVENTS_PARTITION_BY),
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    id: Mapped[int] = mapped_column(Integer, Identity(), primary_key=True)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     correlation_id: Mapped[str] = mapped_column(String(64), nullable=False)
     event_type: Mapped[str] = mapped_column(String(128), nullable=False)
     payload_json: Mapped[str] = mapped_column(Text, nullable=False)
+    severity: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    tool: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    latency_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    error_code: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+
+# Rows outside the monthly partitions land in DEFAULT, so a create_all-built Postgres table accepts inserts too.
+event.listen(OwnerbotAuditEvent.__table__, "after_create", DDL(AUDIT_EVENTS_DEFAULT_PARTITION_DDL).execute_if(dialect="postgresql"))
+
+
+class OwnerbotRetroRollupHourly(Base):
+    __tablename__ = "ownerbot_retro_rollup_hourly"
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_start",
+            "event_type",
+            "tool",
+            "error_code",
+            "intent_source",
+            "intent_kind",
+            "confidence",
+            name="uq_ownerbot_retro_rollup_hourly_key",
+        ),
+        Index("idx_ownerbot_retro_rollup_hourly_bucket_event_type", "bucket_start", "event_type"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    event_type: Mapped[str] = mapped_column(String(128), nullable=False)
+    tool: Mapped[str] = mapped_column(String(128), nullable=False, default="")
+    error_code: Mapped[str] = mapped_column(String(64), nullable=False, default="")
+    intent_source: Mapped[str] = mapped_column(String(16), nullable=False, default="")
+    intent_kind: Mapped[str] = mapped_column(String(16), nullable=False, default="")
+    confidence: Mapped[str] = mapped_column(String(16), nullable=False, default="")
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class OwnerbotRetroLabelHourly(Base):
+    __tablename__ = "ownerbot_retro_label_hourly"
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "label_kind", "label", name="uq_ownerbot_retro_label_hourly_key"),
+        Index("idx_ownerbot_retro_label_hourly_kind_bucket", "label_kind", "bucket_start"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    label_kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    label: Mapped[str] = mapped_column(String(128), nullable=False)
+    label_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class OwnerbotRetroFunnelHourly(Base):
+    __tablename__ = "ownerbot_retro_funnel_hourly"
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "funnel", "stage", name="uq_ownerbot_retro_funnel_hourly_key"),
+        Index("idx_ownerbot_retro_funnel_hourly_funnel_bucket", "funnel", "bucket_start"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    funnel: Mapped[str] = mapped_column(String(16), nullable=False)
+    stage: Mapped[str] = mapped_column(String(16), nullable=False)
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    correlation_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    missing_correlation_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class OwnerbotRetroRollupState(Base):
+    __tablename__ = "ownerbot_retro_rollup_state"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_event_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    pending_gap_ids: Mapped[str] = mapped_column(Text, nullable=False, default="[]")
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class OwnerNotifySettings(Base):
@@ -123,8 +217,35 @@ class OwnerNotifySettings(Base):
     last_error_notice_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
 
+class OwnerbotNotifyOutbox(Base):
+    __tablename__ = "ownerbot_notify_outbox"
+    __table_args__ = (
+        Index("idx_ownerbot_notify_outbox_status_next_attempt", "status", "next_attempt_at"),
+        Index("idx_ownerbot_notify_outbox_group_key", "group_key", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    dedupe_key: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    group_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    notification: Mapped[str] = mapped_column(String(32), nullable=False)
+    owner_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    message_kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    content: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    filename: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    delivered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+
 class OwnerbotDemoOrder(Base):
     __tablename__ = "ownerbot_demo_orders"
+    __table_args__ = (Index("idx_ownerbot_demo_orders_created_at", "created_at"),)
 
     order_id: Mapped[str] = mapped_column(String(64), primary_key=True)
     status: Mapped[str] = mapped_column(String(32), nullable=False)
@@ -206,6 +327,42 @@ class OwnerbotDemoOrderItem(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
+class OwnerbotSalesDaily(Base):
+    __tablename__ = "ownerbot_sales_daily"
+    __table_args__ = (
+        Index("idx_ownerbot_sales_daily_day", "day"),
+        Index("idx_ownerbot_sales_daily_category_day", "category", "day"),
+    )
+
+    product_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    category: Mapped[str] = mapped_column(String(64), nullable=False, default="")
+    qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
+class OwnerbotForecastResult(Base):
+    __tablename__ = "ownerbot_forecast_results"
+
+    preset: Mapped[str] = mapped_column(String(64), primary_key=True)
+    product_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    history_end: Mapped[date] = mapped_column(Date, nullable=False)
+    as_of: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String(40), nullable=False)
+    model: Mapped[str] = mapped_column(String(32), nullable=False)
+    params: Mapped[str] = mapped_column(Text, nullable=False)
+    holdout_mse: Mapped[float | None] = mapped_column(Float, nullable=True)
+    avg_daily_qty: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    forecast_daily_qty: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    forecast_total_qty: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    nonzero_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    confidence: Mapped[str] = mapped_column(String(8), nullable=False)
+    stock_qty: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    reorder_point: Mapped[float | None] = mapped_column(Float, nullable=True)
+    recommended_order_qty: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+
 class OwnerbotDemoCoupon(Base):
     __tablename__ = "ownerbot_demo_coupons"
 
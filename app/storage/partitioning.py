@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from sqlalchemy import PrimaryKeyConstraint
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+
+# Audit events are range-partitioned by month on Postgres so retention detaches whole partitions instead of
+# DELETE + VACUUM; the partition key has to be part of the primary key, hence (id, occurred_at).
+AUDIT_EVENTS_PARTITION_BY = "RANGE (occurred_at)"
+AUDIT_EVENTS_DEFAULT_PARTITION_DDL = "CREATE TABLE IF NOT EXISTS ownerbot_audit_events_default PARTITION OF ownerbot_audit_events DEFAULT"
+_ROWID_KEY = "sqlite_rowid_column"
+
+
+def partitioned_table_kwargs(partition_by: str, *, id_column: str = "id") -> dict:
+    """Table kwargs shared by the model and the baseline migration for a table partitioned on Postgres.
+
+    The only dialect switch lives here: SQLite cannot auto-increment a column of a composite primary key, so
+    there ``id_column`` becomes the rowid alias and the composite key a UNIQUE constraint.
+    """
+    return {"postgresql_partition_by": partition_by, "info": {_ROWID_KEY: id_column}}
+
+
+def _rowid_column(table) -> str | None:
+    return None if table is None else table.info.get(_ROWID_KEY)
+
+
+@compiles(CreateColumn, "sqlite")
+def _sqlite_create_column(element, compiler, **kw):
+    column = element.element
+    if _rowid_column(column.table) == column.name:
+        return f"{compiler.preparer.format_column(column)} INTEGER NOT NULL PRIMARY KEY"
+    return compiler.visit_create_column(element, **kw)
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _sqlite_primary_key(constraint, compiler, **kw):
+    if _rowid_column(constraint.table) is None:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = ", ".join(compiler.preparer.quote(column.name) for column in constraint.columns)
+    return f"UNIQUE ({columns})"
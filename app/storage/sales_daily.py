@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import Date, delete, event, func, insert, inspect, literal, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.db import session_scope
+from app.core.time import utcnow
+from app.storage.models import OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct, OwnerbotSalesDaily
+
+ORDER_FIELDS = ("order_id", "status", "payment_status", "created_at")
+ITEM_FIELDS = ("order_id", "product_id", "qty", "unit_price")
+LOOKUP_CHUNK = 500
+BACKFILL_COMMIT_DAYS = 31
+_PENDING_KEY = "sales_daily_pending"
+# First key of pg_advisory_xact_lock(int, int); the second is the day's ordinal.
+DAY_LOCK_NAMESPACE = 0x5A1E5
+
+
+def paid_filter():
+    return or_(OwnerbotDemoOrder.status == "paid", OwnerbotDemoOrder.payment_status == "paid")
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def sales_day(value: datetime) -> date:
+    return _as_utc(value).date()
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _refresh_day(session: Session, day: date) -> None:
+    start, end = day_bounds(day)
+    if session.get_bind().dialect.name == "postgresql":
+        # Under READ COMMITTED two transactions touching the same day would each rebuild it from a snapshot
+        # without the other's orders, and the later commit would lose them. The lock is held to commit,
+        # so the second rebuild starts after the first is visible; days are locked in sorted order.
+        session.execute(text("SELECT pg_advisory_xact_lock(:namespace, :day)"), {"namespace": DAY_LOCK_NAMESPACE, "day": day.toordinal()})
+    session.execute(delete(OwnerbotSalesDaily).where(OwnerbotSalesDaily.day == day).execution_options(synchronize_session=False))
+    aggregate = (
+        select(
+            OwnerbotDemoOrderItem.product_id,
+            literal(day, Date),
+            func.coalesce(func.max(OwnerbotDemoProduct.category), ""),
+            func.sum(OwnerbotDemoOrderItem.qty),
+            func.sum(OwnerbotDemoOrderItem.qty * OwnerbotDemoOrderItem.unit_price),
+        )
+        .join(OwnerbotDemoOrder, OwnerbotDemoOrder.order_id == OwnerbotDemoOrderItem.order_id)
+        .outerjoin(OwnerbotDemoProduct, OwnerbotDemoProduct.product_id == OwnerbotDemoOrderItem.product_id)
+        .where(OwnerbotDemoOrder.created_at >= start, OwnerbotDemoOrder.created_at < end, paid_filter())
+        .group_by(OwnerbotDemoOrderItem.product_id)
+    )
+    session.execute(insert(OwnerbotSalesDaily).from_select(["product_id", "day", "category", "qty", "revenue"], aggregate))
+
+
+def refresh_days_sync(session: Session, days: Iterable[date]) -> int:
+    """Recompute the fact rows of the given days; cost is the order lines of those days only."""
+    refreshed = 0
+    for day in sorted(set(days)):
+        _refresh_day(session, day)
+        refreshed += 1
+    return refreshed
+
+
+async def refresh_sales_days(session, days: Iterable[date]) -> int:
+    selected = list(days)
+    return await session.run_sync(lambda sync_session: refresh_days_sync(sync_session, selected))
+
+
+async def backfill_sales_daily(session, *, days: int | None = None, now: datetime | None = None) -> int:
+    """Rebuilds ``ownerbot_sales_daily`` from orders: the last ``days`` days, or the whole history."""
+    end_day = sales_day(now or utcnow())
+    if days is not None:
+        start_day = end_day - timedelta(days=days - 1)
+    else:
+        first_created = (await session.execute(select(func.min(OwnerbotDemoOrder.created_at)))).scalar_one_or_none()
+        if first_created is None:
+            await session.execute(delete(OwnerbotSalesDaily))
+            await session.commit()
+            return 0
+        start_day = min(sales_day(first_created), end_day)
+        await session.execute(delete(OwnerbotSalesDaily).where(OwnerbotSalesDaily.day < start_day))
+    total_days = (end_day - start_day).days + 1
+    refreshed = 0
+    for offset in range(0, total_days, BACKFILL_COMMIT_DAYS):
+        chunk = [start_day + timedelta(days=idx) for idx in range(offset, min(offset + BACKFILL_COMMIT_DAYS, total_days))]
+        refreshed += await refresh_sales_days(session, chunk)
+        await session.commit()
+    return refreshed
+
+
+async def ensure_sales_daily(session) -> int:
+    """Backfills once on a database that has orders but no facts yet (table added after the data)."""
+    if (await session.execute(select(OwnerbotSalesDaily.day).limit(1))).first() is not None:
+        return 0
+    if (await session.execute(select(OwnerbotDemoOrder.order_id).limit(1))).first() is None:
+        return 0
+    return await backfill_sales_daily(session)
+
+
+@dataclass
+class _PendingSales:
+    order_ids: set[str] = field(default_factory=set)
+    days: set[date] = field(default_factory=set)
+    categories: dict[str, str] = field(default_factory=dict)
+
+
+def _changed(state, names: tuple[str, ...]) -> bool:
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+def _old_values(state, name: str) -> list:
+    history = state.attrs[name].history
+    return [value for value in (history.deleted or ()) if value is not None]
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_sales_changes(session: Session, flush_context, instances) -> None:
+    pending: _PendingSales | None = None
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, (OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct)):
+            continue
+        state = inspect(obj)
+        persistent_change = obj in session.dirty
+        if pending is None:
+            pending = session.info.setdefault(_PENDING_KEY, _PendingSales())
+        if isinstance(obj, OwnerbotDemoOrder):
+            if persistent_change and not _changed(state, ORDER_FIELDS):
+                continue
+            pending.order_ids.add(obj.order_id)
+            pending.order_ids.update(_old_values(state, "order_id"))
+            # Old values cover a moved created_at and deleted orders, whose row is gone after the flush.
+            created = [state.dict.get("created_at"), *_old_values(state, "created_at")]
+            pending.days.update(sales_day(value) for value in created if value is not None)
+        elif isinstance(obj, OwnerbotDemoOrderItem):
+            if persistent_change and not _changed(state, ITEM_FIELDS):
+                continue
+            pending.order_ids.add(obj.order_id)
+            pending.order_ids.update(_old_values(state, "order_id"))
+        elif obj not in session.deleted and (obj in session.new or _changed(state, ("category",))):
+            pending.categories[obj.product_id] = obj.category
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_sales_changes(session: Session, flush_context) -> None:
+    pending: _PendingSales | None = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+    days = set(pending.days)
+    order_ids = sorted(pending.order_ids)
+    for offset in range(0, len(order_ids), LOOKUP_CHUNK):
+        chunk = order_ids[offset : offset + LOOKUP_CHUNK]
+        rows = session.execute(select(OwnerbotDemoOrder.created_at).where(OwnerbotDemoOrder.order_id.in_(chunk)))
+        days.update(sales_day(created_at) for (created_at,) in rows if created_at is not None)
+    refresh_days_sync(session, days)
+    for product_id, category in pending.categories.items():
+        session.execute(
+            update(OwnerbotSalesDaily)
+            .where(OwnerbotSalesDaily.product_id == product_id)
+            .values(category=category or "")
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def _run_backfill(days: int | None) -> int:
+    async with session_scope() as session:
+        return await backfill_sales_daily(session, days=days)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild ownerbot_sales_daily from demo orders.")
+    parser.add_argument("--days", type=int, default=None, help="only the last N days (default: whole history)")
+    args = parser.parse_args()
+    refreshed = asyncio.run(_run_backfill(args.days))
+    print(f"sales_daily: {refreshed} days rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import delete, insert, select, update
+
+from app.core.time import utcnow
+from app.storage.models import OwnerbotForecastResult
+from app.storage.sales_daily import sales_day
+from app.tools.impl._forecasting import (
+    ForecastProduct,
+    SkuForecast,
+    build_daily_qty_matrix,
+    forecast_products,
+    list_products,
+    reorder_numbers,
+)
+
+WRITE_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class ForecastPreset:
+    """Standard tool parameters whose results are precomputed; reorder presets also fix lead time and safety stock."""
+
+    name: str
+    horizon_days: int
+    history_days: int = 30
+    method: str = "sma"
+    window_days: int = 14
+    alpha: float = 0.35
+    lead_time_days: int | None = None
+    safety_stock_days: int | None = None
+
+    @property
+    def reorder(self) -> bool:
+        return self.lead_time_days is not None
+
+    def matches(self, payload) -> bool:
+        fields = ("horizon_days", "history_days", "method", "window_days", "alpha", "lead_time_days", "safety_stock_days")
+        return all(getattr(payload, name, None) == getattr(self, name) for name in fields)
+
+    def metadata(self) -> str:
+        params = asdict(self)
+        params.pop("name")
+        return json.dumps(params, sort_keys=True)
+
+
+# Payload defaults (free-text intents) and the FRC_7D_DEMAND / FRC_REORDER_PLAN templates.
+PRESETS: tuple[ForecastPreset, ...] = (
+    ForecastPreset(name="demand_7d_sma", horizon_days=7),
+    ForecastPreset(name="demand_7d_auto", horizon_days=7, method="auto"),
+    ForecastPreset(name="reorder_14d_sma", horizon_days=14, lead_time_days=14, safety_stock_days=7),
+    ForecastPreset(name="reorder_14d_auto", horizon_days=14, method="auto", lead_time_days=14, safety_stock_days=7),
+)
+
+
+def find_preset(payload) -> ForecastPreset | None:
+    return next((preset for preset in PRESETS if preset.matches(payload)), None)
+
+
+def _fingerprint(series: np.ndarray, stock_qty: int | None) -> str:
+    # The window is date-aligned, so a series without sales keeps its fingerprint when the day rolls over.
+    digest = hashlib.sha1(np.ascontiguousarray(series, dtype=np.float64).tobytes())
+    if stock_qty is not None:
+        digest.update(str(stock_qty).encode())
+    return digest.hexdigest()
+
+
+def _result_row(preset: ForecastPreset, forecast: SkuForecast, fingerprint: str, history_end: date, now: datetime) -> dict[str, object]:
+    row: dict[str, object] = {
+        "preset": preset.name,
+        "product_id": forecast.product.product_id,
+        "history_end": history_end,
+        "as_of": now,
+        "computed_at": now,
+        "fingerprint": fingerprint,
+        "model": forecast.method,
+        "params": preset.metadata(),
+        "holdout_mse": forecast.holdout_mse,
+        "avg_daily_qty": forecast.avg_daily_qty,
+        "forecast_daily_qty": forecast.forecast_daily_qty,
+        "forecast_total_qty": forecast.forecast_total_qty,
+        "nonzero_days": forecast.nonzero_days,
+        "confidence": forecast.confidence,
+        "stock_qty": None,
+        "reorder_point": None,
+        "recommended_order_qty": None,
+    }
+    if preset.reorder:
+        numbers = reorder_numbers(
+            forecast.forecast_daily_qty,
+            forecast.product.stock_qty,
+            horizon_days=preset.horizon_days,
+            lead_time_days=int(preset.lead_time_days or 0),
+            safety_stock_days=int(preset.safety_stock_days or 0),
+        )
+        row.update(stock_qty=forecast.product.stock_qty, reorder_point=numbers.reorder_point, recommended_order_qty=numbers.recommended_order_qty)
+    return row
+
+
+async def _refresh_preset(
+    session,
+    preset: ForecastPreset,
+    products: list[ForecastProduct],
+    matrix: np.ndarray,
+    history_end: date,
+    now: datetime,
+) -> dict[str, int]:
+    fingerprints = [_fingerprint(matrix[idx], product.stock_qty if preset.reorder else None) for idx, product in enumerate(products)]
+    stored = dict(
+        (await session.execute(select(OwnerbotForecastResult.product_id, OwnerbotForecastResult.fingerprint).where(OwnerbotForecastResult.preset == preset.name))).all()
+    )
+    changed = [idx for idx, product in enumerate(products) if stored.get(product.product_id) != fingerprints[idx]]
+    known = {product.product_id for product in products}
+    gone = [product_id for product_id in stored if product_id not in known]
+
+    if changed:
+        forecasts = forecast_products(
+            matrix[changed],
+            [products[idx] for idx in changed],
+            history_days=preset.history_days,
+            horizon_days=preset.horizon_days,
+            method=preset.method,
+            window_days=preset.window_days,
+            alpha=preset.alpha,
+        )
+        rows = [_result_row(preset, forecast, fingerprints[idx], history_end, now) for idx, forecast in zip(changed, forecasts)]
+        for offset in range(0, len(rows), WRITE_CHUNK):
+            chunk = rows[offset : offset + WRITE_CHUNK]
+            await session.execute(
+                delete(OwnerbotForecastResult).where(
+                    OwnerbotForecastResult.preset == preset.name,
+                    OwnerbotForecastResult.product_id.in_([row["product_id"] for row in chunk]),
+                )
+            )
+            await session.execute(insert(OwnerbotForecastResult), chunk)
+    for offset in range(0, len(gone), WRITE_CHUNK):
+        await session.execute(
+            delete(OwnerbotForecastResult).where(
+                OwnerbotForecastResult.preset == preset.name,
+                OwnerbotForecastResult.product_id.in_(gone[offset : offset + WRITE_CHUNK]),
+            )
+        )
+    # Rows whose series did not change are still valid for the new window.
+    await session.execute(
+        update(OwnerbotForecastResult).where(OwnerbotForecastResult.preset == preset.name).values(history_end=history_end, as_of=now)
+    )
+    await session.commit()
+    return {"recomputed": len(changed), "unchanged": len(products) - len(changed), "deleted": len(gone)}
+
+
+async def refresh_forecast_results(
+    session,
+    *,
+    now: datetime | None = None,
+    presets: tuple[ForecastPreset, ...] = PRESETS,
+) -> dict[str, int]:
+    """Brings ``ownerbot_forecast_results`` up to date; only SKUs whose series (or stock, for reorder) changed are recomputed."""
+    now = now or utcnow()
+    history_end = sales_day(now)
+    products = await list_products(session, None)
+    matrices: dict[int, np.ndarray] = {}
+    stats = {"presets": 0, "products": len(products), "recomputed": 0, "unchanged": 0, "deleted": 0}
+    for preset in presets:
+        if preset.history_days not in matrices:
+            matrices[preset.history_days] = await build_daily_qty_matrix(session, preset.history_days, None, products=products, end_day=history_end)
+        result = await _refresh_preset(session, preset, products, matrices[preset.history_days], history_end, now)
+        stats["presets"] += 1
+        for key, value in result.items():
+            stats[key] += value
+    return stats
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def load_forecast_results(
+    session,
+    preset: ForecastPreset,
+    products: list[ForecastProduct],
+    *,
+    max_age_sec: float,
+    now: datetime | None = None,
+) -> tuple[list[SkuForecast], datetime] | None:
+    """Stored forecasts for ``products`` and their as_of, or ``None`` when any of them is missing or stale."""
+    now = now or utcnow()
+    rows = (
+        await session.execute(
+            select(OwnerbotForecastResult).where(
+                OwnerbotForecastResult.preset == preset.name,
+                OwnerbotForecastResult.history_end == sales_day(now),
+            )
+        )
+    ).scalars().all()
+    by_product = {row.product_id: row for row in rows}
+    if any(product.product_id not in by_product for product in products):
+        return None
+    oldest = min((_as_utc(by_product[product.product_id].as_of) for product in products), default=now)
+    if now - oldest > timedelta(seconds=max_age_sec):
+        return None
+    forecasts = [
+        SkuForecast(
+            product=product,
+            avg_daily_qty=float(row.avg_daily_qty),
+            forecast_daily_qty=float(row.forecast_daily_qty),
+            forecast_total_qty=float(row.forecast_total_qty),
+            nonzero_days=int(row.nonzero_days),
+            confidence=row.confidence,
+            method=row.model,
+            holdout_mse=row.holdout_mse,
+        )
+        for product in products
+        for row in (by_product[product.product_id],)
+    ]
+    return forecasts, oldest
+
+
+async def forecasts_for(
+    session,
+    payload,
+    products: list[ForecastProduct],
+    *,
+    max_age_sec: float,
+) -> tuple[list[SkuForecast], datetime | None]:
+    """Precomputed forecasts for a standard payload, otherwise computed on demand (``as_of`` is then ``None``)."""
+    preset = find_preset(payload)
+    if preset is not None and products:
+        loaded = await load_forecast_results(session, preset, products, max_age_sec=max_age_sec)
+        if loaded is not None:
+            return loaded
+    matrix = await build_daily_qty_matrix(
+        session=session,
+        history_days=payload.history_days,
+        include_categories=None,
+        products=products,
+    )
+    forecasts = forecast_products(
+        matrix,
+        products,
+        history_days=payload.history_days,
+        horizon_days=payload.horizon_days,
+        method=payload.method,
+        window_days=payload.window_days,
+        alpha=payload.alpha,
+    )
+    return forecasts, None
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from typing import Iterable
 
-from sqlalchemy import and_, func, or_, select
+import numpy as np
+from sqlalchemy import and_, select
 
 from app.core.time import utcnow
-from app.storage.models import OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct
+from app.forecasting import FORECASTERS, ForecastBatch, ForecastParams, forecast_batch
+from app.storage.models import OwnerbotDemoProduct, OwnerbotSalesDaily
+from app.storage.sales_daily import sales_day
+
+_SMALL_EPS = 1e-9
 
 
 @dataclass(frozen=True)
@@ -39,52 +45,40 @@ async def list_products(session, include_categories: list[str] | None) -> list[F
     ]
 
 
-async def build_daily_qty_series(
+async def build_daily_qty_matrix(
     session,
     history_days: int,
     include_categories: list[str] | None,
-) -> dict[str, list[float]]:
-    products = await list_products(session, include_categories)
+    products: list[ForecastProduct] | None = None,
+    end_day: date | None = None,
+) -> np.ndarray:
+    """Daily paid qty as a products x days matrix (oldest day first), rows aligned with ``products``."""
+    if products is None:
+        products = await list_products(session, include_categories)
+    matrix = np.zeros((len(products), history_days), dtype=np.float64)
     if not products:
-        return {}
+        return matrix
 
-    end_dt = utcnow()
-    end_day = end_dt.date()
+    end_day = end_day or sales_day(utcnow())
     start_day = end_day - timedelta(days=history_days - 1)
-    start_dt = datetime.combine(start_day, datetime.min.time(), tzinfo=end_dt.tzinfo)
-
-    product_ids = [product.product_id for product in products]
-    paid_filter = or_(OwnerbotDemoOrder.status == "paid", OwnerbotDemoOrder.payment_status == "paid")
 
-    stmt = (
-        select(
-            OwnerbotDemoOrderItem.product_id,
-            func.date(OwnerbotDemoOrder.created_at).label("sale_day"),
-            func.sum(OwnerbotDemoOrderItem.qty).label("daily_qty"),
-        )
-        .join(OwnerbotDemoOrder, OwnerbotDemoOrder.order_id == OwnerbotDemoOrderItem.order_id)
-        .where(
-            and_(
-                OwnerbotDemoOrderItem.product_id.in_(product_ids),
-                OwnerbotDemoOrder.created_at >= start_dt,
-                OwnerbotDemoOrder.created_at <= end_dt,
-                paid_filter,
-            )
-        )
-        .group_by(OwnerbotDemoOrderItem.product_id, func.date(OwnerbotDemoOrder.created_at))
+    # One range scan over the daily facts; products outside the selection are skipped here instead of an IN list.
+    stmt = select(OwnerbotSalesDaily.product_id, OwnerbotSalesDaily.day, OwnerbotSalesDaily.qty).where(
+        and_(OwnerbotSalesDaily.day >= start_day, OwnerbotSalesDaily.day <= end_day)
     )
 
     rows = (await session.execute(stmt)).all()
     day_index = _day_index(start_day, history_days)
-    series_map: dict[str, list[float]] = {product_id: [0.0] * history_days for product_id in product_ids}
+    row_index = {product.product_id: idx for idx, product in enumerate(products)}
 
     for row in rows:
-        idx = day_index.get(_coerce_date(row.sale_day))
-        if idx is None:
+        product_idx = row_index.get(row.product_id)
+        idx = day_index.get(_coerce_date(row.day))
+        if product_idx is None or idx is None:
             continue
-        series_map[row.product_id][idx] = float(row.daily_qty or 0.0)
+        matrix[product_idx, idx] = float(row.qty or 0.0)
 
-    return series_map
+    return matrix
 
 
 def _day_index(start_day: date, history_days: int) -> dict[date, int]:
@@ -100,22 +94,88 @@ def _coerce_date(value: object) -> date | None:
 
 
 def forecast_sma(series: Iterable[float], window_days: int) -> float:
-    values = [float(value) for value in series]
-    if not values:
+    values = np.fromiter((float(value) for value in series), dtype=np.float64)
+    if not values.size:
         return 0.0
-    window = values[-window_days:] if len(values) >= window_days else values
-    return float(sum(window) / len(window)) if window else 0.0
+    return float(FORECASTERS["sma"](values[None, :], 1, ForecastParams(window_days=window_days))[0, 0])
 
 
 def forecast_ses(series: Iterable[float], alpha: float) -> float:
-    values = [float(value) for value in series]
-    if not values:
+    values = np.fromiter((float(value) for value in series), dtype=np.float64)
+    if not values.size:
         return 0.0
+    return float(FORECASTERS["ses"](values[None, :], 1, ForecastParams(alpha=alpha))[0, 0])
+
+
+@dataclass(frozen=True)
+class SkuForecast:
+    product: ForecastProduct
+    avg_daily_qty: float
+    forecast_daily_qty: float
+    forecast_total_qty: float
+    nonzero_days: int
+    confidence: str
+    method: str
+    holdout_mse: float | None = None
+
+
+@dataclass(frozen=True)
+class ReorderNumbers:
+    reorder_point: float
+    recommended_order_qty: int
+    stock_cover_days: float
+    reorder_needed: bool
 
-    level = values[0]
-    for value in values[1:]:
-        level = alpha * value + (1.0 - alpha) * level
-    return float(level)
+
+def run_forecast(matrix: np.ndarray, horizon_days: int, method: str, window_days: int, alpha: float) -> ForecastBatch:
+    return forecast_batch(matrix, horizon_days, method=method, params=ForecastParams(window_days=window_days, alpha=alpha))
+
+
+def forecast_products(
+    matrix: np.ndarray,
+    products: list[ForecastProduct],
+    *,
+    history_days: int,
+    horizon_days: int,
+    method: str,
+    window_days: int,
+    alpha: float,
+) -> list[SkuForecast]:
+    """One forecast per product; ``matrix`` rows are aligned with ``products``."""
+    batch = run_forecast(matrix, horizon_days, method, window_days, alpha)
+    averages = matrix.mean(axis=1) if matrix.shape[1] else np.zeros(len(products))
+    nonzero = (matrix > 0).sum(axis=1)
+    return [
+        SkuForecast(
+            product=product,
+            avg_daily_qty=float(averages[idx]),
+            forecast_daily_qty=float(batch.daily_rate[idx]),
+            forecast_total_qty=float(batch.totals[idx]),
+            nonzero_days=int(nonzero[idx]),
+            confidence=confidence_from(matrix[idx], history_days),
+            method=str(batch.methods[idx]),
+            holdout_mse=None if batch.holdout_mse is None else float(batch.holdout_mse[idx]),
+        )
+        for idx, product in enumerate(products)
+    ]
+
+
+def reorder_numbers(
+    forecast_daily_qty: float,
+    stock_qty: int,
+    *,
+    horizon_days: int,
+    lead_time_days: int,
+    safety_stock_days: int,
+) -> ReorderNumbers:
+    reorder_point = forecast_daily_qty * (lead_time_days + safety_stock_days)
+    target_stock = forecast_daily_qty * (lead_time_days + safety_stock_days + horizon_days)
+    return ReorderNumbers(
+        reorder_point=reorder_point,
+        recommended_order_qty=max(0, math.ceil(target_stock - stock_qty)),
+        stock_cover_days=stock_qty / max(forecast_daily_qty, _SMALL_EPS),
+        reorder_needed=stock_qty <= reorder_point and forecast_daily_qty > 0,
+    )
 
 
 def confidence_from(series: Iterable[float], history_days: int) -> str:
@@ -4,6 +4,7 @@ import uuid
 
 from pydantic import BaseModel, Field
 
+from app.core.artifact_cache import render_cached
 from app.core.redis import get_redis
 from app.notify import build_daily_digest, render_revenue_trend_png, render_weekly_pdf
 from app.tools.contracts import ToolActor, ToolArtifact, ToolProvenance, ToolResponse
@@ -58,7 +59,7 @@ async def handle(payload: Payload, correlation_id: str, session, actor: ToolActo
             )
 
         if payload.format == "png":
-            image = render_revenue_trend_png(bundle.series, "Выручка за день", f"tz={payload.tz}")
+            image = await render_cached(render_revenue_trend_png, bundle.series, "Выручка за день", f"tz={payload.tz}")
             return ToolResponse.ok(
                 correlation_id=correlation_id,
                 data={"owner_id": owner_id, "message": text, "warnings": bundle.warnings},
@@ -73,7 +74,7 @@ async def handle(payload: Payload, correlation_id: str, session, actor: ToolActo
                 provenance=ToolProvenance(sources=["build_daily_digest", "render_revenue_trend_png"], window={}),
             )
 
-        pdf = render_weekly_pdf(bundle, report_title="OwnerBot Daily Snapshot")
+        pdf = await render_cached(render_weekly_pdf, bundle, report_title="OwnerBot Daily Snapshot")
         return ToolResponse.ok(
             correlation_id=correlation_id,
             data={"owner_id": owner_id, "message": text, "warnings": bundle.warnings},
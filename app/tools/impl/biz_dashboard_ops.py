@@ -5,6 +5,7 @@ from typing import Any
 
 from pydantic import BaseModel, Field
 
+from app.core.artifact_cache import render_cached
 from app.core.redis import get_redis
 from app.notify import build_ops_snapshot
 from app.notify.renderers import render_ops_pdf
@@ -49,7 +50,7 @@ async def handle(payload: Payload, correlation_id: str, session, actor: ToolActo
     try:
         await redis.set(cooldown_key, "1", ex=_COOLDOWN_TTL_SECONDS)
         snapshot = await build_ops_snapshot(session, correlation_id, payload.rules or {})
-        pdf = render_ops_pdf(snapshot, report_title="Ops Report", tz=payload.tz)
+        pdf = await render_cached(render_ops_pdf, snapshot, report_title="Ops Report", tz=payload.tz)
 
         unanswered = snapshot.get("unanswered_chats") or {}
         stuck = snapshot.get("stuck_orders") or {}
@@ -4,6 +4,7 @@ import uuid
 
 from pydantic import BaseModel, Field
 
+from app.core.artifact_cache import render_cached
 from app.core.redis import get_redis
 from app.notify import build_weekly_digest, render_weekly_pdf
 from app.tools.contracts import ToolActor, ToolArtifact, ToolProvenance, ToolResponse
@@ -49,7 +50,7 @@ async def handle(payload: Payload, correlation_id: str, session, actor: ToolActo
     try:
         await redis.set(cooldown_key, "1", ex=_COOLDOWN_TTL_SECONDS)
         bundle = await build_weekly_digest(owner_id, session, correlation_id)
-        pdf = render_weekly_pdf(bundle)
+        pdf = await render_cached(render_weekly_pdf, bundle)
         return ToolResponse.ok(
             correlation_id=correlation_id,
             data={"owner_id": owner_id, "message": bundle.text, "warnings": bundle.warnings},
@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy import select
 
 from app.core.settings import get_settings
+from app.storage.columnar import SalesColumns, analytics_snapshot, top_k
 from app.storage.models import OwnerbotDemoCoupon
 from app.tools.contracts import ToolProvenance, ToolResponse
 
@@ -12,6 +13,23 @@ class Payload(BaseModel):
     limit: int = Field(5, ge=1, le=20)
 
 
+def _top_from_columns(columns: SalesColumns, limit: int) -> list[dict[str, object]]:
+    coupons = columns.coupons
+    values = coupons.columns
+    best = top_k(values["used_count"], limit, tiebreak=coupons.rank)
+    return [
+        {
+            "rank": idx + 1,
+            "code": str(coupons.keys[position]),
+            "used_count": int(values["used_count"][position]),
+            "active": bool(values["active"][position]),
+            "percent_off": values["percent_off"][position],
+            "amount_off": float(values["amount_off"][position]),
+        }
+        for idx, position in enumerate(best)
+    ]
+
+
 async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
     settings = get_settings()
     if settings.upstream_mode != "DEMO":
@@ -21,20 +39,24 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
             message="SIS coupon top-used endpoint is not implemented yet. Use DEMO or implement SIS side first.",
         )
 
-    rows = (
-        await session.execute(select(OwnerbotDemoCoupon).order_by(OwnerbotDemoCoupon.used_count.desc(), OwnerbotDemoCoupon.code.asc()))
-    ).scalars().all()
-    top = [
-        {
-            "rank": idx + 1,
-            "code": item.code,
-            "used_count": item.used_count,
-            "active": item.active,
-            "percent_off": item.percent_off,
-            "amount_off": float(item.amount_off or 0),
-        }
-        for idx, item in enumerate(rows[: payload.limit])
-    ]
+    columns = analytics_snapshot(session)
+    if columns is not None:
+        top = _top_from_columns(columns, payload.limit)
+    else:
+        rows = (
+            await session.execute(select(OwnerbotDemoCoupon).order_by(OwnerbotDemoCoupon.used_count.desc(), OwnerbotDemoCoupon.code.asc()))
+        ).scalars().all()
+        top = [
+            {
+                "rank": idx + 1,
+                "code": item.code,
+                "used_count": item.used_count,
+                "active": item.active,
+                "percent_off": item.percent_off,
+                "amount_off": float(item.amount_off or 0),
+            }
+            for idx, item in enumerate(rows[: payload.limit])
+        ]
 
     return ToolResponse.ok(
         correlation_id=correlation_id,
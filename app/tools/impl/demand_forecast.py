@@ -8,19 +8,14 @@ from pydantic import BaseModel, Field
 from app.core.settings import get_settings
 from app.core.time import utcnow
 from app.tools.contracts import ToolProvenance, ToolResponse
-from app.tools.impl._forecasting import (
-    build_daily_qty_series,
-    confidence_from,
-    forecast_ses,
-    forecast_sma,
-    list_products,
-)
+from app.tools.impl._forecast_store import forecasts_for
+from app.tools.impl._forecasting import list_products
 
 
 class Payload(BaseModel):
     horizon_days: int = Field(default=7, ge=1, le=60)
     history_days: int = Field(default=30, ge=7, le=120)
-    method: Literal["sma", "ses"] = "sma"
+    method: Literal["sma", "ses", "croston", "tsb", "holt", "holt_winters", "auto"] = "sma"
     window_days: int = Field(default=14, ge=3, le=60)
     alpha: float = Field(default=0.35, ge=0.05, le=0.95)
     limit: int = Field(default=10, ge=1, le=50)
@@ -37,25 +32,20 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
         )
 
     products = await list_products(session, payload.include_categories)
-    series_map = await build_daily_qty_series(
-        session=session,
-        history_days=payload.history_days,
-        include_categories=payload.include_categories,
+    forecasts, as_of = await forecasts_for(
+        session,
+        payload,
+        products,
+        max_age_sec=settings.forecast_results_max_age_sec,
     )
 
     items: list[dict[str, object]] = []
-    for product in products:
-        series = series_map.get(product.product_id, [0.0] * payload.history_days)
-        avg_daily_qty = sum(series) / len(series) if series else 0.0
-        forecast_daily_qty = forecast_sma(series, payload.window_days) if payload.method == "sma" else forecast_ses(series, payload.alpha)
-        forecast_total_qty = forecast_daily_qty * payload.horizon_days
-        nonzero_days = sum(1 for value in series if value > 0)
-        confidence = confidence_from(series, payload.history_days)
-
+    for forecast in forecasts:
+        product = forecast.product
         notes: list[str] = []
-        if nonzero_days == 0:
+        if forecast.nonzero_days == 0:
             notes.append("no sales history")
-        if confidence == "LOW":
+        if forecast.confidence == "LOW":
             notes.append("low confidence")
 
         items.append(
@@ -64,11 +54,12 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
                 "title": product.title,
                 "category": product.category,
                 "stock_qty": product.stock_qty,
-                "avg_daily_qty": round(avg_daily_qty, 2),
-                "forecast_daily_qty": round(forecast_daily_qty, 2),
-                "forecast_total_qty": round(forecast_total_qty, 2),
-                "nonzero_days": nonzero_days,
-                "confidence": confidence,
+                "avg_daily_qty": round(forecast.avg_daily_qty, 2),
+                "forecast_daily_qty": round(forecast.forecast_daily_qty, 2),
+                "forecast_total_qty": round(forecast.forecast_total_qty, 2),
+                "nonzero_days": forecast.nonzero_days,
+                "method": forecast.method,
+                "confidence": forecast.confidence,
                 "notes": notes,
             }
         )
@@ -84,6 +75,10 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
         "include_categories": payload.include_categories or [],
         "items": items[: payload.limit],
     }
+    sources = ["ownerbot_sales_daily", "ownerbot_demo_products", "local_demo"]
+    if as_of is not None:
+        data["as_of"] = as_of.isoformat()
+        sources.insert(0, "ownerbot_forecast_results")
 
     now = utcnow()
     start_day = now.date() - timedelta(days=payload.history_days - 1)
@@ -91,7 +86,7 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
         correlation_id=correlation_id,
         data=data,
         provenance=ToolProvenance(
-            sources=["ownerbot_demo_orders", "ownerbot_demo_order_items", "ownerbot_demo_products", "local_demo"],
+            sources=sources,
             window={"scope": "demand", "type": "rolling", "from": start_day.isoformat(), "to": now.date().isoformat(), "history_days": payload.history_days},
             filters_hash="demo",
         ),
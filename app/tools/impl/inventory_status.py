@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from typing import Literal
 
+import numpy as np
 from pydantic import BaseModel, Field
 from sqlalchemy import select
 
+from app.storage.columnar import SalesColumns, analytics_snapshot
 from app.storage.models import OwnerbotDemoProduct
 from app.tools.contracts import ToolProvenance, ToolResponse
 
@@ -24,21 +26,18 @@ class Payload(BaseModel):
     ] = "all"
 
 
-async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
-    rows = (await session.execute(select(OwnerbotDemoProduct).order_by(OwnerbotDemoProduct.product_id.asc()))).scalars().all()
+def _serialize(row) -> dict[str, object]:
+    return {
+        "product_id": row.product_id,
+        "title": row.title,
+        "category": row.category,
+        "stock_qty": row.stock_qty,
+        "price": float(row.price),
+    }
 
-    def serialize(items: list[OwnerbotDemoProduct]) -> list[dict[str, object]]:
-        return [
-            {
-                "product_id": row.product_id,
-                "title": row.title,
-                "category": row.category,
-                "stock_qty": row.stock_qty,
-                "price": float(row.price),
-            }
-            for row in items[: payload.limit]
-        ]
 
+async def _buckets_from_sql(session, payload: Payload) -> tuple[dict[str, int], dict[str, list[dict[str, object]]]]:
+    rows = (await session.execute(select(OwnerbotDemoProduct).order_by(OwnerbotDemoProduct.product_id.asc()))).scalars().all()
     buckets = {
         "out_of_stock": [row for row in rows if row.published and row.stock_qty == 0],
         "low_stock": [row for row in rows if row.published and 0 < row.stock_qty <= payload.low_stock_lte],
@@ -49,11 +48,51 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
         "unpublished": [row for row in rows if not row.published],
     }
     counts = {name: len(items) for name, items in buckets.items()}
+    return counts, {name: [_serialize(row) for row in items[: payload.limit]] for name, items in buckets.items()}
+
+
+def _buckets_from_columns(columns: SalesColumns, payload: Payload) -> tuple[dict[str, int], dict[str, list[dict[str, object]]]]:
+    products = columns.products
+    order = products.order
+    values = {name: array[order] for name, array in products.columns.items()}
+    published, stock = values["published"], values["stock_qty"]
+    masks = {
+        "out_of_stock": published & (stock == 0),
+        "low_stock": published & (stock > 0) & (stock <= payload.low_stock_lte),
+        "missing_photo": published & ~values["has_photo"],
+        "missing_price": published & (values["price"] <= 0),
+        "missing_video": published & ~values["has_video"],
+        "return_flags": values["return_flagged"],
+        "unpublished": ~published,
+    }
+    counts = {name: int(mask.sum()) for name, mask in masks.items()}
+    items = {
+        name: [
+            {
+                "product_id": str(products.keys[order[position]]),
+                "title": values["title"][position],
+                "category": values["category"][position],
+                "stock_qty": int(stock[position]),
+                "price": float(values["price"][position]),
+            }
+            for position in np.flatnonzero(mask)[: payload.limit]
+        ]
+        for name, mask in masks.items()
+    }
+    return counts, items
+
+
+async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
+    columns = analytics_snapshot(session)
+    if columns is not None:
+        counts, buckets = _buckets_from_columns(columns, payload)
+    else:
+        counts, buckets = await _buckets_from_sql(session, payload)
 
     if payload.section == "all":
         data = {
             "counts": counts,
-            **{name: serialize(items) for name, items in buckets.items()},
+            **buckets,
         }
     else:
         data = {
@@ -62,7 +101,7 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
                 "count": counts[payload.section],
                 "limit": payload.limit,
             },
-            payload.section: serialize(buckets[payload.section]),
+            payload.section: buckets[payload.section],
         }
 
     provenance = ToolProvenance(
@@ -4,6 +4,7 @@ from typing import Any
 
 from pydantic import BaseModel, Field
 
+from app.core.outbound import SendPriority, get_outbound_dispatcher
 from app.core.settings import get_settings
 from app.tools.contracts import ToolActor, ToolProvenance, ToolResponse, ToolWarning
 
@@ -58,10 +59,14 @@ async def handle(
     failed: list[dict[str, Any]] = []
     for chat_id in manager_chat_ids:
         try:
-            await bot.send_message(
-                chat_id=chat_id,
-                text=rendered_message,
-                disable_notification=payload.silent,
+            await get_outbound_dispatcher().send(
+                chat_id,
+                lambda: bot.send_message(
+                    chat_id=chat_id,
+                    text=rendered_message,
+                    disable_notification=payload.silent,
+                ),
+                priority=SendPriority.BROADCAST,
             )
             sent.append(chat_id)
         except Exception as exc:
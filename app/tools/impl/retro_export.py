@@ -8,7 +8,7 @@ from pydantic import BaseModel, Field
 
 from app.core.audit import write_audit_event
 from app.core.time import utcnow
-from app.retro.service import retro_funnels, retro_gaps_with_deltas, retro_summary_with_deltas
+from app.retro.service import MAX_PERIOD_DAYS, retro_funnels, retro_gaps_with_deltas, retro_summary_with_deltas
 from app.tools.contracts import ToolArtifact, ToolProvenance, ToolResponse
 
 _EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
@@ -39,8 +39,12 @@ def _sanitize(obj: Any) -> Any:
 
 
 async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
-    if payload.period_days not in {7, 30}:
-        return ToolResponse.fail(correlation_id=correlation_id, code="VALIDATION_ERROR", message="period_days must be 7 or 30")
+    if not 1 <= payload.period_days <= MAX_PERIOD_DAYS:
+        return ToolResponse.fail(
+            correlation_id=correlation_id,
+            code="VALIDATION_ERROR",
+            message=f"period_days must be between 1 and {MAX_PERIOD_DAYS}",
+        )
     if payload.format != "json":
         return ToolResponse.fail(correlation_id=correlation_id, code="VALIDATION_ERROR", message="format must be json")
 
@@ -78,7 +82,7 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
         },
         artifacts=[artifact],
         provenance=ToolProvenance(
-            sources=["ownerbot_audit_events"],
+            sources=["ownerbot_retro_rollup_hourly"],
             window={"scope": "retro", "type": "rolling", "days": payload.period_days},
             filters_hash=f"retro_export:{payload.period_days}:{int(payload.include_gaps)}:{int(payload.include_funnels)}",
         ),
@@ -4,7 +4,7 @@ from pydantic import BaseModel, Field
 
 from app.core.audit import write_audit_event
 from app.retro.formatter import format_retro_summary
-from app.retro.service import retro_summary_with_deltas
+from app.retro.service import MAX_PERIOD_DAYS, retro_summary_with_deltas
 from app.tools.contracts import ToolProvenance, ToolResponse
 
 
@@ -13,8 +13,12 @@ class Payload(BaseModel):
 
 
 async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
-    if payload.period_days not in {7, 30}:
-        return ToolResponse.fail(correlation_id=correlation_id, code="VALIDATION_ERROR", message="period_days must be 7 or 30")
+    if not 1 <= payload.period_days <= MAX_PERIOD_DAYS:
+        return ToolResponse.fail(
+            correlation_id=correlation_id,
+            code="VALIDATION_ERROR",
+            message=f"period_days must be between 1 and {MAX_PERIOD_DAYS}",
+        )
 
     report = await retro_summary_with_deltas(session, payload.period_days)
     text = format_retro_summary(report.current, report.deltas)
@@ -29,7 +33,7 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
             "text": text,
         },
         provenance=ToolProvenance(
-            sources=["ownerbot_audit_events"],
+            sources=["ownerbot_retro_rollup_hourly"],
             window={"scope": "retro", "type": "rolling", "days": payload.period_days},
             filters_hash=f"retro_summary:{payload.period_days}",
         ),
@@ -70,7 +70,8 @@ async def handle(payload: Payload, correlation_id: str, session, actor: ToolActo
         )
 
     if payload.dry_run:
-        status_resp = await run_sis_request(method="GET", path="/fx/status", payload=None, correlation_id=correlation_id, settings=settings)
+        # The diff is the owner's preview before committing: read SIS directly, a replica's cached copy may predate a write.
+        status_resp = await run_sis_request(method="GET", path="/fx/status", payload=None, correlation_id=correlation_id, settings=settings, use_cache=False)
         if status_resp.status != "ok":
             return status_resp
         diff = _compute_diff(status_resp.data, payload.updates)
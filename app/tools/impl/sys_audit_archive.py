@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from app.core.settings import get_settings
+from app.storage.audit_archive import query_archive
+from app.tools.contracts import ToolProvenance, ToolResponse
+
+MAX_RANGE_DAYS = 92
+
+
+class Payload(BaseModel):
+    date_from: date
+    date_to: date
+    event_type: str | None = Field(default=None, max_length=128)
+    correlation_id: str | None = Field(default=None, max_length=64)
+    severity: Literal["error", "warning", "info"] | None = None
+    tool: str | None = Field(default=None, max_length=128)
+    limit: int = Field(default=50, ge=1, le=200)
+
+
+def _truncate_payload(raw: object) -> str:
+    text = str(raw or "")
+    return text[:300] + ("…" if len(text) > 300 else "")
+
+
+async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
+    if payload.date_from > payload.date_to:
+        return ToolResponse.fail(correlation_id=correlation_id, code="VALIDATION_ERROR", message="date_from must be <= date_to")
+    if (payload.date_to - payload.date_from).days + 1 > MAX_RANGE_DAYS:
+        return ToolResponse.fail(
+            correlation_id=correlation_id,
+            code="VALIDATION_ERROR",
+            message=f"archive range must be at most {MAX_RANGE_DAYS} days",
+        )
+
+    settings = get_settings()
+    filters = {
+        "event_type": payload.event_type,
+        "correlation_id": payload.correlation_id,
+        "severity": payload.severity,
+        "tool": payload.tool,
+    }
+    matched, rows = await asyncio.to_thread(
+        query_archive,
+        settings.audit_archive_dir,
+        payload.date_from,
+        payload.date_to,
+        filters=filters,
+        limit=payload.limit,
+    )
+    events = [
+        {
+            "id": row.get("id"),
+            "occurred_at": row.get("occurred_at"),
+            "correlation_id": row.get("correlation_id"),
+            "event_type": row.get("event_type"),
+            "severity": row.get("severity"),
+            "tool": row.get("tool"),
+            "error_code": row.get("error_code"),
+            "payload_preview": _truncate_payload(row.get("payload_json")),
+        }
+        for row in rows
+    ]
+    filters_hash = ";".join(f"{key}:{value}" for key, value in filters.items() if value)
+    return ToolResponse.ok(
+        correlation_id=correlation_id,
+        data={
+            "matched": matched,
+            "count": len(events),
+            "events": events,
+            "hot_retention_days": settings.audit_hot_retention_days,
+        },
+        provenance=ToolProvenance(
+            sources=["audit_archive"],
+            window={"scope": "audit_archive", "date_from": payload.date_from.isoformat(), "date_to": payload.date_to.isoformat()},
+            filters_hash=f"{filters_hash};limit:{payload.limit}" if filters_hash else f"limit:{payload.limit}",
+        ),
+    )
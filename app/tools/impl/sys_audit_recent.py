@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+from typing import Literal
 
 from pydantic import BaseModel, Field
 from sqlalchemy import select
@@ -11,12 +12,20 @@ from app.tools.contracts import ToolProvenance, ToolResponse
 
 class Payload(BaseModel):
     limit: int = Field(default=20, ge=1, le=100)
+    severity: Literal["error", "warning", "info"] | None = None
+    tool: str | None = Field(default=None, max_length=128)
 
 
 async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
-    result = await session.execute(
-        select(OwnerbotAuditEvent).order_by(OwnerbotAuditEvent.occurred_at.desc()).limit(payload.limit)
-    )
+    stmt = select(OwnerbotAuditEvent)
+    filters = [f"limit:{payload.limit}"]
+    if payload.severity:
+        stmt = stmt.where(OwnerbotAuditEvent.severity == payload.severity)
+        filters.append(f"severity:{payload.severity}")
+    if payload.tool:
+        stmt = stmt.where(OwnerbotAuditEvent.tool == payload.tool)
+        filters.append(f"tool:{payload.tool}")
+    result = await session.execute(stmt.order_by(OwnerbotAuditEvent.occurred_at.desc()).limit(payload.limit))
     rows = result.scalars().all()
     events = []
     for row in rows:
@@ -30,11 +39,16 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
                 "occurred_at": row.occurred_at.isoformat() if row.occurred_at else None,
                 "correlation_id": row.correlation_id,
                 "event_type": row.event_type,
+                "severity": row.severity,
+                "tool": row.tool,
+                "status": row.status,
+                "latency_ms": row.latency_ms,
+                "error_code": row.error_code,
                 "payload": parsed,
             }
         )
     return ToolResponse.ok(
         correlation_id=correlation_id,
         data={"count": len(events), "events": events},
-        provenance=ToolProvenance(sources=["ownerbot_audit_events"], filters_hash=f"limit:{payload.limit}", window={"scope": "recent", "type": "rolling"}),
+        provenance=ToolProvenance(sources=["ownerbot_audit_events"], filters_hash=";".join(filters), window={"scope": "recent", "type": "rolling"}),
     )
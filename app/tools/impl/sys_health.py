@@ -2,8 +2,17 @@ from __future__ import annotations
 
 from pydantic import BaseModel
 
+from app.core.http import http_pool_stats
+from app.core.artifact_cache import artifact_cache_stats
+from app.core.outbound import outbound_stats
+from app.core.render_pool import render_pool_stats
+from app.core.tasks.sis_events import sis_event_stats
 from app.core.settings import get_settings
+from app.storage.columnar import columnar_cache_stats
 from app.tools.contracts import ToolProvenance, ToolResponse
+from app.upstream.circuit_breaker import circuit_breaker_snapshot
+from app.upstream.read_cache import read_cache_stats
+from app.upstream.singleflight import singleflight_stats
 from app.upstream.sis_client import SisClient
 
 
@@ -21,10 +30,21 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
         )
 
     ping = await SisClient(settings).ping(correlation_id)
+    stats = {
+        "http_pools": http_pool_stats(),
+        "sis_read_cache": read_cache_stats(),
+        "singleflight": singleflight_stats(),
+        "circuit_breakers": await circuit_breaker_snapshot(settings),
+        "outbound": outbound_stats(),
+        "render_pool": render_pool_stats(),
+        "artifacts": artifact_cache_stats(),
+        "sis_events": sis_event_stats(),
+        "analytics_cache": columnar_cache_stats(),
+    }
     if ping.status == "ok":
         return ToolResponse.ok(
             correlation_id=correlation_id,
-            data={"status": "ok", "sis_ping": "ok"},
+            data={"status": "ok", "sis_ping": "ok", **stats},
             provenance=ToolProvenance(sources=["sis:/ownerbot/v1/ping"], window={"scope": "snapshot", "type": "snapshot"}),
         )
     return ToolResponse.ok(
@@ -34,6 +54,7 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
             "sis_ping": "error",
             "error_code": ping.error.code if ping.error else "UNKNOWN",
             "error_message": ping.error.message if ping.error else "unknown",
+            **stats,
         },
         provenance=ToolProvenance(sources=["sis:/ownerbot/v1/ping"], window={"scope": "snapshot", "type": "snapshot"}),
     )
@@ -3,8 +3,9 @@ from __future__ import annotations
 import json
 
 from pydantic import BaseModel, Field
-from sqlalchemy import or_, select
+from sqlalchemy import select
 
+from app.core.audit import SEVERITY_ERROR
 from app.storage.models import OwnerbotAuditEvent
 from app.tools.contracts import ToolProvenance, ToolResponse
 
@@ -19,34 +20,34 @@ def _truncate_payload(payload: object) -> str:
 
 
 async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
+    # Served by the partial index on occurred_at WHERE severity = 'error'; payload_json is previewed as stored.
     stmt = (
-        select(OwnerbotAuditEvent)
-        .where(
-            or_(
-                OwnerbotAuditEvent.event_type.ilike("%failed%"),
-                OwnerbotAuditEvent.event_type.ilike("%error%"),
-                OwnerbotAuditEvent.event_type.ilike("%unavailable%"),
-            )
+        select(
+            OwnerbotAuditEvent.id,
+            OwnerbotAuditEvent.occurred_at,
+            OwnerbotAuditEvent.correlation_id,
+            OwnerbotAuditEvent.event_type,
+            OwnerbotAuditEvent.tool,
+            OwnerbotAuditEvent.error_code,
+            OwnerbotAuditEvent.payload_json,
         )
+        .where(OwnerbotAuditEvent.severity == SEVERITY_ERROR)
         .order_by(OwnerbotAuditEvent.occurred_at.desc())
         .limit(payload.limit)
     )
-    rows = (await session.execute(stmt)).scalars().all()
-    events = []
-    for row in rows:
-        try:
-            parsed = json.loads(row.payload_json)
-        except json.JSONDecodeError:
-            parsed = row.payload_json
-        events.append(
-            {
-                "id": row.id,
-                "occurred_at": row.occurred_at.isoformat() if row.occurred_at else None,
-                "correlation_id": row.correlation_id,
-                "event_type": row.event_type,
-                "payload_preview": _truncate_payload(parsed),
-            }
-        )
+    rows = (await session.execute(stmt)).all()
+    events = [
+        {
+            "id": row.id,
+            "occurred_at": row.occurred_at.isoformat() if row.occurred_at else None,
+            "correlation_id": row.correlation_id,
+            "event_type": row.event_type,
+            "tool": row.tool,
+            "error_code": row.error_code,
+            "payload_preview": _truncate_payload(row.payload_json),
+        }
+        for row in rows
+    ]
     return ToolResponse.ok(
         correlation_id=correlation_id,
         data={"count": len(events), "events": events},
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
-from datetime import timedelta
+from datetime import date, timedelta
 from decimal import Decimal
 from typing import Literal
 
+import numpy as np
 from pydantic import BaseModel, Field
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import and_, func, select
 
 from app.core.time import utcnow
-from app.storage.models import OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct
+from app.storage.columnar import SalesColumns, analytics_snapshot, top_k
+from app.storage.models import OwnerbotDemoProduct, OwnerbotSalesDaily
+from app.storage.sales_daily import day_bounds, sales_day
 from app.tools.contracts import ToolProvenance, ToolResponse, ToolWarning
 
+SOURCES = ["ownerbot_sales_daily", "ownerbot_demo_products", "local_demo"]
+COLUMNAR_SOURCES = ["ownerbot_demo_orders", "ownerbot_demo_order_items", "ownerbot_demo_products", "columnar_cache", "local_demo"]
+
 
 class Payload(BaseModel):
     days: int = Field(7, ge=1, le=60)
@@ -20,58 +26,68 @@ class Payload(BaseModel):
     limit: int = Field(10, ge=1, le=30)
 
 
-async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
-    now = utcnow()
-    window_start = now - timedelta(days=payload.days)
+def _rank_from_columns(columns: SalesColumns, payload: Payload, start_day: date, end_day: date) -> tuple[list[dict[str, object]], dict[str, object]]:
+    if payload.group_by == "product":
+        qty, revenue, lines = columns.sales_by_product(start_day, end_day)
+        keys = columns.products.keys
+        titles = columns.products.columns["title"]
+        categories = columns.products.columns["category"]
+        tiebreak = columns.products.rank
+    else:
+        qty, revenue, lines = columns.sales_by_category(start_day, end_day)
+        keys = titles = categories = columns.category_index[0]
+        tiebreak = None
+    sold = np.flatnonzero(lines > 0)
+    metric = revenue if payload.metric == "revenue" else qty
+    best = top_k(metric, payload.limit, largest=payload.direction == "top", tiebreak=tiebreak, candidates=sold)
+    ranked = [
+        {
+            "rank": idx + 1,
+            "key": str(keys[position]),
+            "title": str(titles[position]),
+            "category": str(categories[position]),
+            "qty": int(round(qty[position])),
+            "revenue": round(float(revenue[position]), 2),
+        }
+        for idx, position in enumerate(best)
+    ]
+    totals = {"total_revenue": round(float(revenue[sold].sum()), 2), "total_qty": int(round(qty[sold].sum()))}
+    return ranked, totals
+
 
-    paid_filter = or_(OwnerbotDemoOrder.status == "paid", OwnerbotDemoOrder.payment_status == "paid")
-    revenue_expr = func.sum(OwnerbotDemoOrderItem.qty * OwnerbotDemoOrderItem.unit_price)
-    qty_expr = func.sum(OwnerbotDemoOrderItem.qty)
+async def _rank_from_sql(session, payload: Payload, start_day: date, end_day: date) -> tuple[list[dict[str, object]], dict[str, object]]:
+    day_filter = and_(OwnerbotSalesDaily.day >= start_day, OwnerbotSalesDaily.day <= end_day)
+    revenue_expr = func.sum(OwnerbotSalesDaily.revenue)
+    qty_expr = func.sum(OwnerbotSalesDaily.qty)
 
     if payload.group_by == "product":
         stmt = (
             select(
-                OwnerbotDemoOrderItem.product_id.label("key"),
+                OwnerbotSalesDaily.product_id.label("key"),
                 OwnerbotDemoProduct.title.label("title"),
                 OwnerbotDemoProduct.category.label("category"),
                 qty_expr.label("qty"),
                 revenue_expr.label("revenue"),
             )
-            .join(OwnerbotDemoOrder, OwnerbotDemoOrder.order_id == OwnerbotDemoOrderItem.order_id)
-            .join(OwnerbotDemoProduct, OwnerbotDemoProduct.product_id == OwnerbotDemoOrderItem.product_id)
-            .where(and_(OwnerbotDemoOrder.created_at >= window_start, paid_filter))
-            .group_by(OwnerbotDemoOrderItem.product_id, OwnerbotDemoProduct.title, OwnerbotDemoProduct.category)
+            .join(OwnerbotDemoProduct, OwnerbotDemoProduct.product_id == OwnerbotSalesDaily.product_id)
+            .where(day_filter)
+            .group_by(OwnerbotSalesDaily.product_id, OwnerbotDemoProduct.title, OwnerbotDemoProduct.category)
         )
     else:
         stmt = (
             select(
-                OwnerbotDemoProduct.category.label("key"),
-                OwnerbotDemoProduct.category.label("title"),
-                OwnerbotDemoProduct.category.label("category"),
+                OwnerbotSalesDaily.category.label("key"),
+                OwnerbotSalesDaily.category.label("title"),
+                OwnerbotSalesDaily.category.label("category"),
                 qty_expr.label("qty"),
                 revenue_expr.label("revenue"),
             )
-            .join(OwnerbotDemoOrder, OwnerbotDemoOrder.order_id == OwnerbotDemoOrderItem.order_id)
-            .join(OwnerbotDemoProduct, OwnerbotDemoProduct.product_id == OwnerbotDemoOrderItem.product_id)
-            .where(and_(OwnerbotDemoOrder.created_at >= window_start, paid_filter))
-            .group_by(OwnerbotDemoProduct.category)
+            # "" marks lines of products missing from the catalog, which the product view drops as well.
+            .where(and_(day_filter, OwnerbotSalesDaily.category != ""))
+            .group_by(OwnerbotSalesDaily.category)
         )
 
     rows = (await session.execute(stmt)).all()
-    warnings: list[ToolWarning] = []
-    if not rows:
-        warnings.append(ToolWarning(code="NO_DATA", message="No paid order items found for selected window."))
-        return ToolResponse.ok(
-            correlation_id=correlation_id,
-            data={"rows": [], "totals": {"total_revenue": 0.0, "total_qty": 0}},
-            provenance=ToolProvenance(
-                sources=["ownerbot_demo_orders", "ownerbot_demo_order_items", "ownerbot_demo_products", "local_demo"],
-                window={"scope": "products", "type": "rolling", "start": window_start.isoformat(), "end": now.isoformat(), "days": payload.days},
-                filters_hash=f"metric:{payload.metric};group_by:{payload.group_by};direction:{payload.direction}",
-            ),
-            warnings=warnings,
-        )
-
     serialized = [
         {
             "key": row.key,
@@ -103,9 +119,41 @@ async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse
         "total_revenue": round(sum(item["revenue"] for item in serialized), 2),
         "total_qty": int(sum(item["qty"] for item in serialized)),
     }
+    return ranked, totals
+
+
+async def handle(payload: Payload, correlation_id: str, session) -> ToolResponse:
+    now = utcnow()
+    # Whole UTC days, from the day `days` ago through today so far: rows read = days x products sold.
+    start_day, end_day = sales_day(now - timedelta(days=payload.days)), sales_day(now)
+    window_start, _ = day_bounds(start_day)
+
+    columns = analytics_snapshot(session)
+    if columns is not None:
+        ranked, totals = _rank_from_columns(columns, payload, start_day, end_day)
+        sources = COLUMNAR_SOURCES
+    else:
+        ranked, totals = await _rank_from_sql(session, payload, start_day, end_day)
+        sources = SOURCES
+
     provenance = ToolProvenance(
-        sources=["ownerbot_demo_orders", "ownerbot_demo_order_items", "ownerbot_demo_products", "local_demo"],
-        window={"scope": "products", "type": "rolling", "start": window_start.isoformat(), "end": now.isoformat(), "days": payload.days},
+        sources=sources,
+        window={
+            "scope": "products",
+            "type": "calendar_days",
+            "start": window_start.isoformat(),
+            "end": now.isoformat(),
+            "start_day": start_day.isoformat(),
+            "end_day": end_day.isoformat(),
+            "days": payload.days,
+        },
         filters_hash=f"metric:{payload.metric};group_by:{payload.group_by};direction:{payload.direction}",
     )
+    if not ranked:
+        return ToolResponse.ok(
+            correlation_id=correlation_id,
+            data={"rows": [], "totals": {"total_revenue": 0.0, "total_qty": 0}},
+            provenance=provenance,
+            warnings=[ToolWarning(code="NO_DATA", message="No paid order items found for selected window.")],
+        )
     return ToolResponse.ok(correlation_id=correlation_id, data={"rows": ranked, "totals": totals}, provenance=provenance)
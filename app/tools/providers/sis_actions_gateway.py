@@ -2,9 +2,15 @@ from __future__ import annotations
 
 from typing import Any
 
-from app.actions.capabilities import capability_for_endpoint, capability_support_status, get_sis_capabilities
+from app.actions.capabilities import (
+    capability_for_endpoint,
+    capability_support_status,
+    get_sis_capabilities,
+    mark_capability_unsupported,
+)
 from app.core.settings import Settings
 from app.tools.contracts import ToolProvenance, ToolResponse, ToolWarning
+from app.upstream.read_cache import cached_sis_read, invalidate_after_write
 from app.upstream.sis_actions_client import SisActionsClient
 
 
@@ -91,6 +97,7 @@ async def run_sis_request(
     correlation_id: str,
     settings: Settings,
     idempotency_key: str | None = None,
+    use_cache: bool = True,
 ) -> ToolResponse:
     capability_key = capability_for_endpoint(path)
     upstream_mode = getattr(settings, "upstream_mode", "SIS_HTTP")
@@ -111,8 +118,52 @@ async def run_sis_request(
     normalized_method = method.upper()
 
     if normalized_method == "GET":
+        return await cached_sis_read(
+            settings=settings,
+            path=path,
+            params=payload,
+            correlation_id=correlation_id,
+            use_cache=use_cache,
+            fetch=lambda cid: _execute_sis_request(client, "GET", path, None, cid, None),
+        )
+    response = await _execute_sis_request(client, normalized_method, path, payload, correlation_id, idempotency_key)
+    if response.status == "ok":
+        await invalidate_after_write(settings=settings, path=path)
+    elif (
+        response.error is not None
+        and response.error.code == "UPSTREAM_NOT_IMPLEMENTED"
+        and capability_key
+        and settings.sis_capability_push_invalidation_enabled
+    ):
+        await mark_capability_unsupported(
+            key=capability_key,
+            endpoint=path,
+            status_code=int((response.error.details or {}).get("status_code") or 0),
+            payload_scope=payload,
+            correlation_id=correlation_id,
+        )
+    return response
+
+
+def _is_not_implemented(status_code: int, path: str, body: dict[str, Any] | None) -> bool:
+    # A bare 404 only means "route absent" on a capability-gated endpoint; elsewhere it stays an upstream
+    # error, and a 404 carrying an SIS envelope is always a missing entity.
+    if status_code == 501:
+        return True
+    return status_code == 404 and capability_for_endpoint(path) is not None and not (isinstance(body, dict) and "ok" in body)
+
+
+async def _execute_sis_request(
+    client: SisActionsClient,
+    method: str,
+    path: str,
+    payload: dict[str, Any] | None,
+    correlation_id: str,
+    idempotency_key: str | None,
+) -> ToolResponse:
+    if method == "GET":
         status_code, body = await client.get_action(path, correlation_id=correlation_id)
-    elif normalized_method == "PATCH":
+    elif method == "PATCH":
         status_code, body = await client.patch_action(path, payload or {}, correlation_id=correlation_id)
     else:
         status_code, body = await client.post_action(
@@ -129,7 +180,9 @@ async def run_sis_request(
 
     if status_code >= 400 or not ok:
         code = "UPSTREAM_UNAVAILABLE"
-        if status_code == 409:
+        if _is_not_implemented(status_code, path, body):
+            code = "UPSTREAM_NOT_IMPLEMENTED"
+        elif status_code == 409:
             code = "ACTION_CONFLICT"
         elif status_code == 422:
             code = "VALIDATION_ERROR"
@@ -4,6 +4,7 @@ from datetime import date, timedelta
 
 from app.core.settings import Settings
 from app.tools.contracts import ToolResponse
+from app.upstream.read_cache import cached_sis_read
 from app.upstream.sis_client import SisClient
 
 
@@ -21,20 +22,50 @@ def _calc_range(days: int) -> tuple[str, str]:
     return start_day.isoformat(), end_day.isoformat()
 
 
-async def run_sis_tool(*, tool_name: str, payload: dict, correlation_id: str, settings: Settings) -> ToolResponse:
+async def run_sis_tool(*, tool_name: str, payload: dict, correlation_id: str, settings: Settings, use_cache: bool = True) -> ToolResponse:
     client = SisClient(settings)
     if tool_name == "kpi_snapshot":
         day = payload.get("day")
-        return await client.kpi_summary(from_date=day, to_date=day, tz="Europe/Berlin", correlation_id=correlation_id)
+        params = {"from": day, "to": day, "tz": "Europe/Berlin"}
+        return await cached_sis_read(
+            settings=settings,
+            path="/ownerbot/v1/kpi/summary",
+            params=params,
+            correlation_id=correlation_id,
+            use_cache=use_cache,
+            fetch=lambda cid: client.kpi_summary(from_date=day, to_date=day, tz="Europe/Berlin", correlation_id=cid),
+        )
     if tool_name == "revenue_trend":
         days = int(payload.get("days", 14))
         from_date, to_date = _calc_range(days)
-        return await client.revenue_trend(from_date=from_date, to_date=to_date, tz="Europe/Berlin", correlation_id=correlation_id)
+        params = {"from": from_date, "to": to_date, "tz": "Europe/Berlin"}
+        return await cached_sis_read(
+            settings=settings,
+            path="/ownerbot/v1/revenue/trend",
+            params=params,
+            correlation_id=correlation_id,
+            use_cache=use_cache,
+            fetch=lambda cid: client.revenue_trend(from_date=from_date, to_date=to_date, tz="Europe/Berlin", correlation_id=cid),
+        )
     if tool_name == "orders_search":
         q = payload.get("status") or payload.get("q")
         limit = payload.get("limit", 5)
-        return await client.orders_search(q=q, limit=limit, correlation_id=correlation_id)
+        return await cached_sis_read(
+            settings=settings,
+            path="/ownerbot/v1/orders/search",
+            params={"q": q, "limit": limit},
+            correlation_id=correlation_id,
+            use_cache=use_cache,
+            fetch=lambda cid: client.orders_search(q=q, limit=limit, correlation_id=cid),
+        )
     if tool_name == "order_detail":
         order_id = str(payload.get("order_id", "")).strip()
-        return await client.order_detail(order_id=order_id, correlation_id=correlation_id)
+        return await cached_sis_read(
+            settings=settings,
+            path=f"/ownerbot/v1/orders/{order_id}",
+            params=None,
+            correlation_id=correlation_id,
+            use_cache=use_cache,
+            fetch=lambda cid: client.order_detail(order_id=order_id, correlation_id=cid),
+        )
     return ToolResponse.fail(correlation_id=correlation_id, code="NOT_IMPLEMENTED", message=f"SIS mapping for {tool_name} not implemented.")
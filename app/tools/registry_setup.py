@@ -34,6 +34,7 @@ from app.tools.impl import (
     sys_upstream_mode,
     sys_health,
     sys_audit_recent,
+    sys_audit_archive,
     sys_last_errors,
     kpi_compare,
     team_queue_summary,
@@ -108,6 +109,7 @@ def build_registry() -> ToolRegistry:
     registry.register("sys_health", "1.0", sys_health.Payload, sys_health.handle)
     registry.register("sys_audit_recent", "1.0", sys_audit_recent.Payload, sys_audit_recent.handle)
     registry.register("sys_last_errors", "1.0", sys_last_errors.Payload, sys_last_errors.handle)
+    registry.register("sys_audit_archive", "1.0", sys_audit_archive.Payload, sys_audit_archive.handle)
     registry.register("kpi_compare", "1.1", kpi_compare.Payload, kpi_compare.handle, is_stub=False)
     registry.register("team_queue_summary", "1.1", team_queue_summary.Payload, team_queue_summary.handle, is_stub=False)
     registry.register("bulk_flag_order", "1.0", bulk_flag_order.Payload, bulk_flag_order.handle, kind="action")
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.audit import write_audit_event
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+_STATE_PREFIX = "ownerbot:sis:breaker"
+_PROBE_PREFIX = "ownerbot:sis:breaker_probe"
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Families are listed so diagnostics can report them without scanning Redis.
+ENDPOINT_FAMILIES = ("ping", "kpi", "revenue", "orders", "fx", "prices", "reprice", "discounts", "products", "looks")
+
+
+def endpoint_family(path: str) -> str:
+    trimmed = path.split("?", 1)[0]
+    if trimmed.startswith("/ownerbot/v1/"):
+        trimmed = trimmed[len("/ownerbot/v1/") :]
+    segment = trimmed.strip("/").split("/", 1)[0]
+    return segment or "root"
+
+
+@dataclass(frozen=True)
+class BreakerDecision:
+    allowed: bool
+    probe_token: str | None = None
+    retry_after_sec: int = 0
+
+
+@dataclass(frozen=True)
+class BreakerConfig:
+    failure_rate: float = 0.5
+    min_requests: int = 5
+    consecutive_failures: int = 3
+    window_sec: int = 60
+    open_sec: int = 30
+    probe_ttl_sec: int = 30
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "BreakerConfig":
+        timeout = float(settings.sis_timeout_sec or 15)
+        return cls(
+            failure_rate=settings.sis_circuit_failure_rate,
+            min_requests=settings.sis_circuit_min_requests,
+            consecutive_failures=settings.sis_circuit_consecutive_failures,
+            window_sec=settings.sis_circuit_window_sec,
+            open_sec=settings.sis_circuit_open_sec,
+            probe_ttl_sec=int(timeout) + 5,
+        )
+
+
+class _LocalStore:
+    """In-process stand-in for the few Redis commands the breaker uses, for when Redis is unreachable."""
+
+    def __init__(self) -> None:
+        self._values: dict[str, tuple[Any, float | None]] = {}
+
+    def _live(self, key: str) -> Any:
+        value, expires_at = self._values.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            self._values.pop(key, None)
+            return None
+        return value
+
+    async def get(self, key: str) -> str | None:
+        return self._live(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None, nx: bool = False) -> bool:
+        if nx and self._live(key) is not None:
+            return False
+        self._values[key] = (value, time.time() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._values.pop(key, None)
+
+    async def expire(self, key: str, seconds: int) -> None:
+        value = self._live(key)
+        if value is not None:
+            self._values[key] = (value, time.time() + seconds)
+
+    def _hash(self, key: str) -> dict[str, str]:
+        value = self._live(key)
+        if value is None:
+            value = {}
+            self._values[key] = (value, None)
+        return value
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        return dict(self._live(key) or {})
+
+    async def hincrby(self, key: str, field: str, amount: int) -> int:
+        values = self._hash(key)
+        values[field] = str(int(values.get(field, 0)) + amount)
+        return int(values[field])
+
+    async def hset(self, key: str, field: str, value: Any) -> None:
+        self._hash(key)[field] = str(value)
+
+    async def hsetnx(self, key: str, field: str, value: Any) -> bool:
+        values = self._hash(key)
+        if field in values:
+            return False
+        values[field] = str(value)
+        return True
+
+
+class CircuitBreaker:
+    """Per endpoint-family breaker; state lives in Redis so replicas agree, with an in-process fallback.
+
+    Every transition is a single atomic command: counters are HINCRBY on a per-window hash, the trip is an
+    HSETNX of ``opened_at`` (present only while the circuit is not closed), and only the holder of the probe
+    lease closes the circuit again.
+    """
+
+    def __init__(self, config: BreakerConfig) -> None:
+        self._config = config
+        self._local = _LocalStore()
+
+    async def allow(self, family: str) -> BreakerDecision:
+        return await self._with_store(lambda store: self._allow(store, family))
+
+    async def record_success(self, family: str, decision: BreakerDecision) -> None:
+        closed = await self._with_store(lambda store: self._record_success(store, family, decision))
+        if closed:
+            await write_audit_event("upstream_circuit_closed", {"family": family})
+
+    async def record_failure(self, family: str, decision: BreakerDecision) -> bool:
+        """Returns True when the circuit is (now) open and callers should stop retrying."""
+        tripped, opened = await self._with_store(lambda store: self._record_failure(store, family, decision))
+        if opened is not None:
+            await write_audit_event("upstream_circuit_opened", {"family": family, **opened, "open_sec": self._config.open_sec})
+        return tripped
+
+    async def snapshot(self) -> dict[str, dict[str, Any]]:
+        return await self._with_store(self._snapshot)
+
+    async def _with_store(self, operation):
+        try:
+            return await operation(await get_redis())
+        except Exception:
+            logger.warning("circuit_breaker_state_store_failed")
+            return await operation(self._local)
+
+    def _keys(self, family: str, now: float) -> tuple[str, str, str]:
+        window = int(now // max(1, self._config.window_sec))
+        return f"{_STATE_PREFIX}:{family}", f"{_STATE_PREFIX}:{family}:w{window}", f"{_PROBE_PREFIX}:{family}"
+
+    def _state_ttl(self) -> int:
+        return self._config.window_sec + self._config.open_sec * 10
+
+    def _state_name(self, opened_at: float | None, now: float) -> str:
+        if opened_at is None:
+            return STATE_CLOSED
+        return STATE_OPEN if opened_at + self._config.open_sec > now else STATE_HALF_OPEN
+
+    async def _opened_at(self, store, state_key: str) -> float | None:
+        raw = (await store.hgetall(state_key)).get("opened_at")
+        return float(raw) if raw is not None else None
+
+    async def _allow(self, store, family: str) -> BreakerDecision:
+        now = time.time()
+        state_key, _, probe_key = self._keys(family, now)
+        opened_at = await self._opened_at(store, state_key)
+        if opened_at is None:
+            return BreakerDecision(allowed=True)
+        remaining = opened_at + self._config.open_sec - now
+        if remaining > 0:
+            return BreakerDecision(allowed=False, retry_after_sec=max(1, int(remaining)))
+        token = str(uuid.uuid4())
+        if not await store.set(probe_key, token, ex=self._config.probe_ttl_sec, nx=True):
+            return BreakerDecision(allowed=False, retry_after_sec=1)
+        return BreakerDecision(allowed=True, probe_token=token)
+
+    async def _record_success(self, store, family: str, decision: BreakerDecision) -> bool:
+        now = time.time()
+        state_key, window_key, probe_key = self._keys(family, now)
+        if decision.probe_token is not None:
+            if await store.get(probe_key) != decision.probe_token:
+                # The lease expired and may belong to a newer probe now; that one decides.
+                return False
+            await store.delete(state_key, window_key, probe_key)
+            return True
+        if await self._opened_at(store, state_key) is not None:
+            # Requests admitted before the trip say nothing about recovery; only the probe closes the circuit.
+            return False
+        await store.hincrby(window_key, "total", 1)
+        await store.expire(window_key, self._config.window_sec * 2)
+        await store.hset(state_key, "consecutive_failures", 0)
+        await store.expire(state_key, self._state_ttl())
+        return False
+
+    async def _record_failure(self, store, family: str, decision: BreakerDecision) -> tuple[bool, dict[str, int] | None]:
+        now = time.time()
+        state_key, window_key, probe_key = self._keys(family, now)
+        if decision.probe_token is not None:
+            if await store.get(probe_key) == decision.probe_token:
+                await store.hset(state_key, "opened_at", now)
+                await store.expire(state_key, self._state_ttl())
+                await store.delete(probe_key)
+            return True, None
+        if await self._opened_at(store, state_key) is not None:
+            # Another caller or replica already tripped the breaker; keep its open window as is.
+            return True, None
+
+        total = await store.hincrby(window_key, "total", 1)
+        failures = await store.hincrby(window_key, "failures", 1)
+        await store.expire(window_key, self._config.window_sec * 2)
+        consecutive = await store.hincrby(state_key, "consecutive_failures", 1)
+        await store.expire(state_key, self._state_ttl())
+        tripped = consecutive >= self._config.consecutive_failures or (
+            total >= self._config.min_requests and failures / total >= self._config.failure_rate
+        )
+        if tripped and await store.hsetnx(state_key, "opened_at", now):
+            return True, {"failures": failures, "total": total}
+        return tripped, None
+
+    async def _snapshot(self, store) -> dict[str, dict[str, Any]]:
+        now = time.time()
+        result: dict[str, dict[str, Any]] = {}
+        for family in ENDPOINT_FAMILIES:
+            state_key, window_key, _ = self._keys(family, now)
+            state = self._state_name(await self._opened_at(store, state_key), now)
+            window = await store.hgetall(window_key)
+            failures = int(window.get("failures", 0))
+            if state == STATE_CLOSED and not failures:
+                continue
+            result[family] = {"state": state, "failures": failures, "total": int(window.get("total", 0))}
+        return result
+
+
+def breaker_enabled(settings: Any) -> bool:
+    return settings.sis_circuit_breaker_enabled
+
+
+_BREAKER: CircuitBreaker | None = None
+
+
+def get_circuit_breaker(settings: Any) -> CircuitBreaker:
+    global _BREAKER
+    if _BREAKER is None:
+        _BREAKER = CircuitBreaker(BreakerConfig.from_settings(settings))
+    return _BREAKER
+
+
+async def circuit_breaker_snapshot(settings: Any) -> dict[str, dict[str, Any]]:
+    if not breaker_enabled(settings):
+        return {}
+    try:
+        return await get_circuit_breaker(settings).snapshot()
+    except Exception:
+        return {}
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable
+
+from app.tools.contracts import ToolResponse
+
+logger = logging.getLogger(__name__)
+
+HEALTH_KEY = "ownerbot:upstream:sis_health"
+
+Ping = Callable[[], Awaitable[ToolResponse]]
+
+
+@dataclass
+class UpstreamHealth:
+    available: bool = True
+    availability: float = 1.0
+    latency_ms: float | None = None
+    checked_at: float = 0.0
+    changed_at: float = 0.0
+    last_error_code: str | None = None
+
+
+@dataclass(frozen=True)
+class HealthPolicy:
+    alpha: float = 0.3
+    down_below: float = 0.4
+    up_above: float = 0.8
+
+
+def apply_sample(
+    state: UpstreamHealth,
+    *,
+    ok: bool,
+    latency_ms: float,
+    error_code: str | None,
+    policy: HealthPolicy,
+    now: float,
+) -> bool:
+    """Folds one ping into the EWMAs; returns True when availability flipped.
+
+    The gap between ``down_below`` and ``up_above`` is the hysteresis band: a single
+    failed or successful ping never flips the mode on its own.
+    """
+    state.availability = policy.alpha * (1.0 if ok else 0.0) + (1 - policy.alpha) * state.availability
+    if ok:
+        state.latency_ms = latency_ms if state.latency_ms is None else policy.alpha * latency_ms + (1 - policy.alpha) * state.latency_ms
+    state.last_error_code = None if ok else error_code
+    state.checked_at = now
+
+    flipped = False
+    if state.available and state.availability < policy.down_below:
+        state.available, flipped = False, True
+    elif not state.available and state.availability >= policy.up_above:
+        state.available, flipped = True, True
+    if flipped:
+        state.changed_at = now
+    return flipped
+
+
+def _parse(raw: str | None) -> UpstreamHealth | None:
+    if not raw:
+        return None
+    try:
+        return UpstreamHealth(**json.loads(raw))
+    except (TypeError, ValueError):
+        return None
+
+
+async def read_upstream_health(redis) -> UpstreamHealth | None:
+    try:
+        return _parse(await redis.get(HEALTH_KEY))
+    except Exception:
+        return None
+
+
+async def record_ping(redis, *, ping: Ping, policy: HealthPolicy, ttl_sec: int) -> tuple[UpstreamHealth, bool]:
+    start = time.perf_counter()
+    try:
+        response = await ping()
+        ok = response.status == "ok"
+        error_code = response.error.code if response.error else None
+    except Exception as exc:
+        ok, error_code = False, exc.__class__.__name__
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    state = await read_upstream_health(redis)
+    fresh = state is None
+    if state is None:
+        # The first sample seeds the state outright so a cold start does not wait out the EWMA.
+        state = UpstreamHealth(available=ok, availability=1.0 if ok else 0.0, changed_at=time.time())
+    flipped = apply_sample(state, ok=ok, latency_ms=latency_ms, error_code=error_code, policy=policy, now=time.time())
+    flipped = flipped or (fresh and not ok)
+    try:
+        await redis.set(HEALTH_KEY, json.dumps(asdict(state)), ex=ttl_sec)
+    except Exception:
+        logger.warning("upstream_health_store_failed")
+    return state, flipped
+
+
+_BOOTSTRAP: asyncio.Task | None = None
+
+
+def schedule_bootstrap_ping(redis, ping: Ping, *, policy: HealthPolicy, ttl_sec: int) -> None:
+    """Runs one ping in the background when no health state exists yet; never awaited by callers."""
+    global _BOOTSTRAP
+    if _BOOTSTRAP is not None and not _BOOTSTRAP.done():
+        return
+    _BOOTSTRAP = asyncio.create_task(record_ping(redis, ping=ping, policy=policy, ttl_sec=ttl_sec), name="upstream-health-bootstrap")
+
+
+def health_policy(settings: Any) -> HealthPolicy:
+    return HealthPolicy(
+        alpha=settings.upstream_health_ewma_alpha,
+        down_below=settings.upstream_health_down_below,
+        up_above=settings.upstream_health_up_above,
+    )
+
+
+def health_ttl_sec(settings: Any) -> int:
+    # State outlives a few missed ticks, then expires so a dead monitor does not pin the mode forever.
+    return max(30, settings.upstream_health_interval_sec * 6)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from app.core.redis import get_redis
+from app.tools.contracts import ToolResponse
+
+logger = logging.getLogger(__name__)
+
+_CACHE_PREFIX = "ownerbot:sis:read_cache"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    fresh_ttl_sec: int
+    stale_ttl_sec: int
+
+
+# Longest matching prefix wins. Stale entries are served while a background refresh runs.
+CACHE_POLICIES: tuple[tuple[str, CachePolicy], ...] = (
+    ("/ownerbot/v1/kpi/summary", CachePolicy(fresh_ttl_sec=60, stale_ttl_sec=600)),
+    ("/ownerbot/v1/revenue/trend", CachePolicy(fresh_ttl_sec=300, stale_ttl_sec=1800)),
+    ("/ownerbot/v1/orders/search", CachePolicy(fresh_ttl_sec=30, stale_ttl_sec=120)),
+    ("/ownerbot/v1/orders/", CachePolicy(fresh_ttl_sec=30, stale_ttl_sec=120)),
+    ("/fx/status", CachePolicy(fresh_ttl_sec=30, stale_ttl_sec=300)),
+)
+
+# Successful writes under these prefixes drop the listed cached reads so owners see their change immediately.
+WRITE_INVALIDATIONS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("/fx/", ("/fx/status",)),
+    ("/reprice/", ("/fx/status",)),
+)
+
+# SIS events (app/notify/events.py) make these cached reads outdated, whatever their params.
+EVENT_INVALIDATIONS: dict[str, tuple[str, ...]] = {
+    "fx_apply": ("/fx/status",),
+    "order_stuck": ("/ownerbot/v1/orders/",),
+    "payment_failed": ("/ownerbot/v1/orders/",),
+}
+
+Fetch = Callable[[str], Awaitable[ToolResponse]]
+
+
+def policy_for_path(path: str) -> CachePolicy | None:
+    matches = [(prefix, policy) for prefix, policy in CACHE_POLICIES if path.startswith(prefix)]
+    if not matches:
+        return None
+    return max(matches, key=lambda item: len(item[0]))[1]
+
+
+def _normalize_params(params: dict[str, Any] | None) -> dict[str, Any]:
+    normalized: dict[str, Any] = {}
+    for key, value in sorted((params or {}).items()):
+        if value is None:
+            continue
+        normalized[str(key)] = value.strip() if isinstance(value, str) else value
+    return normalized
+
+
+def cache_key(*, base_url: str, method: str, path: str, params: dict[str, Any] | None) -> str:
+    material = json.dumps(
+        {"base_url": base_url.rstrip("/"), "params": _normalize_params(params)},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    digest = hashlib.sha1(material.encode("utf-8")).hexdigest()[:20]
+    return f"{_CACHE_PREFIX}:{method.upper()}:{path}:{digest}"
+
+
+class SisReadCache:
+    """Two-tier read-through cache (in-process LRU in front of Redis) for SIS GET responses."""
+
+    def __init__(self, *, lru_size: int = 512) -> None:
+        self._lru: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lru_size = max(1, lru_size)
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def get_or_fetch(self, *, key: str, policy: CachePolicy, correlation_id: str, fetch: Fetch) -> ToolResponse:
+        entry = await self._load(key)
+        if entry is not None:
+            age = max(0.0, time.time() - float(entry["stored_at"]))
+            if age < policy.fresh_ttl_sec:
+                self.hits += 1
+                return _restore(entry, correlation_id=correlation_id, state="hit", age=age)
+            if age < policy.fresh_ttl_sec + policy.stale_ttl_sec:
+                self.stale_hits += 1
+                self._schedule_refresh(key, policy, correlation_id, fetch)
+                return _restore(entry, correlation_id=correlation_id, state="stale", age=age)
+
+        self.misses += 1
+        response = await fetch(correlation_id)
+        if response.status == "ok":
+            await self._store(key, policy, response)
+        return _annotate(response, state="miss", age=0.0)
+
+    async def invalidate(self, key: str) -> None:
+        self._lru.pop(key, None)
+        try:
+            redis = await get_redis()
+            await redis.delete(key)
+        except Exception:
+            logger.warning("sis_read_cache_invalidate_failed", extra={"key": key})
+
+    async def invalidate_prefix(self, prefix: str, *, local_only: bool = False) -> None:
+        for key in [key for key in self._lru if key.startswith(prefix)]:
+            self._lru.pop(key, None)
+        if local_only:
+            return
+        try:
+            redis = await get_redis()
+            keys = [key async for key in redis.scan_iter(match=f"{prefix}*", count=200)]
+            if keys:
+                await redis.delete(*keys)
+        except Exception:
+            logger.warning("sis_read_cache_invalidate_failed", extra={"prefix": prefix})
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._lru),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
+
+    def _schedule_refresh(self, key: str, policy: CachePolicy, correlation_id: str, fetch: Fetch) -> None:
+        if key in self._refreshing:
+            return
+
+        async def _refresh() -> None:
+            try:
+                response = await fetch(f"{correlation_id}-swr")
+                if response.status == "ok":
+                    await self._store(key, policy, response)
+                    self.refreshes += 1
+                else:
+                    self.refresh_failures += 1
+            except Exception:
+                self.refresh_failures += 1
+                logger.warning("sis_read_cache_refresh_failed", extra={"key": key})
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_refresh(), name=f"sis-cache-refresh:{key}")
+
+    async def _load(self, key: str) -> dict[str, Any] | None:
+        entry = self._lru.get(key)
+        if entry is not None:
+            self._lru.move_to_end(key)
+            return entry
+        try:
+            redis = await get_redis()
+            raw = await redis.get(key)
+        except Exception:
+            return None
+        if not raw:
+            return None
+        try:
+            entry = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(entry, dict) or "stored_at" not in entry or "response" not in entry:
+            return None
+        self._remember(key, entry)
+        return entry
+
+    async def _store(self, key: str, policy: CachePolicy, response: ToolResponse) -> None:
+        entry = {"stored_at": time.time(), "response": response.model_dump(mode="json")}
+        self._remember(key, entry)
+        try:
+            redis = await get_redis()
+            await redis.set(key, json.dumps(entry, ensure_ascii=False), ex=policy.fresh_ttl_sec + policy.stale_ttl_sec)
+        except Exception:
+            logger.warning("sis_read_cache_store_failed", extra={"key": key})
+
+    def _remember(self, key: str, entry: dict[str, Any]) -> None:
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._lru_size:
+            self._lru.popitem(last=False)
+
+
+def _annotate(response: ToolResponse, *, state: str, age: float) -> ToolResponse:
+    window = dict(response.provenance.window or {})
+    window["cache"] = state
+    window["cache_age_sec"] = int(age)
+    provenance = response.provenance.model_copy(update={"window": window})
+    return response.model_copy(update={"provenance": provenance})
+
+
+def _restore(entry: dict[str, Any], *, correlation_id: str, state: str, age: float) -> ToolResponse:
+    response = ToolResponse.model_validate(entry["response"])
+    return _annotate(response.model_copy(update={"correlation_id": correlation_id}), state=state, age=age)
+
+
+_CACHE: SisReadCache | None = None
+
+
+def get_sis_read_cache() -> SisReadCache:
+    global _CACHE
+    if _CACHE is None:
+        from app.core.settings import get_settings
+
+        _CACHE = SisReadCache(lru_size=get_settings().sis_read_cache_lru_size)
+    return _CACHE
+
+
+def read_cache_stats() -> dict[str, int]:
+    return _CACHE.stats() if _CACHE is not None else {}
+
+
+def read_cache_enabled(settings: Any) -> bool:
+    return settings.sis_read_cache_enabled
+
+
+async def cached_sis_read(
+    *,
+    settings: Any,
+    path: str,
+    params: dict[str, Any] | None,
+    correlation_id: str,
+    fetch: Fetch,
+    use_cache: bool = True,
+) -> ToolResponse:
+    policy = policy_for_path(path)
+    if not use_cache or policy is None or not read_cache_enabled(settings):
+        return await fetch(correlation_id)
+    key = cache_key(base_url=settings.sis_base_url, method="GET", path=path, params=params)
+    return await get_sis_read_cache().get_or_fetch(key=key, policy=policy, correlation_id=correlation_id, fetch=fetch)
+
+
+async def invalidate_after_write(*, settings: Any, path: str) -> None:
+    if not read_cache_enabled(settings):
+        return
+    base_url = settings.sis_base_url
+    for prefix, read_paths in WRITE_INVALIDATIONS:
+        if not path.startswith(prefix):
+            continue
+        for read_path in read_paths:
+            await get_sis_read_cache().invalidate(cache_key(base_url=base_url, method="GET", path=read_path, params=None))
+
+
+async def invalidate_for_events(*, settings: Any, event_types: set[str], local_only: bool = False) -> None:
+    """Drops cached reads the events outdate; ``local_only`` skips Redis for replicas told by the one that cleared it."""
+    if not read_cache_enabled(settings):
+        return
+    paths = {path for event_type in event_types for path in EVENT_INVALIDATIONS.get(event_type, ())}
+    for path in sorted(paths):
+        await get_sis_read_cache().invalidate_prefix(f"{_CACHE_PREFIX}:GET:{path}", local_only=local_only)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_LEASE_PREFIX = "ownerbot:singleflight:lease"
+_RESULT_PREFIX = "ownerbot:singleflight:result"
+_REMOTE_POLL_SEC = 0.05
+_REMOTE_RESULT_TTL_MS = 2000
+
+
+@dataclass(frozen=True)
+class Codec(Generic[T]):
+    encode: Callable[[T], str]
+    decode: Callable[[str], T]
+
+
+JSON_CODEC: Codec[Any] = Codec(encode=lambda value: json.dumps(value, ensure_ascii=False), decode=json.loads)
+
+
+def flight_key(method: str, url: str, params: dict[str, Any] | None = None) -> str:
+    normalized = {str(k): v for k, v in sorted((params or {}).items()) if v is not None}
+    return f"{method.upper()} {url} {json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+class SingleFlight:
+    """Concurrent identical calls share one execution; optionally across replicas through a short Redis lease."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.remote_coalesced = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        remote: bool = False,
+        lease_ms: int = 3000,
+        codec: Codec[T] | None = None,
+    ) -> tuple[T, bool]:
+        """Returns (result, shared); shared is True when this caller reused another caller's execution."""
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: run the call ourselves instead of failing.
+                task = asyncio.current_task()
+                if not future.cancelled() or (task is not None and task.cancelling()):
+                    raise
+                return await self.do(key, fn, remote=remote, lease_ms=lease_ms, codec=codec)
+            self.coalesced += 1
+            return result, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            if remote and codec is not None:
+                result, shared = await self._do_remote(key, fn, lease_ms=lease_ms, codec=codec)
+            else:
+                result, shared = await self._execute(fn), False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a flight without followers does not log "exception never retrieved".
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, shared
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _execute(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self.executions += 1
+        return await fn()
+
+    async def _do_remote(self, key: str, fn: Callable[[], Awaitable[T]], *, lease_ms: int, codec: Codec[T]) -> tuple[T, bool]:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        lease_key = f"{_LEASE_PREFIX}:{digest}"
+        result_key = f"{_RESULT_PREFIX}:{digest}"
+        token = str(uuid.uuid4())
+        try:
+            redis = await get_redis()
+            leased = await redis.set(lease_key, token, px=lease_ms, nx=True)
+        except Exception:
+            return await self._execute(fn), False
+
+        if leased:
+            try:
+                result = await self._execute(fn)
+                try:
+                    await redis.set(result_key, codec.encode(result), px=_REMOTE_RESULT_TTL_MS)
+                except Exception:
+                    logger.warning("singleflight_result_store_failed")
+                return result, False
+            finally:
+                try:
+                    if await redis.get(lease_key) == token:
+                        await redis.delete(lease_key)
+                except Exception:
+                    pass
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + lease_ms / 1000
+        while loop.time() < deadline:
+            try:
+                raw = await redis.get(result_key)
+            except Exception:
+                break
+            if raw:
+                self.remote_coalesced += 1
+                return codec.decode(raw), True
+            await asyncio.sleep(_REMOTE_POLL_SEC)
+        return await self._execute(fn), False
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "inflight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "remote_coalesced": self.remote_coalesced,
+        }
+
+
+_SINGLEFLIGHT: SingleFlight | None = None
+
+
+def get_singleflight() -> SingleFlight:
+    global _SINGLEFLIGHT
+    if _SINGLEFLIGHT is None:
+        _SINGLEFLIGHT = SingleFlight()
+    return _SINGLEFLIGHT
+
+
+def singleflight_stats() -> dict[str, int]:
+    return _SINGLEFLIGHT.stats() if _SINGLEFLIGHT is not None else {}
+
+
+def singleflight_options(settings: Any) -> dict[str, Any]:
+    return {
+        "remote": settings.sis_singleflight_redis_enabled,
+        "lease_ms": settings.sis_singleflight_lease_ms,
+    }
+
+
+def singleflight_enabled(settings: Any) -> bool:
+    return settings.sis_singleflight_enabled
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import copy
+import json
 import time
 from typing import Any
 
 import httpx
 
 from app.core.audit import write_audit_event
+from app.core.http import SIS_CLIENT, get_http_client
 from app.core.settings import Settings
+from app.upstream.circuit_breaker import BreakerDecision, breaker_enabled, endpoint_family, get_circuit_breaker
+from app.upstream.singleflight import Codec, flight_key, get_singleflight, singleflight_enabled, singleflight_options
+
+_RESULT_CODEC: Codec[tuple[int, dict[str, Any] | None]] = Codec(
+    encode=lambda result: json.dumps(list(result), ensure_ascii=False),
+    decode=lambda raw: tuple(json.loads(raw)),
+)
 
 
 class SisActionsClient:
@@ -32,6 +42,12 @@ class SisActionsClient:
         payload: dict[str, Any] | None = None,
         extra_headers: dict[str, str] | None = None,
     ) -> tuple[int, dict[str, Any] | None]:
+        decision: BreakerDecision | None = None
+        if breaker_enabled(self._settings):
+            decision = await get_circuit_breaker(self._settings).allow(endpoint_family(path))
+            if not decision.allowed:
+                # Same shape as a network failure: gateways already map status 0 to UPSTREAM_UNAVAILABLE.
+                return 0, None
         url = f"{self._base_url}{path}"
         headers = self._build_headers(correlation_id=correlation_id, extra_headers=extra_headers)
         retries = max(self._settings.sis_max_retries, 0)
@@ -41,15 +57,22 @@ class SisActionsClient:
             start = time.perf_counter()
             await write_audit_event("upstream_call_started", {"endpoint": path}, correlation_id=correlation_id)
             try:
-                async with httpx.AsyncClient(timeout=self._settings.sis_timeout_sec, headers=headers) as client:
-                    resp = await client.request(method, url, json=payload)
+                resp = await get_http_client(SIS_CLIENT).request(
+                    method,
+                    url,
+                    json=payload,
+                    headers=headers,
+                    timeout=self._settings.sis_timeout_sec,
+                )
                 latency_ms = int((time.perf_counter() - start) * 1000)
                 await write_audit_event(
                     "upstream_call_finished",
                     {"endpoint": path, "latency_ms": latency_ms, "status": resp.status_code, "correlation_id": correlation_id},
                     correlation_id=correlation_id,
                 )
-                if resp.status_code in {429, 500, 502, 503, 504} and attempt < retries:
+                failed = resp.status_code in {429, 500, 502, 503, 504}
+                opened = await self._record(path, decision, failed=failed)
+                if failed and attempt < retries and not opened:
                     await asyncio.sleep(backoff * (2**attempt))
                     continue
                 try:
@@ -64,13 +87,23 @@ class SisActionsClient:
                     {"endpoint": path, "latency_ms": latency_ms, "status": "network_error", "correlation_id": correlation_id},
                     correlation_id=correlation_id,
                 )
-                if attempt < retries:
+                opened = await self._record(path, decision, failed=True)
+                if attempt < retries and not opened:
                     await asyncio.sleep(backoff * (2**attempt))
                     continue
                 return 0, None
 
         return 0, None
 
+    async def _record(self, path: str, decision: BreakerDecision | None, *, failed: bool) -> bool:
+        if decision is None:
+            return False
+        breaker = get_circuit_breaker(self._settings)
+        if failed:
+            return await breaker.record_failure(endpoint_family(path), decision)
+        await breaker.record_success(endpoint_family(path), decision)
+        return False
+
     async def post_action(
         self,
         path: str,
@@ -86,7 +119,15 @@ class SisActionsClient:
         return await self._request_json("POST", path, correlation_id=correlation_id, payload=payload, extra_headers=headers or None)
 
     async def get_action(self, path: str, *, correlation_id: str) -> tuple[int, dict[str, Any] | None]:
-        return await self._request_json("GET", path, correlation_id=correlation_id)
+        if not singleflight_enabled(self._settings):
+            return await self._request_json("GET", path, correlation_id=correlation_id)
+        result, shared = await get_singleflight().do(
+            flight_key("GET", f"{self._base_url}{path}"),
+            lambda: self._request_json("GET", path, correlation_id=correlation_id),
+            codec=_RESULT_CODEC,
+            **singleflight_options(self._settings),
+        )
+        return copy.deepcopy(result) if shared else result
 
     async def patch_action(self, path: str, payload: dict[str, Any], *, correlation_id: str) -> tuple[int, dict[str, Any] | None]:
         return await self._request_json("PATCH", path, correlation_id=correlation_id, payload=payload)
@@ -7,8 +7,13 @@ from typing import Any
 import httpx
 
 from app.core.audit import write_audit_event
+from app.core.http import SIS_CLIENT, get_http_client
 from app.core.settings import Settings
 from app.tools.contracts import ToolProvenance, ToolResponse
+from app.upstream.circuit_breaker import BreakerDecision, breaker_enabled, endpoint_family, get_circuit_breaker
+from app.upstream.singleflight import Codec, flight_key, get_singleflight, singleflight_enabled, singleflight_options
+
+_RESPONSE_CODEC: Codec[ToolResponse] = Codec(encode=lambda response: response.model_dump_json(), decode=ToolResponse.model_validate_json)
 
 
 class SisClient:
@@ -36,6 +41,51 @@ class SisClient:
         return await self._request("GET", f"/ownerbot/v1/orders/{order_id}", correlation_id=correlation_id)
 
     async def _request(self, method: str, path: str, *, params: dict[str, Any] | None = None, correlation_id: str) -> ToolResponse:
+        if method != "GET" or not singleflight_enabled(self._settings):
+            return await self._send(method, path, params=params, correlation_id=correlation_id)
+        response, shared = await get_singleflight().do(
+            flight_key(method, f"{self._base_url}{path}", params),
+            lambda: self._send(method, path, params=params, correlation_id=correlation_id),
+            codec=_RESPONSE_CODEC,
+            **singleflight_options(self._settings),
+        )
+        if not shared:
+            return response
+        return response.model_copy(update={"correlation_id": correlation_id}, deep=True)
+
+    async def _send(self, method: str, path: str, *, params: dict[str, Any] | None = None, correlation_id: str) -> ToolResponse:
+        if not breaker_enabled(self._settings):
+            return await self._send_with_retries(method, path, params=params, correlation_id=correlation_id, decision=None)
+        family = endpoint_family(path)
+        decision = await get_circuit_breaker(self._settings).allow(family)
+        if not decision.allowed:
+            return ToolResponse.fail(
+                correlation_id=correlation_id,
+                code="UPSTREAM_UNAVAILABLE",
+                message=f"SIS circuit is open for {family}; retry in {decision.retry_after_sec}s.",
+                details={"circuit": "open", "family": family, "retry_after_sec": decision.retry_after_sec},
+            )
+        return await self._send_with_retries(method, path, params=params, correlation_id=correlation_id, decision=decision)
+
+    async def _record(self, path: str, decision: BreakerDecision | None, *, failed: bool) -> bool:
+        """Feeds the breaker; returns True when the circuit opened and retries should stop."""
+        if decision is None:
+            return False
+        breaker = get_circuit_breaker(self._settings)
+        if failed:
+            return await breaker.record_failure(endpoint_family(path), decision)
+        await breaker.record_success(endpoint_family(path), decision)
+        return False
+
+    async def _send_with_retries(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict[str, Any] | None,
+        correlation_id: str,
+        decision: BreakerDecision | None,
+    ) -> ToolResponse:
         url = f"{self._base_url}{path}"
         retries = max(self._settings.sis_max_retries, 0)
         backoff = self._settings.sis_retry_backoff_base_sec
@@ -44,8 +94,13 @@ class SisClient:
             start = time.perf_counter()
             await write_audit_event("upstream_call_started", {"endpoint": path}, correlation_id=correlation_id)
             try:
-                async with httpx.AsyncClient(timeout=self._settings.sis_timeout_sec, headers=self._headers) as client:
-                    resp = await client.request(method, url, params={k: v for k, v in (params or {}).items() if v is not None})
+                resp = await get_http_client(SIS_CLIENT).request(
+                    method,
+                    url,
+                    params={k: v for k, v in (params or {}).items() if v is not None},
+                    headers=self._headers,
+                    timeout=self._settings.sis_timeout_sec,
+                )
                 latency_ms = int((time.perf_counter() - start) * 1000)
                 await write_audit_event(
                     "upstream_call_finished",
@@ -55,15 +110,19 @@ class SisClient:
 
                 if resp.status_code >= 400:
                     if resp.status_code == 429 or 500 <= resp.status_code <= 599:
-                        if attempt < retries:
+                        opened = await self._record(path, decision, failed=True)
+                        if attempt < retries and not opened:
                             await asyncio.sleep(backoff * (2**attempt))
                             continue
+                    else:
+                        await self._record(path, decision, failed=False)
                     return ToolResponse.fail(
                         correlation_id=correlation_id,
                         code="UPSTREAM_UNAVAILABLE",
                         message=f"SIS error status {resp.status_code}.",
                     )
 
+                await self._record(path, decision, failed=False)
                 payload = resp.json()
                 return _parse_envelope(payload, correlation_id)
             except httpx.HTTPError:
@@ -73,7 +132,8 @@ class SisClient:
                     {"endpoint": path, "latency_ms": latency_ms, "status": "network_error", "correlation_id": correlation_id},
                     correlation_id=correlation_id,
                 )
-                if attempt < retries:
+                opened = await self._record(path, decision, failed=True)
+                if attempt < retries and not opened:
                     await asyncio.sleep(backoff * (2**attempt))
                     continue
                 return ToolResponse.fail(correlation_id=correlation_id, code="UPSTREAM_UNAVAILABLE", message="SIS upstream is unavailable.")
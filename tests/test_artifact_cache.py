@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core import artifact_cache
+from app.bot.services import presentation
+from app.core.artifact_cache import ArtifactCache, TelegramFileIdCache, artifact_key, send_artifact
+from app.notify.digest_builder import DigestBundle
+from app.reports.pdf_weekly import build_weekly_report_pdf
+from app.tools.contracts import ToolProvenance, ToolResponse
+
+RENDERS: list[str] = []
+
+
+def _render(bundle: DigestBundle, title: str) -> bytes:
+    RENDERS.append(title)
+    return f"{title}:{bundle.text}".encode()
+
+
+def _bundle(text: str = "digest") -> DigestBundle:
+    return DigestBundle(text=text, kpi_summary={}, series=[{"day": "2026-01-01", "revenue_net": 1}], ops_summary={}, fx_summary={}, warnings=[])
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+def test_key_depends_on_inputs_and_template_version() -> None:
+    base = artifact_key(_render, (_bundle(), "weekly"), {})
+    assert base == artifact_key(_render, (_bundle(), "weekly"), {})
+    assert base != artifact_key(_render, (_bundle("other"), "weekly"), {})
+    assert base != artifact_key(_render, (_bundle(), "weekly"), {}, version="2")
+
+
+@pytest.mark.asyncio
+async def test_identical_renders_run_once() -> None:
+    RENDERS.clear()
+    cache = ArtifactCache()
+
+    results = await asyncio.gather(*(cache.render(_render, _bundle(), "weekly") for _ in range(3)))
+    again = await cache.render(_render, _bundle(), "weekly")
+
+    assert set(results) == {again} == {b"weekly:digest"}
+    assert RENDERS == ["weekly"]
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_respects_byte_budget() -> None:
+    cache = ArtifactCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"12345")
+    assert cache.get("a") is None
+    assert cache.get("c") == b"12345"
+    assert cache.stats()["bytes"] == 10
+
+
+@pytest.mark.asyncio
+async def test_second_send_reuses_file_id(monkeypatch) -> None:
+    redis = FakeRedis()
+    monkeypatch.setattr(artifact_cache, "get_redis", AsyncMock(return_value=redis))
+    monkeypatch.setattr(artifact_cache, "_FILE_ID_CACHE", TelegramFileIdCache())
+    sent = SimpleNamespace(document=SimpleNamespace(file_id="FILE123"))
+    bot = SimpleNamespace(send_document=AsyncMock(return_value=sent), send_photo=AsyncMock())
+
+    await send_artifact(bot, 1, "document", b"%PDF", filename="weekly.pdf", caption="weekly")
+    await send_artifact(bot, 2, "document", b"%PDF", filename="weekly.pdf", caption="weekly")
+
+    first, second = bot.send_document.await_args_list
+    assert first.kwargs["document"].filename == "weekly.pdf"
+    assert second.kwargs["document"] == "FILE123"
+    assert list(redis.store.values()) == ["FILE123"]
+
+
+@pytest.mark.asyncio
+async def test_stale_file_id_falls_back_to_upload(monkeypatch) -> None:
+    monkeypatch.setattr(artifact_cache, "get_redis", AsyncMock(side_effect=RuntimeError("no redis")))
+    cache = TelegramFileIdCache()
+    monkeypatch.setattr(artifact_cache, "_FILE_ID_CACHE", cache)
+    await cache.put(f"photo:{artifact_cache.content_digest(b'png')}", "OLD")
+    fresh = SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id="NEW")])
+    bot = SimpleNamespace(send_photo=AsyncMock(side_effect=[RuntimeError("Bad Request: wrong file identifier"), fresh]))
+
+    await send_artifact(bot, 1, "photo", b"png", filename="chart.png")
+
+    assert bot.send_photo.await_count == 2
+    assert await cache.get(f"photo:{artifact_cache.content_digest(b'png')}") == "NEW"
+
+
+@pytest.mark.asyncio
+async def test_repeated_weekly_pdf_taps_render_and_upload_once(monkeypatch) -> None:
+    monkeypatch.setattr(artifact_cache, "get_redis", AsyncMock(side_effect=RuntimeError("no redis")))
+    monkeypatch.setattr(artifact_cache, "_ARTIFACT_CACHE", ArtifactCache())
+    monkeypatch.setattr(artifact_cache, "_FILE_ID_CACHE", TelegramFileIdCache())
+    renders: list[dict] = []
+
+    def _build(payload: dict) -> bytes:
+        renders.append(payload)
+        return build_weekly_report_pdf(payload)
+
+    data = {
+        "revenue_trend": {"series": [{"day": "2026-01-01", "revenue_gross": 40.0}], "totals": {"revenue_gross": 40.0}},
+        "kpi_snapshot": {"revenue_gross": 40.0, "orders_paid": 2, "aov": 20.0},
+        "orders_search": {"orders": []},
+        "chats_unanswered": {"threads": []},
+    }
+
+    async def _run_tool(name, payload, *, correlation_id, **kwargs):
+        return ToolResponse.ok(correlation_id=correlation_id, data=data[name], provenance=ToolProvenance(sources=["local_demo"]))
+
+    monkeypatch.setattr(presentation, "run_tool", _run_tool)
+    monkeypatch.setattr(presentation, "build_weekly_report_pdf", _build)
+    sent = SimpleNamespace(document=SimpleNamespace(file_id="WEEKLY"))
+    bot = SimpleNamespace(send_document=AsyncMock(return_value=sent), send_photo=AsyncMock())
+    message = SimpleNamespace(bot=bot, chat=SimpleNamespace(id=1), answer=AsyncMock())
+    tenant = SimpleNamespace(currency="EUR")
+
+    for correlation_id in ("tap-1", "tap-2"):
+        await presentation.send_weekly_pdf(message=message, actor=None, tenant=tenant, correlation_id=correlation_id, registry=None)
+
+    assert len(renders) == 1
+    first, second = bot.send_document.await_args_list
+    assert first.kwargs["document"].filename == "weekly_report.pdf"
+    assert second.kwargs["document"] == "WEEKLY"
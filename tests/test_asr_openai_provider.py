@@ -10,13 +10,7 @@ class FakeClient:
         self.responses = list(responses)
         self.calls = 0
 
-    async def __aenter__(self):
-        return self
-
-    async def __aexit__(self, exc_type, exc, tb):
-        return False
-
-    async def post(self, url, headers=None, data=None, files=None):
+    async def post(self, url, headers=None, data=None, files=None, timeout=None):
         self.calls += 1
         response = self.responses.pop(0)
         if isinstance(response, Exception):
@@ -46,7 +40,7 @@ async def test_openai_asr_success(monkeypatch) -> None:
     async def fake_sleep(_delay: float) -> None:
         return None
 
-    monkeypatch.setattr("app.asr.openai_provider.httpx.AsyncClient", lambda **kwargs: client)
+    monkeypatch.setattr("app.asr.openai_provider.get_http_client", lambda name: client)
     monkeypatch.setattr("app.asr.openai_provider.asyncio.sleep", fake_sleep)
     monkeypatch.setattr(
         "app.asr.openai_provider.convert_telegram_voice",
@@ -72,7 +66,7 @@ async def test_openai_asr_retries_on_429(monkeypatch) -> None:
     async def fake_sleep(_delay: float) -> None:
         return None
 
-    monkeypatch.setattr("app.asr.openai_provider.httpx.AsyncClient", lambda **kwargs: client)
+    monkeypatch.setattr("app.asr.openai_provider.get_http_client", lambda name: client)
     monkeypatch.setattr("app.asr.openai_provider.asyncio.sleep", fake_sleep)
     monkeypatch.setattr(
         "app.asr.openai_provider.convert_telegram_voice",
@@ -98,7 +92,7 @@ async def test_openai_asr_retries_on_500(monkeypatch) -> None:
     async def fake_sleep(_delay: float) -> None:
         return None
 
-    monkeypatch.setattr("app.asr.openai_provider.httpx.AsyncClient", lambda **kwargs: client)
+    monkeypatch.setattr("app.asr.openai_provider.get_http_client", lambda name: client)
     monkeypatch.setattr("app.asr.openai_provider.asyncio.sleep", fake_sleep)
     monkeypatch.setattr(
         "app.asr.openai_provider.convert_telegram_voice",
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.tasks import audit_retention
+from app.storage.audit_archive import add_months, archive_path, ensure_audit_partitions, retention_cutoff
+from app.storage.models import Base, OwnerbotAuditEvent, OwnerbotRetroRollupHourly
+from app.tools.impl import sys_audit_archive
+
+
+def _settings(tmp_path) -> SimpleNamespace:
+    return SimpleNamespace(
+        audit_hot_retention_days=30,
+        audit_partition_premake_months=2,
+        audit_archive_dir=str(tmp_path / "archive"),
+        audit_retention_interval_sec=3600,
+    )
+
+
+def test_retention_cutoff_keeps_whole_months() -> None:
+    now = datetime(2026, 3, 15, 12, tzinfo=timezone.utc)
+    assert retention_cutoff(now, 30) == datetime(2026, 2, 1, tzinfo=timezone.utc)
+    assert add_months(datetime(2026, 11, 1, tzinfo=timezone.utc), 3) == datetime(2027, 2, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_retention_archives_expired_months_and_archive_tool_reads_them(monkeypatch, tmp_path) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def scope():
+        async with async_session() as session:
+            yield session
+
+    settings = _settings(tmp_path)
+    monkeypatch.setattr(audit_retention, "get_settings", lambda: settings)
+    monkeypatch.setattr(sys_audit_archive, "get_settings", lambda: settings)
+
+    now = datetime(2026, 3, 15, 12, tzinfo=timezone.utc)
+    async with scope() as session:
+        session.add_all(
+            [
+                OwnerbotAuditEvent(
+                    correlation_id="old-1",
+                    event_type="tool_call_started",
+                    occurred_at=datetime(2026, 1, 10, 9, tzinfo=timezone.utc),
+                    payload_json=json.dumps({"tool": "kpi_snapshot"}),
+                    severity="info",
+                    tool="kpi_snapshot",
+                ),
+                OwnerbotAuditEvent(
+                    correlation_id="old-2",
+                    event_type="upstream_call_failed",
+                    occurred_at=datetime(2026, 1, 20, 9, tzinfo=timezone.utc),
+                    payload_json="{}",
+                    severity="error",
+                ),
+                OwnerbotAuditEvent(
+                    correlation_id="hot-1",
+                    event_type="tool_call_started",
+                    occurred_at=datetime(2026, 2, 3, 9, tzinfo=timezone.utc),
+                    payload_json=json.dumps({"tool": "kpi_snapshot"}),
+                    severity="info",
+                    tool="kpi_snapshot",
+                ),
+            ]
+        )
+        await session.commit()
+
+    stats = await audit_retention.run_audit_retention(now=now, session_factory=scope)
+    assert stats["rows_archived"] == 2
+    assert archive_path(settings.audit_archive_dir, datetime(2026, 1, 1, tzinfo=timezone.utc)).exists()
+
+    async with scope() as session:
+        remaining = (await session.execute(select(OwnerbotAuditEvent.correlation_id))).scalars().all()
+        rolled_up = (await session.execute(select(func.sum(OwnerbotRetroRollupHourly.event_count)))).scalar_one()
+    assert remaining == ["hot-1"]
+    assert rolled_up == 2
+
+    response = await sys_audit_archive.handle(
+        sys_audit_archive.Payload(date_from=date(2026, 1, 1), date_to=date(2026, 1, 31), severity="error"),
+        "corr",
+        None,
+    )
+    assert response.status == "ok"
+    assert response.data["matched"] == 1
+    assert response.data["events"][0]["correlation_id"] == "old-2"
+
+    too_wide = await sys_audit_archive.handle(
+        sys_audit_archive.Payload(date_from=date(2025, 1, 1), date_to=date(2026, 1, 31)),
+        "corr",
+        None,
+    )
+    assert too_wide.status == "error"
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_retention_stages_run_even_when_one_fails(monkeypatch, tmp_path) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def scope():
+        async with async_session() as session:
+            yield session
+
+    async def broken_rollups(session, *, now):
+        raise RuntimeError("rollups down")
+
+    monkeypatch.setattr(audit_retention, "get_settings", lambda: _settings(tmp_path))
+    monkeypatch.setattr(audit_retention, "refresh_retro_rollups", broken_rollups)
+    async with scope() as session:
+        session.add(OwnerbotAuditEvent(correlation_id="old", event_type="tool_call_started", occurred_at=datetime(2026, 1, 10, tzinfo=timezone.utc), payload_json="{}"))
+        await session.commit()
+
+    stats = await audit_retention.run_audit_retention(now=datetime(2026, 3, 15, 12, tzinfo=timezone.utc), session_factory=scope)
+    await engine.dispose()
+
+    assert stats["failed_stages"] == ["rollups"]
+    assert stats["rows_archived"] == 1
+
+
+class _RecordingPostgresSession:
+    def __init__(self, *, existing: set[str], stranded: set[str]) -> None:
+        self.existing = existing
+        self.stranded = stranded
+        self.statements: list[str] = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if sql.startswith("SELECT to_regclass"):
+            value = params["name"] if params["name"] in self.existing else None
+        elif sql.startswith("SELECT EXISTS"):
+            value = f"{params['start']:%Y%m}" in self.stranded
+        else:
+            value = None
+        return SimpleNamespace(scalar=lambda: value)
+
+    async def commit(self) -> None:
+        self.statements.append("COMMIT")
+
+
+@pytest.mark.asyncio
+async def test_missing_partition_takes_over_rows_stranded_in_default() -> None:
+    session = _RecordingPostgresSession(existing={"ownerbot_audit_events_p202604"}, stranded={"202603"})
+
+    created = await ensure_audit_partitions(session, now=datetime(2026, 3, 2, tzinfo=timezone.utc), months_ahead=2)
+
+    assert created == ["ownerbot_audit_events_p202603", "ownerbot_audit_events_p202605"]
+    ddl = [sql.split(" (")[0].split(" WHERE")[0] for sql in session.statements if not sql.startswith("SELECT")]
+    assert ddl == [
+        "ALTER TABLE ownerbot_audit_events DETACH PARTITION ownerbot_audit_events_default",
+        "CREATE TABLE ownerbot_audit_events_p202603 PARTITION OF ownerbot_audit_events FOR VALUES FROM",
+        "INSERT INTO ownerbot_audit_events_p202603",
+        "DELETE FROM ownerbot_audit_events_default",
+        "ALTER TABLE ownerbot_audit_events ATTACH PARTITION ownerbot_audit_events_default DEFAULT",
+        "COMMIT",
+        "CREATE TABLE ownerbot_audit_events_p202605 PARTITION OF ownerbot_audit_events FOR VALUES FROM",
+        "COMMIT",
+    ]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import audit
+from app.core.audit import AuditRecord, AuditWriter
+from app.core.time import utcnow
+from app.storage.models import Base, OwnerbotAuditEvent
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def scope():
+        async with async_session() as session:
+            yield session
+
+    return scope
+
+
+async def _count(scope) -> int:
+    async with scope() as session:
+        return int((await session.execute(select(func.count()).select_from(OwnerbotAuditEvent))).scalar_one())
+
+
+def _record(event_type: str = "tool_call_finished") -> AuditRecord:
+    return AuditRecord(occurred_at=utcnow(), correlation_id="c1", event_type=event_type, payload_json="{}")
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_batches_on_size() -> None:
+    scope = await _session_factory()
+    writer = AuditWriter(batch_size=5, flush_interval_sec=10.0, session_factory=scope)
+    writer.start()
+    for _ in range(10):
+        await writer.submit(_record())
+    for _ in range(50):
+        if writer.written == 10:
+            break
+        await asyncio.sleep(0.01)
+    await writer.stop()
+
+    assert await _count(scope) == 10
+    assert writer.flushes == 2
+
+
+@pytest.mark.asyncio
+async def test_writer_stop_drains_queue() -> None:
+    scope = await _session_factory()
+    writer = AuditWriter(batch_size=100, flush_interval_sec=10.0, session_factory=scope)
+    writer.start()
+    for _ in range(7):
+        await writer.submit(_record())
+    await writer.stop()
+
+    assert await _count(scope) == 7
+    assert writer.stats()["queue_size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_poison_record_loses_only_itself() -> None:
+    scope = await _session_factory()
+    writer = AuditWriter(batch_size=100, flush_interval_sec=10.0, session_factory=scope)
+    writer.start()
+    for index in range(5):
+        await writer.submit(_record(None if index == 2 else "tool_call_finished"))
+    await writer.stop()
+
+    assert await _count(scope) == 4
+    assert writer.stats()["rejected"] == 1
+    assert writer.flush_failures == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_flush_failure_is_retried_as_a_batch() -> None:
+    scope = await _session_factory()
+    calls = 0
+
+    @asynccontextmanager
+    async def flaky_scope():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ConnectionError("connection reset")
+        async with scope() as session:
+            yield session
+
+    writer = AuditWriter(batch_size=100, flush_interval_sec=10.0, session_factory=flaky_scope)
+    writer.start()
+    for _ in range(3):
+        await writer.submit(_record())
+    await writer.stop()
+
+    assert await _count(scope) == 3
+    assert (writer.flushes, writer.flush_failures, writer.rejected) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_writer_samples_noisy_events_and_drops_when_full() -> None:
+    writer = AuditWriter(max_queue_size=5, overload_sample_every=2, backpressure_timeout_sec=0.0)
+    for _ in range(4):
+        assert await writer.submit(_record()) is True
+
+    results = [await writer.submit(_record("upstream_call_started")) for _ in range(2)]
+    assert results == [False, True]
+    assert writer.sampled_out == 1
+
+    assert await writer.submit(_record()) is False
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_write_audit_event_routes_through_running_writer(monkeypatch) -> None:
+    scope = await _session_factory()
+    writer = AuditWriter(batch_size=100, flush_interval_sec=10.0, session_factory=scope)
+    writer.start()
+    monkeypatch.setattr(audit, "_WRITER", writer)
+
+    await audit.write_audit_event("tool_call_started", {"tool": "kpi_snapshot"}, correlation_id="c-route")
+    assert writer.enqueued == 1
+
+    await audit.stop_audit_writer()
+    async with scope() as session:
+        row = (await session.execute(select(OwnerbotAuditEvent))).scalar_one()
+    assert row.correlation_id == "c-route"
+    assert row.occurred_at is not None
+
+
+def test_derive_hot_columns_classifies_events() -> None:
+    assert audit.derive_hot_columns("upstream_unavailable", {})["severity"] == "error"
+    finished = audit.derive_hot_columns(
+        "tool_call_finished",
+        {"tool": "kpi_snapshot", "status": "error", "error_code": "UPSTREAM_TIMEOUT", "latency_ms": 12.7},
+    )
+    assert finished == {
+        "severity": "warning",
+        "tool": "kpi_snapshot",
+        "status": "error",
+        "latency_ms": 12,
+        "error_code": "UPSTREAM_TIMEOUT",
+    }
+    assert audit.derive_hot_columns("llm_intent_failed", {"error_class": "NO_TOOL"})["error_code"] == "NO_TOOL"
+    assert audit.derive_hot_columns("tool_call_started", {"tool": {"nested": 1}})["tool"] is None
+
+
+@pytest.mark.asyncio
+async def test_backfill_populates_legacy_rows() -> None:
+    scope = await _session_factory()
+    async with scope() as session:
+        session.add_all(
+            [
+                OwnerbotAuditEvent(correlation_id="l1", event_type="sis_ping_failed", payload_json="{}"),
+                OwnerbotAuditEvent(correlation_id="l2", event_type="tool_call_finished", payload_json='{"tool": "kpi_snapshot", "status": "ok"}'),
+                OwnerbotAuditEvent(correlation_id="l3", event_type="tool_call_started", payload_json="not-json"),
+            ]
+        )
+        await session.commit()
+
+    assert await audit.backfill_audit_hot_columns(batch_size=2, session_factory=scope) == 3
+    assert await audit.backfill_audit_hot_columns(batch_size=2, session_factory=scope) == 0
+    async with scope() as session:
+        rows = {row.correlation_id: row for row in (await session.execute(select(OwnerbotAuditEvent))).scalars()}
+    assert rows["l1"].severity == "error"
+    assert (rows["l2"].severity, rows["l2"].tool, rows["l2"].status) == ("info", "kpi_snapshot", "ok")
+    assert rows["l3"].severity == "info"
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.upstream import circuit_breaker, sis_client
+from app.upstream.circuit_breaker import BreakerConfig, CircuitBreaker, endpoint_family
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, object] = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return False
+        self.store[key] = value
+        return True
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def expire(self, key, seconds):
+        return key in self.store
+
+    async def hgetall(self, key):
+        return dict(self.store.get(key) or {})
+
+    async def hincrby(self, key, field, amount):
+        values = self.store.setdefault(key, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+        return int(values[field])
+
+    async def hset(self, key, field, value):
+        self.store.setdefault(key, {})[field] = str(value)
+
+    async def hsetnx(self, key, field, value):
+        values = self.store.setdefault(key, {})
+        if field in values:
+            return False
+        values[field] = str(value)
+        return True
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+
+    async def _get_redis():
+        return fake
+
+    async def _audit(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(circuit_breaker, "get_redis", _get_redis)
+    monkeypatch.setattr(circuit_breaker, "write_audit_event", _audit)
+    monkeypatch.setattr(circuit_breaker, "_BREAKER", None)
+    return fake
+
+
+def _expire_open_window(redis: FakeRedis, family: str) -> None:
+    state = redis.store[f"ownerbot:sis:breaker:{family}"]
+    state["opened_at"] = str(float(state["opened_at"]) - 3600)
+
+
+def test_endpoint_family_uses_first_path_segment() -> None:
+    assert endpoint_family("/ownerbot/v1/kpi/summary") == "kpi"
+    assert endpoint_family("/ownerbot/v1/orders/OB-1") == "orders"
+    assert endpoint_family("/fx/status") == "fx"
+    assert endpoint_family("/prices/bump/preview?x=1") == "prices"
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_then_lets_one_probe_through(redis) -> None:
+    breaker = CircuitBreaker(BreakerConfig(consecutive_failures=2, open_sec=30))
+    decision = await breaker.allow("kpi")
+    assert decision.allowed
+    assert await breaker.record_failure("kpi", decision) is False
+    assert await breaker.record_failure("kpi", decision) is True
+
+    rejected = await breaker.allow("kpi")
+    assert not rejected.allowed
+    assert rejected.retry_after_sec > 0
+    assert (await breaker.allow("orders")).allowed
+
+    _expire_open_window(redis, "kpi")
+    probe = await breaker.allow("kpi")
+    assert probe.allowed and probe.probe_token
+    assert not (await breaker.allow("kpi")).allowed
+    assert (await breaker.snapshot())["kpi"]["state"] == "half_open"
+
+    await breaker.record_success("kpi", probe)
+    assert (await breaker.allow("kpi")).allowed
+    assert "kpi" not in await breaker.snapshot()
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_and_failure_rate_trips(redis) -> None:
+    breaker = CircuitBreaker(BreakerConfig(consecutive_failures=2, open_sec=30))
+    decision = await breaker.allow("fx")
+    await breaker.record_failure("fx", decision)
+    await breaker.record_failure("fx", decision)
+    _expire_open_window(redis, "fx")
+
+    probe = await breaker.allow("fx")
+    assert await breaker.record_failure("fx", probe) is True
+    assert not (await breaker.allow("fx")).allowed
+
+    rate = CircuitBreaker(BreakerConfig(consecutive_failures=100, min_requests=4, failure_rate=0.5))
+    ok = await rate.allow("orders")
+    results = []
+    for failed in (True, False, False, True):
+        if failed:
+            results.append(await rate.record_failure("orders", ok))
+        else:
+            await rate.record_success("orders", ok)
+    assert results == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_only_the_current_probe_closes_the_circuit(redis) -> None:
+    breaker = CircuitBreaker(BreakerConfig(consecutive_failures=1, open_sec=30))
+    before_trip = await breaker.allow("orders")
+    assert await breaker.record_failure("orders", before_trip) is True
+
+    # A request admitted before the trip finishing late is not a recovery signal.
+    await breaker.record_success("orders", before_trip)
+    assert not (await breaker.allow("orders")).allowed
+
+    _expire_open_window(redis, "orders")
+    probe = await breaker.allow("orders")
+    redis.store.pop("ownerbot:sis:breaker_probe:orders")
+    newer_probe = await breaker.allow("orders")
+    await breaker.record_success("orders", probe)
+    assert (await breaker.snapshot())["orders"]["state"] == "half_open"
+
+    await breaker.record_success("orders", newer_probe)
+    assert (await breaker.allow("orders")).allowed
+
+
+@pytest.mark.asyncio
+async def test_breaker_falls_back_to_process_state_without_redis(monkeypatch) -> None:
+    async def _down():
+        raise ConnectionError("redis down")
+
+    async def _audit(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(circuit_breaker, "get_redis", _down)
+    monkeypatch.setattr(circuit_breaker, "write_audit_event", _audit)
+    breaker = CircuitBreaker(BreakerConfig(consecutive_failures=2))
+    decision = await breaker.allow("kpi")
+    await breaker.record_failure("kpi", decision)
+
+    assert await breaker.record_failure("kpi", decision) is True
+    assert not (await breaker.allow("kpi")).allowed
+    assert (await breaker.snapshot())["kpi"] == {"state": "open", "failures": 2, "total": 2}
+
+
+@pytest.mark.asyncio
+async def test_sis_client_fails_fast_while_circuit_is_open(redis, monkeypatch) -> None:
+    requests = 0
+
+    class DownClient:
+        async def request(self, *args, **kwargs):
+            nonlocal requests
+            requests += 1
+            raise httpx.ConnectError("down")
+
+    async def _audit(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(sis_client, "get_http_client", lambda name: DownClient())
+    monkeypatch.setattr(sis_client, "write_audit_event", _audit)
+    settings = SimpleNamespace(
+        sis_base_url="http://sis",
+        sis_ownerbot_api_key="",
+        sis_max_retries=5,
+        sis_retry_backoff_base_sec=0,
+        sis_timeout_sec=1,
+        sis_singleflight_enabled=False,
+        sis_circuit_breaker_enabled=True,
+        sis_circuit_failure_rate=0.5,
+        sis_circuit_min_requests=5,
+        sis_circuit_consecutive_failures=2,
+        sis_circuit_window_sec=60,
+        sis_circuit_open_sec=30,
+    )
+    client = sis_client.SisClient(settings)
+
+    first = await client.ping("c1")
+    assert first.error.code == "UPSTREAM_UNAVAILABLE"
+    assert requests == 2
+
+    second = await client.ping("c2")
+    assert second.error.code == "UPSTREAM_UNAVAILABLE"
+    assert second.error.details["circuit"] == "open"
+    assert requests == 2
+
+    snapshot = await circuit_breaker.circuit_breaker_snapshot(settings)
+    assert snapshot["ping"]["state"] == "open"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.storage import columnar
+from app.storage.columnar import ColumnarSalesCache, top_k
+from app.storage.models import Base, OwnerbotDemoCoupon, OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct
+from app.tools.impl.coupons_top_used import Payload as CouponsPayload, handle as coupons_handle
+from app.tools.impl.inventory_status import Payload as InventoryPayload, handle as inventory_handle
+from app.tools.impl.top_products import Payload as TopProductsPayload, handle as top_products_handle
+
+
+@pytest.fixture
+def cache(monkeypatch) -> ColumnarSalesCache:
+    fresh = ColumnarSalesCache()
+    monkeypatch.setattr(columnar, "_CACHE", fresh)
+    return fresh
+
+
+async def _seeded():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    now = datetime.now(timezone.utc)
+    async with async_session() as session:
+        session.add_all(
+            [
+                OwnerbotDemoProduct(product_id=f"P{idx}", title=f"Prod {idx}", category=f"Cat{idx % 3}", price=10 + idx, currency="EUR", stock_qty=idx % 4, published=idx != 5, has_photo=idx % 2 == 0)
+                for idx in range(1, 9)
+            ]
+        )
+        session.add_all(
+            [
+                OwnerbotDemoOrder(order_id=f"O{idx}", status="paid" if idx % 4 else "pending", amount=10, currency="EUR", customer_id="c", payment_status="paid" if idx % 4 else "pending", created_at=now - timedelta(days=idx % 10))
+                for idx in range(1, 25)
+            ]
+        )
+        session.add_all(
+            [
+                OwnerbotDemoOrderItem(order_id=f"O{idx}", product_id=f"P{(idx * 3) % 8 + 1}", qty=idx % 3 + 1, unit_price=5 + idx, currency="EUR")
+                for idx in range(1, 25)
+            ]
+        )
+        session.add_all(
+            [
+                OwnerbotDemoCoupon(code="B", used_count=5, active=True, percent_off=10),
+                OwnerbotDemoCoupon(code="A", used_count=5, active=False, amount_off=3),
+                OwnerbotDemoCoupon(code="C", used_count=9, active=True),
+            ]
+        )
+        await session.commit()
+    return engine, async_session
+
+
+def _data(response) -> dict:
+    return response.model_dump(mode="json")["data"]
+
+
+@pytest.mark.asyncio
+async def test_warm_cache_answers_like_sql(cache, monkeypatch) -> None:
+    monkeypatch.setattr("app.tools.impl.coupons_top_used.get_settings", lambda: SimpleNamespace(upstream_mode="DEMO"))
+    engine, async_session = await _seeded()
+    payloads = [
+        TopProductsPayload(days=7),
+        TopProductsPayload(days=30, metric="qty", direction="bottom", limit=3),
+        TopProductsPayload(days=30, group_by="category"),
+    ]
+
+    async with async_session() as session:
+        from_sql = [await top_products_handle(payload, "corr", session) for payload in payloads]
+        inventory_sql = await inventory_handle(InventoryPayload(limit=3), "corr", session)
+        coupons_sql = await coupons_handle(CouponsPayload(limit=2), "corr", session)
+        await cache.refresh(session)
+        from_cache = [await top_products_handle(payload, "corr", session) for payload in payloads]
+        inventory_cache = await inventory_handle(InventoryPayload(limit=3), "corr", session)
+        coupons_cache = await coupons_handle(CouponsPayload(limit=2), "corr", session)
+    await engine.dispose()
+
+    assert all("columnar_cache" not in response.provenance.sources for response in from_sql)
+    assert all("columnar_cache" in response.provenance.sources for response in from_cache)
+    assert [_data(response) for response in from_cache] == [_data(response) for response in from_sql]
+    assert _data(inventory_cache) == _data(inventory_sql)
+    assert _data(coupons_cache)["rows"] == _data(coupons_sql)["rows"]
+    assert [row["code"] for row in _data(coupons_cache)["rows"]] == ["C", "A"]
+    assert cache.stats()["hits"] == 5
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_picks_up_payments_new_lines_and_products(cache) -> None:
+    engine, async_session = await _seeded()
+    payload = TopProductsPayload(days=30, metric="qty", limit=30)
+
+    async with async_session() as session:
+        await cache.refresh(session)
+        before = {row["key"]: row["qty"] for row in _data(await top_products_handle(payload, "corr", session))["rows"]}
+
+        order = await session.get(OwnerbotDemoOrder, "O4")
+        order.payment_status = "paid"
+        session.add(OwnerbotDemoProduct(product_id="P9", title="Prod 9", category="Cat9", price=1, currency="EUR", stock_qty=1))
+        session.add(OwnerbotDemoOrderItem(order_id="O1", product_id="P9", qty=7, unit_price=1, currency="EUR"))
+        await session.commit()
+        stats = await cache.refresh(session)
+        after = {row["key"]: row["qty"] for row in _data(await top_products_handle(payload, "corr", session))["rows"]}
+    await engine.dispose()
+
+    assert stats["full"] == 0
+    assert stats["lines"] == 1
+    # O4 carries P5 x2 and is now paid.
+    assert after["P5"] == before.get("P5", 0) + 2
+    assert after["P9"] == 7
+    assert cache.stats()["incremental_refreshes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_of_another_database_is_not_used(cache) -> None:
+    engine, async_session = await _seeded()
+    other_engine, other_session = await _seeded()
+    async with async_session() as session:
+        await cache.refresh(session)
+    async with other_session() as session:
+        response = await top_products_handle(TopProductsPayload(), "corr", session)
+    await engine.dispose()
+    await other_engine.dispose()
+
+    assert "columnar_cache" not in response.provenance.sources
+    assert cache.stats()["fallbacks"] == 1
+
+
+def test_top_k_matches_a_full_sort() -> None:
+    rng = np.random.default_rng(7)
+    values = rng.integers(0, 50, size=100_000).astype(np.float64)
+    tiebreak = rng.permutation(values.size)
+    candidates = np.flatnonzero(values % 7 != 0)
+
+    for largest in (True, False):
+        best = top_k(values, 25, largest=largest, tiebreak=tiebreak, candidates=candidates)
+        sign = -1 if largest else 1
+        expected = candidates[np.lexsort((tiebreak[candidates], sign * values[candidates]))][:25]
+        assert best.tolist() == expected.tolist()
+
+    assert top_k(values, 0).size == 0
+    assert top_k(values, 5, candidates=np.empty(0, dtype=np.int64)).size == 0
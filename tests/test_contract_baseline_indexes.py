@@ -8,6 +8,7 @@ def test_baseline_contains_critical_perf_indexes() -> None:
 
     for index_name in (
         "idx_ownerbot_audit_events_event_type_occurred_at",
+        "idx_ownerbot_audit_events_errors_occurred_at",
         "idx_ownerbot_action_log_status_committed_at",
         "idx_ownerbot_action_log_tool_committed_at",
         "idx_ownerbot_demo_orders_status_created_at",
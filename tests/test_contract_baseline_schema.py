@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import importlib.util
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.storage.models import Base, OwnerbotAuditEvent
+
+
+def _baseline_module():
+    spec = importlib.util.spec_from_file_location("ownerbot_baseline", "app/storage/alembic/versions/0001_baseline.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _schema(engine) -> dict[str, dict]:
+    inspector = inspect(engine)
+    return {
+        table: {
+            "columns": {column["name"]: column["nullable"] for column in inspector.get_columns(table)},
+            "pk": inspector.get_pk_constraint(table)["constrained_columns"],
+            "unique": sorted(tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table)),
+            "indexes": {index["name"]: tuple(index["column_names"]) for index in inspector.get_indexes(table)},
+        }
+        for table in inspector.get_table_names()
+    }
+
+
+def _migrated_and_declared() -> tuple[dict[str, dict], dict[str, dict]]:
+    migrated = create_engine("sqlite://")
+    with migrated.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            _baseline_module().upgrade()
+    declared = create_engine("sqlite://")
+    Base.metadata.create_all(declared)
+    return _schema(migrated), _schema(declared)
+
+
+def test_models_match_baseline_tables_and_keys() -> None:
+    migrated, declared = _migrated_and_declared()
+
+    assert set(migrated) == set(declared)
+    for table, schema in declared.items():
+        assert set(migrated[table]["columns"]) == set(schema["columns"]), table
+        assert migrated[table]["pk"] == schema["pk"], table
+        assert schema["indexes"].items() <= migrated[table]["indexes"].items(), table
+
+
+def test_audit_events_schema_matches_baseline() -> None:
+    migrated, declared = _migrated_and_declared()
+
+    audit = declared["ownerbot_audit_events"]
+    assert {key: value for key, value in migrated["ownerbot_audit_events"].items() if key != "indexes"} == {
+        key: value for key, value in audit.items() if key != "indexes"
+    }
+    assert audit["columns"]["occurred_at"] is False
+    assert ("id", "occurred_at") in audit["unique"]
+
+
+def test_audit_events_are_partitioned_on_postgres() -> None:
+    ddl = str(CreateTable(OwnerbotAuditEvent.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "PRIMARY KEY (id, occurred_at)" in ddl
+    assert "PARTITION BY RANGE (occurred_at)" in ddl
+    assert [column.name for column in OwnerbotAuditEvent.__table__.primary_key] == ["id", "occurred_at"]
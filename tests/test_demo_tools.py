@@ -395,6 +395,10 @@ async def test_top_products_revenue_ordering():
     assert response.data["rows"]
     assert response.data["rows"][0]["key"] == "P3"
     assert response.data["rows"][1]["key"] == "P2"
+    window = response.provenance.window
+    assert window["type"] == "calendar_days"
+    assert window["start_day"] == (now - timedelta(days=7)).date().isoformat()
+    assert window["start"].startswith(f"{window['start_day']}T00:00:00")
 
 
 @pytest.mark.asyncio
@@ -81,6 +81,7 @@ async def test_run_systems_check_sis_unavailable(monkeypatch: pytest.MonkeyPatch
         llm_allowed_action_tools=["notify_team"],
         sis_ownerbot_api_key="",
         sizebot_api_key="",
+        sis_circuit_breaker_enabled=False,
     )
     report = await run_systems_check(
         DiagnosticsContext(settings=settings, redis=None, correlation_id="corr-1", sis_client=_SisClient())
@@ -132,6 +133,7 @@ async def test_run_systems_check_contract_degraded(monkeypatch: pytest.MonkeyPat
         llm_allowed_action_tools=["notify_team"],
         sis_ownerbot_api_key="",
         sizebot_api_key="",
+        sis_circuit_breaker_enabled=False,
     )
     report = await run_systems_check(
         DiagnosticsContext(settings=settings, redis=None, correlation_id="corr-1", sis_client=_SisClient())
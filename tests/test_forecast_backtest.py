@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.forecasting.backtest import (
+    BacktestConfig,
+    backtest_sales_history,
+    benchmark_catalog,
+    compare_reports,
+    error_metrics,
+    rolling_origin,
+    run_suite,
+    synthetic_shop,
+    write_report,
+)
+from app.storage.models import Base, OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct
+
+CONFIG = BacktestConfig()
+DAYS = CONFIG.history_days + CONFIG.horizon_days + (CONFIG.origins - 1) * CONFIG.step_days
+
+# Regression thresholds for the generated shop (2000 SKUs, seed 0), about 10% above the measured WAPE.
+MAX_WAPE = {"sma": 0.19, "ses": 0.22, "croston": 0.20, "tsb": 0.19, "holt": 0.22, "holt_winters": 0.22, "auto": 0.20}
+MAX_ABS_BIAS = 0.06
+
+# Wall-clock and memory budgets depend on the machine; the default run only checks what the benchmark returns.
+full_benchmark = pytest.mark.skipif(not os.getenv("FORECAST_BENCHMARK_FULL"), reason="set FORECAST_BENCHMARK_FULL=1 for time and memory budgets")
+
+
+def test_error_metrics() -> None:
+    metrics = error_metrics(np.array([10.0, 0.0, 5.0]), np.array([8.0, 2.0, 0.0]))
+
+    assert metrics["wape"] == pytest.approx((2 + 2 + 5) / 10)
+    assert metrics["bias"] == pytest.approx(0.5)
+    assert metrics["mape"] == pytest.approx((0.25 + 1.0) / 2)
+    assert error_metrics(np.ones(2), np.zeros(2)) == {"mape": None, "wape": None, "bias": None}
+
+
+def test_accuracy_on_the_synthetic_shop_does_not_regress() -> None:
+    history, profiles = synthetic_shop(2000, DAYS, seed=0)
+
+    report = rolling_origin(history, CONFIG, segments=profiles)
+
+    assert report["origins"] == CONFIG.origins
+    for method, max_wape in MAX_WAPE.items():
+        entry = report["methods"][method]
+        assert entry["wape"] <= max_wape, method
+        assert abs(entry["bias"]) <= MAX_ABS_BIAS, method
+    intermittent = {method: entry["segments"]["intermittent"]["wape"] for method, entry in report["methods"].items()}
+    assert intermittent["auto"] < intermittent["sma"]
+
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_time_and_memory_per_method() -> None:
+    result = await benchmark_catalog(1_000, CONFIG)
+
+    assert (result["skus"], result["history_days"]) == (1_000, CONFIG.history_days)
+    for key in ("forecast_sma", "forecast_auto"):
+        assert set(result[key]) == {"wall_ms", "peak_mb"}
+        assert result[key]["wall_ms"] >= 0 and result[key]["peak_mb"] > 0
+    assert "load_matrix" not in result
+
+
+@pytest.mark.asyncio
+@full_benchmark
+async def test_forecasting_10k_skus_stays_within_budget() -> None:
+    result = await benchmark_catalog(10_000, CONFIG)
+
+    assert result["forecast_sma"]["wall_ms"] < 200
+    assert result["forecast_auto"]["wall_ms"] < 2_000
+    assert result["forecast_auto"]["peak_mb"] < 30
+
+
+@pytest.mark.asyncio
+async def test_loading_series_from_sql_matches_the_history() -> None:
+    # benchmark_catalog raises when the SQL round trip does not reproduce the generated matrix.
+    result = await benchmark_catalog(1_000, CONFIG, with_db=True)
+
+    assert set(result["load_matrix"]) == {"wall_ms", "peak_mb"}
+
+
+@pytest.mark.asyncio
+@full_benchmark
+async def test_loading_series_from_sql_stays_within_budget() -> None:
+    result = await benchmark_catalog(1_000, CONFIG, with_db=True)
+
+    assert result["load_matrix"]["wall_ms"] < 5_000
+    assert result["load_matrix"]["peak_mb"] < 50
+
+
+@pytest.mark.asyncio
+@full_benchmark
+async def test_forecasting_100k_skus_stays_within_budget() -> None:
+    result = await benchmark_catalog(100_000, CONFIG)
+
+    assert result["forecast_auto"]["wall_ms"] < 10_000
+    assert result["forecast_auto"]["peak_mb"] < 200
+
+
+@pytest.mark.asyncio
+async def test_backtest_over_order_history() -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    now = datetime.now(timezone.utc)
+    async with async_session() as session:
+        session.add_all([OwnerbotDemoProduct(product_id=f"P{idx}", title=f"Prod {idx}", category="Cat", price=10, currency="EUR", stock_qty=5) for idx in range(3)])
+        session.add_all(
+            [
+                OwnerbotDemoOrder(order_id=f"O{day}", status="paid", amount=10, currency="EUR", customer_id="c", payment_status="paid", created_at=now - timedelta(days=day))
+                for day in range(DAYS)
+            ]
+        )
+        # P0 sells daily, P1 every fifth day, P2 never.
+        session.add_all([OwnerbotDemoOrderItem(order_id=f"O{day}", product_id="P0", qty=2, unit_price=10, currency="EUR") for day in range(DAYS)])
+        session.add_all([OwnerbotDemoOrderItem(order_id=f"O{day}", product_id="P1", qty=1, unit_price=10, currency="EUR") for day in range(0, DAYS, 5)])
+        await session.commit()
+
+        report = await backtest_sales_history(session, CONFIG)
+    await engine.dispose()
+
+    assert report["skus"] == 3
+    sma = report["methods"]["sma"]
+    assert set(sma["segments"]) == {"intermittent", "regular"}
+    assert sma["segments"]["regular"]["wape"] == pytest.approx(0.0)
+    assert all(entry["wape"] is not None for entry in report["methods"].values())
+
+
+@pytest.mark.asyncio
+async def test_report_is_saved_and_compared(tmp_path) -> None:
+    report = await run_suite(sizes=(500,), synthetic_skus=300)
+    path = write_report(report, tmp_path)
+    saved = json.loads(path.read_text(encoding="utf-8"))
+
+    assert path.parent == tmp_path and path.suffix == ".json"
+    assert saved["benchmark"][0]["skus"] == 500
+    assert set(saved["backtest"]["synthetic"]["methods"]) == set(CONFIG.methods)
+    lines = compare_reports(saved, saved)
+    assert any(line.startswith("synthetic auto: wape") and "(+0.000)" in line for line in lines)
+    assert any(line.startswith("500 skus forecast_auto") and "(1.00x)" in line for line in lines)
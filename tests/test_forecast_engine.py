@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.forecasting import ForecastParams, forecast_batch
+from app.tools.impl._forecasting import forecast_ses, forecast_sma
+
+
+def test_batch_matches_the_scalar_forecasts_row_by_row() -> None:
+    rng = np.random.default_rng(3)
+    history = rng.poisson(1.5, size=(50, 30)).astype(np.float64)
+    params = ForecastParams(window_days=10, alpha=0.4)
+
+    sma = forecast_batch(history, 5, method="sma", params=params)
+    ses = forecast_batch(history, 5, method="ses", params=params)
+
+    assert sma.daily.shape == (50, 5)
+    assert sma.totals == pytest.approx([5 * forecast_sma(row, 10) for row in history])
+    assert ses.daily_rate == pytest.approx([forecast_ses(row, 0.4) for row in history])
+    assert set(sma.methods) == {"sma"}
+
+
+def test_holt_winters_follows_the_weekly_season() -> None:
+    days = np.arange(56)
+    weekly = 10 + 6 * (days % 7 >= 5)
+    history = np.vstack([weekly, weekly * 2]).astype(np.float64)
+
+    batch = forecast_batch(history, 7, method="holt_winters")
+
+    expected = 10 + 6 * ((56 + np.arange(7)) % 7 >= 5)
+    assert batch.daily[0] == pytest.approx(expected, abs=0.5)
+    assert batch.daily[1] == pytest.approx(expected * 2, abs=1.0)
+
+
+def test_auto_picks_a_method_per_product() -> None:
+    days = np.arange(56)
+    history = np.vstack(
+        [
+            np.zeros(56),
+            10 + 6 * (days % 7 >= 5),
+            np.where(days % 9 == 0, 3.0, 0.0),
+        ]
+    )
+
+    batch = forecast_batch(history, 7)
+
+    # Rows without regular sales only choose between the intermittent-demand methods.
+    assert batch.methods.tolist()[0] in {"croston", "tsb"}
+    assert batch.methods.tolist()[1] == "holt_winters"
+    assert batch.methods.tolist()[2] in {"croston", "tsb"}
+    assert batch.totals[0] == 0
+    assert batch.holdout_mse is not None and batch.holdout_mse[1] < 1.0
+    assert forecast_batch(np.zeros((0, 30)), 7).daily.shape == (0, 7)
+
+
+def test_auto_beats_sma_on_sparse_sellers() -> None:
+    rng = np.random.default_rng(5)
+    rate = 0.3
+    history = rng.poisson(rate, size=(2000, 60)).astype(np.float64)
+
+    auto = forecast_batch(history, 7)
+    sma = forecast_batch(history, 7, method="sma")
+
+    def mse(batch) -> float:
+        return float(((batch.daily_rate - rate) ** 2).mean())
+
+    assert mse(auto) < 0.7 * mse(sma)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.storage.models import Base, OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct, OwnerbotForecastResult
+from app.tools.impl._forecast_store import PRESETS, refresh_forecast_results
+from app.tools.impl.demand_forecast import Payload as DemandPayload, handle as demand_handle
+from app.tools.impl.reorder_plan import Payload as ReorderPayload, handle as reorder_handle
+
+
+@pytest.fixture(autouse=True)
+def demo_mode(monkeypatch) -> None:
+    settings = SimpleNamespace(upstream_mode="DEMO", forecast_results_max_age_sec=7200.0)
+    monkeypatch.setattr("app.tools.impl.demand_forecast.get_settings", lambda: settings)
+    monkeypatch.setattr("app.tools.impl.reorder_plan.get_settings", lambda: settings)
+
+
+async def _seeded():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    now = datetime.now(timezone.utc)
+    async with async_session() as session:
+        session.add_all(
+            [
+                OwnerbotDemoProduct(product_id=f"P{idx}", title=f"Prod {idx}", category="Cat", price=10, currency="EUR", stock_qty=idx)
+                for idx in range(1, 5)
+            ]
+        )
+        session.add_all(
+            [
+                OwnerbotDemoOrder(order_id=f"O{idx}", status="paid", amount=10, currency="EUR", customer_id="c", payment_status="paid", created_at=now - timedelta(days=idx))
+                for idx in range(1, 7)
+            ]
+        )
+        session.add_all(
+            [OwnerbotDemoOrderItem(order_id=f"O{idx}", product_id=f"P{idx % 2 + 1}", qty=idx, unit_price=10, currency="EUR") for idx in range(1, 7)]
+        )
+        await session.commit()
+    return engine, async_session
+
+
+def _items(response) -> list[dict]:
+    return response.model_dump(mode="json")["data"]["items"]
+
+
+@pytest.mark.asyncio
+async def test_standard_payloads_are_served_from_the_store() -> None:
+    engine, async_session = await _seeded()
+    async with async_session() as session:
+        on_demand = [await demand_handle(DemandPayload(), "corr", session), await reorder_handle(ReorderPayload(method="auto"), "corr", session)]
+        stats = await refresh_forecast_results(session)
+        stored = [await demand_handle(DemandPayload(), "corr", session), await reorder_handle(ReorderPayload(method="auto"), "corr", session)]
+        custom = await demand_handle(DemandPayload(horizon_days=9), "corr", session)
+    await engine.dispose()
+
+    assert stats == {"presets": len(PRESETS), "products": 4, "recomputed": 4 * len(PRESETS), "unchanged": 0, "deleted": 0}
+    assert all("ownerbot_forecast_results" not in response.provenance.sources for response in on_demand)
+    assert all(response.provenance.sources[0] == "ownerbot_forecast_results" and response.data["as_of"] for response in stored)
+    assert [_items(response) for response in stored] == [_items(response) for response in on_demand]
+    assert "ownerbot_forecast_results" not in custom.provenance.sources
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_recomputes_changed_skus() -> None:
+    engine, async_session = await _seeded()
+    now = datetime.now(timezone.utc)
+    reorder_presets = sum(1 for preset in PRESETS if preset.reorder)
+
+    async with async_session() as session:
+        await refresh_forecast_results(session, now=now)
+        assert (await refresh_forecast_results(session, now=now))["recomputed"] == 0
+
+        # A new sale of P3 touches every preset, a stock change of P4 only the reorder ones.
+        session.add(OwnerbotDemoOrderItem(order_id="O1", product_id="P3", qty=2, unit_price=10, currency="EUR"))
+        product = await session.get(OwnerbotDemoProduct, "P4")
+        product.stock_qty = 40
+        await session.commit()
+        stats = await refresh_forecast_results(session, now=now)
+        assert stats["recomputed"] == len(PRESETS) + reorder_presets
+
+        # Next day: series with sales shift in the window, P4 without sales keeps its results.
+        stats = await refresh_forecast_results(session, now=now + timedelta(days=1))
+        assert stats["recomputed"] == 3 * len(PRESETS)
+        assert stats["unchanged"] == len(PRESETS)
+
+        await session.execute(delete(OwnerbotDemoProduct).where(OwnerbotDemoProduct.product_id == "P4"))
+        await session.commit()
+        stats = await refresh_forecast_results(session, now=now + timedelta(days=1))
+        assert stats["deleted"] == len(PRESETS)
+        rows = (await session.execute(select(OwnerbotForecastResult).where(OwnerbotForecastResult.preset == "reorder_14d_auto"))).scalars().all()
+    await engine.dispose()
+
+    assert sorted(row.product_id for row in rows) == ["P1", "P2", "P3"]
+    assert all(row.history_end == (now + timedelta(days=1)).date() and row.stock_qty is not None for row in rows)
+    assert {row.model for row in rows} <= {"sma", "ses", "croston", "tsb", "holt", "holt_winters"}
+
+
+@pytest.mark.asyncio
+async def test_stale_or_incomplete_results_fall_back_to_on_demand() -> None:
+    engine, async_session = await _seeded()
+    now = datetime.now(timezone.utc)
+
+    async with async_session() as session:
+        # Computed for yesterday's window: not served today.
+        await refresh_forecast_results(session, now=now - timedelta(days=1))
+        stale = await demand_handle(DemandPayload(), "corr", session)
+
+        await refresh_forecast_results(session, now=now)
+        session.add(OwnerbotDemoProduct(product_id="P9", title="Prod 9", category="Cat", price=1, currency="EUR", stock_qty=1))
+        await session.commit()
+        missing = await reorder_handle(ReorderPayload(), "corr", session)
+        filtered = await reorder_handle(ReorderPayload(include_categories=["Cat"]), "corr", session)
+    await engine.dispose()
+
+    assert "ownerbot_forecast_results" not in stale.provenance.sources
+    assert "ownerbot_forecast_results" not in missing.provenance.sources
+    assert any(item["product_id"] == "P9" for item in _items(filtered))
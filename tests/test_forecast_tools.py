@@ -34,8 +34,8 @@ def test_confidence_grading() -> None:
 
 @pytest.mark.asyncio
 async def test_reorder_plan_formula_and_sorting(monkeypatch) -> None:
-    monkeypatch.setattr("app.tools.impl.reorder_plan.get_settings", lambda: SimpleNamespace(upstream_mode="DEMO"))
-    monkeypatch.setattr("app.tools.impl.demand_forecast.get_settings", lambda: SimpleNamespace(upstream_mode="DEMO"))
+    monkeypatch.setattr("app.tools.impl.reorder_plan.get_settings", lambda: SimpleNamespace(upstream_mode="DEMO", forecast_results_max_age_sec=7200.0))
+    monkeypatch.setattr("app.tools.impl.demand_forecast.get_settings", lambda: SimpleNamespace(upstream_mode="DEMO", forecast_results_max_age_sec=7200.0))
 
     engine = create_async_engine("sqlite+aiosqlite:///:memory:")
     async with engine.begin() as conn:
@@ -83,8 +83,8 @@ async def test_reorder_plan_formula_and_sorting(monkeypatch) -> None:
 
 @pytest.mark.asyncio
 async def test_forecast_tools_non_demo(monkeypatch) -> None:
-    monkeypatch.setattr("app.tools.impl.reorder_plan.get_settings", lambda: SimpleNamespace(upstream_mode="SIS_HTTP"))
-    monkeypatch.setattr("app.tools.impl.demand_forecast.get_settings", lambda: SimpleNamespace(upstream_mode="AUTO"))
+    monkeypatch.setattr("app.tools.impl.reorder_plan.get_settings", lambda: SimpleNamespace(upstream_mode="SIS_HTTP", forecast_results_max_age_sec=7200.0))
+    monkeypatch.setattr("app.tools.impl.demand_forecast.get_settings", lambda: SimpleNamespace(upstream_mode="AUTO", forecast_results_max_age_sec=7200.0))
 
     engine = create_async_engine("sqlite+aiosqlite:///:memory:")
     async with engine.begin() as conn:
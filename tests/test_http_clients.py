@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.core import http
+from app.core.http import HttpClientRegistry
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_client_and_counts_requests() -> None:
+    registry = HttpClientRegistry(max_connections=4, max_keepalive_connections=2)
+    client = registry.get("sis")
+    assert registry.get("sis") is client
+    assert registry.get("openai") is not client
+
+    client._transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+    for _ in range(3):
+        response = await client.get("http://sis.local/ownerbot/v1/ping", timeout=1.0)
+        assert response.status_code == 200
+
+    stats = registry.stats()
+    assert stats["sis"]["requests"] == 3
+    assert stats["openai"]["requests"] == 0
+
+    await registry.aclose()
+    assert client.is_closed
+    assert registry.stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_http2_falls_back_when_h2_missing(monkeypatch) -> None:
+    monkeypatch.setattr(http, "_http2_available", lambda: False)
+    registry = HttpClientRegistry(http2=True)
+    registry.get("sis")
+    assert registry.stats()["sis"]["http2"] is False
+    await registry.aclose()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.notify import build_ops_snapshot
+from app.notify.fanout import ToolCall, fan_out
+from app.tools.contracts import ToolProvenance, ToolResponse
+from app.tools.impl import chats_unanswered, inventory_status, orders_search, sys_last_errors
+
+
+def _slow_handle(delay: float, sessions: list | None = None):
+    async def _handle(payload, correlation_id, session):
+        if sessions is not None:
+            sessions.append(session)
+        await asyncio.sleep(delay)
+        return ToolResponse.ok(correlation_id=correlation_id, data={"count": 2}, provenance=ToolProvenance())
+
+    return _handle
+
+
+@pytest.mark.asyncio
+async def test_ops_snapshot_takes_as_long_as_the_slowest_call(monkeypatch) -> None:
+    for module in (chats_unanswered, inventory_status, orders_search, sys_last_errors):
+        monkeypatch.setattr(module, "handle", _slow_handle(0.1))
+
+    started = time.monotonic()
+    snapshot = await build_ops_snapshot(None, correlation_id="cid")
+
+    # Five calls of 100 ms each: concurrently, not 500 ms.
+    assert time.monotonic() - started < 0.3
+    assert snapshot["unanswered_chats"]["count"] == 2
+    assert snapshot["warnings"] == []
+
+
+@pytest.mark.asyncio
+async def test_timed_out_call_becomes_a_warning(monkeypatch) -> None:
+    for module in (chats_unanswered, orders_search, sys_last_errors):
+        monkeypatch.setattr(module, "handle", _slow_handle(0))
+    monkeypatch.setattr(inventory_status, "handle", _slow_handle(5))
+    monkeypatch.setattr("app.notify.fanout.get_settings", lambda: SimpleNamespace(notify_fanout_call_timeout_sec=0.05))
+
+    snapshot = await build_ops_snapshot(None, correlation_id="cid")
+
+    assert snapshot["warnings"] == ["inventory_status:UPSTREAM_TIMEOUT"]
+    assert snapshot["stuck_orders"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_each_call_gets_its_own_session() -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    sessions: list = []
+
+    class _Tool:
+        handle = staticmethod(_slow_handle(0, sessions))
+
+    class _Payload(BaseModel):
+        pass
+
+    async with AsyncSession(engine) as outer:
+        results = await fan_out(
+            [ToolCall("a", _Tool, _Payload(), "a"), ToolCall("b", _Tool, _Payload(), "b")],
+            session=outer,
+            timeout_sec=1,
+        )
+    await engine.dispose()
+
+    assert {response.status for response in results.values()} == {"ok"}
+    assert len({id(session) for session in sessions}) == 2
+    assert all(session is not outer and session.bind is engine for session in sessions)
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import outbound
+from app.core.outbound import OutboundDispatcher
+from app.core.tasks.notify_worker import NotifyWorker
+from app.notify.outbox import OutboxMessage, drain_outbox, enqueue_notification
+from app.storage.models import Base, OwnerbotNotifyOutbox, OwnerNotifySettings
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def set(self, key, value, ex=None, nx=None):
+        if nx and key in self.store:
+            return False
+        self.store[key] = value
+        return True
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+@pytest.fixture
+async def async_session(monkeypatch):
+    monkeypatch.setattr(outbound, "_DISPATCHER", OutboundDispatcher(global_rate=1000, global_burst=100, chat_rate=1000))
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _rows(async_session) -> list[OwnerbotNotifyOutbox]:
+    async with async_session() as session:
+        return list((await session.execute(select(OwnerbotNotifyOutbox).order_by(OwnerbotNotifyOutbox.id))).scalars())
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent_per_dedupe_key(async_session) -> None:
+    messages = [OutboxMessage.message("digest"), OutboxMessage.photo(b"png", "chart")]
+    async with async_session() as session:
+        assert await enqueue_notification(session, owner_id=1, chat_id=1, notification="digest", dedupe_key="digest:1:2026-01-01", messages=messages)
+        await session.commit()
+        assert not await enqueue_notification(session, owner_id=1, chat_id=1, notification="digest", dedupe_key="digest:1:2026-01-01", messages=messages)
+        await session.commit()
+
+    rows = await _rows(async_session)
+    assert [row.dedupe_key for row in rows] == ["digest:1:2026-01-01#0", "digest:1:2026-01-01#1"]
+    assert [row.message_kind for row in rows] == ["text", "photo"]
+
+
+@pytest.mark.asyncio
+async def test_drain_delivers_in_order_and_marks_rows(async_session) -> None:
+    async with async_session() as session:
+        await enqueue_notification(
+            session,
+            owner_id=1,
+            chat_id=1,
+            notification="weekly",
+            dedupe_key="weekly:1:2026-W01",
+            messages=[OutboxMessage.document(b"%PDF", filename="weekly_report.pdf", caption="report"), OutboxMessage.message("text")],
+        )
+        await session.commit()
+
+    calls: list[str] = []
+    bot = SimpleNamespace(
+        send_message=AsyncMock(side_effect=lambda **kw: calls.append("message")),
+        send_document=AsyncMock(side_effect=lambda **kw: calls.append("document")),
+        send_photo=AsyncMock(),
+    )
+    async with async_session() as session:
+        stats = await drain_outbox(session, bot)
+
+    assert stats["delivered"] == 2
+    assert calls == ["document", "message"]
+    rows = await _rows(async_session)
+    assert {row.status for row in rows} == {"delivered"}
+    assert all(row.content is None for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_failed_send_backs_off_the_whole_group_then_dies(async_session) -> None:
+    now = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    async with async_session() as session:
+        await enqueue_notification(
+            session,
+            owner_id=1,
+            chat_id=1,
+            notification="digest",
+            dedupe_key="digest:1:2026-01-01",
+            messages=[OutboxMessage.message("digest"), OutboxMessage.photo(b"png", "chart")],
+            now=now,
+        )
+        await session.commit()
+
+    bot = SimpleNamespace(send_message=AsyncMock(side_effect=RuntimeError("down")), send_photo=AsyncMock(), send_document=AsyncMock())
+    async with async_session() as session:
+        stats = await drain_outbox(session, bot, max_attempts=2, now=now)
+    assert stats["retried"] == 1
+    bot.send_photo.assert_not_called()
+    rows = await _rows(async_session)
+    assert [row.status for row in rows] == ["pending", "pending"]
+    assert rows[0].attempts == 1
+    assert all(row.next_attempt_at.replace(tzinfo=timezone.utc) == now + timedelta(seconds=30) for row in rows)
+
+    # Not due yet: nothing is sent.
+    async with async_session() as session:
+        assert (await drain_outbox(session, bot, max_attempts=2, now=now + timedelta(seconds=10)))["retried"] == 0
+
+    async with async_session() as session:
+        stats = await drain_outbox(session, bot, max_attempts=2, now=now + timedelta(seconds=31))
+    assert stats["failed"] == 1
+    assert stats["dead"][0]["notification"] == "digest"
+    assert [row.status for row in await _rows(async_session)] == ["failed", "failed"]
+
+
+@pytest.mark.asyncio
+async def test_a_second_replica_cannot_take_over_part_of_a_claimed_group(async_session) -> None:
+    async with async_session() as session:
+        await enqueue_notification(
+            session,
+            owner_id=1,
+            chat_id=1,
+            notification="digest",
+            dedupe_key="digest:1:2026-01-02",
+            messages=[OutboxMessage.message("digest"), OutboxMessage.photo(b"png", "chart")],
+        )
+        await session.commit()
+
+    other_replica: list[dict] = []
+    other_bot = SimpleNamespace(send_message=AsyncMock(), send_photo=AsyncMock(), send_document=AsyncMock())
+
+    async def send_message(**kwargs):
+        # Another replica drains while the first part is in flight here.
+        async with async_session() as other:
+            other_replica.append(await drain_outbox(other, other_bot))
+
+    bot = SimpleNamespace(send_message=AsyncMock(side_effect=send_message), send_photo=AsyncMock(), send_document=AsyncMock())
+    async with async_session() as session:
+        stats = await drain_outbox(session, bot)
+
+    assert stats["delivered"] == 2
+    assert other_replica[0]["delivered"] == 0
+    other_bot.send_photo.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_worker_enqueues_digest_in_the_state_commit(async_session, monkeypatch) -> None:
+    async with async_session() as session:
+        session.add(OwnerNotifySettings(owner_id=7, digest_enabled=True, digest_time_local="00:00", digest_tz="UTC", digest_format="text"))
+        await session.commit()
+
+    @asynccontextmanager
+    async def fake_scope():
+        async with async_session() as s:
+            yield s
+
+    bot = SimpleNamespace(send_message=AsyncMock(), send_photo=AsyncMock(), send_document=AsyncMock())
+    worker = NotifyWorker(bot)
+    monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(return_value=FakeRedis()))
+    settings = SimpleNamespace(
+        owner_ids=[7],
+        notify_outbox_enabled=True,
+        notify_shard_count=1,
+        notify_shard_lease_ttl_sec=15,
+        notify_owner_concurrency=4,
+        notify_owner_timeout_sec=120,
+        notify_events_enabled=False,
+        notify_condition_poll_sec=300,
+    )
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: settings)
+    monkeypatch.setattr(
+        "app.core.tasks.notify_worker.build_daily_digest",
+        AsyncMock(return_value=SimpleNamespace(text="digest", series=[], kpi_summary={}, ops_summary={}, fx_summary={}, warnings=[])),
+    )
+
+    await worker.tick()
+
+    bot.send_message.assert_not_called()
+    rows = await _rows(async_session)
+    assert [(row.notification, row.text) for row in rows] == [("digest", "digest")]
+    async with async_session() as session:
+        assert (await session.get(OwnerNotifySettings, 7)).digest_last_sent_at is not None
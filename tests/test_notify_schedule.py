@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.tasks.notify_worker import NotifyWorker
+from app.notify.schedule import SCHEDULE_KEY, next_due_at
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return False
+        self.store[key] = value
+        return True
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrange(self, key, start, end, withscores=False):
+        return sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(str(member), None)
+
+
+def _notify_settings(**overrides):
+    base = dict(
+        digest_enabled=False,
+        digest_tz="Europe/Berlin",
+        digest_time_local="09:00",
+        digest_last_sent_at=None,
+        weekly_enabled=False,
+        weekly_tz="Europe/Berlin",
+        weekly_time_local="09:30",
+        weekly_day_of_week=0,
+        weekly_last_sent_at=None,
+        fx_delta_enabled=False,
+        fx_delta_last_notified_at=None,
+        fx_delta_cooldown_hours=6,
+        fx_apply_events_enabled=False,
+        fx_apply_last_sent_at=None,
+        fx_apply_events_cooldown_hours=6,
+        ops_alerts_enabled=False,
+        ops_alerts_last_sent_at=None,
+        ops_alerts_cooldown_hours=6,
+    )
+    base.update(overrides)
+    return SimpleNamespace(**base)
+
+
+def test_nothing_enabled_has_no_due_time() -> None:
+    assert next_due_at(_notify_settings(), datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc), poll_interval_sec=300) is None
+
+
+def test_digest_due_at_local_time_and_tomorrow_after_send() -> None:
+    # 06:00 UTC is 07:00 in Berlin (CET): the digest is due at 09:00 local.
+    now = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+    settings = _notify_settings(digest_enabled=True)
+    assert next_due_at(settings, now, poll_interval_sec=300) == datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+
+    settings.digest_last_sent_at = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+    later = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+    assert next_due_at(settings, later, poll_interval_sec=300) == datetime(2026, 3, 3, 8, 0, tzinfo=timezone.utc)
+
+
+def test_digest_keeps_local_time_across_dst_switch() -> None:
+    # Berlin switches to CEST on 2026-03-29: 09:00 local becomes 07:00 UTC.
+    now = datetime(2026, 3, 28, 12, 0, tzinfo=timezone.utc)
+    settings = _notify_settings(digest_enabled=True, digest_last_sent_at=datetime(2026, 3, 28, 8, 0, tzinfo=timezone.utc))
+    assert next_due_at(settings, now, poll_interval_sec=300) == datetime(2026, 3, 29, 7, 0, tzinfo=timezone.utc)
+
+
+def test_weekly_due_on_configured_day() -> None:
+    # 2026-03-02 is a Monday; weekly_day_of_week=2 means Wednesday 09:30 Berlin.
+    now = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+    settings = _notify_settings(weekly_enabled=True, weekly_day_of_week=2)
+    assert next_due_at(settings, now, poll_interval_sec=300) == datetime(2026, 3, 4, 8, 30, tzinfo=timezone.utc)
+
+
+def test_cooldown_pushes_condition_poll_out() -> None:
+    now = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+    settings = _notify_settings(fx_delta_enabled=True)
+    assert next_due_at(settings, now, poll_interval_sec=300) == now + timedelta(seconds=300)
+
+    settings.fx_delta_last_notified_at = now - timedelta(hours=1)
+    assert next_due_at(settings, now, poll_interval_sec=300) == now + timedelta(hours=5)
+
+
+@pytest.mark.asyncio
+async def test_run_due_processes_only_due_owners_and_returns_sleep(monkeypatch) -> None:
+    redis = FakeRedis()
+    now = datetime.now(timezone.utc)
+    redis.zsets[SCHEDULE_KEY] = {"1": (now - timedelta(seconds=1)).timestamp(), "2": (now + timedelta(hours=1)).timestamp(), "99": 0.0}
+    processed: list[int] = []
+
+    async def _process_owner(owner_id: int):
+        processed.append(owner_id)
+        return now + timedelta(seconds=30)
+
+    settings = SimpleNamespace(
+        owner_ids=[1, 2],
+        notify_shard_count=1,
+        notify_shard_lease_ttl_sec=15,
+        notify_owner_concurrency=4,
+        notify_owner_timeout_sec=120,
+        notify_scheduler_max_sleep_sec=60,
+        notify_outbox_enabled=False,
+    )
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(return_value=redis))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: settings)
+    worker = NotifyWorker(bot=SimpleNamespace())
+    monkeypatch.setattr(worker, "_process_owner", _process_owner)
+
+    delay = await worker.run_due()
+
+    assert processed == [1]
+    assert 0 < delay <= 30
+    # Owners removed from OWNER_IDS drop out of the schedule.
+    assert set(redis.zsets[SCHEDULE_KEY]) == {"1", "2"}
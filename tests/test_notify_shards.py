@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core.tasks.notify_shards import (
+    RELEASE_LEASE_SCRIPT,
+    RENEW_LEASE_SCRIPT,
+    SHARD_LEASE_KEY_PREFIX,
+    ShardLeases,
+    owner_shard,
+)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return False
+        self.store[key] = value
+        return True
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def eval(self, script, numkeys, key, holder, *args):
+        # Both lease scripts act only while the key still holds the caller's replica id.
+        if self.store.get(key) != holder:
+            return 0
+        if script == RELEASE_LEASE_SCRIPT:
+            self.store.pop(key)
+        else:
+            assert script == RENEW_LEASE_SCRIPT
+        return 1
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for member in [m for m, score in zset.items() if score <= float(high)]:
+            zset.pop(member)
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+
+def test_owner_shard_is_stable_and_in_range() -> None:
+    assert owner_shard(123456, 8) == owner_shard(123456, 8)
+    assert {owner_shard(owner_id, 8) for owner_id in range(1000)} == set(range(8))
+
+
+@pytest.mark.asyncio
+async def test_replicas_split_shards_and_take_over_a_dead_one() -> None:
+    redis = FakeRedis()
+    a = ShardLeases(shard_count=8, lease_ttl_sec=15, replica_id="a")
+    b = ShardLeases(shard_count=8, lease_ttl_sec=15, replica_id="b")
+
+    await a.heartbeat(redis)
+    assert a.held == set(range(8))
+
+    # b joins: a gives up its surplus at the start of its next tick, b claims it.
+    await b.heartbeat(redis)
+    await a.heartbeat(redis, rebalance=True)
+    await b.heartbeat(redis)
+    assert len(a.held) == len(b.held) == 4
+    assert a.held.isdisjoint(b.held)
+
+    # a dies: its leases expire and its membership ages out, b picks everything up.
+    for shard in a.held:
+        redis.store.pop(f"{SHARD_LEASE_KEY_PREFIX}{shard}")
+    redis.zsets["ownerbot:notify:members"]["a"] = 0.0
+    claimed = await b.heartbeat(redis)
+    assert claimed == a.held
+    assert b.held == set(range(8))
+
+
+@pytest.mark.asyncio
+async def test_release_all_frees_leases_for_other_replicas() -> None:
+    redis = FakeRedis()
+    a = ShardLeases(shard_count=4, lease_ttl_sec=15, replica_id="a")
+    b = ShardLeases(shard_count=4, lease_ttl_sec=15, replica_id="b")
+    await a.heartbeat(redis)
+
+    await a.release_all(redis)
+    await b.heartbeat(redis)
+
+    assert a.held == set()
+    assert b.held == set(range(4))
+
+
+@pytest.mark.asyncio
+async def test_a_lease_taken_over_after_expiry_is_neither_renewed_nor_released_by_the_old_holder() -> None:
+    redis = FakeRedis()
+    a = ShardLeases(shard_count=2, lease_ttl_sec=15, replica_id="a")
+    await a.heartbeat(redis)
+    # a stalled past the TTL; b claimed shard 0 meanwhile.
+    redis.store[f"{SHARD_LEASE_KEY_PREFIX}0"] = "b"
+
+    await a.heartbeat(redis)
+    assert a.held == {1}
+
+    a.held.add(0)
+    await a.release_all(redis)
+    assert redis.store == {f"{SHARD_LEASE_KEY_PREFIX}0": "b"}
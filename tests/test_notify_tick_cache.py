@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.notify import build_ops_snapshot
+from app.notify.tick_cache import tick_cache_scope
+from app.tools.contracts import ToolProvenance, ToolResponse
+from app.tools.impl import chats_unanswered, inventory_status, orders_search, sys_last_errors
+
+
+@pytest.fixture()
+def tool_calls(monkeypatch) -> Counter:
+    calls: Counter = Counter()
+
+    def _fake(name):
+        async def _handle(payload, correlation_id, session):
+            calls[name] += 1
+            await asyncio.sleep(0)
+            return ToolResponse.ok(correlation_id=correlation_id, data={"count": 1}, provenance=ToolProvenance())
+
+        return _handle
+
+    for module in (chats_unanswered, inventory_status, orders_search, sys_last_errors):
+        monkeypatch.setattr(module, "handle", _fake(module.__name__.rsplit(".", 1)[-1]))
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_owners_with_identical_rules_share_one_ops_snapshot(tool_calls) -> None:
+    rules = {"ops_low_stock_lte": 5, "ops_unanswered_min_count": 1}
+    with tick_cache_scope() as cache:
+        await asyncio.gather(*(build_ops_snapshot(None, correlation_id=f"owner-{i}", rules=dict(rules)) for i in range(5)))
+
+    # chats, stuck, payment (two orders_search presets), errors, inventory: computed once for five owners.
+    assert tool_calls == Counter({"orders_search": 2, "chats_unanswered": 1, "sys_last_errors": 1, "inventory_status": 1})
+    assert cache.misses == 5
+
+
+@pytest.mark.asyncio
+async def test_different_thresholds_refetch_only_the_affected_call(tool_calls) -> None:
+    with tick_cache_scope():
+        await build_ops_snapshot(None, correlation_id="a", rules={"ops_low_stock_lte": 5, "ops_unanswered_min_count": 1})
+        # min_count is applied after the fetch, only low_stock_lte changes the inventory query.
+        await build_ops_snapshot(None, correlation_id="b", rules={"ops_low_stock_lte": 2, "ops_unanswered_min_count": 4})
+
+    assert tool_calls["inventory_status"] == 2
+    assert tool_calls["chats_unanswered"] == 1
+    assert tool_calls["sys_last_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_sharing_outside_a_tick(tool_calls) -> None:
+    await build_ops_snapshot(None, correlation_id="a")
+    await build_ops_snapshot(None, correlation_id="b")
+
+    assert tool_calls["chats_unanswered"] == 2
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
@@ -11,6 +12,22 @@ from app.core.tasks.notify_worker import NotifyWorker
 from app.storage.models import Base, OwnerNotifySettings
 
 
+def _settings(**overrides) -> SimpleNamespace:
+    # One shard: FakeRedis holds a single key, so only one lease can be taken.
+    values = {
+        "notify_shard_count": 1,
+        "notify_shard_lease_ttl_sec": 15,
+        "notify_owner_concurrency": 4,
+        "notify_owner_timeout_sec": 120,
+        "notify_outbox_enabled": False,
+        "notify_events_enabled": False,
+        "notify_condition_poll_sec": 300,
+        "notify_scheduler_max_sleep_sec": 60,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
 class FakeRedis:
     def __init__(self, lock: bool = True):
         self.lock = lock
@@ -29,6 +46,14 @@ class FakeRedis:
     async def delete(self, key):
         self.value = None
 
+    async def eval(self, script, numkeys, key, holder, *args):
+        # Shard lease renew/release scripts: act only while the caller still holds the lease.
+        if self.value != holder:
+            return 0
+        if "del" in script:
+            self.value = None
+        return 1
+
 
 @pytest.mark.asyncio
 async def test_notify_worker_skips_when_lock_not_acquired(monkeypatch):
@@ -36,7 +61,7 @@ async def test_notify_worker_skips_when_lock_not_acquired(monkeypatch):
     worker = NotifyWorker(bot)
 
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(return_value=FakeRedis(lock=False)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[1]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[1]))
 
     await worker.tick()
     bot.send_message.assert_not_called()
@@ -63,7 +88,7 @@ async def test_notify_worker_no_state_update_on_send_failure(monkeypatch):
 
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[7]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[7]))
     monkeypatch.setattr(
         "app.core.tasks.notify_worker.build_daily_digest",
         AsyncMock(return_value=SimpleNamespace(text="digest", series=[], kpi_summary={}, ops_summary={}, fx_summary={}, warnings=[])),
@@ -128,7 +153,7 @@ async def test_digest_png_uses_photo_and_updates_state(monkeypatch):
 
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[1]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[1]))
     monkeypatch.setattr("app.core.tasks.notify_worker.NotificationSettingsService.get_or_create", AsyncMock(return_value=DummySettings()))
     monkeypatch.setattr(
         "app.core.tasks.notify_worker.build_daily_digest",
@@ -175,7 +200,7 @@ async def test_digest_pdf_uses_document(monkeypatch):
 
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[1]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[1]))
     monkeypatch.setattr("app.core.tasks.notify_worker.NotificationSettingsService.get_or_create", AsyncMock(return_value=DummySettings()))
     monkeypatch.setattr(
         "app.core.tasks.notify_worker.build_daily_digest",
@@ -219,7 +244,7 @@ async def test_fx_apply_event_sent_once_and_state_updated(monkeypatch):
 
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[9], upstream_mode="DEMO"))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[9], upstream_mode="DEMO"))
     monkeypatch.setattr("app.core.tasks.notify_worker.sis_fx_status.handle", AsyncMock(return_value=response))
 
     await worker.tick()
@@ -258,7 +283,7 @@ async def test_fx_apply_event_send_failure_does_not_update_state(monkeypatch):
 
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[10], upstream_mode="DEMO"))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[10], upstream_mode="DEMO"))
     monkeypatch.setattr("app.core.tasks.notify_worker.sis_fx_status.handle", AsyncMock(return_value=response))
 
     await worker.tick()
@@ -309,7 +334,7 @@ async def test_fx_apply_event_result_defaults(monkeypatch):
 
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[1], upstream_mode="DEMO"))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[1], upstream_mode="DEMO"))
     monkeypatch.setattr("app.core.tasks.notify_worker.NotificationSettingsService.get_or_create", AsyncMock(return_value=DummySettings()))
     monkeypatch.setattr("app.core.tasks.notify_worker.sis_fx_status.handle", AsyncMock(return_value=noop_response))
 
@@ -352,7 +377,7 @@ async def test_ops_alert_sent_once_and_state_updated(monkeypatch):
 
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[11]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[11]))
     monkeypatch.setattr("app.core.tasks.notify_worker.build_ops_snapshot", AsyncMock(return_value=snapshot))
 
     await worker.tick()
@@ -395,7 +420,7 @@ async def test_ops_alert_send_failure_does_not_update_state(monkeypatch):
 
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[12]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[12]))
     monkeypatch.setattr("app.core.tasks.notify_worker.build_ops_snapshot", AsyncMock(return_value=snapshot))
 
     await worker.tick()
@@ -438,7 +463,7 @@ async def test_ops_tool_warning_throttled(monkeypatch):
     monkeypatch.setattr("app.core.tasks.notify_worker.write_audit_event", audit_mock)
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[13]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[13]))
     monkeypatch.setattr("app.core.tasks.notify_worker.build_ops_snapshot", AsyncMock(return_value=snapshot))
 
     await worker.tick()
@@ -484,7 +509,7 @@ async def test_quiet_digest_skip_updates_attempt_and_skipped_without_sending(mon
     ops_warning_mock = AsyncMock()
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[21]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[21]))
     monkeypatch.setattr("app.core.tasks.notify_worker.build_daily_digest", digest_mock)
     monkeypatch.setattr("app.core.tasks.notify_worker.kpi_compare.handle", AsyncMock(return_value=SimpleNamespace(status="ok", data={"delta": {"revenue_net_sum": {"delta_pct": -1.0}, "orders_paid_sum": {"delta_pct": -1.0}}})))
     monkeypatch.setattr(
@@ -547,7 +572,7 @@ async def test_quiet_digest_triggered_sends_and_updates_last_sent(monkeypatch):
     digest_mock = AsyncMock(return_value=SimpleNamespace(text="digest", series=[], kpi_summary={}, ops_summary={}, fx_summary={}, warnings=[]))
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[22]))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[22]))
     monkeypatch.setattr("app.core.tasks.notify_worker.build_daily_digest", digest_mock)
     monkeypatch.setattr("app.core.tasks.notify_worker.kpi_compare.handle", AsyncMock(return_value=SimpleNamespace(status="ok", data={"delta": {"revenue_net_sum": {"delta_pct": -20.0}, "orders_paid_sum": {"delta_pct": -1.0}}})))
 
@@ -581,7 +606,7 @@ async def test_escalation_new_incident_sets_first_seen_without_sending(monkeypat
     worker = NotifyWorker(bot)
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[31], upstream_mode="DEMO"))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[31], upstream_mode="DEMO"))
     monkeypatch.setattr("app.core.tasks.notify_worker.build_ops_snapshot", AsyncMock(return_value={"warnings": [], "inventory": {"out_of_stock": 1, "top_out": []}, "stuck_orders": {"count": 0, "top": []}, "errors": {"count": 0, "top": []}, "unanswered_chats": {"count": 0, "top": [], "threshold_hours": 2}}))
 
     await worker.tick()
@@ -612,7 +637,7 @@ async def test_escalation_send_and_limits(monkeypatch):
     worker = NotifyWorker(bot)
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[32], upstream_mode="DEMO"))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[32], upstream_mode="DEMO"))
     monkeypatch.setattr("app.core.tasks.notify_worker.make_critical_event_key", lambda _: "k")
     monkeypatch.setattr("app.core.tasks.notify_worker.build_ops_snapshot", AsyncMock(return_value={"warnings": [], "inventory": {"out_of_stock": 1, "top_out": []}, "stuck_orders": {"count": 0, "top": []}, "errors": {"count": 0, "top": []}, "unanswered_chats": {"count": 0, "top": [], "threshold_hours": 2}}))
 
@@ -640,7 +665,7 @@ async def test_escalation_ack_and_snooze_stop(monkeypatch):
     worker = NotifyWorker(bot)
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[33], upstream_mode="DEMO"))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[33], upstream_mode="DEMO"))
     monkeypatch.setattr("app.core.tasks.notify_worker.make_critical_event_key", lambda _: "k")
     monkeypatch.setattr("app.core.tasks.notify_worker.build_ops_snapshot", AsyncMock(return_value={"warnings": [], "inventory": {"out_of_stock": 1, "top_out": []}, "stuck_orders": {"count": 0, "top": []}, "errors": {"count": 0, "top": []}, "unanswered_chats": {"count": 0, "top": [], "threshold_hours": 2}}))
 
@@ -676,7 +701,7 @@ async def test_escalation_send_failure_keeps_state(monkeypatch):
     worker = NotifyWorker(bot)
     monkeypatch.setattr("app.core.tasks.notify_worker.session_scope", fake_scope)
     monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
-    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[34], upstream_mode="DEMO"))
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: _settings(owner_ids=[34], upstream_mode="DEMO"))
     monkeypatch.setattr("app.core.tasks.notify_worker.make_critical_event_key", lambda _: "k")
     monkeypatch.setattr("app.core.tasks.notify_worker.build_ops_snapshot", AsyncMock(return_value={"warnings": [], "inventory": {"out_of_stock": 1, "top_out": []}, "stuck_orders": {"count": 0, "top": []}, "errors": {"count": 0, "top": []}, "unanswered_chats": {"count": 0, "top": [], "threshold_hours": 2}}))
 
@@ -685,3 +710,41 @@ async def test_escalation_send_failure_keeps_state(monkeypatch):
         row = await session.get(OwnerNotifySettings, 34)
         assert row.escalation_last_sent_at is None
         assert row.escalation_repeat_count == 0
+
+
+@pytest.mark.asyncio
+async def test_notify_worker_processes_owners_concurrently_with_timeout(monkeypatch):
+    bot = SimpleNamespace(send_message=AsyncMock(), send_photo=AsyncMock(), send_document=AsyncMock())
+    worker = NotifyWorker(bot)
+    active = 0
+    peak = 0
+    finished: list[int] = []
+    audit_events: list[dict] = []
+
+    async def fake_process(owner_id):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(5 if owner_id == 1 else 0.01)
+            finished.append(owner_id)
+        finally:
+            active -= 1
+
+    async def fake_audit(event_type, payload, **kwargs):
+        if event_type == "notify_error":
+            audit_events.append(payload)
+
+    monkeypatch.setattr(worker, "_process_owner", fake_process)
+    monkeypatch.setattr("app.core.tasks.notify_worker.write_audit_event", fake_audit)
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_redis", AsyncMock(side_effect=lambda: FakeRedis(lock=True)))
+    monkeypatch.setattr(
+        "app.core.tasks.notify_worker.get_settings",
+        lambda: _settings(owner_ids=[1, 2, 3, 4], notify_owner_concurrency=2, notify_owner_timeout_sec=0.2),
+    )
+
+    await asyncio.wait_for(worker.tick(), timeout=2)
+
+    assert sorted(finished) == [2, 3, 4]
+    assert peak == 2
+    assert audit_events == [{"stage": "owner_timeout", "owner_id": 1, "timeout_sec": 0.2}]
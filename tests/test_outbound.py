@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import outbound
+from app.core.outbound import OutboundDispatcher, OutboundRequestMiddleware, SendPriority
+
+
+@pytest.mark.asyncio
+async def test_interactive_overtakes_queued_broadcasts() -> None:
+    dispatcher = OutboundDispatcher(global_rate=20, global_burst=1, interactive_reserve=0)
+    order: list[str] = []
+
+    async def _send(label: str, chat_id: int, priority: SendPriority) -> None:
+        async def _call():
+            order.append(label)
+
+        await dispatcher.send(chat_id, _call, priority=priority)
+
+    broadcasts = [asyncio.create_task(_send(f"b{i}", 100 + i, SendPriority.BROADCAST)) for i in range(3)]
+    await asyncio.sleep(0)
+    reply = asyncio.create_task(_send("reply", 1, SendPriority.INTERACTIVE))
+    await asyncio.gather(reply, *broadcasts)
+
+    # The first broadcast already held the only token; the reply jumps the rest of the queue.
+    assert order == ["b0", "reply", "b1", "b2"]
+    assert dispatcher.stats()["classes"]["broadcast"]["sent"] == 3
+
+
+@pytest.mark.asyncio
+async def test_lower_classes_leave_the_interactive_reserve() -> None:
+    dispatcher = OutboundDispatcher(global_rate=10, global_burst=3, interactive_reserve=2)
+
+    async def _noop():
+        return None
+
+    await dispatcher.send(1, _noop, priority=SendPriority.DIGEST)
+    started = time.monotonic()
+    await dispatcher.send(2, _noop, priority=SendPriority.INTERACTIVE)
+    await dispatcher.send(3, _noop, priority=SendPriority.INTERACTIVE)
+    assert time.monotonic() - started < 0.05
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_the_chat_and_retries() -> None:
+    dispatcher = OutboundDispatcher(global_rate=100, global_burst=10)
+    calls = 0
+
+    class RetryAfter(Exception):
+        retry_after = 0.05
+
+    async def _call():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RetryAfter()
+        return "ok"
+
+    started = time.monotonic()
+    assert await dispatcher.send(5, _call) == "ok"
+    assert calls == 2
+    assert time.monotonic() - started >= 0.05
+    assert dispatcher.stats()["classes"]["interactive"]["retry_after"] == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_chats_are_forgotten() -> None:
+    dispatcher = OutboundDispatcher(global_rate=1000, global_burst=100, chat_rate=1000, evict_interval_sec=0)
+
+    async def _noop():
+        return None
+
+    for chat_id in range(50):
+        await dispatcher.send(chat_id, _noop)
+    dispatcher.pause_chat(7, 0.01)
+    await asyncio.sleep(0.02)
+
+    # The next send sweeps every bucket that refilled meanwhile; only the chat just used is left.
+    await dispatcher.send(99, _noop)
+    assert dispatcher.stats()["tracked_chats"] == 1
+    assert dispatcher._paused_until == {}
+
+
+@pytest.mark.asyncio
+async def test_middleware_throttles_send_methods_once(monkeypatch) -> None:
+    dispatcher = OutboundDispatcher(global_rate=100, global_burst=10)
+    monkeypatch.setattr(outbound, "_DISPATCHER", dispatcher)
+    middleware = OutboundRequestMiddleware()
+
+    class SendMessage(SimpleNamespace):
+        pass
+
+    class GetMe(SimpleNamespace):
+        pass
+
+    async def _make_request(bot, method):
+        return type(method).__name__
+
+    assert await middleware(_make_request, None, SendMessage(chat_id=1)) == "SendMessage"
+    assert await middleware(_make_request, None, GetMe()) == "GetMe"
+    # Already inside dispatcher.send (worker path): not queued a second time.
+    await dispatcher.send(2, lambda: middleware(_make_request, None, SendMessage(chat_id=2)))
+
+    assert dispatcher.stats()["classes"]["interactive"]["sent"] == 2
@@ -30,3 +30,8 @@ def test_weekly_pdf_builder_returns_non_empty_bytes() -> None:
     )
     assert isinstance(content, bytes)
     assert len(content) > 100
+
+
+def test_weekly_pdf_bytes_depend_only_on_report_data() -> None:
+    payload = {"currency": "EUR", "kpi": {"revenue_gross": 100.0}, "trend": {"series": [{"day": "2026-01-01"}]}}
+    assert build_weekly_report_pdf(payload) == build_weekly_report_pdf(dict(payload))
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.render_pool import RenderPool, RenderTimeoutError
+from app.notify.renderers import render_revenue_trend_png
+
+
+def _slow(seconds: float) -> str:
+    time.sleep(seconds)
+    return "done"
+
+
+@pytest.mark.asyncio
+async def test_event_loop_keeps_running_while_rendering() -> None:
+    pool = RenderPool(workers=0)
+    ticks = 0
+
+    async def _heartbeat() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    heartbeat = asyncio.create_task(_heartbeat())
+    assert await pool.run(_slow, 0.2) == "done"
+    heartbeat.cancel()
+    pool.close()
+
+    assert ticks >= 10
+    assert pool.stats()["rendered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises_and_is_counted() -> None:
+    pool = RenderPool(workers=0, timeout_sec=0.05)
+    with pytest.raises(RenderTimeoutError):
+        await pool.run(_slow, 0.3)
+    pool.close()
+    assert pool.stats()["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_process_pool_renders_a_chart() -> None:
+    pool = RenderPool(workers=1, timeout_sec=60)
+    try:
+        await pool.warm_up()
+        png = await pool.run(render_revenue_trend_png, [{"day": "2026-01-01", "revenue_net": 10}], "Revenue", "tz=UTC")
+    finally:
+        pool.close()
+
+    assert png.startswith(b"\x89PNG")
+    assert pool.stats()["mode"] == "process"
@@ -4,12 +4,15 @@ import json
 from datetime import timedelta
 
 import pytest
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.core.tasks.retro_rollups import RetroRollupWorker
 from app.core.time import utcnow
+from app.retro.rollups import refresh_retro_rollups
 from app.retro.service import retro_funnels, retro_gaps, retro_gaps_with_deltas, retro_summary, retro_summary_with_deltas
-from app.storage.models import Base, OwnerbotAuditEvent
+from app.storage.models import Base, OwnerbotAuditEvent, OwnerbotRetroFunnelHourly, OwnerbotRetroRollupHourly, OwnerbotRetroRollupState
 
 
 async def _session_factory():
@@ -51,6 +54,12 @@ async def test_retro_summary_aggregates_windowed_events() -> None:
         )
         await session.commit()
 
+    async with async_session() as session:
+        # Readers never fold events themselves: nothing is reported until the background refresh runs.
+        assert (await retro_summary(session, 7)).totals["tool_calls_total"] == 0
+        assert (await session.execute(select(func.count()).select_from(OwnerbotRetroRollupState))).scalar_one() == 0
+
+    assert await RetroRollupWorker(session_factory=async_session).tick() == 11
     async with async_session() as session:
         summary = await retro_summary(session, 7)
 
@@ -79,6 +88,7 @@ async def test_retro_gaps_collects_tool_and_wizard_gaps() -> None:
             ]
         )
         await session.commit()
+        await refresh_retro_rollups(session)
 
     async with async_session() as session:
         gaps = await retro_gaps(session, 30)
@@ -106,6 +116,7 @@ async def test_retro_deltas() -> None:
             ]
         )
         await session.commit()
+        await refresh_retro_rollups(session)
 
     async with async_session() as session:
         summary_report = await retro_summary_with_deltas(session, 7)
@@ -135,6 +146,7 @@ async def test_retro_funnels() -> None:
             ]
         )
         await session.commit()
+        await refresh_retro_rollups(session)
 
     async with async_session() as session:
         report = await retro_funnels(session, 7)
@@ -146,3 +158,89 @@ async def test_retro_funnels() -> None:
     assert report.plan["rates"]["preview_per_built"] == 0.5
     assert report.advice["memo"] == 1
     assert report.advice["rates"]["memo_per_advice"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_retro_rollups_refresh_incrementally() -> None:
+    async_session = await _session_factory()
+    now = utcnow()
+    async with async_session() as session:
+        session.add(OwnerbotAuditEvent(event_type="tool_call_started", correlation_id="r1", occurred_at=now - timedelta(days=1), payload_json=json.dumps({"tool": "kpi_snapshot"})))
+        await session.commit()
+
+    async with async_session() as session:
+        assert await refresh_retro_rollups(session) == 1
+        assert await refresh_retro_rollups(session) == 0
+        session.add(OwnerbotAuditEvent(event_type="tool_call_started", correlation_id="r2", occurred_at=now - timedelta(days=1), payload_json=json.dumps({"tool": "kpi_snapshot"})))
+        session.add(OwnerbotAuditEvent(event_type="tool_call_started", correlation_id="r3", occurred_at=now, payload_json=json.dumps({"tool": "fresh"})))
+        await session.commit()
+        assert await refresh_retro_rollups(session) == 1
+
+        rows = (await session.execute(select(OwnerbotRetroRollupHourly))).scalars().all()
+        assert [(row.tool, row.event_count) for row in rows] == [("kpi_snapshot", 2)]
+
+
+@pytest.mark.asyncio
+async def test_retro_rollups_fold_a_lower_id_committed_late() -> None:
+    async_session = await _session_factory()
+    day_ago = utcnow() - timedelta(days=1)
+    payload = json.dumps({"tool": "kpi_snapshot"})
+    async with async_session() as session:
+        session.add(OwnerbotAuditEvent(id=1, event_type="tool_call_started", correlation_id="a", occurred_at=day_ago, payload_json=payload))
+        await session.commit()
+        assert await refresh_retro_rollups(session) == 1
+        # Id 2 is still in flight when id 3 commits and gets folded.
+        session.add(OwnerbotAuditEvent(id=3, event_type="tool_call_started", correlation_id="c", occurred_at=day_ago, payload_json=payload))
+        await session.commit()
+        assert await refresh_retro_rollups(session) == 1
+        state = (await session.execute(select(OwnerbotRetroRollupState))).scalar_one()
+        assert (state.last_event_id, json.loads(state.pending_gap_ids)[0][0]) == (3, 2)
+
+        session.add(OwnerbotAuditEvent(id=2, event_type="tool_call_started", correlation_id="b", occurred_at=day_ago, payload_json=payload))
+        await session.commit()
+        assert await refresh_retro_rollups(session) == 1
+        assert await refresh_retro_rollups(session) == 0
+        total = (await session.execute(select(func.sum(OwnerbotRetroRollupHourly.event_count)))).scalar_one()
+        pending = (await session.execute(select(OwnerbotRetroRollupState.pending_gap_ids))).scalar_one()
+
+    assert total == 3
+    assert pending == "[]"
+
+
+@pytest.mark.asyncio
+async def test_retro_funnel_rollup_counts_distinct_correlations_across_batches() -> None:
+    async_session = await _session_factory()
+    hour = utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+    async with async_session() as session:
+        for minute, corr in ((1, "plan-1"), (2, "plan-1"), (3, "plan-2"), (4, "")):
+            session.add(OwnerbotAuditEvent(event_type="agent_plan_built", correlation_id=corr, occurred_at=hour + timedelta(minutes=minute), payload_json="{}"))
+        await session.commit()
+        assert await refresh_retro_rollups(session, batch_size=1) == 4
+
+        row = (await session.execute(select(OwnerbotRetroFunnelHourly))).scalar_one()
+
+    assert (row.funnel, row.stage) == ("plan", "built")
+    assert (row.event_count, row.correlation_count, row.missing_correlation_count) == (4, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_retro_summary_supports_arbitrary_period() -> None:
+    async_session = await _session_factory()
+    now = utcnow()
+    async with async_session() as session:
+        session.add_all(
+            [
+                OwnerbotAuditEvent(event_type="tool_call_started", correlation_id="a1", occurred_at=now - timedelta(days=10), payload_json=json.dumps({"tool": "kpi_snapshot"})),
+                OwnerbotAuditEvent(event_type="tool_call_started", correlation_id="a2", occurred_at=now - timedelta(days=20), payload_json=json.dumps({"tool": "kpi_snapshot"})),
+            ]
+        )
+        await session.commit()
+        await refresh_retro_rollups(session)
+
+    async with async_session() as session:
+        summary = await retro_summary(session, 14)
+        with pytest.raises(ValueError):
+            await retro_summary(session, 0)
+
+    assert summary.period_days == 14
+    assert summary.totals["tool_calls_total"] == 1
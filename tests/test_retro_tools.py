@@ -50,7 +50,7 @@ async def test_retro_tools_reject_invalid_period(monkeypatch: pytest.MonkeyPatch
         return None
 
     monkeypatch.setattr(retro_gaps, "write_audit_event", _noop)
-    response = await retro_gaps.handle(retro_gaps.Payload(period_days=15), "corr", session=None)
+    response = await retro_gaps.handle(retro_gaps.Payload(period_days=400), "corr", session=None)
     assert response.status == "error"
     assert response.error is not None
     assert response.error.code == "VALIDATION_ERROR"
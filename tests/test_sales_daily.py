@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.storage.models import Base, OwnerbotDemoOrder, OwnerbotDemoOrderItem, OwnerbotDemoProduct, OwnerbotSalesDaily
+from app.storage.sales_daily import backfill_sales_daily, ensure_sales_daily, refresh_days_sync
+from app.tools.impl.top_products import Payload as TopProductsPayload, handle as top_products_handle
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _facts(session) -> dict[tuple[str, str], tuple[str, int, float]]:
+    rows = (await session.execute(select(OwnerbotSalesDaily))).scalars().all()
+    return {(row.product_id, row.day.isoformat()): (row.category, row.qty, float(row.revenue)) for row in rows}
+
+
+def _seed(now: datetime) -> list:
+    return [
+        OwnerbotDemoProduct(product_id="P1", title="Prod 1", category="CatA", price=10, currency="EUR", stock_qty=5),
+        OwnerbotDemoProduct(product_id="P2", title="Prod 2", category="CatB", price=30, currency="EUR", stock_qty=5),
+        OwnerbotDemoOrder(order_id="O1", status="paid", amount=70, currency="EUR", customer_id="c1", payment_status="paid", created_at=now - timedelta(days=1)),
+        OwnerbotDemoOrder(order_id="O2", status="pending", amount=30, currency="EUR", customer_id="c2", payment_status="pending", created_at=now - timedelta(days=1)),
+        OwnerbotDemoOrderItem(order_id="O1", product_id="P1", qty=1, unit_price=10, currency="EUR"),
+        OwnerbotDemoOrderItem(order_id="O1", product_id="P2", qty=2, unit_price=30, currency="EUR"),
+        OwnerbotDemoOrderItem(order_id="O2", product_id="P2", qty=1, unit_price=30, currency="EUR"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_order_and_payment_changes_update_the_daily_facts() -> None:
+    engine, async_session = await _session_factory()
+    now = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+    day = (now - timedelta(days=1)).date().isoformat()
+
+    async with async_session() as session:
+        session.add_all(_seed(now))
+        await session.commit()
+        assert await _facts(session) == {("P1", day): ("CatA", 1, 10.0), ("P2", day): ("CatB", 2, 60.0)}
+
+        # Payment lands for the pending order: its line joins the same day.
+        order = await session.get(OwnerbotDemoOrder, "O2")
+        order.payment_status = "paid"
+        await session.commit()
+        assert (await _facts(session))[("P2", day)] == ("CatB", 3, 90.0)
+
+        # A cancelled order leaves the aggregate; a recategorised product carries its facts along.
+        order = await session.get(OwnerbotDemoOrder, "O1")
+        order.status = "cancelled"
+        order.payment_status = "refunded"
+        product = await session.get(OwnerbotDemoProduct, "P2")
+        product.category = "CatC"
+        await session.commit()
+        assert await _facts(session) == {("P2", day): ("CatC", 1, 30.0)}
+
+        # Unrelated edits do not touch the facts.
+        order = await session.get(OwnerbotDemoOrder, "O2")
+        order.customer_phone = "+100"
+        await session.commit()
+        assert await _facts(session) == {("P2", day): ("CatC", 1, 30.0)}
+
+        await session.execute(delete(OwnerbotDemoOrderItem).where(OwnerbotDemoOrderItem.order_id == "O2"))
+        item = OwnerbotDemoOrderItem(order_id="O2", product_id="P1", qty=4, unit_price=10, currency="EUR")
+        session.add(item)
+        await session.commit()
+        assert await _facts(session) == {("P1", day): ("CatA", 4, 40.0)}
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_backfill_rebuilds_facts_written_around_the_orm() -> None:
+    engine, async_session = await _session_factory()
+    now = datetime.now(timezone.utc)
+
+    async with async_session() as session:
+        session.add_all(_seed(now))
+        await session.commit()
+        expected = await _facts(session)
+        await session.execute(delete(OwnerbotSalesDaily))
+        await session.commit()
+
+        assert await ensure_sales_daily(session) >= 2
+        assert await _facts(session) == expected
+        # Facts already present: the startup check is a no-op.
+        assert await ensure_sales_daily(session) == 0
+
+        await session.execute(delete(OwnerbotDemoOrder).where(OwnerbotDemoOrder.order_id == "O1"))
+        await session.commit()
+        await backfill_sales_daily(session, days=7)
+        assert await _facts(session) == {}
+
+    async with async_session() as session:
+        response = await top_products_handle(TopProductsPayload(days=7, group_by="category"), "corr", session)
+    assert response.status == "ok"
+    assert response.data["rows"] == []
+    assert response.provenance.sources[0] == "ownerbot_sales_daily"
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_top_products_by_category_reads_the_facts() -> None:
+    engine, async_session = await _session_factory()
+    now = datetime.now(timezone.utc)
+
+    async with async_session() as session:
+        session.add_all(_seed(now))
+        await session.commit()
+
+    async with async_session() as session:
+        response = await top_products_handle(TopProductsPayload(days=7, metric="qty", group_by="category"), "corr", session)
+
+    assert [(row["key"], row["qty"]) for row in response.data["rows"]] == [("CatB", 2), ("CatA", 1)]
+    assert response.data["totals"] == {"total_revenue": 70.0, "total_qty": 3}
+    await engine.dispose()
+
+
+def test_day_refresh_takes_a_per_day_lock_on_postgres() -> None:
+    statements: list[tuple[str, dict | None]] = []
+
+    class _PostgresSession:
+        def get_bind(self):
+            return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+        def execute(self, statement, params=None):
+            statements.append((str(statement), params))
+
+    refresh_days_sync(_PostgresSession(), [date(2026, 3, 2), date(2026, 3, 1)])
+
+    locks = [params["day"] for sql, params in statements if "pg_advisory_xact_lock" in sql]
+    assert locks == [date(2026, 3, 1).toordinal(), date(2026, 3, 2).toordinal()]
+    assert "pg_advisory_xact_lock" in statements[0][0] and statements[1][0].startswith("DELETE")
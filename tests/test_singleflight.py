@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.actions import capabilities
+from app.upstream import singleflight
+from app.upstream.singleflight import JSON_CODEC, SingleFlight, flight_key
+
+
+def test_flight_key_ignores_param_order_and_none() -> None:
+    assert flight_key("get", "http://sis/x", {"b": 1, "a": 2, "c": None}) == flight_key("GET", "http://sis/x", {"a": 2, "b": 1})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution() -> None:
+    flight = SingleFlight()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await release.wait()
+        return {"value": calls}
+
+    leader = asyncio.create_task(flight.do("k", fetch))
+    await started.wait()
+    followers = [asyncio.create_task(flight.do("k", fetch)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(leader, *followers)
+    assert calls == 1
+    assert [shared for _, shared in results] == [False, True, True, True]
+    assert flight.stats()["coalesced"] == 3
+
+    await flight.do("k", fetch)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_followers_retry_when_leader_is_cancelled() -> None:
+    flight = SingleFlight()
+    started = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            await asyncio.sleep(10)
+        return "ok"
+
+    leader = asyncio.create_task(flight.do("k", fetch))
+    await started.wait()
+    follower = asyncio.create_task(flight.do("k", fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == ("ok", False)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_remote_follower_reads_leader_result(monkeypatch) -> None:
+    class FakeRedis:
+        def __init__(self) -> None:
+            self.store: dict[str, str] = {}
+
+        async def set(self, key, value, px=None, nx=False):
+            if nx and key in self.store:
+                return False
+            self.store[key] = value
+            return True
+
+        async def get(self, key):
+            return self.store.get(key)
+
+        async def delete(self, key):
+            self.store.pop(key, None)
+
+    redis = FakeRedis()
+
+    async def _get_redis():
+        return redis
+
+    monkeypatch.setattr(singleflight, "get_redis", _get_redis)
+    replica_a, replica_b = SingleFlight(), SingleFlight()
+    release = asyncio.Event()
+    calls: list[str] = []
+
+    async def fetch_a():
+        calls.append("a")
+        await release.wait()
+        return {"from": "a"}
+
+    async def fetch_b():
+        calls.append("b")
+        return {"from": "b"}
+
+    task_a = asyncio.create_task(replica_a.do("k", fetch_a, remote=True, lease_ms=1000, codec=JSON_CODEC))
+    await asyncio.sleep(0)
+    task_b = asyncio.create_task(replica_b.do("k", fetch_b, remote=True, lease_ms=1000, codec=JSON_CODEC))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await task_a == ({"from": "a"}, False)
+    assert await task_b == ({"from": "a"}, True)
+    assert calls == ["a"]
+    assert replica_b.stats()["remote_coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_capability_probe_storm_runs_one_probe(monkeypatch) -> None:
+    monkeypatch.setattr(singleflight, "_SINGLEFLIGHT", SingleFlight())
+    probes = 0
+
+    async def _probe_all(*, settings, correlation_id):
+        nonlocal probes
+        probes += 1
+        await asyncio.sleep(0.01)
+        return {"checked_at": "now", "capabilities": {}}
+
+    monkeypatch.setattr(capabilities, "_probe_all", _probe_all)
+    settings = SimpleNamespace(sis_base_url="http://sis", sis_capability_probe_concurrency=3, sis_singleflight_enabled=True, sis_singleflight_redis_enabled=False, sis_singleflight_lease_ms=3000)
+    reports = await asyncio.gather(
+        *[capabilities.probe_sis_capabilities(settings=settings, correlation_id=f"c{i}") for i in range(5)]
+    )
+    assert probes == 1
+    assert all(report == {"checked_at": "now", "capabilities": {}} for report in reports)
@@ -5,6 +5,17 @@ import pytest
 from app.tools.providers.sis_actions_gateway import run_sis_action, run_sis_request
 
 
+def _settings(**overrides) -> SimpleNamespace:
+    # No SIS_BASE_URL: the capability pre-check is skipped and the fake client answers directly.
+    values = {
+        "sis_base_url": "",
+        "sis_read_cache_enabled": False,
+        "sis_capability_push_invalidation_enabled": False,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
 @pytest.mark.asyncio
 async def test_gateway_parses_dict_warnings(monkeypatch) -> None:
     class _Client:
@@ -15,7 +26,7 @@ async def test_gateway_parses_dict_warnings(monkeypatch) -> None:
             return 200, {"warnings": [{"code": "FORCE_REQUIRED", "message": "Need force"}]}
 
     monkeypatch.setattr("app.tools.providers.sis_actions_gateway.SisActionsClient", _Client)
-    response = await run_sis_action(path="/x", payload={}, correlation_id="c1", settings=SimpleNamespace())
+    response = await run_sis_action(path="/x", payload={}, correlation_id="c1", settings=_settings())
     assert response.status == "ok"
     assert response.warnings[0].code == "FORCE_REQUIRED"
     assert response.warnings[0].message == "Need force"
@@ -31,7 +42,7 @@ async def test_gateway_parses_string_warnings(monkeypatch) -> None:
             return 200, {"warnings": ["legacy warning"]}
 
     monkeypatch.setattr("app.tools.providers.sis_actions_gateway.SisActionsClient", _Client)
-    response = await run_sis_action(path="/x", payload={}, correlation_id="c2", settings=SimpleNamespace())
+    response = await run_sis_action(path="/x", payload={}, correlation_id="c2", settings=_settings())
     assert response.status == "ok"
     assert response.warnings[0].code == "SIS_WARNING"
     assert response.warnings[0].message == "legacy warning"
@@ -53,7 +64,7 @@ async def test_gateway_parses_envelope_ok(monkeypatch) -> None:
             }
 
     monkeypatch.setattr("app.tools.providers.sis_actions_gateway.SisActionsClient", _Client)
-    response = await run_sis_request(method="GET", path="/fx/status", payload=None, correlation_id="c3", settings=SimpleNamespace())
+    response = await run_sis_request(method="GET", path="/fx/status", payload=None, correlation_id="c3", settings=_settings())
     assert response.status == "ok"
     assert response.data["value"] == 10
     assert response.data["correlation_id"] == "corr-1"
@@ -70,7 +81,37 @@ async def test_gateway_envelope_error_returns_tool_error(monkeypatch) -> None:
             return 200, {"ok": False, "error": {"message": "boom"}, "data": {}}
 
     monkeypatch.setattr("app.tools.providers.sis_actions_gateway.SisActionsClient", _Client)
-    response = await run_sis_request(method="POST", path="/fx/apply", payload={}, correlation_id="c4", settings=SimpleNamespace())
+    response = await run_sis_request(method="POST", path="/fx/apply", payload={}, correlation_id="c4", settings=_settings())
     assert response.status == "error"
     assert response.error is not None
     assert response.error.message == "boom"
+
+
+@pytest.mark.asyncio
+async def test_uncached_reads_bypass_the_read_cache(monkeypatch) -> None:
+    from app.upstream import read_cache
+
+    calls = 0
+
+    class _Client:
+        def __init__(self, settings):
+            self.settings = settings
+
+        async def get_action(self, path, correlation_id):
+            nonlocal calls
+            calls += 1
+            return 200, {"ok": True, "data": {"min_rate_delta_percent": calls}}
+
+    async def _no_redis():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr("app.tools.providers.sis_actions_gateway.SisActionsClient", _Client)
+    monkeypatch.setattr(read_cache, "_CACHE", read_cache.SisReadCache(lru_size=8))
+    monkeypatch.setattr(read_cache, "get_redis", _no_redis)
+    settings = _settings(sis_read_cache_enabled=True)
+
+    cached = [await run_sis_request(method="GET", path="/fx/status", payload=None, correlation_id=f"c{idx}", settings=settings) for idx in range(2)]
+    fresh = await run_sis_request(method="GET", path="/fx/status", payload=None, correlation_id="c3", settings=settings, use_cache=False)
+
+    assert [response.data["min_rate_delta_percent"] for response in cached] == [1, 1]
+    assert fresh.data["min_rate_delta_percent"] == 2
@@ -1,12 +1,20 @@
+import asyncio
+import json
+from datetime import timedelta
 from types import SimpleNamespace
 
 import pytest
 
+from app.actions import capabilities
 from app.actions.capabilities import (
+    CAPABILITY_PROBES,
     capability_support_status,
     get_sis_capabilities,
+    mark_capability_unsupported,
+    probe_sis_capabilities,
 )
 from app.core.redis import get_test_redis
+from app.core.time import utcnow
 from app.tools.providers.sis_actions_gateway import run_sis_action
 
 
@@ -36,7 +44,7 @@ async def test_probe_status_mapping(monkeypatch) -> None:
 
     monkeypatch.setattr("app.actions.capabilities.SisActionsClient", _Client)
 
-    settings = SimpleNamespace(upstream_mode="SIS_HTTP", sis_base_url="http://sis")
+    settings = SimpleNamespace(upstream_mode="SIS_HTTP", sis_base_url="http://sis", sis_capability_probe_concurrency=3, sis_singleflight_enabled=False, sis_capability_push_invalidation_enabled=True)
     report = await get_sis_capabilities(settings=settings, correlation_id="cap-1", force_refresh=True)
 
     assert capability_support_status(report, "prices_bump") is False
@@ -71,7 +79,7 @@ async def test_capabilities_cache_reuses_previous_probe(monkeypatch) -> None:
     monkeypatch.setattr("app.actions.capabilities.SisActionsClient", _Client)
     monkeypatch.setattr("app.actions.capabilities.get_redis", lambda: get_test_redis())
 
-    settings = SimpleNamespace(upstream_mode="SIS_HTTP", sis_base_url="http://sis")
+    settings = SimpleNamespace(upstream_mode="SIS_HTTP", sis_base_url="http://sis", sis_capability_probe_concurrency=3, sis_singleflight_enabled=False, sis_capability_push_invalidation_enabled=True)
     await get_sis_capabilities(settings=settings, correlation_id="cap-2", force_refresh=True)
     first = calls["count"]
     await get_sis_capabilities(settings=settings, correlation_id="cap-3", force_refresh=False)
@@ -97,7 +105,7 @@ async def test_gateway_blocks_unsupported_capability_without_calling_upstream(mo
     monkeypatch.setattr("app.tools.providers.sis_actions_gateway.get_sis_capabilities", _caps)
     monkeypatch.setattr("app.tools.providers.sis_actions_gateway.SisActionsClient", _Client)
 
-    settings = SimpleNamespace(upstream_mode="SIS_HTTP", sis_base_url="http://sis")
+    settings = SimpleNamespace(upstream_mode="SIS_HTTP", sis_base_url="http://sis", sis_capability_probe_concurrency=3, sis_singleflight_enabled=False, sis_capability_push_invalidation_enabled=True)
     response = await run_sis_action(
         path="/prices/bump/apply",
         payload={"actor_tg_id": 1},
@@ -108,3 +116,120 @@ async def test_gateway_blocks_unsupported_capability_without_calling_upstream(mo
     assert response.status == "error"
     assert response.error is not None
     assert response.error.code == "UPSTREAM_NOT_IMPLEMENTED"
+
+
+@pytest.mark.asyncio
+async def test_probes_run_concurrently_within_limit(monkeypatch) -> None:
+    await get_test_redis()
+    active = 0
+    peak = 0
+
+    class _Client:
+        def __init__(self, settings):
+            self.settings = settings
+
+        async def _call(self):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return 200, {}
+
+        async def get_action(self, path, correlation_id):
+            return await self._call()
+
+        async def post_action(self, path, payload, correlation_id, idempotency_key=None):
+            return await self._call()
+
+    monkeypatch.setattr("app.actions.capabilities.SisActionsClient", _Client)
+    settings = SimpleNamespace(sis_base_url="http://sis", sis_capability_probe_concurrency=3, sis_singleflight_enabled=False)
+    report = await probe_sis_capabilities(settings=settings, correlation_id="cap-5")
+
+    assert peak == 3
+    assert list(report["capabilities"]) == [probe.key for probe in CAPABILITY_PROBES]
+
+
+@pytest.mark.asyncio
+async def test_stale_report_is_served_and_refreshed_in_background(monkeypatch) -> None:
+    redis = await get_test_redis()
+    old = {"checked_at": (utcnow() - timedelta(hours=5, minutes=30)).isoformat(), "capabilities": {"fx": {"supported": True}}}
+    await redis.set("ownerbot:sis:capabilities:shop:default", json.dumps(old))
+    probed = asyncio.Event()
+
+    async def _probe(*, settings, correlation_id):
+        probed.set()
+        return {"checked_at": utcnow().isoformat(), "capabilities": {"fx": {"supported": False}}}
+
+    monkeypatch.setattr(capabilities, "probe_sis_capabilities", _probe)
+    settings = SimpleNamespace(sis_base_url="http://sis", sis_capability_probe_concurrency=3, sis_singleflight_enabled=False)
+
+    report = await get_sis_capabilities(settings=settings, correlation_id="cap-6")
+    assert capability_support_status(report, "fx") is True
+    await asyncio.wait_for(probed.wait(), timeout=1)
+    await asyncio.sleep(0)
+    refreshed = await get_sis_capabilities(settings=settings, correlation_id="cap-7")
+    assert capability_support_status(refreshed, "fx") is False
+
+
+@pytest.mark.asyncio
+async def test_bare_404_marks_capability_unsupported(monkeypatch) -> None:
+    redis = await get_test_redis()
+    fresh = {"checked_at": utcnow().isoformat(), "capabilities": {"discounts": {"supported": True, "method": "POST"}}}
+    await redis.set("ownerbot:sis:capabilities:shop:default", json.dumps(fresh))
+
+    async def _no_audit(*args, **kwargs):
+        return None
+
+    class _Client:
+        def __init__(self, settings):
+            self.settings = settings
+
+        async def post_action(self, path, payload, correlation_id, idempotency_key=None):
+            return 404, {"detail": "Not Found"}
+
+    monkeypatch.setattr("app.tools.providers.sis_actions_gateway.SisActionsClient", _Client)
+    monkeypatch.setattr(capabilities, "write_audit_event", _no_audit)
+    settings = SimpleNamespace(upstream_mode="SIS_HTTP", sis_base_url="http://sis", sis_capability_probe_concurrency=3, sis_singleflight_enabled=False, sis_capability_push_invalidation_enabled=True)
+
+    response = await run_sis_action(path="/discounts/set/apply", payload={}, correlation_id="cap-8", settings=settings)
+
+    assert response.error.code == "UPSTREAM_NOT_IMPLEMENTED"
+    report = await get_sis_capabilities(settings=settings, correlation_id="cap-9")
+    assert capability_support_status(report, "discounts") is False
+
+
+@pytest.mark.asyncio
+async def test_bare_404_outside_capability_endpoints_is_not_remapped(monkeypatch) -> None:
+    await get_test_redis()
+
+    class _Client:
+        def __init__(self, settings):
+            self.settings = settings
+
+        async def post_action(self, path, payload, correlation_id, idempotency_key=None):
+            return 404, {"detail": "Not Found"}
+
+    monkeypatch.setattr("app.tools.providers.sis_actions_gateway.SisActionsClient", _Client)
+    settings = SimpleNamespace(upstream_mode="SIS_HTTP", sis_base_url="http://sis", sis_capability_probe_concurrency=3, sis_singleflight_enabled=False, sis_capability_push_invalidation_enabled=True)
+
+    response = await run_sis_action(path="/orders/O-1/refund", payload={}, correlation_id="cap-10", settings=settings)
+
+    assert response.error.code == "UPSTREAM_UNAVAILABLE"
+
+
+@pytest.mark.asyncio
+async def test_push_invalidation_without_a_cached_report_leaves_checked_at_unset(monkeypatch) -> None:
+    redis = await get_test_redis()
+
+    async def _no_audit(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(capabilities, "write_audit_event", _no_audit)
+    await redis.set("ownerbot:sis:capabilities:shop:default", "")
+
+    await mark_capability_unsupported(key="fx", endpoint="/fx/reprice/apply", status_code=501)
+
+    report = json.loads(await redis.get("ownerbot:sis:capabilities:shop:default"))
+    assert "checked_at" not in report
+    assert report["capabilities"]["fx"]["supported"] is False
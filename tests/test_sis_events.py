@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import itertools
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.tasks import sis_events
+from app.core.tasks.notify_worker import NotifyWorker
+from app.core.tasks.sis_events import SisEventConsumer
+from app.notify.events import BROADCAST_CHANNEL, COUNTERS_KEY, GROUP_NAME, STREAM_KEY, publish_sis_event
+
+
+class FakeStreamRedis:
+    def __init__(self) -> None:
+        self.entries: list[tuple[str, dict[str, str]]] = []
+        self.delivered: dict[str, set[str]] = {}
+        self.acked: set[str] = set()
+        self.hashes: dict[str, dict[str, object]] = {}
+        self.groups: set[str] = set()
+        self.published: list[tuple[str, str]] = []
+        self._ids = itertools.count(1)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+    async def xadd(self, stream, fields, maxlen=None, approximate=True):
+        entry_id = f"{1_700_000_000_000 + next(self._ids)}-0"
+        self.entries.append((entry_id, dict(fields)))
+        return entry_id
+
+    async def xgroup_create(self, stream, group, id="$", mkstream=False):
+        if group in self.groups:
+            raise RuntimeError("BUSYGROUP Consumer Group name already exists")
+        self.groups.add(group)
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        (stream, start), = streams.items()
+        mine = self.delivered.setdefault(consumer, set())
+        if start == ">":
+            seen = set().union(*self.delivered.values())
+            batch = [(entry_id, fields) for entry_id, fields in self.entries if entry_id not in seen][:count]
+            mine.update(entry_id for entry_id, _ in batch)
+        else:
+            batch = [(entry_id, fields) for entry_id, fields in self.entries if entry_id in mine and entry_id not in self.acked]
+        return [(stream, batch)] if batch else []
+
+    async def xautoclaim(self, stream, group, consumer, min_idle_time, start_id="0-0", count=None):
+        return ["0-0", [], []]
+
+    async def xack(self, stream, group, *ids):
+        self.acked.update(ids)
+        return len(ids)
+
+    async def hincrby(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = int(bucket.get(field, 0)) + amount
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+
+@pytest.mark.asyncio
+async def test_a_burst_of_events_triggers_one_reaction_and_is_acked(monkeypatch) -> None:
+    redis = FakeStreamRedis()
+    monkeypatch.setattr(sis_events, "get_redis", AsyncMock(return_value=redis))
+    monkeypatch.setattr(sis_events, "invalidate_for_events", AsyncMock())
+    worker = SimpleNamespace(react_to_events=AsyncMock())
+    consumer = SisEventConsumer(worker, consumer_name="replica-a")
+
+    await publish_sis_event(redis, "order_stuck", {"order_id": "A-1"})
+    await publish_sis_event(redis, "stock_out", {"sku": "X"})
+    await publish_sis_event(redis, "fx_apply", {"result": "applied"})
+
+    assert await consumer.poll_once() == 3
+    worker.react_to_events.assert_awaited_once_with({"ops", "fx_apply"})
+    assert redis.acked == {entry_id for entry_id, _ in redis.entries}
+    assert redis.hashes[COUNTERS_KEY]["order_stuck"] == 1
+    assert GROUP_NAME in redis.groups
+    assert consumer.stats()["received"] == 3
+
+    # Nothing new: no reaction, the group is not recreated.
+    assert await consumer.poll_once() == 0
+    assert worker.react_to_events.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_pending_entries_are_replayed_after_a_restart(monkeypatch) -> None:
+    redis = FakeStreamRedis()
+    monkeypatch.setattr(sis_events, "get_redis", AsyncMock(return_value=redis))
+    monkeypatch.setattr(sis_events, "invalidate_for_events", AsyncMock())
+    await publish_sis_event(redis, "payment_failed", {"order_id": "B-2"})
+    # Delivered to this consumer before a crash, never acknowledged.
+    await redis.xgroup_create(STREAM_KEY, GROUP_NAME)
+    await redis.xreadgroup(GROUP_NAME, "replica-a", {STREAM_KEY: ">"}, count=10)
+
+    worker = SimpleNamespace(react_to_events=AsyncMock())
+    await SisEventConsumer(worker, consumer_name="replica-a").poll_once()
+
+    worker.react_to_events.assert_awaited_once_with({"ops"})
+    assert redis.acked == {redis.entries[0][0]}
+
+
+@pytest.mark.asyncio
+async def test_worker_reacts_for_owned_owners_and_rearms_the_rest(monkeypatch) -> None:
+    worker = NotifyWorker(bot=SimpleNamespace())
+    leases = SimpleNamespace(owns=lambda owner_id: owner_id == 1)
+    monkeypatch.setattr(worker, "_shard_leases", lambda: leases)
+    monkeypatch.setattr("app.core.tasks.notify_worker.get_settings", lambda: SimpleNamespace(owner_ids=[1, 2], notify_owner_concurrency=4, notify_owner_timeout_sec=120, notify_outbox_enabled=False))
+    react_owner = AsyncMock(return_value=None)
+    store_schedule = AsyncMock()
+    monkeypatch.setattr(worker, "_react_owner", react_owner)
+    monkeypatch.setattr(worker, "_store_schedule", store_schedule)
+
+    await worker.react_to_events({"ops"})
+
+    react_owner.assert_awaited_once_with(1, {"ops"})
+    (dues,), _ = store_schedule.await_args
+    assert list(dues) == [2]
+
+    # Reacting to another replica's broadcast: owner 2 was already marked due by that replica.
+    await worker.react_to_events({"ops"}, rearm_others=False)
+    assert store_schedule.await_count == 1
+    assert react_owner.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_other_replicas_invalidate_and_react_on_the_broadcast(monkeypatch) -> None:
+    redis = FakeStreamRedis()
+    invalidate = AsyncMock()
+    monkeypatch.setattr(sis_events, "get_redis", AsyncMock(return_value=redis))
+    monkeypatch.setattr(sis_events, "invalidate_for_events", invalidate)
+    consuming = SisEventConsumer(SimpleNamespace(react_to_events=AsyncMock()), consumer_name="replica-a")
+    other_worker = SimpleNamespace(react_to_events=AsyncMock())
+    other = SisEventConsumer(other_worker, consumer_name="replica-b")
+
+    await publish_sis_event(redis, "fx_apply", {"result": "applied"})
+    await consuming.poll_once()
+    (channel, message), = redis.published
+
+    await consuming.handle_broadcast(message)
+    await other.handle_broadcast(message)
+
+    assert channel == BROADCAST_CHANNEL
+    assert invalidate.await_count == 2
+    assert invalidate.await_args.kwargs["event_types"] == {"fx_apply"}
+    assert invalidate.await_args.kwargs["local_only"] is True
+    other_worker.react_to_events.assert_awaited_once_with({"fx_apply"}, rearm_others=False)
+    assert other.stats()["broadcasts_received"] == 1
+    assert consuming.stats()["broadcasts_received"] == 0
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.tools.contracts import ToolProvenance, ToolResponse
+from app.upstream import read_cache
+from app.upstream.read_cache import CachePolicy, SisReadCache, cache_key
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def env(monkeypatch):
+    redis = FakeRedis()
+    clock = Clock()
+
+    async def _get_redis():
+        return redis
+
+    monkeypatch.setattr(read_cache, "get_redis", _get_redis)
+    monkeypatch.setattr(read_cache, "time", clock)
+    return redis, clock
+
+
+def _fetcher(calls: list[str]):
+    async def fetch(correlation_id: str) -> ToolResponse:
+        calls.append(correlation_id)
+        return ToolResponse.ok(
+            correlation_id=correlation_id,
+            data={"version": len(calls)},
+            provenance=ToolProvenance(sources=["sis"], window={"scope": "snapshot", "type": "snapshot"}),
+        )
+
+    return fetch
+
+
+def test_cache_key_normalizes_params() -> None:
+    first = cache_key(base_url="http://sis/", method="get", path="/ownerbot/v1/orders/search", params={"q": " stuck ", "limit": 5, "x": None})
+    second = cache_key(base_url="http://sis", method="GET", path="/ownerbot/v1/orders/search", params={"limit": 5, "q": "stuck"})
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_fresh_hit_then_stale_while_revalidate(env) -> None:
+    redis, clock = env
+    cache = SisReadCache()
+    policy = CachePolicy(fresh_ttl_sec=30, stale_ttl_sec=60)
+    calls: list[str] = []
+    fetch = _fetcher(calls)
+
+    miss = await cache.get_or_fetch(key="k", policy=policy, correlation_id="c1", fetch=fetch)
+    assert miss.provenance.window["cache"] == "miss"
+
+    clock.now += 10
+    hit = await cache.get_or_fetch(key="k", policy=policy, correlation_id="c2", fetch=fetch)
+    assert hit.correlation_id == "c2"
+    assert hit.provenance.window["cache"] == "hit"
+    assert hit.provenance.window["cache_age_sec"] == 10
+    assert calls == ["c1"]
+
+    clock.now += 40
+    stale = await cache.get_or_fetch(key="k", policy=policy, correlation_id="c3", fetch=fetch)
+    assert stale.provenance.window["cache"] == "stale"
+    assert stale.data == {"version": 1}
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert calls == ["c1", "c3-swr"]
+
+    refreshed = await cache.get_or_fetch(key="k", policy=policy, correlation_id="c4", fetch=fetch)
+    assert refreshed.provenance.window["cache"] == "hit"
+    assert refreshed.data == {"version": 2}
+    assert cache.stats()["refreshes"] == 1
+    assert "k" in redis.store
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_shared_and_errors_not_cached(env) -> None:
+    _redis, _clock = env
+    calls: list[str] = []
+    fetch = _fetcher(calls)
+    policy = CachePolicy(fresh_ttl_sec=30, stale_ttl_sec=60)
+    await SisReadCache().get_or_fetch(key="k", policy=policy, correlation_id="c1", fetch=fetch)
+
+    other_replica = SisReadCache()
+    hit = await other_replica.get_or_fetch(key="k", policy=policy, correlation_id="c2", fetch=fetch)
+    assert hit.provenance.window["cache"] == "hit"
+    assert calls == ["c1"]
+
+    async def failing(correlation_id: str) -> ToolResponse:
+        return ToolResponse.fail(correlation_id=correlation_id, code="UPSTREAM_UNAVAILABLE", message="down")
+
+    for _ in range(2):
+        response = await other_replica.get_or_fetch(key="err", policy=policy, correlation_id="c3", fetch=failing)
+        assert response.status == "error"
+    assert other_replica.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_write_invalidates_fx_status(env, monkeypatch) -> None:
+    cache = SisReadCache()
+    monkeypatch.setattr(read_cache, "_CACHE", cache)
+    settings = SimpleNamespace(sis_read_cache_enabled=True, sis_base_url="http://sis")
+    calls: list[str] = []
+    fetch = _fetcher(calls)
+
+    await read_cache.cached_sis_read(settings=settings, path="/fx/status", params=None, correlation_id="c1", fetch=fetch)
+    await read_cache.cached_sis_read(settings=settings, path="/fx/status", params=None, correlation_id="c2", fetch=fetch)
+    assert calls == ["c1"]
+
+    await read_cache.invalidate_after_write(settings=settings, path="/fx/settings")
+    await read_cache.cached_sis_read(settings=settings, path="/fx/status", params=None, correlation_id="c3", fetch=fetch)
+    assert calls == ["c1", "c3"]
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.audit import derive_hot_columns
+from app.storage.models import Base, OwnerbotAuditEvent
+from app.tools.impl import sys_audit_recent, sys_last_errors
+
+
+def _event(correlation_id: str, event_type: str, payload: dict) -> OwnerbotAuditEvent:
+    return OwnerbotAuditEvent(
+        correlation_id=correlation_id,
+        event_type=event_type,
+        payload_json=json.dumps(payload),
+        **derive_hot_columns(event_type, payload),
+    )
+
+
+@pytest.mark.asyncio
+async def test_sys_last_errors_and_recent_use_typed_columns() -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with async_session() as session:
+        session.add_all(
+            [
+                _event("c1", "upstream_call_failed", {"tool": "kpi_snapshot", "error_code": "UPSTREAM_TIMEOUT"}),
+                _event("c2", "tool_call_finished", {"tool": "kpi_snapshot", "status": "ok", "latency_ms": 40}),
+                _event("c3", "tool_call_finished", {"tool": "orders_search", "status": "ok"}),
+            ]
+        )
+        await session.commit()
+
+        errors = await sys_last_errors.handle(sys_last_errors.Payload(), "corr", session)
+        assert errors.status == "ok"
+        assert [event["correlation_id"] for event in errors.data["events"]] == ["c1"]
+        assert errors.data["events"][0]["error_code"] == "UPSTREAM_TIMEOUT"
+
+        recent = await sys_audit_recent.handle(sys_audit_recent.Payload(tool="kpi_snapshot", severity="info"), "corr", session)
+        assert [event["correlation_id"] for event in recent.data["events"]] == ["c2"]
+        assert recent.data["events"][0]["latency_ms"] == 40
+        assert recent.provenance.filters_hash == "limit:20;severity:info;tool:kpi_snapshot"
+
+    await engine.dispose()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+from dataclasses import asdict
 from types import SimpleNamespace
 
 import pytest
@@ -7,6 +9,7 @@ import pytest
 from app.bot.ui.formatting import format_tool_response
 from app.core.redis import InMemoryRedis
 from app.tools.contracts import ToolProvenance, ToolResponse
+from app.upstream import health
 from app.upstream.mode_store import get_runtime_mode, set_runtime_mode
 from app.upstream.selector import choose_data_mode, resolve_effective_mode
 from app.upstream.sis_client import _parse_envelope
@@ -50,8 +53,11 @@ def test_sis_check_parses_envelope() -> None:
 @pytest.mark.asyncio
 async def test_auto_mode_falls_back_to_demo_on_ping_fail() -> None:
     redis = InMemoryRedis()
+    pings = 0
 
     async def ping_fail() -> ToolResponse:
+        nonlocal pings
+        pings += 1
         return ToolResponse.fail(correlation_id="c1", code="UPSTREAM_UNAVAILABLE", message="down")
 
     selected_mode, ping_response = await choose_data_mode(
@@ -62,8 +68,48 @@ async def test_auto_mode_falls_back_to_demo_on_ping_fail() -> None:
     )
 
     assert selected_mode == "DEMO"
-    assert ping_response is not None
-    assert ping_response.status == "error"
+    assert ping_response is None
+    await health._BOOTSTRAP
+
+    selected_mode, _ = await choose_data_mode(effective_mode="AUTO", redis=redis, correlation_id="c2", ping_callable=ping_fail)
+    assert selected_mode == "DEMO"
+    assert pings == 1
+    state = await health.read_upstream_health(redis)
+    assert state is not None and not state.available
+    assert state.last_error_code == "UPSTREAM_UNAVAILABLE"
+
+
+@pytest.mark.asyncio
+async def test_auto_mode_uses_monitor_state_without_pinging() -> None:
+    redis = InMemoryRedis()
+    await redis.set(health.HEALTH_KEY, json.dumps(asdict(health.UpstreamHealth(available=True, availability=0.9))))
+
+    async def ping_must_not_run() -> ToolResponse:
+        raise AssertionError("AUTO mode must not ping inline")
+
+    selected_mode, _ = await choose_data_mode(
+        effective_mode="AUTO",
+        redis=redis,
+        correlation_id="c1",
+        ping_callable=ping_must_not_run,
+    )
+    assert selected_mode == "SIS_HTTP"
+
+
+def test_health_ewma_hysteresis() -> None:
+    policy = health.HealthPolicy(alpha=0.3, down_below=0.4, up_above=0.8)
+    state = health.UpstreamHealth()
+
+    flips = [health.apply_sample(state, ok=False, latency_ms=0, error_code="X", policy=policy, now=1.0) for _ in range(3)]
+    assert flips == [False, False, True]
+    assert not state.available
+
+    # One good ping inside the hysteresis band does not bring SIS back.
+    assert health.apply_sample(state, ok=True, latency_ms=100, error_code=None, policy=policy, now=2.0) is False
+    assert not state.available
+    flips = [health.apply_sample(state, ok=True, latency_ms=100, error_code=None, policy=policy, now=3.0) for _ in range(3)]
+    assert flips[-1] is True
+    assert state.available and state.latency_ms == pytest.approx(100)
 
 
 def test_source_tag_in_response_formatter() -> None:
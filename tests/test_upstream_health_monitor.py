@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.tasks import upstream_health
+from app.tools.contracts import ToolResponse
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return False
+        self.store[key] = value
+        return True
+
+    async def get(self, key):
+        return self.store.get(key)
+
+
+@pytest.mark.asyncio
+async def test_monitor_pings_once_per_interval_and_audits_transitions(monkeypatch) -> None:
+    redis = FakeRedis()
+    events: list[str] = []
+    pings = 0
+
+    class DownSis:
+        def __init__(self, settings) -> None:
+            pass
+
+        async def ping(self, correlation_id):
+            nonlocal pings
+            pings += 1
+            return ToolResponse.fail(correlation_id=correlation_id, code="UPSTREAM_UNAVAILABLE", message="down")
+
+    async def _get_redis():
+        return redis
+
+    async def _audit(event_type, payload, correlation_id=None):
+        events.append(event_type)
+
+    settings = SimpleNamespace(
+        sis_base_url="http://sis",
+        upstream_health_interval_sec=10,
+        upstream_health_ewma_alpha=0.3,
+        upstream_health_down_below=0.4,
+        upstream_health_up_above=0.8,
+    )
+    monkeypatch.setattr(upstream_health, "get_settings", lambda: settings)
+    monkeypatch.setattr(upstream_health, "get_redis", _get_redis)
+    monkeypatch.setattr(upstream_health, "SisClient", DownSis)
+    monkeypatch.setattr(upstream_health, "write_audit_event", _audit)
+
+    monitor = upstream_health.UpstreamHealthMonitor()
+    state = await monitor.tick()
+    assert state is not None and not state.available
+    assert events == ["upstream_unavailable"]
+
+    # Another replica (or a fast loop) inside the same interval does not ping again.
+    assert await monitor.tick() is None
+    assert pings == 1